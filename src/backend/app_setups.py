@@ -0,0 +1,89 @@
+import os
+from typing import Mapping
+
+from backend.services.chat_repo.message_id_generator import (
+    MAX_NODE_ID,
+    NODE_ID_ENV_VAR,
+    node_id_from_env,
+)
+
+MULTI_NODE_ENV_VAR = "CHAT_MULTI_NODE"
+MESSAGE_TAIL_CACHE_ENV_VAR = "CHAT_MESSAGE_TAIL_CACHE"
+REPO_CACHE_ENV_VAR = "CHAT_REPO_CACHE"
+REPO_CACHE_TTL_ENV_VAR = "CHAT_REPO_CACHE_TTL_SEC"
+
+_TRUE_VALUES = ("1", "true", "yes", "on")
+_FALSE_VALUES = ("0", "false", "no", "off")
+
+
+def env_flag(environ: Mapping[str, str], name: str, default: bool) -> bool:
+    """
+    Read boolean flag from the environment variable. Raise ValueError if the value
+    is not recognized.
+    """
+    value = environ.get(name)
+    if value is None:
+        return default
+    if value.lower() in _TRUE_VALUES:
+        return True
+    if value.lower() in _FALSE_VALUES:
+        return False
+    raise ValueError(f"{name} should be a boolean flag, got {value!r}")
+
+
+def env_float(environ: Mapping[str, str], name: str) -> float | None:
+    """
+    Read non-negative number from the environment variable. Return None if it's not
+    set, raise ValueError if it's invalid.
+    """
+    value = environ.get(name)
+    if value is None:
+        return None
+    try:
+        number = float(value)
+    except ValueError:
+        raise ValueError(f"{name} should be a number, got {value!r}")
+    if number < 0:
+        raise ValueError(f"{name} should be non-negative, got {value!r}")
+    return number
+
+
+class AppConfig:
+    """
+    Application settings, read from the environment variables.
+    """
+
+    def __init__(self, environ: Mapping[str, str] = os.environ):
+        # Several processes (nodes) serve the same DB
+        self.MULTI_NODE = env_flag(environ, MULTI_NODE_ENV_VAR, False)
+        # Node id of the message id generator (see message_id_generator.py). Every
+        # node should have its own one, otherwise nodes generate the same ids
+        self.MESSAGE_ID_NODE_ID = node_id_from_env(environ)
+        # Message tail cache is process-local and only sees writes of this process,
+        # so it's single-process only
+        self.MESSAGE_TAIL_CACHE_ENABLED = env_flag(
+            environ, MESSAGE_TAIL_CACHE_ENV_VAR, not self.MULTI_NODE
+        )
+        # Cache of hot chat repository reads (CachingChatRepo). Entries expire, so
+        # the cache can be used by several nodes, staleness is limited by TTL
+        self.REPO_CACHE_ENABLED = env_flag(environ, REPO_CACHE_ENV_VAR, True)
+        # If set, overrides TTL of all cached repository methods
+        self.REPO_CACHE_TTL_SEC = env_float(environ, REPO_CACHE_TTL_ENV_VAR)
+
+    def check(self):
+        """
+        Check that settings are consistent. Should be called at startup.
+        """
+        if self.MULTI_NODE and (self.MESSAGE_ID_NODE_ID is None):
+            raise RuntimeError(
+                f"{NODE_ID_ENV_VAR} should be set to the unique id of the node (0..."
+                f"{MAX_NODE_ID}) when {MULTI_NODE_ENV_VAR} is enabled"
+            )
+        if self.MULTI_NODE and self.MESSAGE_TAIL_CACHE_ENABLED:
+            raise RuntimeError(
+                f"{MESSAGE_TAIL_CACHE_ENV_VAR} can't be enabled together with "
+                f"{MULTI_NODE_ENV_VAR}: the cache isn't invalidated by other nodes"
+            )
+
+
+app_config = AppConfig()
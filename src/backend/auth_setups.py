@@ -26,6 +26,10 @@ class AuthConfig:
     ALGORITHM = "HS256"
     ACCESS_TOKEN_EXPIRE_TIMEDELTA = timedelta(minutes=2)
     PWD_HASH_ROUNDS = 8
+    PWD_HASH_MAX_WORKERS = 2
+    # Max number of hashing operations waiting for a worker. Requests above the limit
+    # are rejected (HTTP 503)
+    PWD_HASH_QUEUE_SIZE = 32
     REFRESH_TOKEN_EXPIRE_TIMEDELTA = timedelta(minutes=60 * 24 * 2)
 
     JWT_AUD = "ws-chat"
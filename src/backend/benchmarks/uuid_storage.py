@@ -0,0 +1,103 @@
+"""
+Compares storage of chat_id as 32-char hex string (previous storage format) and as
+16-byte blob (BinaryUUID) in `chat_messages`-like SQLite table.
+
+Reports the size of the `chat_id` index and the time of range scans that are used
+to load chat history (last N messages of the chat).
+
+Usage:
+    python -m backend.benchmarks.uuid_storage --messages 10000000 --chats 10000
+"""
+
+import argparse
+import os
+import random
+import sqlite3
+import tempfile
+import time
+import uuid
+from typing import Callable
+
+INSERT_BATCH_SIZE = 100_000
+
+
+def _create_table(
+    conn: sqlite3.Connection,
+    column_type: str,
+    chat_ids: list[uuid.UUID],
+    messages: int,
+    encode: Callable[[uuid.UUID], str | bytes],
+):
+    conn.execute(
+        "CREATE TABLE chat_messages ("
+        "id INTEGER PRIMARY KEY, "
+        f"chat_id {column_type} NOT NULL, "
+        "text VARCHAR NOT NULL)"
+    )
+    encoded_ids = [encode(chat_id) for chat_id in chat_ids]
+    rnd = random.Random(0)
+    for start in range(0, messages, INSERT_BATCH_SIZE):
+        count = min(INSERT_BATCH_SIZE, messages - start)
+        conn.executemany(
+            "INSERT INTO chat_messages (chat_id, text) VALUES (?, 'message')",
+            ((rnd.choice(encoded_ids),) for _ in range(count)),
+        )
+    conn.execute("CREATE INDEX ix_chat_messages_chat_id ON chat_messages (chat_id)")
+    conn.commit()
+
+
+def _index_size(conn: sqlite3.Connection) -> int:
+    return conn.execute(
+        "SELECT SUM(pgsize) FROM dbstat WHERE name = 'ix_chat_messages_chat_id'"
+    ).fetchone()[0]
+
+
+def _range_scan_time(
+    conn: sqlite3.Connection,
+    chat_ids: list[uuid.UUID],
+    encode: Callable[[uuid.UUID], str | bytes],
+    queries: int,
+    page_size: int,
+) -> float:
+    rnd = random.Random(1)
+    params = [(encode(rnd.choice(chat_ids)), page_size) for _ in range(queries)]
+    start = time.perf_counter()
+    for param in params:
+        conn.execute(
+            "SELECT id FROM chat_messages WHERE chat_id = ? "
+            "ORDER BY id DESC LIMIT ?",
+            param,
+        ).fetchall()
+    return time.perf_counter() - start
+
+
+def run(messages: int, chats: int, queries: int, page_size: int):
+    chat_ids = [uuid.uuid4() for _ in range(chats)]
+    variants: dict[str, tuple[str, Callable[[uuid.UUID], str | bytes]]] = {
+        "hex string": ("CHAR(32)", lambda chat_id: chat_id.hex),
+        "binary": ("BINARY(16)", lambda chat_id: chat_id.bytes),
+    }
+    print(f"{messages} messages in {chats} chats")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for name, (column_type, encode) in variants.items():
+            db_path = os.path.join(tmp_dir, f"{column_type}.sqlite")
+            conn = sqlite3.connect(db_path)
+            _create_table(conn, column_type, chat_ids, messages, encode)
+            index_size = _index_size(conn)
+            scan_time = _range_scan_time(conn, chat_ids, encode, queries, page_size)
+            conn.close()
+            print(
+                f"{name:>10}: index size {index_size / 2**20:9.1f} MiB, "
+                f"db size {os.path.getsize(db_path) / 2**20:9.1f} MiB, "
+                f"{queries} range scans (LIMIT {page_size}) {scan_time:.3f} s"
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--messages", type=int, default=10_000_000)
+    parser.add_argument("--chats", type=int, default=10_000)
+    parser.add_argument("--queries", type=int, default=10_000)
+    parser.add_argument("--page-size", type=int, default=50)
+    args = parser.parse_args()
+    run(args.messages, args.chats, args.queries, args.page_size)
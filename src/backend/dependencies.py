@@ -1,25 +1,200 @@
 from typing import Annotated, AsyncGenerator
 
-from fastapi import Depends, HTTPException, WebSocket
+from fastapi import Depends, HTTPException, WebSocket, WebSocketException, status
 from fastapi.requests import HTTPConnection
 from fastapi.security import SecurityScopes
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
+from backend.app_setups import app_config
 from backend.auth_setups import auth_config
 from backend.database import async_session_maker
 from backend.schemas.user import UserSchema
 from backend.services.auth.abstract_auth import AbstractAuth
+from backend.services.auth.auth_cache import AuthCache
 from backend.services.auth.auth_exc import (
     AuthBadRequestParametersError,
     AuthBadTokenError,
     AuthUnauthorizedError,
 )
 from backend.services.auth.internal_sqla_auth import InternalSQLAAuth
-from backend.services.chat_manager.chat_manager import ChatManager
+from backend.services.auth.password_hasher import password_hasher
+from backend.services.cache.single_flight import SingleFlight
+from backend.services.chat_manager.chat_manager import (
+    ChatManager,
+    TypingThrottle,
+    new_typing_throttle,
+)
+from backend.services.chat_manager.membership_cache import ChatMembershipCache
+from backend.services.chat_manager.message_tail_cache import MessageTailCache
+from backend.services.chat_manager.side_effect_executor import SideEffectExecutor
+from backend.services.chat_repo.caching_chat_repo import ChatRepoCache
 from backend.services.event_broker.abstract_event_broker import AbstractEventBroker
 from backend.services.event_broker.in_memory_event_broker import InMemoryEventBroker
+from backend.services.load_shedder.load_shedder import LoadShedder
+from backend.services.metrics.metrics import MetricsRegistry, metrics_registry
+from backend.services.outbox.outbox_dispatcher import OutboxDispatcher
+from backend.services.presence.presence_service import PresenceService
+from backend.services.rate_limiter.rate_limiter import RateLimiter
+from backend.services.read_tracker.read_tracker import ReadTracker
 from backend.services.uow.abstract_uow import AbstractUnitOfWork
 from backend.services.uow.sqla_uow import SQLAlchemyUnitOfWork
+from backend.services.user_index.user_name_index import UserNameIndex
+
+user_name_index = UserNameIndex()
+chat_membership_cache = ChatMembershipCache()
+message_tail_cache = (
+    MessageTailCache() if app_config.MESSAGE_TAIL_CACHE_ENABLED else None
+)
+auth_cache = AuthCache()
+chat_repo_cache = (
+    ChatRepoCache(ttl=app_config.REPO_CACHE_TTL_SEC)
+    if app_config.REPO_CACHE_ENABLED
+    else None
+)
+single_flight = SingleFlight()
+typing_throttle = new_typing_throttle()
+rate_limiter = RateLimiter()
+load_shedder = LoadShedder(queue_depth=InMemoryEventBroker().queue_depth)
+outbox_dispatcher = OutboxDispatcher(
+    uow=SQLAlchemyUnitOfWork(session_maker=async_session_maker),
+    event_broker=InMemoryEventBroker(),
+)
+presence_service = PresenceService(
+    uow=SQLAlchemyUnitOfWork(
+        session_maker=async_session_maker, repo_cache=chat_repo_cache
+    ),
+    event_broker=InMemoryEventBroker(),
+)
+read_tracker = ReadTracker(
+    uow=SQLAlchemyUnitOfWork(session_maker=async_session_maker),
+    event_broker=InMemoryEventBroker(),
+    outbox_dispatcher=outbox_dispatcher,
+)
+
+
+def _register_repo_cache_metrics(registry: MetricsRegistry, cache: ChatRepoCache):
+    registry.collector(
+        "chat_repo_cache_hits_total",
+        "Number of chat repository reads served from the cache",
+        "counter",
+        lambda: {(method,): stats.hits for method, stats in cache.stats().items()},
+        labelnames=("method",),
+    )
+    registry.collector(
+        "chat_repo_cache_misses_total",
+        "Number of chat repository reads not found in the cache",
+        "counter",
+        lambda: {(method,): stats.misses for method, stats in cache.stats().items()},
+        labelnames=("method",),
+    )
+    registry.collector(
+        "chat_repo_cache_size",
+        "Number of entries in the chat repository cache",
+        "gauge",
+        lambda: {(method,): stats.size for method, stats in cache.stats().items()},
+        labelnames=("method",),
+    )
+
+
+def _register_metrics(registry: MetricsRegistry):
+    event_broker = InMemoryEventBroker()
+    registry.collector(
+        "chat_ws_sessions",
+        "Number of active websocket sessions",
+        "gauge",
+        lambda: load_shedder.sessions,
+    )
+    registry.collector(
+        "chat_ws_requests_in_flight",
+        "Number of client requests in progress",
+        "gauge",
+        lambda: load_shedder.in_flight,
+    )
+    registry.collector(
+        "chat_ws_rejected_sessions_total",
+        "Number of websocket sessions rejected by the sessions limit",
+        "counter",
+        lambda: load_shedder.rejected_sessions,
+    )
+    registry.collector(
+        "chat_ws_shed_requests_total",
+        "Number of client requests rejected because of overload",
+        "counter",
+        lambda: load_shedder.shed_requests,
+    )
+    registry.collector(
+        "chat_ws_throttled_requests_total",
+        "Number of client requests rejected by rate limits",
+        "counter",
+        lambda: {
+            (packet_type, scope): count
+            for scope, counter in (
+                ("connection", rate_limiter.throttled_connection),
+                ("user", rate_limiter.throttled_user),
+            )
+            for packet_type, count in counter.items()
+        },
+        labelnames=("packet_type", "scope"),
+    )
+    if chat_repo_cache is not None:
+        _register_repo_cache_metrics(registry, chat_repo_cache)
+    registry.collector(
+        "chat_password_hasher_queued",
+        "Number of password hashing operations waiting for a worker",
+        "gauge",
+        lambda: password_hasher.stats().queued,
+    )
+    registry.collector(
+        "chat_password_hasher_running",
+        "Number of password hashing operations in progress",
+        "gauge",
+        lambda: password_hasher.stats().running,
+    )
+    registry.collector(
+        "chat_password_hasher_rejected_total",
+        "Number of password hashing operations rejected because the queue was full",
+        "counter",
+        lambda: password_hasher.stats().rejected,
+    )
+    registry.collector(
+        "chat_side_effects_overflowed_total",
+        "Number of side effects executed inline because executor's queue was full",
+        "counter",
+        lambda: SideEffectExecutor.overflowed_total,
+    )
+    registry.collector(
+        "chat_side_effects_discarded_total",
+        "Number of pending side effects discarded when sessions were closed",
+        "counter",
+        lambda: SideEffectExecutor.discarded_total,
+    )
+    registry.collector(
+        "chat_side_effects_errors_total",
+        "Number of failed side effects",
+        "counter",
+        lambda: SideEffectExecutor.errors_total,
+    )
+    registry.collector(
+        "chat_broker_queue_depth",
+        "Total number of events queued for sessions",
+        "gauge",
+        event_broker.queue_depth,
+    )
+    registry.collector(
+        "chat_broker_max_user_queue_depth",
+        "The largest number of events queued for one session",
+        "gauge",
+        lambda: max(event_broker.user_queue_depths() or [0]),
+    )
+    registry.collector(
+        "chat_broker_unacknowledged_events",
+        "Number of events sent to sessions and not acknowledged yet",
+        "gauge",
+        lambda: AbstractEventBroker.unacknowledged_events_total,
+    )
+
+
+_register_metrics(metrics_registry)
 
 
 async def sqla_sessionmaker_dep():
@@ -33,16 +208,110 @@ async def sqla_session_dep(
         yield session
 
 
+async def chat_repo_cache_dep() -> ChatRepoCache | None:
+    return chat_repo_cache
+
+
 async def uow_dep(
-    session_maker: Annotated[async_sessionmaker, Depends(sqla_sessionmaker_dep)]
+    session_maker: Annotated[async_sessionmaker, Depends(sqla_sessionmaker_dep)],
+    repo_cache: Annotated[ChatRepoCache | None, Depends(chat_repo_cache_dep)],
 ) -> AbstractUnitOfWork:
-    return SQLAlchemyUnitOfWork(session_maker=session_maker)
+    return SQLAlchemyUnitOfWork(session_maker=session_maker, repo_cache=repo_cache)
+
+
+async def user_name_index_dep() -> UserNameIndex:
+    return user_name_index
+
+
+async def chat_membership_cache_dep() -> ChatMembershipCache:
+    return chat_membership_cache
+
+
+async def message_tail_cache_dep() -> MessageTailCache | None:
+    return message_tail_cache
+
+
+async def auth_cache_dep() -> AuthCache:
+    return auth_cache
+
+
+async def single_flight_dep() -> SingleFlight:
+    return single_flight
+
+
+async def typing_throttle_dep() -> TypingThrottle:
+    return typing_throttle
+
+
+async def rate_limiter_dep() -> RateLimiter:
+    return rate_limiter
+
+
+async def metrics_registry_dep() -> MetricsRegistry:
+    return metrics_registry
+
+
+async def load_shedder_dep() -> LoadShedder:
+    return load_shedder
+
+
+async def ws_session_slot_dep(
+    load_shedder: Annotated[LoadShedder, Depends(load_shedder_dep)],
+) -> AsyncGenerator[None, None]:
+    """
+    Reserve the slot for the websocket session. Sessions above the limit are
+    rejected before authentication and other expensive dependencies.
+    """
+    if not load_shedder.open_session():
+        raise WebSocketException(
+            code=status.WS_1013_TRY_AGAIN_LATER, reason="Too many sessions"
+        )
+    try:
+        yield
+    finally:
+        load_shedder.close_session()
+
+
+async def outbox_dispatcher_dep() -> OutboxDispatcher | None:
+    """
+    Outbox is used only if the dispatcher is running (it's started on app startup).
+    """
+    if outbox_dispatcher.is_running:
+        return outbox_dispatcher
+    return None
+
+
+async def presence_service_dep() -> PresenceService | None:
+    """
+    Presence is tracked only if the service is running (it's started on app startup).
+    """
+    if presence_service.is_running:
+        return presence_service
+    return None
+
+
+async def read_tracker_dep() -> ReadTracker | None:
+    """
+    Read marks are buffered only if the tracker is running (it's started on app
+    startup).
+    """
+    if read_tracker.is_running:
+        return read_tracker
+    return None
 
 
 async def get_auth_service(
     session_maker: Annotated[async_sessionmaker, Depends(sqla_sessionmaker_dep)],
+    user_name_index: Annotated[UserNameIndex, Depends(user_name_index_dep)],
+    auth_cache: Annotated[AuthCache, Depends(auth_cache_dep)],
+    single_flight: Annotated[SingleFlight, Depends(single_flight_dep)],
 ) -> AbstractAuth:
-    return InternalSQLAAuth(session_maker=session_maker)
+    return InternalSQLAAuth(
+        session_maker=session_maker,
+        user_name_index=user_name_index,
+        auth_cache=auth_cache,
+        single_flight=single_flight,
+    )
 
 
 async def get_current_user(
@@ -69,15 +338,49 @@ async def get_current_user(
 
 
 async def event_broker_dep(
-    current_user: Annotated[UserSchema, Depends(get_current_user)]
+    current_user: Annotated[UserSchema, Depends(get_current_user)],
+    presence_service: Annotated[PresenceService | None, Depends(presence_service_dep)],
 ) -> AsyncGenerator[AbstractEventBroker, None]:
     event_broker = InMemoryEventBroker()
     async with event_broker.session(current_user.id):
-        yield event_broker
+        if presence_service is None:
+            yield event_broker
+        else:
+            async with presence_service.session(current_user.id):
+                yield event_broker
 
 
 async def chat_manager_dep(
     uow: Annotated[AbstractUnitOfWork, Depends(uow_dep)],
+    side_effects_uow: Annotated[AbstractUnitOfWork, Depends(uow_dep, use_cache=False)],
     event_broker: Annotated[AbstractEventBroker, Depends(event_broker_dep)],
-) -> ChatManager:
-    return ChatManager(uow=uow, event_broker=event_broker)
+    user_name_index: Annotated[UserNameIndex, Depends(user_name_index_dep)],
+    membership_cache: Annotated[
+        ChatMembershipCache, Depends(chat_membership_cache_dep)
+    ],
+    message_cache: Annotated[MessageTailCache | None, Depends(message_tail_cache_dep)],
+    single_flight: Annotated[SingleFlight, Depends(single_flight_dep)],
+    typing_throttle: Annotated[TypingThrottle, Depends(typing_throttle_dep)],
+    outbox_dispatcher: Annotated[
+        OutboxDispatcher | None, Depends(outbox_dispatcher_dep)
+    ],
+    presence_service: Annotated[PresenceService | None, Depends(presence_service_dep)],
+    read_tracker: Annotated[ReadTracker | None, Depends(read_tracker_dep)],
+) -> AsyncGenerator[ChatManager, None]:
+    side_effect_executor = SideEffectExecutor(uow=side_effects_uow)
+    try:
+        yield ChatManager(
+            uow=uow,
+            event_broker=event_broker,
+            user_name_index=user_name_index,
+            membership_cache=membership_cache,
+            message_cache=message_cache,
+            single_flight=single_flight,
+            side_effect_executor=side_effect_executor,
+            outbox_dispatcher=outbox_dispatcher,
+            presence_service=presence_service,
+            read_tracker=read_tracker,
+            typing_throttle=typing_throttle,
+        )
+    finally:
+        await side_effect_executor.close()
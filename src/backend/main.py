@@ -1,37 +1,52 @@
+import asyncio
 import uuid
 from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
-from backend.auth_setups import auth_config
+from backend.app_setups import app_config
 from backend.database import engine
-from backend.dependencies import sqla_sessionmaker_dep
+from backend.dependencies import (
+    outbox_dispatcher,
+    presence_service,
+    read_tracker,
+    sqla_sessionmaker_dep,
+    user_name_index_dep,
+)
 from backend.models.base import BaseModel
 from backend.models.chat import Chat
 from backend.models.user import User
 from backend.models.user_chat_link import UserChatLink
 from backend.routers.auth import auth_router
+from backend.routers.metrics import metrics_router
 from backend.routers.ws_chat import ws_chat_router
+from backend.services.auth.password_hasher import password_hasher
+from backend.services.uow.sqla_uow import SQLAlchemyUnitOfWork
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
 
+    app_config.check()
+
     # Create DB tables and fill by test data
     async with engine.begin() as conn:
         await conn.run_sync(BaseModel.metadata.create_all)
     sessionmaker = await sqla_sessionmaker_dep()
+    hashed_passwords = await asyncio.gather(
+        password_hasher.hash("123"), password_hasher.hash("123")
+    )
     async with sessionmaker() as session:
         user_1 = User(
             id=uuid.UUID("ef376e46-db3b-4beb-8170-82940d849847"),
             name="John",
-            hashed_password=auth_config.pwd_context.hash("123"),
+            hashed_password=hashed_passwords[0],
         )
         user_2 = User(
             id=uuid.UUID("ef376e56-db3b-4beb-8170-82940d849847"),
             name="Joe",
-            hashed_password=auth_config.pwd_context.hash("123"),
+            hashed_password=hashed_passwords[1],
         )
         chats = [
             Chat(id=uuid.uuid4(), title=f"Chat {i}", owner_id=user_1.id)
@@ -53,8 +68,28 @@ async def lifespan(app: FastAPI):
         session.add_all((user_1, user_2, *chats, *user_chat_links))
         await session.commit()
 
+    # Build the index of user names for autocomplete
+    uow = SQLAlchemyUnitOfWork(session_maker=sessionmaker)
+    async with uow:
+        users = await uow.chat_repo.get_user_list()
+    user_name_index = await user_name_index_dep()
+    user_name_index.build(users)
+
+    # Start dispatching events from the outbox to the Event broker
+    outbox_dispatcher.start()
+
+    # Start publishing users' presence changes
+    presence_service.start()
+
+    # Start flushing buffered read marks
+    read_tracker.start()
+
     yield
 
+    await read_tracker.stop()
+    await presence_service.stop()
+    await outbox_dispatcher.stop()
+
 
 app = FastAPI(title="FastAPI websocket chat", version="0.0.1", lifespan=lifespan)
 
@@ -73,3 +108,4 @@ app.add_middleware(
 
 app.include_router(ws_chat_router)
 app.include_router(auth_router)
+app.include_router(metrics_router)
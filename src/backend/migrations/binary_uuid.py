@@ -0,0 +1,64 @@
+"""
+Converts UUID values stored as hex strings (SQLAlchemy's `Uuid` type on SQLite) into
+16-byte binary values (BinaryUUID type).
+
+The migration is idempotent: only values that are still stored as text are
+converted, so it can be resumed after interruption.
+
+Usage:
+    async with engine.begin() as conn:
+        await migrate_uuid_columns_to_binary(conn)
+"""
+
+import uuid
+
+from sqlalchemy import Connection
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+import backend.models.chat  # noqa: F401
+import backend.models.outbox_event  # noqa: F401
+import backend.models.user_chat_state  # noqa: F401
+from backend.models.base import BaseModel
+from backend.models.types import BinaryUUID
+
+DEFAULT_BATCH_SIZE = 10_000
+
+
+def get_binary_uuid_columns() -> list[tuple[str, str]]:
+    """
+    Return list of (table name, column name) of all BinaryUUID columns.
+    """
+    return [
+        (table.name, column.name)
+        for table in BaseModel.metadata.sorted_tables
+        for column in table.columns
+        if isinstance(column.type, BinaryUUID)
+    ]
+
+
+async def migrate_uuid_columns_to_binary(
+    connection: AsyncConnection, batch_size: int = DEFAULT_BATCH_SIZE
+) -> int:
+    """
+    Convert text UUID values of all BinaryUUID columns into binary.
+    Return the number of converted values.
+    """
+    return await connection.run_sync(_migrate, batch_size)
+
+
+def _migrate(connection: Connection, batch_size: int) -> int:
+    converted = 0
+    for table_name, column_name in get_binary_uuid_columns():
+        while True:
+            rows = connection.exec_driver_sql(
+                f"SELECT rowid, {column_name} FROM {table_name} "
+                f"WHERE typeof({column_name}) = 'text' LIMIT {batch_size}"
+            ).all()
+            if not rows:
+                break
+            connection.exec_driver_sql(
+                f"UPDATE {table_name} SET {column_name} = ? WHERE rowid = ?",
+                [(uuid.UUID(value).bytes, rowid) for rowid, value in rows],
+            )
+            converted += len(rows)
+    return converted
@@ -1,5 +1,10 @@
+import uuid
+from typing import Any
+
 from sqlalchemy.orm import DeclarativeBase
 
+from .types import BinaryUUID
+
 
 class BaseModel(DeclarativeBase):
-    pass
+    type_annotation_map: dict[Any, Any] = {uuid.UUID: BinaryUUID}
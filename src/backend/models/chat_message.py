@@ -1,8 +1,19 @@
 import uuid
 from datetime import datetime
 
-from sqlalchemy import DateTime, ForeignKey, func
+from sqlalchemy import (
+    DDL,
+    BigInteger,
+    DateTime,
+    Float,
+    ForeignKey,
+    Integer,
+    String,
+    event,
+    func,
+)
 from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy.sql import column, table
 
 from .base import BaseModel
 
@@ -14,7 +25,10 @@ class ChatMessage(BaseModel):
         "polymorphic_identity": None,
     }
 
-    id: Mapped[int] = mapped_column(primary_key=True)
+    # Ids are generated by the application (MessageIdGenerator)
+    id: Mapped[int] = mapped_column(
+        BigInteger().with_variant(Integer, "sqlite"), primary_key=True
+    )
     is_notification: Mapped[bool]
     chat_id: Mapped[uuid.UUID] = mapped_column(index=True)
     text: Mapped[str]
@@ -53,3 +67,44 @@ class ChatNotification(ChatMessage):
         self.chat_id = chat_id
         self.text = text
         self.params = params
+
+
+# Full-text search index for user messages (SQLite FTS5).
+# External content table: only the index is stored, the text is read from
+# `chat_messages`. Index is maintained incrementally by triggers, so it stays in sync
+# whichever way messages are inserted or edited.
+
+chat_messages_fts = table(
+    "chat_messages_fts",
+    column("rowid", Integer),
+    column("text", String),
+    column("rank", Float),
+)
+
+_CHAT_MESSAGES_FTS_DDL = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS chat_messages_fts USING fts5("
+    "text, content='chat_messages', content_rowid='id')",
+    "CREATE TRIGGER IF NOT EXISTS chat_messages_fts_ai AFTER INSERT ON chat_messages "
+    "WHEN new.is_notification = 0 BEGIN "
+    "INSERT INTO chat_messages_fts(rowid, text) VALUES (new.id, new.text); "
+    "END",
+    "CREATE TRIGGER IF NOT EXISTS chat_messages_fts_au AFTER UPDATE OF text "
+    "ON chat_messages WHEN old.is_notification = 0 BEGIN "
+    "INSERT INTO chat_messages_fts(chat_messages_fts, rowid, text) "
+    "VALUES ('delete', old.id, old.text); "
+    "INSERT INTO chat_messages_fts(rowid, text) VALUES (new.id, new.text); "
+    "END",
+    "CREATE TRIGGER IF NOT EXISTS chat_messages_fts_ad AFTER DELETE ON chat_messages "
+    "WHEN old.is_notification = 0 BEGIN "
+    "INSERT INTO chat_messages_fts(chat_messages_fts, rowid, text) "
+    "VALUES ('delete', old.id, old.text); "
+    "END",
+)
+
+for _ddl in _CHAT_MESSAGES_FTS_DDL:
+    event.listen(ChatMessage.__table__, "after_create", DDL(_ddl))
+event.listen(
+    ChatMessage.__table__,
+    "before_drop",
+    DDL("DROP TABLE IF EXISTS chat_messages_fts"),
+)
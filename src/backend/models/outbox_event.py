@@ -0,0 +1,24 @@
+from sqlalchemy.orm import Mapped, mapped_column
+
+from .base import BaseModel
+
+
+class OutboxEvent(BaseModel):
+    __tablename__ = "outbox_events"
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    channel: Mapped[str]
+    event: Mapped[str]  # JSON representation of the event
+
+
+class OutboxLease(BaseModel):
+    """
+    Lease of the outbox: only the dispatcher that holds the lease drains the outbox.
+    """
+
+    __tablename__ = "outbox_lease"
+
+    name: Mapped[str] = mapped_column(primary_key=True)
+    owner: Mapped[str]
+    # Time when the lease expires (seconds since the epoch)
+    expires_at: Mapped[float]
@@ -0,0 +1,40 @@
+import uuid
+from typing import Any
+
+from sqlalchemy import BINARY, Dialect
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.types import TypeDecorator, TypeEngine
+
+
+class BinaryUUID(TypeDecorator[uuid.UUID]):
+    """
+    UUID stored as 16 raw bytes (instead of 32-char hex string that SQLAlchemy's
+    `Uuid` type uses for databases without native UUID type).
+    Uses native UUID type on PostgreSQL.
+    Byte order is the same as the order of hex strings, so ordering by the column
+    doesn't change.
+    """
+
+    impl = BINARY(16)
+    cache_ok = True
+
+    def load_dialect_impl(self, dialect: Dialect) -> TypeEngine[Any]:
+        if dialect.name == "postgresql":
+            return dialect.type_descriptor(postgresql.UUID(as_uuid=True))
+        return dialect.type_descriptor(BINARY(16))
+
+    def process_bind_param(
+        self, value: uuid.UUID | str | None, dialect: Dialect
+    ) -> Any:
+        if value is None:
+            return None
+        if not isinstance(value, uuid.UUID):
+            value = uuid.UUID(value)
+        if dialect.name == "postgresql":
+            return value
+        return value.bytes
+
+    def process_result_value(self, value: Any, dialect: Dialect) -> uuid.UUID | None:
+        if value is None or isinstance(value, uuid.UUID):
+            return value
+        return uuid.UUID(bytes=value)
@@ -0,0 +1,30 @@
+import uuid
+
+from sqlalchemy.orm import Mapped, mapped_column
+
+from .base import BaseModel
+
+
+class PresenceSession(BaseModel):
+    """
+    User's sessions on one node (process). The row exists while the node has at
+    least one session of the user.
+    """
+
+    __tablename__ = "presence_sessions"
+
+    user_id: Mapped[uuid.UUID] = mapped_column(primary_key=True)
+    node_id: Mapped[str] = mapped_column(primary_key=True)
+    # Time of the last heartbeat (seconds since the epoch)
+    last_heartbeat: Mapped[float]
+
+
+class UserPresence(BaseModel):
+    """
+    Published online status of the user.
+    """
+
+    __tablename__ = "user_presence"
+
+    user_id: Mapped[uuid.UUID] = mapped_column(primary_key=True)
+    is_online: Mapped[bool] = mapped_column(default=False)
@@ -11,9 +11,13 @@ from backend.schemas.user import UserCreateSchema, UserSchema
 from backend.services.auth.abstract_auth import AbstractAuth
 from backend.services.auth.auth_exc import (
     AuthBadRequestParametersError,
+    AuthServiceBusyError,
     AuthUnauthorizedError,
 )
 
+# Seconds to wait before retrying the request rejected because of overload
+BUSY_RETRY_AFTER_SEC = 1
+
 auth_router = APIRouter(prefix=auth_config.AUTH_ROUTER_PATH)
 
 
@@ -26,6 +30,12 @@ async def register(
         return await auth_service.register_user(user_data=user_data)
     except AuthBadRequestParametersError as exc:
         raise HTTPException(status_code=400, detail=f"{exc}: {exc.detail}")
+    except AuthServiceBusyError as exc:
+        raise HTTPException(
+            status_code=503,
+            detail=exc.detail,
+            headers={"Retry-After": str(BUSY_RETRY_AFTER_SEC)},
+        )
 
 
 @auth_router.post(auth_config.TOKEN_PATH_WITH_PWD)
@@ -41,6 +51,12 @@ async def get_token_with_pwd(
         raise HTTPException(status_code=400, detail=exc.detail)
     except AuthUnauthorizedError as exc:
         raise HTTPException(status_code=403, detail=exc.detail, headers=exc.headers)
+    except AuthServiceBusyError as exc:
+        raise HTTPException(
+            status_code=503,
+            detail=exc.detail,
+            headers={"Retry-After": str(BUSY_RETRY_AFTER_SEC)},
+        )
 
 
 @auth_router.post(auth_config.TOKEN_PATH_WITH_REFRESH)
@@ -0,0 +1,18 @@
+from typing import Annotated
+
+from fastapi import APIRouter, Depends
+from fastapi.responses import PlainTextResponse
+
+from backend.dependencies import metrics_registry_dep
+from backend.services.metrics.metrics import MetricsRegistry
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+metrics_router = APIRouter(tags=["metrics"])
+
+
+@metrics_router.get("/metrics", response_class=PlainTextResponse)
+async def metrics(
+    registry: Annotated[MetricsRegistry, Depends(metrics_registry_dep)],
+):
+    return PlainTextResponse(registry.render(), media_type=PROMETHEUS_CONTENT_TYPE)
@@ -2,10 +2,18 @@ from typing import Annotated
 
 from fastapi import APIRouter, Depends, WebSocket, WebSocketDisconnect
 
-from backend.dependencies import chat_manager_dep, get_current_user
+from backend.dependencies import (
+    chat_manager_dep,
+    get_current_user,
+    load_shedder_dep,
+    rate_limiter_dep,
+    ws_session_slot_dep,
+)
 from backend.schemas.user import UserSchema
 from backend.services import ws_chat_server
 from backend.services.chat_manager.chat_manager import ChatManager
+from backend.services.load_shedder.load_shedder import LoadShedder
+from backend.services.rate_limiter.rate_limiter import RateLimiter
 
 ws_chat_router = APIRouter(prefix="/ws", tags=["websocket"])
 
@@ -13,11 +21,17 @@ ws_chat_router = APIRouter(prefix="/ws", tags=["websocket"])
 @ws_chat_router.websocket("/chat")
 async def ws_chat(
     websocket: WebSocket,
+    _: Annotated[None, Depends(ws_session_slot_dep)],
     chat_manager: Annotated[ChatManager, Depends(chat_manager_dep)],
     current_user: Annotated[UserSchema, Depends(get_current_user)],
+    rate_limiter: Annotated[RateLimiter, Depends(rate_limiter_dep)],
+    load_shedder: Annotated[LoadShedder, Depends(load_shedder_dep)],
 ):
-    await websocket.accept()
+    session_rate_limiter = rate_limiter.session(current_user.id)
+    # Subscribe before accepting the connection, so that the client receives all
+    # events posted after it's connected
     await chat_manager.subscribe_for_updates(current_user_id=current_user.id)
+    await websocket.accept()
     try:
         while True:
             # Receive packet from websocket and process it
@@ -25,6 +39,8 @@ async def ws_chat(
                 chat_manager=chat_manager,
                 current_user_id=current_user.id,
                 websocket=websocket,
+                rate_limiter=session_rate_limiter,
+                load_shedder=load_shedder,
             )
 
             # Check for new events and send via websocket
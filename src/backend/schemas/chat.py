@@ -2,6 +2,10 @@ import uuid
 
 from .base import BaseSchema
 
+# Unread messages counter stops counting at this value, so the cost of the counter
+# doesn't depend on the number of unread messages
+UNREAD_COUNT_LIMIT = 100
+
 
 class ChatSchema(BaseSchema):
     id: uuid.UUID
@@ -16,3 +20,6 @@ class ChatCreateSchema(ChatSchema):
 class ChatExtSchema(ChatSchema):
     last_message_text: str | None
     members_count: int
+    # Number of messages of other users after user's `last_read`, capped at
+    # UNREAD_COUNT_LIMIT
+    unread_count: int = 0
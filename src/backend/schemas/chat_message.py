@@ -81,3 +81,26 @@ ChatMessageAny: TypeAlias = Union[ChatUserMessageSchema, ChatNotificationSchema]
 AnnotatedChatMessageAny: TypeAlias = Annotated[
     ChatMessageAny, Field(discriminator="is_notification")
 ]
+
+
+# Full-text search result
+
+
+class ChatMessageSearchResultSchema(BaseSchema):
+    """
+    Message found by full-text search and its rank (lower is better).
+    """
+
+    message: ChatUserMessageSchema
+    rank: float
+
+
+class ChatMessageSearchPageSchema(BaseSchema):
+    """
+    Page of full-text search results.
+    Only messages with id <= `max_id` are searched. To get the next page pass
+    `max_id` together with `rank` and `message.id` of the last result.
+    """
+
+    results: list[ChatMessageSearchResultSchema]
+    max_id: int
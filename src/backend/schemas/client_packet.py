@@ -11,6 +11,7 @@ from .base import BaseSchema
 ClientPacketData: TypeAlias = Union[
     "CMDGetJoinedChats",
     "CMDAddUserToChat",
+    "CMDAddUsersToChat",
     "CMDSendMessage",
     "CMDGetMessages",
     "CMDEditMessage",
@@ -18,6 +19,10 @@ ClientPacketData: TypeAlias = Union[
     "CMDGetFirstCircleListUpdates",
     "CMDGetUserAutocomplete",
     "CMDCreateChat",
+    "CMDSearchMessages",
+    "CMDPing",
+    "CMDTyping",
+    "CMDMarkRead",
 ]
 
 
@@ -41,6 +46,12 @@ class CMDAddUserToChat(BaseSchema):
     user_id: uuid.UUID
 
 
+class CMDAddUsersToChat(BaseSchema):
+    packet_type: Literal["CMDAddUsersToChat"] = "CMDAddUsersToChat"
+    chat_id: uuid.UUID
+    user_ids: list[uuid.UUID] = Field(min_length=1)
+
+
 class CMDSendMessage(BaseSchema):
     packet_type: Literal["CMDSendMessage"] = "CMDSendMessage"
     message: ChatUserMessageCreateSchema
@@ -68,7 +79,7 @@ class CMDGetUserAutocomplete(BaseSchema):
     packet_type: Literal["CMDGetUserAutocomplete"] = "CMDGetUserAutocomplete"
     name_filter: str
     limit: int | None = None
-    offset: int | None = None
+    start_id: uuid.UUID | None = None
 
 
 class CMDGetFirstCircleListUpdates(BaseSchema):
@@ -80,3 +91,29 @@ class CMDGetFirstCircleListUpdates(BaseSchema):
 class CMDCreateChat(BaseSchema):
     packet_type: Literal["CMDCreateChat"] = "CMDCreateChat"
     chat_data: ChatCreateSchema
+    user_ids: list[uuid.UUID] = Field(default_factory=list)
+
+
+class CMDSearchMessages(BaseSchema):
+    packet_type: Literal["CMDSearchMessages"] = "CMDSearchMessages"
+    query: str = Field(min_length=1)
+    chat_id: uuid.UUID | None = None
+    max_id: int | None = None
+    start_rank: float | None = None
+    start_id: int | None = None
+    limit: int | None = Field(default=None, ge=1)
+
+
+class CMDPing(BaseSchema):
+    packet_type: Literal["CMDPing"] = "CMDPing"
+
+
+class CMDTyping(BaseSchema):
+    packet_type: Literal["CMDTyping"] = "CMDTyping"
+    chat_id: uuid.UUID
+
+
+class CMDMarkRead(BaseSchema):
+    packet_type: Literal["CMDMarkRead"] = "CMDMarkRead"
+    chat_id: uuid.UUID
+    message_id: int
@@ -1,4 +1,5 @@
 import uuid
+from datetime import datetime
 from typing import Annotated, Literal, TypeAlias, Union
 
 from pydantic import Field
@@ -6,6 +7,7 @@ from pydantic import Field
 from backend.schemas.chat import ChatExtSchema
 from backend.schemas.chat_message import ChatMessageAny, ChatUserMessageSchema
 from backend.schemas.user import UserSchema
+from backend.schemas.user_chat_state import ReadReceiptSchema
 
 from .base import BaseSchema
 
@@ -24,6 +26,8 @@ class AnotherUserJoinedChatNotification(BaseSchema):
     event_type: Literal["AnotherUserJoinedChatNotification"] = (
         "AnotherUserJoinedChatNotification"
     )
+    chat_id: uuid.UUID
+    users: list[UserSchema]
 
 
 class ChatListUpdate(BaseSchema):
@@ -43,6 +47,44 @@ class FirstCircleUserListUpdate(BaseSchema):
     users: list[UserSchema]
 
 
+class UserPresenceUpdate(BaseSchema):
+    event_type: Literal["UserPresenceUpdate"] = "UserPresenceUpdate"
+    online: list[uuid.UUID]
+    offline: list[uuid.UUID]
+
+
+class TypingEvent(BaseSchema):
+    """
+    Ephemeral event: it isn't persisted, isn't acknowledged by client and can be
+    dropped. It's stale after `expires_at`.
+    """
+
+    event_type: Literal["TypingEvent"] = "TypingEvent"
+    chat_id: uuid.UUID
+    user_id: uuid.UUID
+    expires_at: datetime
+
+
+class ReadReceiptsUpdate(BaseSchema):
+    event_type: Literal["ReadReceiptsUpdate"] = "ReadReceiptsUpdate"
+    chat_id: uuid.UUID
+    receipts: list[ReadReceiptSchema]
+
+
+class UnreadCountUpdate(BaseSchema):
+    """
+    New value of the unread messages counter of the chat. It's sent to the user when
+    the counter is reset by reading messages.
+    Server doesn't store counters and doesn't send this event on new messages: the
+    client gets the initial values with the chat list and keeps its own counters
+    (increments them on ChatMessageEvent from other users).
+    """
+
+    event_type: Literal["UnreadCountUpdate"] = "UnreadCountUpdate"
+    chat_id: uuid.UUID
+    unread_count: int
+
+
 # Discriminated union type
 
 AnyEvent: TypeAlias = Union[
@@ -52,6 +94,10 @@ AnyEvent: TypeAlias = Union[
     ChatListUpdate,
     ChatMessageEdited,
     FirstCircleUserListUpdate,
+    UserPresenceUpdate,
+    TypingEvent,
+    ReadReceiptsUpdate,
+    UnreadCountUpdate,
 ]
 
 AnyEventDiscr: TypeAlias = Annotated[
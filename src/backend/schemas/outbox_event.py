@@ -0,0 +1,7 @@
+from .base import BaseSchema
+
+
+class OutboxEventSchema(BaseSchema):
+    id: int
+    channel: str
+    event: str
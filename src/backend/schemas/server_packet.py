@@ -1,9 +1,9 @@
 from typing import Literal, TypeAlias, Union
 
-from pydantic import Field
+from pydantic import Field, SerializeAsAny
 
 from backend.schemas.chat import ChatExtSchema
-from backend.schemas.chat_message import ChatMessageAny
+from backend.schemas.chat_message import ChatMessageAny, ChatMessageSearchResultSchema
 from backend.schemas.event import AnyEventDiscr
 from backend.schemas.user import UserSchema
 from backend.services.chat_manager.chat_manager_exc import ChatManagerException
@@ -17,6 +17,7 @@ ServerPacketData: TypeAlias = Union[
     "SrvRespGetMessages",
     "SrvEventList",
     "SrvRespGetUserAutocomplete",
+    "SrvRespSearchMessages",
 ]
 
 
@@ -40,7 +41,7 @@ class SrvRespError(BaseSchema):
 
     packet_type: Literal["RespError"] = "RespError"
     success: Literal[False] = False
-    error_data: ChatManagerException
+    error_data: SerializeAsAny[ChatManagerException]
 
 
 class SrvRespSuccess(BaseSchema):
@@ -90,6 +91,18 @@ class SrvRespGetUserAutocomplete(SrvRespSuccess):
     users: list[UserSchema]
 
 
+class SrvRespSearchMessages(SrvRespSuccess):
+    """
+    Response for CMDSearchMessages command.
+    Contains list of found messages with their ranks and max message id of the
+    search snapshot (pass it to get next pages)
+    """
+
+    packet_type: Literal["RespSearchMessages"] = "RespSearchMessages"
+    results: list[ChatMessageSearchResultSchema]
+    max_id: int
+
+
 # Events
 
 
@@ -8,3 +8,10 @@ class UserChatStateSchema(BaseSchema):
     chat_id: uuid.UUID
     last_delivered: int
     last_read: int
+    # Not stored, calculated by `update_user_chat_state_*()` methods of repository
+    unread_count: int = 0
+
+
+class ReadReceiptSchema(BaseSchema):
+    user_id: uuid.UUID
+    last_read: int
@@ -0,0 +1,72 @@
+import hashlib
+import time
+import uuid
+
+from backend.schemas.token_data import TokenData
+from backend.schemas.user import UserSchema
+from backend.services.cache.expiring_lru_cache import ExpiringLRUCache
+
+TOKEN_CACHE_SIZE = 10_000
+USER_CACHE_SIZE = 10_000
+USER_CACHE_TTL_SEC = 30
+
+
+def _unix_time() -> float:
+    return time.time()
+
+
+class AuthCache:
+    """
+    Process-wide cache of validated tokens and users.
+
+    Decoded tokens are kept in LRU cache keyed by the token digest until token's
+    expiration time (`exp` claim).
+    Users are kept for a short time (USER_CACHE_TTL_SEC) and should be invalidated
+    by `invalidate_user()` when user data is changed.
+    """
+
+    def __init__(
+        self,
+        token_cache_size: int = TOKEN_CACHE_SIZE,
+        user_cache_size: int = USER_CACHE_SIZE,
+        user_cache_ttl: float = USER_CACHE_TTL_SEC,
+    ):
+        # `exp` claim is a unix timestamp, so token cache uses wall clock
+        self._tokens: ExpiringLRUCache[bytes, tuple[TokenData, str]] = ExpiringLRUCache(
+            maxsize=token_cache_size, timer=_unix_time
+        )
+        self._users: ExpiringLRUCache[uuid.UUID, UserSchema] = ExpiringLRUCache(
+            maxsize=user_cache_size, ttl=user_cache_ttl
+        )
+
+    def get_token(self, token: str) -> tuple[TokenData, str] | None:
+        """
+        Get decoded token data and token type if token is cached and not expired.
+        """
+        cached = self._tokens.get(self._token_digest(token))
+        if cached is None:
+            return None
+        token_data, token_type = cached
+        return token_data.model_copy(deep=True), token_type
+
+    def set_token(
+        self, token: str, token_data: TokenData, token_type: str, expires_at: float
+    ):
+        self._tokens.set(
+            self._token_digest(token),
+            (token_data.model_copy(deep=True), token_type),
+            expires_at=expires_at,
+        )
+
+    def get_user(self, user_id: uuid.UUID) -> UserSchema | None:
+        return self._users.get(user_id)
+
+    def set_user(self, user: UserSchema):
+        self._users.set(user.id, user)
+
+    def invalidate_user(self, user_id: uuid.UUID):
+        self._users.pop(user_id)
+
+    @staticmethod
+    def _token_digest(token: str) -> bytes:
+        return hashlib.sha256(token.encode()).digest()
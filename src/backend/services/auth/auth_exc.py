@@ -30,3 +30,8 @@ class AuthUnauthorizedError(AuthException):
 @dataclass
 class UserCreationError(AuthException):
     pass
+
+
+@dataclass
+class AuthServiceBusyError(AuthException):
+    pass
@@ -15,6 +15,7 @@ from backend.schemas.token_data import TokenData
 from backend.schemas.tokens_response import TokensResponse
 from backend.schemas.user import UserCreateSchema, UserSchema
 from backend.services.auth.abstract_auth import DEFAULT_SCOPES, AbstractAuth, TokenType
+from backend.services.auth.auth_cache import AuthCache
 from backend.services.auth.auth_exc import (
     AuthBadCredentialsError,
     AuthBadRequestParametersError,
@@ -22,11 +23,23 @@ from backend.services.auth.auth_exc import (
     AuthUnauthorizedError,
     UserCreationError,
 )
+from backend.services.auth.password_hasher import password_hasher
+from backend.services.cache.single_flight import SingleFlight
+from backend.services.user_index.user_name_index import UserNameIndex
 
 
 class InternalSQLAAuth(AbstractAuth):
-    def __init__(self, session_maker: async_sessionmaker):
+    def __init__(
+        self,
+        session_maker: async_sessionmaker,
+        user_name_index: UserNameIndex | None = None,
+        auth_cache: AuthCache | None = None,
+        single_flight: SingleFlight | None = None,
+    ):
         self.session_maker = session_maker
+        self.user_name_index = user_name_index
+        self.auth_cache = auth_cache
+        self.single_flight = single_flight
 
     async def register_user(self, user_data: UserCreateSchema) -> UserSchema:
         try:
@@ -36,7 +49,7 @@ class InternalSQLAAuth(AbstractAuth):
                 )
                 if existed_user:
                     raise AuthBadRequestParametersError(detail="Duplicated user name")
-                hashed_password = auth_config.pwd_context.hash(user_data.password)
+                hashed_password = await password_hasher.hash(user_data.password)
                 user = User(
                     id=uuid.uuid4(),
                     name=user_data.name,
@@ -46,7 +59,12 @@ class InternalSQLAAuth(AbstractAuth):
                 session.add(user)
                 await session.commit()
                 await session.refresh(user)
-            return UserSchema.model_validate(user)
+            user_schema = UserSchema.model_validate(user)
+            if self.user_name_index is not None:
+                self.user_name_index.add(user_schema)
+            if self.auth_cache is not None:
+                self.auth_cache.invalidate_user(user_schema.id)
+            return user_schema
         except SQLAlchemyError as exc:
             raise UserCreationError(detail=f"Database error: {exc}")
 
@@ -57,7 +75,7 @@ class InternalSQLAAuth(AbstractAuth):
             user = await session.scalar(select(User).where(User.name == user_name))
         if not user:
             raise AuthBadCredentialsError(detail="Incorrect username or password")
-        is_password_correct = auth_config.pwd_context.verify(
+        is_password_correct = await password_hasher.verify(
             password, user.hashed_password
         )
         if not is_password_correct:
@@ -104,33 +122,47 @@ class InternalSQLAAuth(AbstractAuth):
             if (required_scopes and required_scopes.scopes)
             else "Bearer"
         )
-        try:
-            payload = cast(
-                dict[str, Any],
-                jwt.decode(
-                    jwt=token,
-                    audience=auth_config.JWT_AUD,
-                    key=auth_config.SECRET_KEY,
-                    algorithms=[auth_config.ALGORITHM],
-                    options={"require": ["exp", "aud", "sub"]},
-                ),
-            )
-            sub: str = cast(str, payload.get("sub", ""))
-            user_name: str = cast(str, payload.get("user_name", ""))
-            token_scopes = cast(list[str], payload.get("scopes", []))
-            decoded_token_type = cast(str, payload.get("token_type", ""))
-            token_data = TokenData.model_validate(
-                {"scopes": token_scopes, "sub": sub, "user_name": user_name}
-            )
-        except (jwt.InvalidTokenError, ValidationError):
-            raise AuthBadTokenError(
-                detail="Invalid token", headers={"WWW-Authenticate": authenticate_value}
-            )
+        cached = self.auth_cache.get_token(token) if self.auth_cache else None
+        if cached is not None:
+            token_data, decoded_token_type = cached
+        else:
+            try:
+                payload = cast(
+                    dict[str, Any],
+                    jwt.decode(
+                        jwt=token,
+                        audience=auth_config.JWT_AUD,
+                        key=auth_config.SECRET_KEY,
+                        algorithms=[auth_config.ALGORITHM],
+                        options={"require": ["exp", "aud", "sub"]},
+                    ),
+                )
+                sub: str = cast(str, payload.get("sub", ""))
+                user_name: str = cast(str, payload.get("user_name", ""))
+                token_scopes = cast(list[str], payload.get("scopes", []))
+                decoded_token_type = cast(str, payload.get("token_type", ""))
+                token_data = TokenData.model_validate(
+                    {"scopes": token_scopes, "sub": sub, "user_name": user_name}
+                )
+            except (jwt.InvalidTokenError, ValidationError):
+                raise AuthBadTokenError(
+                    detail="Invalid token",
+                    headers={"WWW-Authenticate": authenticate_value},
+                )
+            if self.auth_cache is not None:
+                self.auth_cache.set_token(
+                    token=token,
+                    token_data=token_data,
+                    token_type=decoded_token_type,
+                    expires_at=float(payload["exp"]),
+                )
         if decoded_token_type != token_type:
             raise AuthBadTokenError(
                 detail="Invalid token", headers={"WWW-Authenticate": authenticate_value}
             )
-        if required_scopes and (not set(required_scopes.scopes).issubset(token_scopes)):
+        if required_scopes and (
+            not set(required_scopes.scopes).issubset(token_data.scopes)
+        ):
             raise AuthUnauthorizedError(
                 detail="Not enough permissions",
                 headers={"WWW-Authenticate": authenticate_value},
@@ -138,14 +170,32 @@ class InternalSQLAAuth(AbstractAuth):
         return token_data
 
     async def get_current_user(self, access_token_decoded: TokenData) -> UserSchema:
-        async with self.session_maker() as session:
-            user = await session.get(User, uuid.UUID(access_token_decoded.sub))
-        if not user:
+        user_id = uuid.UUID(access_token_decoded.sub)
+        if self.auth_cache is not None:
+            cached_user = self.auth_cache.get_user(user_id)
+            if cached_user is not None:
+                return cached_user
+        if self.single_flight is None:
+            user_schema = await self._get_user(user_id)
+        else:
+            user_schema = await self.single_flight.run(
+                ("get_current_user", user_id), lambda: self._get_user(user_id)
+            )
+        if user_schema is None:
             raise AuthBadTokenError(detail="Invalid user id")
-        return UserSchema.model_validate(user)
+        if self.auth_cache is not None:
+            self.auth_cache.set_user(user_schema)
+        return user_schema
 
     # Private methods
 
+    async def _get_user(self, user_id: uuid.UUID) -> UserSchema | None:
+        async with self.session_maker() as session:
+            user = await session.get(User, user_id)
+        if not user:
+            return None
+        return UserSchema.model_validate(user)
+
     def _create_token(
         self, data: TokenData, expires_delta: timedelta, token_type: TokenType
     ):
@@ -0,0 +1,107 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Callable, TypeVar
+
+from passlib.context import CryptContext
+
+from backend.auth_setups import auth_config
+from backend.services.auth.auth_exc import AuthServiceBusyError
+
+T = TypeVar("T")
+
+
+@dataclass
+class PasswordHasherStats:
+    max_workers: int
+    queued: int
+    running: int
+    completed: int
+    rejected: int
+    max_queued: int
+    total_wait_time_sec: float
+    total_run_time_sec: float
+
+
+class PasswordHasher:
+    """
+    Runs password hashing and verification in a bounded thread pool.
+
+    Hashing takes milliseconds of CPU. Running it on the event loop would stall all
+    connections served by the process, so it's done in worker threads (bcrypt
+    releases the GIL). Not more than `max_workers` operations run concurrently, the
+    rest wait in the pool's queue.
+    Not more than `queue_size` operations can wait, others are rejected with
+    AuthServiceBusyError right away, so a burst of logins doesn't increase latency
+    for everyone without limit.
+    """
+
+    def __init__(self, pwd_context: CryptContext, max_workers: int, queue_size: int):
+        self.pwd_context = pwd_context
+        self.max_workers = max_workers
+        self.queue_size = queue_size
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="password_hasher"
+        )
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._running = 0
+        self._completed = 0
+        self._rejected = 0
+        self._max_queued = 0
+        self._total_wait_time = 0.0
+        self._total_run_time = 0.0
+
+    async def hash(self, password: str) -> str:
+        return await self._run(self.pwd_context.hash, password)
+
+    async def verify(self, password: str, hashed_password: str) -> bool:
+        return await self._run(self.pwd_context.verify, password, hashed_password)
+
+    def stats(self) -> PasswordHasherStats:
+        with self._lock:
+            return PasswordHasherStats(
+                max_workers=self.max_workers,
+                queued=self._queued,
+                running=self._running,
+                completed=self._completed,
+                rejected=self._rejected,
+                max_queued=self._max_queued,
+                total_wait_time_sec=self._total_wait_time,
+                total_run_time_sec=self._total_run_time,
+            )
+
+    async def _run(self, func: Callable[..., T], *args) -> T:
+        with self._lock:
+            if self._queued >= self.queue_size:
+                self._rejected += 1
+                raise AuthServiceBusyError(detail="Too many authentication requests")
+            self._queued += 1
+            self._max_queued = max(self._max_queued, self._queued)
+        submitted_at = time.monotonic()
+
+        def _worker() -> T:
+            started_at = time.monotonic()
+            with self._lock:
+                self._queued -= 1
+                self._running += 1
+                self._total_wait_time += started_at - submitted_at
+            try:
+                return func(*args)
+            finally:
+                with self._lock:
+                    self._running -= 1
+                    self._completed += 1
+                    self._total_run_time += time.monotonic() - started_at
+
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, _worker)
+
+
+password_hasher = PasswordHasher(
+    pwd_context=auth_config.pwd_context,
+    max_workers=auth_config.PWD_HASH_MAX_WORKERS,
+    queue_size=auth_config.PWD_HASH_QUEUE_SIZE,
+)
@@ -0,0 +1,68 @@
+import time
+from collections import OrderedDict
+from typing import Callable, Generic, Hashable, TypeVar
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class ExpiringLRUCache(Generic[K, V]):
+    """
+    Bounded LRU cache with optional expiration of entries.
+
+    Entries expire at `expires_at` passed to `set()` or, if it's not passed, after
+    `ttl` seconds. Time is measured by `timer` (time.monotonic by default).
+    When the cache is full, the least recently used entry is evicted.
+    """
+
+    def __init__(
+        self,
+        maxsize: int,
+        ttl: float | None = None,
+        timer: Callable[[], float] = time.monotonic,
+    ):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.timer = timer
+        self.hits = 0
+        self.misses = 0
+        self._data: OrderedDict[K, tuple[V, float | None]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: K) -> V | None:
+        """
+        Get value by key. Returns None if there is no entry or it has expired.
+        """
+        entry = self._data.get(key)
+        if entry is not None:
+            value, expires_at = entry
+            if (expires_at is None) or (expires_at > self.timer()):
+                self._data.move_to_end(key)
+                self.hits += 1
+                return value
+            del self._data[key]
+        self.misses += 1
+        return None
+
+    def set(self, key: K, value: V, expires_at: float | None = None):
+        """
+        Add or replace the entry. Evicts the least recently used entry if the cache
+        is full.
+        """
+        if (expires_at is None) and (self.ttl is not None):
+            expires_at = self.timer() + self.ttl
+        self._data[key] = (value, expires_at)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def pop(self, key: K):
+        """
+        Remove the entry if it exists.
+        """
+        self._data.pop(key, None)
+
+    def clear(self):
+        self._data.clear()
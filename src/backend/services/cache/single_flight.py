@@ -0,0 +1,47 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Hashable, TypeVar
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent identical calls.
+
+    While the call with some key is in flight, other callers with the same key don't
+    start their own calls, but wait for the result of the first one. The result (or
+    exception) is shared by all of them, so it shouldn't be modified by callers.
+    If the first caller is cancelled, waiting callers retry.
+    Key should identify the operation and its arguments, e.g.
+    ("get_user_list", tuple(chat_list_filter)).
+    """
+
+    def __init__(self):
+        self.calls = 0
+        self.coalesced = 0
+        self._in_flight: dict[Hashable, asyncio.Future[Any]] = {}
+
+    async def run(self, key: Hashable, func: Callable[[], Awaitable[T]]) -> T:
+        self.calls += 1
+        while (future := self._in_flight.get(key)) is not None:
+            self.coalesced += 1
+            try:
+                return await asyncio.shield(future)
+            except asyncio.CancelledError:
+                if not future.cancelled():
+                    raise  # Waiting caller itself is cancelled
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = future
+        try:
+            res = await func()
+        except Exception as exc:
+            future.set_exception(exc)
+            future.exception()  # Mark as retrieved if nobody waits for it
+            raise
+        except BaseException:
+            future.cancel()
+            raise
+        finally:
+            del self._in_flight[key]
+        future.set_result(res)
+        return res
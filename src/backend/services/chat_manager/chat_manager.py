@@ -1,12 +1,15 @@
 import uuid
+from collections.abc import Set
 from contextlib import contextmanager
-from datetime import datetime, timedelta
-from typing import Optional
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable, Hashable, TypeVar
 
 from backend.schemas.chat import ChatCreateSchema, ChatExtSchema
 from backend.schemas.chat_message import (
     ChatMessageAny,
+    ChatMessageSearchPageSchema,
     ChatNotificationCreateSchema,
+    ChatNotificationSchema,
     ChatUserMessageCreateSchema,
     ChatUserMessageSchema,
 )
@@ -17,9 +20,16 @@ from backend.schemas.event import (
     ChatMessageEdited,
     ChatMessageEvent,
     FirstCircleUserListUpdate,
+    ReadReceiptsUpdate,
+    TypingEvent,
+    UnreadCountUpdate,
     UserAddedToChatNotification,
+    UserPresenceUpdate,
 )
 from backend.schemas.user import UserSchema, UserSchemaExt
+from backend.schemas.user_chat_state import ReadReceiptSchema
+from backend.services.cache.expiring_lru_cache import ExpiringLRUCache
+from backend.services.cache.single_flight import SingleFlight
 from backend.services.chat_manager.chat_manager_exc import (
     BadRequest,
     EventBrokerError,
@@ -27,14 +37,32 @@ from backend.services.chat_manager.chat_manager_exc import (
     RepositoryError,
     UnauthorizedAction,
 )
+from backend.services.chat_manager.first_circle import FirstCircle
+from backend.services.chat_manager.membership_cache import ChatMembershipCache
+from backend.services.chat_manager.message_tail_cache import MessageTailCache
+from backend.services.chat_manager.side_effect_executor import SideEffectExecutor
 from backend.services.chat_manager.utils import channel_code
-from backend.services.chat_repo.abstract_chat_repo import MAX_MESSAGE_COUNT_PER_PAGE
+from backend.services.chat_repo.abstract_chat_repo import (
+    MAX_MESSAGE_COUNT_PER_PAGE,
+    AbstractChatRepo,
+)
 from backend.services.chat_repo.chat_repo_exc import ChatRepoException
 from backend.services.event_broker.abstract_event_broker import AbstractEventBroker
 from backend.services.event_broker.event_broker_exc import EventBrokerException
+from backend.services.outbox.outbox_dispatcher import OutboxDispatcher
+from backend.services.presence.presence_service import PresenceService
+from backend.services.read_tracker.read_tracker import ReadTracker
+from backend.services.tracing.tracing import traced_methods
 from backend.services.uow.abstract_uow import AbstractUnitOfWork
+from backend.services.user_index.user_name_index import UserNameIndex
 
 USER_JOINED_CHAT_NOTIFICATION = "USER_JOINED_CHAT_MSG"
+USERS_JOINED_CHAT_NOTIFICATION = "USERS_JOINED_CHAT_MSG"
+TYPING_EVENT_TTL_SEC = 5.0
+TYPING_EVENT_MIN_INTERVAL_SEC = 2.0
+TYPING_THROTTLE_MAXSIZE = 100_000
+
+T = TypeVar("T")
 
 
 @contextmanager
@@ -50,12 +78,53 @@ def process_exceptions(*args, **kwds):
         raise EventBrokerError(detail=str(exc))
 
 
+# (User id, chat id) as `uuid.int` -> True while TypingEvent from the user to the
+# chat is throttled
+TypingThrottle = ExpiringLRUCache[tuple[int, int], bool]
+
+
+def new_typing_throttle() -> TypingThrottle:
+    return ExpiringLRUCache(
+        maxsize=TYPING_THROTTLE_MAXSIZE, ttl=TYPING_EVENT_MIN_INTERVAL_SEC
+    )
+
+
+@traced_methods("chat_manager.")
 class ChatManager:
-    def __init__(self, uow: AbstractUnitOfWork, event_broker: AbstractEventBroker):
+    def __init__(
+        self,
+        uow: AbstractUnitOfWork,
+        event_broker: AbstractEventBroker,
+        user_name_index: UserNameIndex | None = None,
+        membership_cache: ChatMembershipCache | None = None,
+        message_cache: MessageTailCache | None = None,
+        single_flight: SingleFlight | None = None,
+        side_effect_executor: SideEffectExecutor | None = None,
+        outbox_dispatcher: OutboxDispatcher | None = None,
+        presence_service: PresenceService | None = None,
+        read_tracker: ReadTracker | None = None,
+        typing_throttle: TypingThrottle | None = None,
+    ):
         self.uow = uow
         self.event_broker = event_broker
-        self._user_chat_ids_cached: Optional[list[uuid.UUID]] = None
-        self._first_circle_user_id_list: list[uuid.UUID] = []
+        self.user_name_index = user_name_index
+        if membership_cache is None:
+            membership_cache = ChatMembershipCache()
+        self.membership_cache = membership_cache
+        self.message_cache = message_cache
+        self.single_flight = single_flight
+        self.side_effect_executor = side_effect_executor
+        self.outbox_dispatcher = outbox_dispatcher
+        self.presence_service = presence_service
+        self.read_tracker = read_tracker
+        # Should be shared by all sessions of the process, otherwise the limit is
+        # per session
+        if typing_throttle is None:
+            typing_throttle = new_typing_throttle()
+        self.typing_throttle = typing_throttle
+        # First circle state: users and ids of chats shared with current user.
+        # None if not loaded yet
+        self._first_circle: FirstCircle | None = None
         self._first_circle_user_list_updated: datetime = datetime.now() - timedelta(
             days=10 * 365
         )
@@ -90,11 +159,10 @@ class ChatManager:
          - RepositoryError on repository failure
         """
         with process_exceptions():
-            async with self.uow:
-                chat_list = await self.uow.chat_repo.get_joined_chat_list(
-                    current_user_id
-                )
-                return chat_list
+            return await self._read_coalesced(
+                ("get_joined_chat_list", current_user_id),
+                lambda repo: repo.get_joined_chat_list(current_user_id),
+            )
 
     async def add_user_to_chat(
         self, current_user_id: uuid.UUID, user_id: uuid.UUID, chat_id: uuid.UUID
@@ -107,7 +175,28 @@ class ChatManager:
 
         Raises:
          - UnauthorizedAction if current user unathorized to add users to that chat
-         - BadRequest if chat_id is wrong
+         - BadRequest if chat_id or user_id is wrong
+         - RepositoryError on repository failure
+         - EventBrokerError on Event broker failure
+        """
+        await self.add_users_to_chat(
+            current_user_id=current_user_id, user_ids=[user_id], chat_id=chat_id
+        )
+
+    async def add_users_to_chat(
+        self,
+        current_user_id: uuid.UUID,
+        user_ids: list[uuid.UUID],
+        chat_id: uuid.UUID,
+    ):
+        """
+        Add several users to chat at once.
+        All User-Chat links and one notification about joined users are added to the
+        DB in a single transaction. Then events are posted to Event broker in a batch.
+
+        Raises:
+         - UnauthorizedAction if current user unathorized to add users to that chat
+         - BadRequest if chat_id or some of user_ids is wrong
          - RepositoryError on repository failure
          - EventBrokerError on Event broker failure
         """
@@ -124,35 +213,20 @@ class ChatManager:
                         f"chat ({chat_id}))"
                     )
                 # Make changes in DB and add notification to DB
-                await self.uow.chat_repo.add_user_to_chat(
-                    chat_id=chat_id, user_id=user_id
-                )
-                self._invalidate_joined_chat_ids_cache()
-                user = await self.uow.chat_repo.get_user_by_id(user_id=user_id)
-                notification_create = ChatNotificationCreateSchema(
-                    chat_id=chat_id,
-                    text=USER_JOINED_CHAT_NOTIFICATION,
-                    params={"user_name": user.name},
+                users, notification = await self._add_users_to_chat(
+                    chat_id=chat_id, user_ids=user_ids
                 )
-                notification = await self.uow.chat_repo.add_notification(
-                    notification_create
+                events = self._users_added_events(
+                    chat_id=chat_id, users=users, notification=notification
                 )
+                await self._add_events_to_outbox(events)
                 await self.uow.commit()
-            # Post notifications to the chat's channel and to the user's channel via
-            # Event broker
-            # TODO: catch exceptions during post_event() and retry or log
-            await self.event_broker.post_event(
-                channel=channel_code("chat", chat_id),
-                event=ChatMessageEvent(message=notification),
-            )
-            await self.event_broker.post_event(
-                channel=channel_code("chat", chat_id),
-                event=AnotherUserJoinedChatNotification(),
-            )
-            await self.event_broker.post_event(
-                channel=channel_code("user", user_id),
-                event=UserAddedToChatNotification(chat_id=chat_id),
+            self.membership_cache.add_chat_members(
+                chat_id=chat_id, user_ids=[user.id for user in users]
             )
+            if self.message_cache is not None:
+                self.message_cache.add_message(notification)
+            await self._post_committed_events(events)
 
     async def send_message(
         self, current_user_id: uuid.UUID, message: ChatUserMessageCreateSchema
@@ -174,24 +248,119 @@ class ChatManager:
                 raise UnauthorizedAction(
                     detail="Can't send message on behalf of another user"
                 )
-            user_chats = await self._get_joined_chat_ids(
-                current_user_id=current_user_id
-            )
             chat_id = message.chat_id
-            if chat_id not in user_chats:
+            if not await self._is_chat_member(current_user_id, chat_id):
                 raise UnauthorizedAction(
                     detail=f"User {current_user_id} is not a member of chat {chat_id}"
                 )
             # Add event to the DB and to Event broker's queue
             async with self.uow:
                 message_in_db = await self.uow.chat_repo.add_message(message)
+                events: list[tuple[str, AnyEvent]] = [
+                    (
+                        channel_code("chat", message.chat_id),
+                        ChatMessageEvent(message=message_in_db),
+                    )
+                ]
+                await self._add_events_to_outbox(events)
                 await self.uow.commit()
-            channel = channel_code("chat", message.chat_id)
-            await self.event_broker.post_event(
-                channel=channel,
-                event=ChatMessageEvent(message=message_in_db),
+            if self.message_cache is not None:
+                self.message_cache.add_message(message_in_db)
+            await self._post_committed_events(events)
+
+    async def send_typing(self, current_user_id: uuid.UUID, chat_id: uuid.UUID):
+        """
+        Notify chat members that the user is typing.
+        TypingEvent is ephemeral: it isn't stored and can be dropped. It's sent at
+        most once in TYPING_EVENT_MIN_INTERVAL_SEC per user and chat (over all
+        sessions sharing `typing_throttle`), more frequent calls are ignored.
+
+        Raises:
+         - UnauthorizedAction if current user is not a member of that chat
+         - RepositoryError on repository failure
+         - EventBrokerError on Event broker failure
+        """
+        with process_exceptions():
+            if not await self._is_chat_member(current_user_id, chat_id):
+                raise UnauthorizedAction(
+                    detail=f"User {current_user_id} is not a member of chat {chat_id}"
+                )
+            throttle_key = (current_user_id.int, chat_id.int)
+            if self.typing_throttle.get(throttle_key):
+                return
+            self.typing_throttle.set(throttle_key, True)
+            await self.event_broker.post_ephemeral_event(
+                channel=channel_code("chat", chat_id),
+                event=TypingEvent(
+                    chat_id=chat_id,
+                    user_id=current_user_id,
+                    expires_at=datetime.now(timezone.utc)
+                    + timedelta(seconds=TYPING_EVENT_TTL_SEC),
+                ),
+                ttl=TYPING_EVENT_TTL_SEC,
             )
 
+    async def mark_read(
+        self, current_user_id: uuid.UUID, chat_id: uuid.UUID, message_id: int
+    ):
+        """
+        Mark messages of the chat up to message_id (inclusive) as read by the user.
+        If ReadTracker is used, the mark is buffered and written later with other
+        marks, read receipts are sent to the chat at a bounded rate. Otherwise it's
+        written immediately, ReadReceiptsUpdate event is sent to the chat and
+        UnreadCountUpdate event is sent to the user.
+
+        Raises:
+         - UnauthorizedAction if current user is not a member of that chat
+         - RepositoryError on repository failure
+         - EventBrokerError on Event broker failure
+        """
+        with process_exceptions():
+            if not await self._is_chat_member(current_user_id, chat_id):
+                raise UnauthorizedAction(
+                    detail=f"User {current_user_id} is not a member of chat {chat_id}"
+                )
+            if self.read_tracker is not None:
+                self.read_tracker.mark_read(current_user_id, chat_id, message_id)
+                return
+            async with self.uow:
+                states = await self.uow.chat_repo.update_user_chat_state_from_dict(
+                    user_id=current_user_id,
+                    user_chat_state_dict={
+                        chat_id: {"last_delivered": message_id, "last_read": message_id}
+                    },
+                    clamp_to_last_message=True,
+                )
+                # Receipts carry the stored value: message_id from the client is
+                # clamped to the last message of the chat
+                events: list[tuple[str, AnyEvent]] = []
+                for state in states:
+                    events.append(
+                        (
+                            channel_code("chat", chat_id),
+                            ReadReceiptsUpdate(
+                                chat_id=chat_id,
+                                receipts=[
+                                    ReadReceiptSchema(
+                                        user_id=current_user_id,
+                                        last_read=state.last_read,
+                                    )
+                                ],
+                            ),
+                        )
+                    )
+                    events.append(
+                        (
+                            channel_code("user", current_user_id),
+                            UnreadCountUpdate(
+                                chat_id=state.chat_id, unread_count=state.unread_count
+                            ),
+                        )
+                    )
+                await self._add_events_to_outbox(events)
+                await self.uow.commit()
+            await self._post_committed_events(events)
+
     async def edit_message(
         self, current_user_id: uuid.UUID, message_id: int, text: str
     ):
@@ -212,17 +381,25 @@ class ChatManager:
                 message = await self.uow.chat_repo.edit_message(
                     message_id=message_id, text=text
                 )
-                await self.event_broker.post_event(
-                    channel=channel_code("chat", message.chat_id),
-                    event=ChatMessageEdited(message=message),
-                )
+                events: list[tuple[str, AnyEvent]] = [
+                    (
+                        channel_code("chat", message.chat_id),
+                        ChatMessageEdited(message=message),
+                    )
+                ]
+                await self._add_events_to_outbox(events)
                 await self.uow.commit()
+            if self.message_cache is not None:
+                self.message_cache.update_message(message)
+            await self._post_committed_events(events)
 
     async def get_events(
         self, current_user_id: uuid.UUID, limit: int = 20
     ) -> list[AnyEvent]:
         """
         Get events from user's Event broker queue.
+        If side effect executor is set, actions triggered by these events are executed
+        in background, and follow-up events are posted to user's channel later.
 
         Raises:
          - UserNotSubscribedMBE(EventBrokerException) if user is not subscribed.
@@ -238,10 +415,30 @@ class ChatManager:
             events = await self.event_broker.get_events(
                 user_id=current_user_id, limit=limit
             )
-            if events:
-                await self._process_events_before_send(
-                    current_user_id=current_user_id, events=events
+            events_to_process: list[AnyEvent] = [
+                event
+                for event in events
+                if isinstance(
+                    event,
+                    (UserAddedToChatNotification, AnotherUserJoinedChatNotification),
+                )
+            ]
+            if events_to_process:
+                scheduled = (
+                    self.side_effect_executor is not None
+                ) and self.side_effect_executor.schedule(
+                    lambda uow: self._process_events_before_send(
+                        current_user_id=current_user_id,
+                        events=events_to_process,
+                        uow=uow,
+                    )
                 )
+                # If the executor's queue is full, side effects are executed inline,
+                # they can't be dropped
+                if not scheduled:
+                    await self._process_events_before_send(
+                        current_user_id=current_user_id, events=events_to_process
+                    )
             return events
 
     async def get_message_list(
@@ -255,28 +452,84 @@ class ChatManager:
         """
         Get list of chat's messages by filter (start_id).
         Note: message with id=start_id is not included int the results.
+        Latest page and pages near the tail are served from the message cache (if
+        it's enabled).
 
         Raises:
          - UnauthorizedAction if current user is not a member of that chat
          - RepositoryError on repository failure
         """
 
+        with process_exceptions():
+            if not await self._is_chat_member(current_user_id, chat_id):
+                raise UnauthorizedAction(
+                    detail=f"User {current_user_id} is not a member of chat {chat_id}"
+                )
+            if self.message_cache is not None:
+                messages = self.message_cache.get_message_list(
+                    chat_id=chat_id,
+                    start_id=start_id,
+                    order_desc=order_desc,
+                    limit=limit,
+                )
+                if messages is not None:
+                    return messages
+                if (
+                    order_desc
+                    and (start_id <= 0)
+                    and (limit <= self.message_cache.tail_size)
+                ):
+                    messages = await self._load_message_tail(chat_id=chat_id)
+                    return messages[:limit]
+            async with self.uow:
+                return await self.uow.chat_repo.get_message_list(
+                    chat_id=chat_id,
+                    start_id=start_id,
+                    order_desc=order_desc,
+                    limit=limit,
+                )
+
+    async def search_messages(
+        self,
+        current_user_id: uuid.UUID,
+        query: str,
+        chat_id: uuid.UUID | None = None,
+        max_id: int | None = None,
+        start_rank: float | None = None,
+        start_id: int = -1,
+        limit: int = MAX_MESSAGE_COUNT_PER_PAGE,
+    ) -> ChatMessageSearchPageSchema:
+        """
+        Full-text search of messages in user's chats (or in the chat with chat_id, if
+        it's passed).
+        Results are ordered by rank. To get the next page, pass `max_id` of the
+        first page, rank and message id of the last result as start_rank and
+        start_id (see AbstractChatRepo.search_messages()).
+
+        Raises:
+         - UnauthorizedAction if current user is not a member of chat with chat_id
+         - RepositoryError on repository failure
+        """
         with process_exceptions():
             user_chats = await self._get_joined_chat_ids(
                 current_user_id=current_user_id
             )
-            async with self.uow:
+            if chat_id is not None:
                 if chat_id not in user_chats:
                     raise UnauthorizedAction(
                         detail=(
                             f"User {current_user_id} is not a member of chat {chat_id}"
                         )
                     )
-                return await self.uow.chat_repo.get_message_list(
-                    chat_id=chat_id,
+                user_chats = {chat_id}
+            async with self.uow:
+                return await self.uow.chat_repo.search_messages(
+                    query=query,
+                    chat_list_filter=list(user_chats),
+                    max_id=max_id,
+                    start_rank=start_rank,
                     start_id=start_id,
-                    order_desc=order_desc,
-                    limit=limit,
+                    limit=min(limit, MAX_MESSAGE_COUNT_PER_PAGE),
                 )
 
     async def acknowledge_events(self, current_user_id: uuid.UUID):
@@ -301,6 +554,8 @@ class ChatManager:
         Sends via EventBroker the FirstCircleUserListUpdate event with the list of
         users that have mutual chats with current user.
         That list includes current user itself.
+        If `full` is True and presence is tracked, also sends UserPresenceUpdate
+        event with the list of first circle users that are online.
 
         Raises:
          - RepositoryError on repository failure
@@ -318,23 +573,45 @@ class ChatManager:
                         users=[UserSchema.model_validate(user) for user in u_list_upd],
                     ),
                 )
+            if full and self.presence_service and self._first_circle:
+                online = await self.presence_service.get_online_user_ids(
+                    list(self._first_circle)
+                )
+                await self.event_broker.post_event(
+                    channel=channel_code("user", current_user_id),
+                    event=UserPresenceUpdate(online=online, offline=[]),
+                )
+
+    def ping(self, current_user_id: uuid.UUID):
+        """
+        Register client's heartbeat.
+        """
+        if self.presence_service:
+            self.presence_service.heartbeat(current_user_id)
 
     async def get_user_list(
         self,
         name_filter: str,
         limit: int = 10,
-        offset: int = 0,
+        start_id: uuid.UUID | None = None,
     ) -> list[UserSchema]:
         """
-        Get list of users filtered by name with pagination.
+        Get list of users filtered by name with keyset pagination.
+        Results are ordered by name. Pass the id of the last received user as
+        start_id to get the next page.
+        If the user name index is loaded, it's used instead of the repository.
 
         Raises:
          - RepositoryError on repository failure
         """
+        if (self.user_name_index is not None) and self.user_name_index.is_loaded:
+            return self.user_name_index.search(
+                name_filter=name_filter, limit=limit, start_id=start_id
+            )
         with process_exceptions():
             async with self.uow:
                 users = await self.uow.chat_repo.get_user_list(
-                    name_filter=name_filter, limit=limit, offset=offset
+                    name_filter=name_filter, limit=limit, start_id=start_id
                 )
                 return [UserSchema.model_validate(user) for user in users]
 
@@ -342,11 +619,17 @@ class ChatManager:
         self,
         current_user_id: uuid.UUID,
         chat_data: ChatCreateSchema,
+        user_ids: list[uuid.UUID] | None = None,
     ):
         """
-        Create chat with specified parameters. Add owner to that chat.
+        Create chat with specified parameters. Add owner and users from the user_ids
+        list to that chat.
+        Chat, User-Chat links and notification are added to the DB in a single
+        transaction.
 
         Raises:
+         - UnauthorizedAction if owner_id is not equal to current_user_id
+         - BadRequest if some of user_ids is wrong
          - RepositoryError on repository failure
          - EventBrokerError on Event broker failure
         """
@@ -357,13 +640,119 @@ class ChatManager:
         with process_exceptions():
             async with self.uow:
                 chat = await self.uow.chat_repo.add_chat(chat=chat_data)
+                users, notification = await self._add_users_to_chat(
+                    chat_id=chat.id, user_ids=[current_user_id, *(user_ids or [])]
+                )
+                events = self._users_added_events(
+                    chat_id=chat.id, users=users, notification=notification
+                )
+                await self._add_events_to_outbox(events)
                 await self.uow.commit()
-            await self.add_user_to_chat(
-                current_user_id=current_user_id,
-                user_id=current_user_id,
-                chat_id=chat.id,
+            self.membership_cache.add_chat_members(
+                chat_id=chat.id, user_ids=[user.id for user in users]
+            )
+            if self.message_cache is not None:
+                self.message_cache.add_message(notification)
+            await self._post_committed_events(events)
+
+    async def _add_users_to_chat(
+        self, chat_id: uuid.UUID, user_ids: list[uuid.UUID]
+    ) -> tuple[list[UserSchema], ChatNotificationSchema]:
+        """
+        Add User-Chat links and the notification about joined users to the DB.
+        Should be called inside the UoW context. Doesn't commit changes.
+        Returns the list of added users (without duplicates, in the order of user_ids)
+        and the notification.
+
+        Raises:
+         - BadRequest if some of user_ids is wrong
+         - ChatRepoException on repository failure
+        """
+        user_ids = list(dict.fromkeys(user_ids))  # Remove duplicates, keep order
+        await self.uow.chat_repo.add_users_to_chat(chat_id=chat_id, user_ids=user_ids)
+        users_in_db = await self.uow.chat_repo.get_user_list(id_list_filter=user_ids)
+        if len(users_in_db) != len(user_ids):
+            missing_ids = set(user_ids) - {user.id for user in users_in_db}
+            raise BadRequest(detail=f"Users with IDs={missing_ids} don't exist")
+        users_by_id = {user.id: user for user in users_in_db}
+        users = [
+            UserSchema.model_validate(users_by_id[user_id]) for user_id in user_ids
+        ]
+        user_names = [user.name for user in users]
+        if len(user_names) == 1:
+            notification_create = ChatNotificationCreateSchema(
+                chat_id=chat_id,
+                text=USER_JOINED_CHAT_NOTIFICATION,
+                params={"user_name": user_names[0]},
             )
-            self._invalidate_joined_chat_ids_cache()
+        else:
+            notification_create = ChatNotificationCreateSchema(
+                chat_id=chat_id,
+                text=USERS_JOINED_CHAT_NOTIFICATION,
+                params={"user_names": ", ".join(user_names)},
+            )
+        notification = await self.uow.chat_repo.add_notification(notification_create)
+        return users, notification
+
+    def _users_added_events(
+        self,
+        chat_id: uuid.UUID,
+        users: list[UserSchema],
+        notification: ChatNotificationSchema,
+    ) -> list[tuple[str, AnyEvent]]:
+        """
+        Build the list of (channel, event) pairs with notifications about added users
+        for the chat's channel and for the added users' channels.
+        Notification for the chat's channel contains profiles of added users, so
+        that members of the chat can update their first circle without DB requests.
+        Events don't depend on the order of delivery across channels: added users get
+        events of the chat's channel only after they subscribe to it (on
+        UserAddedToChatNotification) and load the chat state from the DB.
+        """
+        chat_channel = channel_code("chat", chat_id)
+        events: list[tuple[str, AnyEvent]] = [
+            (chat_channel, ChatMessageEvent(message=notification)),
+            (
+                chat_channel,
+                AnotherUserJoinedChatNotification(chat_id=chat_id, users=users),
+            ),
+        ]
+        events.extend(
+            (
+                channel_code("user", user.id),
+                UserAddedToChatNotification(chat_id=chat_id),
+            )
+            for user in users
+        )
+        return events
+
+    async def _add_events_to_outbox(self, events: list[tuple[str, AnyEvent]]):
+        """
+        If the outbox is enabled, add events to the outbox in the current transaction.
+        Should be called inside the UoW context before commit.
+
+        Raises:
+         - ChatRepoException on repository failure
+        """
+        if self.outbox_dispatcher is not None:
+            await self.uow.chat_repo.add_outbox_events(
+                events=[(channel, event.model_dump_json()) for channel, event in events]
+            )
+
+    async def _post_committed_events(self, events: list[tuple[str, AnyEvent]]):
+        """
+        Deliver events of the committed transaction. If the outbox is enabled, they
+        are already in the outbox, so just wake up the dispatcher. Otherwise post
+        events to the Event broker (in one batch).
+
+        Raises:
+         - EventBrokerException on Event broker failure
+        """
+        if self.outbox_dispatcher is not None:
+            self.outbox_dispatcher.wake()
+        else:
+            # TODO: catch exceptions during post_events() and retry or log
+            await self.event_broker.post_events(events=events)
 
     async def _get_first_circle_user_list_updates(
         self, current_user_id: uuid.UUID, full: bool = False
@@ -371,38 +760,90 @@ class ChatManager:
         """
         Get updates of the list of users that have mutual chats with current user.
         That list includes current user itself.
+        Rebuilds the first circle state from the repository.
 
         Raises:
          - RepositoryError on repository failure
         """
         if full:
-            self._first_circle_user_id_list = []
+            self._first_circle = None
         with process_exceptions():
-            chat_ids = await self._get_joined_chat_ids(current_user_id=current_user_id)
+            chat_ids = list(
+                await self._get_joined_chat_ids(current_user_id=current_user_id)
+            )
             async with self.uow:
+                chat_members = await self.uow.chat_repo.get_chat_member_ids(
+                    chat_id_list=chat_ids
+                )
                 user_list = await self.uow.chat_repo.get_user_list(
                     chat_list_filter=chat_ids
                 )
+            first_circle = FirstCircle()
+            for chat_id, user_ids in chat_members.items():
+                for user_id in user_ids:
+                    first_circle.add(user_id, chat_id)
+            prev_first_circle = self._first_circle or FirstCircle()
             res: list[UserSchemaExt] = []
-            first_circle_user_id_list: list[uuid.UUID] = []
             for user in user_list:
-                if user.id in self._first_circle_user_id_list:
-                    if user.updated_at > self._first_circle_user_list_updated:
-                        res.append(user)
-                else:
+                if (user.id not in prev_first_circle) or (
+                    user.updated_at > self._first_circle_user_list_updated
+                ):
                     res.append(user)
                 self._first_circle_user_list_updated = max(
                     self._first_circle_user_list_updated, user.updated_at
                 )
-                first_circle_user_id_list.append(user.id)
-            self._first_circle_user_id_list = first_circle_user_id_list
+            self._first_circle = first_circle
             return res
 
+    async def _add_first_circle_members(
+        self,
+        current_user_id: uuid.UUID,
+        chat_id: uuid.UUID,
+        users: list[UserSchema] | None = None,
+        uow: AbstractUnitOfWork | None = None,
+    ):
+        """
+        Update the first circle state with users that joined the chat and send
+        FirstCircleUserListUpdate event with users that are new to the first circle.
+        If users is None, current user has joined the chat, and the list of chat's
+        members is loaded from the repository. Otherwise no repository requests are
+        made.
+        If the first circle state isn't loaded yet, does nothing (it will be loaded
+        when client requests it).
+
+        Raises:
+         - ChatRepoException on repository failure
+         - EventBrokerException on Event broker failure
+        """
+        if self._first_circle is None:
+            return
+        if users is None:
+            members = await self._read_coalesced(
+                ("get_user_list", "chat_list_filter", chat_id),
+                lambda repo: repo.get_user_list(chat_list_filter=[chat_id]),
+                uow=uow,
+            )
+            users = [UserSchema.model_validate(user) for user in members]
+        new_users: list[UserSchema] = []
+        for user in users:
+            if self._first_circle.add(user.id, chat_id):
+                new_users.append(user)
+        if not new_users:
+            return
+        await self.event_broker.post_event(
+            channel=channel_code("user", current_user_id),
+            event=FirstCircleUserListUpdate(is_full=False, users=new_users),
+        )
+
     async def _process_events_before_send(
-        self, current_user_id: uuid.UUID, events: list[AnyEvent]
+        self,
+        current_user_id: uuid.UUID,
+        events: list[AnyEvent],
+        uow: AbstractUnitOfWork | None = None,
     ):
         """
         Process events and do some actions triggered by these events.
+        Repository requests are made via `uow` (self.uow if not specified).
 
         Raises:
          - RepositoryError on repository failure
@@ -411,16 +852,25 @@ class ChatManager:
         with process_exceptions():
             for event in events:
                 if isinstance(event, UserAddedToChatNotification):
+                    # Update membership cache (user might have been added to the chat
+                    # by another process)
+                    self.membership_cache.add_chat_members(
+                        chat_id=event.chat_id, user_ids=[current_user_id]
+                    )
                     # Subscribe user for this chat's updates
                     await self.event_broker.subscribe(
                         channel=channel_code("chat", event.chat_id),
                         user_id=current_user_id,
                     )
                     # Send chat list update data
-                    async with self.uow:
-                        chats = await self.uow.chat_repo.get_joined_chat_list(
-                            user_id=current_user_id, chat_id_list=[event.chat_id]
-                        )
+                    chat_id = event.chat_id
+                    chats = await self._read_coalesced(
+                        ("get_joined_chat_list", current_user_id, chat_id),
+                        lambda repo: repo.get_joined_chat_list(
+                            user_id=current_user_id, chat_id_list=[chat_id]
+                        ),
+                        uow=uow,
+                    )
                     if len(chats) != 1:
                         raise RepositoryError(
                             detail=(
@@ -432,11 +882,15 @@ class ChatManager:
                         channel=channel_code("user", current_user_id),
                         event=ChatListUpdate(action_type="add", chat_data=chats[0]),
                     )
-                if isinstance(event, UserAddedToChatNotification) or isinstance(
-                    event, AnotherUserJoinedChatNotification
-                ):
-                    await self.get_first_circle_user_list(
-                        current_user_id=current_user_id
+                    await self._add_first_circle_members(
+                        current_user_id=current_user_id, chat_id=event.chat_id, uow=uow
+                    )
+                elif isinstance(event, AnotherUserJoinedChatNotification):
+                    await self._add_first_circle_members(
+                        current_user_id=current_user_id,
+                        chat_id=event.chat_id,
+                        users=event.users,
+                        uow=uow,
                     )
 
     async def _process_events_after_acknowledgement(
@@ -471,27 +925,78 @@ class ChatManager:
                     )
                     await self.uow.commit()
 
-    async def _get_joined_chat_ids(
-        self, current_user_id: uuid.UUID, use_cache: bool = True
-    ) -> list[uuid.UUID]:
+    async def _read_coalesced(
+        self,
+        key: Hashable,
+        query: Callable[[AbstractChatRepo], Awaitable[T]],
+        uow: AbstractUnitOfWork | None = None,
+    ) -> T:
         """
-        Get list of user's chat ids.
-        Uses cache if results are cached and use_cache is True.
+        Run read-only repository query in a separate transaction (using `uow` or
+        self.uow if not specified).
+        If single-flight is enabled, concurrent queries with the same key (shared with
+        other ChatManager instances) are coalesced into one.
+
+        Raises:
+         - ChatRepoException on repository failure
         """
-        if use_cache is False:
-            self._user_chat_ids_cached = None
 
-        if self._user_chat_ids_cached is None:
-            async with self.uow:
-                self._user_chat_ids_cached = (
-                    await self.uow.chat_repo.get_joined_chat_ids(
-                        user_id=current_user_id
-                    )
-                )
-        return self._user_chat_ids_cached
+        query_uow = self.uow if uow is None else uow
+
+        async def run_query() -> T:
+            async with query_uow:
+                return await query(query_uow.chat_repo)
 
-    def _invalidate_joined_chat_ids_cache(self):
+        if self.single_flight is None:
+            return await run_query()
+        return await self.single_flight.run(key, run_query)
+
+    async def _load_message_tail(self, chat_id: uuid.UUID) -> list[ChatMessageAny]:
         """
-        Invalidate the cache of user's chat ids list.
+        Load the latest chat's messages from repository and put them to the message
+        cache. Returns messages ordered by id desc.
+
+        Raises:
+         - ChatRepoException on repository failure
         """
-        self._user_chat_ids_cached = None
+        assert self.message_cache is not None
+        messages: list[ChatMessageAny] | None = None
+        self.message_cache.begin_load(chat_id)
+        try:
+            async with self.uow:
+                messages = await self.uow.chat_repo.get_message_list(
+                    chat_id=chat_id, limit=self.message_cache.tail_size
+                )
+        finally:
+            self.message_cache.end_load(chat_id, messages)
+        return messages
+
+    async def _get_joined_chat_ids(
+        self, current_user_id: uuid.UUID, use_cache: bool = True
+    ) -> Set[uuid.UUID]:
+        """
+        Get the set of user's chat ids.
+        Uses shared membership cache if user's chats are cached and use_cache is True.
+        Otherwise loads them from the repository (bypassing repository caches if
+        use_cache is False) and updates the cache.
+        """
+        if use_cache:
+            user_chats = self.membership_cache.get_user_chat_ids(current_user_id)
+            if user_chats is not None:
+                return user_chats
+        async with self.uow:
+            chat_repo = self.uow.chat_repo if use_cache else self.uow.uncached_chat_repo
+            chat_ids = await chat_repo.get_joined_chat_ids(user_id=current_user_id)
+        self.membership_cache.set_user_chat_ids(current_user_id, chat_ids)
+        return set(chat_ids)
+
+    async def _is_chat_member(
+        self, current_user_id: uuid.UUID, chat_id: uuid.UUID
+    ) -> bool:
+        """
+        Check whether user is a member of the chat.
+        """
+        is_member = self.membership_cache.is_member(current_user_id, chat_id)
+        if is_member is None:
+            is_member = chat_id in await self._get_joined_chat_ids(current_user_id)
+        return is_member
@@ -33,3 +33,15 @@ class NotSubscribedError(ChatManagerException):
 @dataclass()
 class BadRequest(ChatManagerException):
     error_code: str = "BAD_REQUEST"
+
+
+@dataclass()
+class RateLimitExceeded(ChatManagerException):
+    error_code: str = "RATE_LIMIT_EXCEEDED"
+    retry_after: float = 0.0  # Seconds
+
+
+@dataclass()
+class ServerOverloaded(ChatManagerException):
+    error_code: str = "SERVER_OVERLOADED"
+    retry_after: float = 0.0  # Seconds
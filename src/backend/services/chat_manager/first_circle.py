@@ -0,0 +1,98 @@
+import uuid
+from array import array
+from typing import Iterator
+
+_MASK_64 = (1 << 64) - 1
+
+
+class IdSet:
+    """
+    Compact set of UUIDs.
+    Ids are stored in the sorted array of 64-bit halves (16 bytes per id), that is
+    much smaller than the set of uuid.UUID objects for small sets.
+    """
+
+    __slots__ = ("_data",)
+
+    def __init__(self, ids: list[uuid.UUID] | None = None):
+        self._data = array("Q")
+        for id in ids or []:
+            self.add(id)
+
+    def __len__(self) -> int:
+        return len(self._data) // 2
+
+    def __contains__(self, id: uuid.UUID) -> bool:
+        index, found = self._find(id.int)
+        return found
+
+    def __iter__(self) -> Iterator[uuid.UUID]:
+        data = self._data
+        for i in range(0, len(data), 2):
+            yield uuid.UUID(int=(data[i] << 64) | data[i + 1])
+
+    def add(self, id: uuid.UUID) -> bool:
+        """
+        Add id to the set. Return True if it wasn't in the set.
+        """
+        id_int = id.int
+        index, found = self._find(id_int)
+        if found:
+            return False
+        pos = 2 * index
+        self._data[pos:pos] = array("Q", (id_int >> 64, id_int & _MASK_64))
+        return True
+
+    def _find(self, id_int: int) -> tuple[int, bool]:
+        data = self._data
+        lo, hi = 0, len(data) // 2
+        while lo < hi:
+            mid = (lo + hi) // 2
+            mid_int = (data[2 * mid] << 64) | data[2 * mid + 1]
+            if mid_int < id_int:
+                lo = mid + 1
+            elif mid_int > id_int:
+                hi = mid
+            else:
+                return mid, True
+        return lo, False
+
+
+class FirstCircle:
+    """
+    First circle state of the session: users that have mutual chats with current
+    user and ids of these mutual chats.
+    Users are keyed by `uuid.int`.
+    """
+
+    __slots__ = ("_members",)
+
+    def __init__(self):
+        self._members: dict[int, IdSet] = {}
+
+    def __len__(self) -> int:
+        return len(self._members)
+
+    def __contains__(self, user_id: uuid.UUID) -> bool:
+        return user_id.int in self._members
+
+    def __iter__(self) -> Iterator[uuid.UUID]:
+        for user_id in self._members:
+            yield uuid.UUID(int=user_id)
+
+    def add(self, user_id: uuid.UUID, chat_id: uuid.UUID) -> bool:
+        """
+        Add mutual chat of the user. Return True if user is new to the first circle.
+        """
+        user_chats = self._members.get(user_id.int)
+        if user_chats is None:
+            self._members[user_id.int] = IdSet([chat_id])
+            return True
+        user_chats.add(chat_id)
+        return False
+
+    def to_dict(self) -> dict[uuid.UUID, set[uuid.UUID]]:
+        return {
+            uuid.UUID(int=user_id): set(chat_ids)
+            for user_id, chat_ids in self._members.items()
+        }
@@ -0,0 +1,74 @@
+import time
+import uuid
+from collections.abc import Iterable, Set
+from typing import Callable
+
+from backend.services.cache.expiring_lru_cache import ExpiringLRUCache
+
+DEFAULT_MAX_USERS = 100_000
+# Limits staleness of membership changed by other processes
+DEFAULT_TTL_SEC = 300.0
+
+
+class ChatMembershipCache:
+    """
+    Process-wide cache of chat membership (user -> set of chats), shared by all
+    ChatManager instances.
+
+    User's chat set is loaded from the repository on the first request
+    (`set_user_chat_ids()`) and then kept up to date by `add_chat_members()`.
+    The number of cached users is limited by `max_users` (the least recently used
+    are evicted), entries expire `ttl` seconds after they were loaded.
+    """
+
+    def __init__(
+        self,
+        max_users: int = DEFAULT_MAX_USERS,
+        ttl: float = DEFAULT_TTL_SEC,
+        timer: Callable[[], float] = time.monotonic,
+    ):
+        self._user_chats: ExpiringLRUCache[uuid.UUID, set[uuid.UUID]] = (
+            ExpiringLRUCache(maxsize=max_users, ttl=ttl, timer=timer)
+        )
+
+    def __len__(self) -> int:
+        return len(self._user_chats)
+
+    def get_user_chat_ids(self, user_id: uuid.UUID) -> Set[uuid.UUID] | None:
+        """
+        Get the set of user's chat ids or None if it's not loaded.
+        Returned set shouldn't be modified by the caller.
+        """
+        return self._user_chats.get(user_id)
+
+    def is_member(self, user_id: uuid.UUID, chat_id: uuid.UUID) -> bool | None:
+        """
+        Check whether user is a member of the chat.
+        Returns None if user's chat set isn't loaded.
+        """
+        user_chats = self._user_chats.get(user_id)
+        if user_chats is None:
+            return None
+        return chat_id in user_chats
+
+    def set_user_chat_ids(self, user_id: uuid.UUID, chat_ids: Iterable[uuid.UUID]):
+        """
+        Replace the set of user's chat ids (e.g. with data loaded from repository).
+        """
+        self._user_chats.set(user_id, set(chat_ids))
+
+    def add_chat_members(self, chat_id: uuid.UUID, user_ids: Iterable[uuid.UUID]):
+        """
+        Register new members of the chat.
+        Only users whose chat set is loaded are updated.
+        """
+        for user_id in user_ids:
+            user_chats = self._user_chats.get(user_id)
+            if user_chats is not None:
+                user_chats.add(chat_id)
+
+    def invalidate_user(self, user_id: uuid.UUID):
+        """
+        Remove user's membership data from the cache.
+        """
+        self._user_chats.pop(user_id)
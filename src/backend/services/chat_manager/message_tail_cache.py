@@ -0,0 +1,178 @@
+import bisect
+import uuid
+from collections import OrderedDict
+
+from backend.schemas.chat_message import ChatMessageAny
+from backend.services.chat_repo.abstract_chat_repo import MAX_MESSAGE_COUNT_PER_PAGE
+
+DEFAULT_TAIL_SIZE = 2 * MAX_MESSAGE_COUNT_PER_PAGE
+DEFAULT_MAX_TOTAL_MESSAGES = 100_000
+
+
+def _message_id(message: ChatMessageAny) -> int:
+    return message.id
+
+
+class _ChatTail:
+    __slots__ = ("messages", "is_complete")
+
+    def __init__(self, messages: list[ChatMessageAny], is_complete: bool):
+        # Ordered by id. Contains all chat's messages with id >= messages[0].id
+        self.messages = messages
+        # True if there are no older messages in the chat
+        self.is_complete = is_complete
+
+
+class MessageTailCache:
+    """
+    Process-wide cache of the most recent messages of chats.
+
+    For each cached chat keeps up to `tail_size` latest messages. Chat's tail is
+    loaded from repository on the first request of the latest page and then written
+    through by ChatManager when messages are added or edited.
+    Total number of cached messages is limited by `max_total_messages`, the least
+    recently used chats are evicted.
+    Only writes made by this process are applied, so the cache can't be used when
+    several processes serve the same chats (it's disabled by
+    AppConfig.MESSAGE_TAIL_CACHE_ENABLED, see app_setups.py).
+    """
+
+    def __init__(
+        self,
+        tail_size: int = DEFAULT_TAIL_SIZE,
+        max_total_messages: int = DEFAULT_MAX_TOTAL_MESSAGES,
+    ):
+        self.tail_size = tail_size
+        self.max_total_messages = max_total_messages
+        self.hits = 0
+        self.misses = 0
+        self._chats: OrderedDict[uuid.UUID, _ChatTail] = OrderedDict()
+        self._total_messages = 0
+        self._loading: dict[uuid.UUID, int] = {}
+        self._stale_loads: set[uuid.UUID] = set()
+
+    @property
+    def total_messages(self) -> int:
+        return self._total_messages
+
+    def get_message_list(
+        self,
+        chat_id: uuid.UUID,
+        start_id: int = -1,
+        order_desc: bool = True,
+        limit: int = MAX_MESSAGE_COUNT_PER_PAGE,
+    ) -> list[ChatMessageAny] | None:
+        """
+        Get the list of chat's messages with the same semantics as
+        AbstractChatRepo.get_message_list().
+        Returns None if the result can't be built from cached messages.
+        """
+        tail = self._chats.get(chat_id)
+        res = None
+        if tail is not None:
+            res = self._get_from_tail(
+                tail, start_id=start_id, order_desc=order_desc, limit=limit
+            )
+        if res is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+            self._chats.move_to_end(chat_id)
+        return res
+
+    def begin_load(self, chat_id: uuid.UUID):
+        """
+        Register the start of loading chat's tail from repository.
+        Messages written to that chat before `end_load()` is called make loaded data
+        stale, so it will be discarded.
+        """
+        self._loading[chat_id] = self._loading.get(chat_id, 0) + 1
+
+    def end_load(self, chat_id: uuid.UUID, messages_desc: list[ChatMessageAny] | None):
+        """
+        Put the latest chat's messages (ordered by id desc, as returned by
+        repository) to the cache. Pass None if loading failed.
+        """
+        loading_count = self._loading.pop(chat_id) - 1
+        if loading_count > 0:
+            self._loading[chat_id] = loading_count
+        is_stale = chat_id in self._stale_loads
+        if loading_count == 0:
+            self._stale_loads.discard(chat_id)
+        if (messages_desc is None) or is_stale or (chat_id in self._chats):
+            return
+        messages = list(reversed(messages_desc[: self.tail_size]))
+        self._chats[chat_id] = _ChatTail(
+            messages=messages, is_complete=(len(messages_desc) < self.tail_size)
+        )
+        self._total_messages += len(messages)
+        self._evict()
+
+    def add_message(self, message: ChatMessageAny):
+        """
+        Write through the new message.
+        """
+        tail = self._get_tail_for_write(message.chat_id)
+        if tail is None:
+            return
+        messages = tail.messages
+        if (not messages) or (message.id > messages[-1].id):
+            messages.append(message)
+        else:
+            pos = bisect.bisect_left(messages, message.id, key=_message_id)
+            if (pos < len(messages)) and (messages[pos].id == message.id):
+                messages[pos] = message
+                return
+            messages.insert(pos, message)
+        self._total_messages += 1
+        if len(messages) > self.tail_size:
+            del messages[0]
+            tail.is_complete = False
+            self._total_messages -= 1
+        self._chats.move_to_end(message.chat_id)
+        self._evict()
+
+    def update_message(self, message: ChatMessageAny):
+        """
+        Write through the edited message.
+        """
+        tail = self._get_tail_for_write(message.chat_id)
+        if tail is None:
+            return
+        messages = tail.messages
+        pos = bisect.bisect_left(messages, message.id, key=_message_id)
+        if (pos < len(messages)) and (messages[pos].id == message.id):
+            messages[pos] = message
+
+    def _get_tail_for_write(self, chat_id: uuid.UUID) -> _ChatTail | None:
+        tail = self._chats.get(chat_id)
+        if (tail is None) and (chat_id in self._loading):
+            self._stale_loads.add(chat_id)
+        return tail
+
+    def _get_from_tail(
+        self, tail: _ChatTail, start_id: int, order_desc: bool, limit: int
+    ) -> list[ChatMessageAny] | None:
+        messages = tail.messages
+        if order_desc:
+            end = len(messages)
+            if start_id > 0:
+                end = bisect.bisect_left(messages, start_id, key=_message_id)
+            if end >= limit:
+                return messages[end - limit : end][::-1]  # noqa: E203
+            if tail.is_complete:
+                return messages[:end][::-1]
+            return None
+        if tail.is_complete or (
+            (start_id > 0) and messages and (start_id >= messages[0].id)
+        ):
+            begin = 0
+            if start_id > 0:
+                begin = bisect.bisect_right(messages, start_id, key=_message_id)
+            return messages[begin : begin + limit]  # noqa: E203
+        return None
+
+    def _evict(self):
+        while (self._total_messages > self.max_total_messages) and self._chats:
+            _, tail = self._chats.popitem(last=False)
+            self._total_messages -= len(tail.messages)
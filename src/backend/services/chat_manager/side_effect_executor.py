@@ -0,0 +1,113 @@
+import asyncio
+import contextvars
+import logging
+from typing import Awaitable, Callable
+
+from backend.services.uow.abstract_uow import AbstractUnitOfWork
+
+DEFAULT_MAX_QUEUE_SIZE = 100
+DEFAULT_CLOSE_TIMEOUT_SEC = 5.0
+
+logger = logging.getLogger(__name__)
+
+SideEffect = Callable[[AbstractUnitOfWork], Awaitable[None]]
+
+
+class SideEffectExecutor:
+    """
+    Per-session background worker that runs side effects of delivered events
+    (subscriptions, follow-up events), so that events are sent to the client without
+    waiting for them.
+
+    Side effects are executed one by one in the order they were scheduled. Each side
+    effect receives the executor's own UoW, so that it doesn't interfere with the UoW
+    used by the request path.
+    The number of pending side effects is limited by `max_queue_size`. schedule()
+    never waits, so it doesn't delay delivery of events. If the queue is full (the
+    worker is stuck), the side effect is not scheduled and the caller has to execute
+    it itself: side effects (e.g. subscriptions to joined chats) must not be lost.
+    Failed side effects are logged and counted, they don't stop the worker.
+    """
+
+    # Counters of all executors in this process
+    errors_total: int = 0
+    overflowed_total: int = 0
+    discarded_total: int = 0
+
+    def __init__(
+        self, uow: AbstractUnitOfWork, max_queue_size: int = DEFAULT_MAX_QUEUE_SIZE
+    ):
+        self.uow = uow
+        self.errors = 0
+        self.overflowed = 0
+        self.discarded = 0
+        self._queue: asyncio.Queue[SideEffect] = asyncio.Queue(maxsize=max_queue_size)
+        self._task: asyncio.Task | None = None
+        self._in_progress = False
+
+    def schedule(self, side_effect: SideEffect) -> bool:
+        """
+        Schedule the side effect. Returns False if the queue is full and the side
+        effect is not scheduled.
+        """
+        if self._task is None:
+            # Worker outlives the request that scheduled the first side effect, so it
+            # shouldn't inherit its context (e.g. the current tracing span)
+            self._task = asyncio.create_task(
+                self._worker(), context=contextvars.Context()
+            )
+        try:
+            self._queue.put_nowait(side_effect)
+        except asyncio.QueueFull:
+            self.overflowed += 1
+            SideEffectExecutor.overflowed_total += 1
+            logger.warning("Side effect queue is full, side effect not scheduled")
+            return False
+        return True
+
+    async def join(self):
+        """
+        Wait until all scheduled side effects are executed.
+        """
+        await self._queue.join()
+
+    async def close(self, timeout: float = DEFAULT_CLOSE_TIMEOUT_SEC):
+        """
+        Wait up to `timeout` seconds for pending side effects to be executed, then
+        stop the worker. Side effects that are not executed by then are discarded,
+        logged and counted.
+        """
+        if self._task is None:
+            return
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout=timeout)
+        except TimeoutError:
+            pass
+        discarded = self._queue.qsize() + int(self._in_progress)
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        while not self._queue.empty():
+            self._queue.get_nowait()
+            self._queue.task_done()
+        if discarded:
+            self.discarded += discarded
+            SideEffectExecutor.discarded_total += discarded
+            logger.warning("Executor closed, %d side effect(s) discarded", discarded)
+
+    async def _worker(self):
+        while True:
+            side_effect = await self._queue.get()
+            self._in_progress = True
+            try:
+                await side_effect(self.uow)
+            except Exception:
+                self.errors += 1
+                SideEffectExecutor.errors_total += 1
+                logger.exception("Side effect execution failed")
+            finally:
+                self._in_progress = False
+                self._queue.task_done()
@@ -1,6 +1,8 @@
+import sys
 import uuid
 from typing import Literal
 
 
 def channel_code(ch_type: Literal["chat", "user"], id: uuid.UUID) -> str:
-    return f"{ch_type}_{id}"
+    # Interned, so that all sessions subscribed to the channel share one string
+    return sys.intern(f"{ch_type}_{id}")
@@ -4,11 +4,13 @@ from abc import ABC, abstractmethod
 from backend.schemas.chat import ChatCreateSchema, ChatExtSchema, ChatSchema
 from backend.schemas.chat_message import (
     ChatMessageAny,
+    ChatMessageSearchPageSchema,
     ChatNotificationCreateSchema,
     ChatNotificationSchema,
     ChatUserMessageCreateSchema,
     ChatUserMessageSchema,
 )
+from backend.schemas.outbox_event import OutboxEventSchema
 from backend.schemas.user import UserSchemaExt
 from backend.schemas.user_chat_state import UserChatStateSchema
 
@@ -62,6 +64,19 @@ class AbstractChatRepo(ABC):
         """
         raise NotImplementedError()
 
+    @abstractmethod
+    async def get_chat_member_ids(
+        self, chat_id_list: list[uuid.UUID]
+    ) -> dict[uuid.UUID, list[uuid.UUID]]:
+        """
+        Get ids of members of chats from chat_id_list.
+        Returns dict chat_id -> list of user ids. Chats without members are omitted.
+
+        Raises:
+         - ChatRepoDatabaseError if the database fails
+        """
+        raise NotImplementedError()
+
     @abstractmethod
     async def get_joined_chat_list(
         self,
@@ -72,7 +87,9 @@ class AbstractChatRepo(ABC):
         chat_id_list: list[uuid.UUID] | None = None,
     ) -> list[ChatExtSchema]:
         """
-        Get list of joined chats by user.
+        Get list of joined chats by user (with user's unread messages counters).
+        Unread messages counter is the number of messages of other users after
+        user's `last_read`, it's capped at UNREAD_COUNT_LIMIT.
         If chat_id_list is not empty list, then filter chats by this list.
 
         Raises:
@@ -91,12 +108,40 @@ class AbstractChatRepo(ABC):
         """
         raise NotImplementedError()
 
+    @abstractmethod
+    async def add_users_to_chat(
+        self, chat_id: uuid.UUID, user_ids: list[uuid.UUID]
+    ) -> None:
+        """
+        Add user-chat link records for all users in the list to the DB.
+
+        Raises:
+         - ChatRepoRequestError (some of user-chat links already exist)
+         - ChatRepoDatabaseError if the database fails
+        """
+        raise NotImplementedError()
+
     @abstractmethod
     async def add_message(
         self, message: ChatUserMessageCreateSchema
     ) -> ChatUserMessageSchema:
         """
         Add message record to the DB.
+        Message `id` (time-ordered) and `dt` are generated by the application.
+
+        Raises:
+         - ChatRepoDatabaseError if the database fails
+        """
+        raise NotImplementedError()
+
+    @abstractmethod
+    async def add_messages(
+        self, messages: list[ChatUserMessageCreateSchema]
+    ) -> list[ChatUserMessageSchema]:
+        """
+        Add several message records to the DB in one batch.
+        Returned messages are in the same order as input messages, their ids are
+        increasing in this order.
 
         Raises:
          - ChatRepoDatabaseError if the database fails
@@ -157,6 +202,37 @@ class AbstractChatRepo(ABC):
         """
         raise NotImplementedError()
 
+    @abstractmethod
+    async def search_messages(
+        self,
+        query: str,
+        chat_list_filter: list[uuid.UUID],
+        max_id: int | None = None,
+        start_rank: float | None = None,
+        start_id: int = -1,
+        limit: int = MAX_MESSAGE_COUNT_PER_PAGE,
+    ) -> ChatMessageSearchPageSchema:
+        """
+        Full-text search of user messages in the chats from chat_list_filter.
+        Results are ordered by rank (best first), then by id (newest first).
+
+        Paging is keyset: to get the next page pass rank and message id of the last
+        result as start_rank and start_id (that message is not included in the
+        results), so deep pages cost the same as the first one.
+        max_id is the visibility bound: only messages with id <= max_id are
+        searched. If it's None, the current max message id is used. It's returned
+        with the page and should be passed back with next pages, so that messages
+        added meanwhile don't appear in the middle of the results.
+        bm25 rank depends on statistics of the whole index, so ranks of older
+        messages drift slightly as messages are added or edited. Results near the
+        page boundary can then be repeated or skipped, which is acceptable for
+        search.
+
+        Raises:
+         - ChatRepoDatabaseError if the database fails
+        """
+        raise NotImplementedError()
+
     @abstractmethod
     async def get_user_chat_state(
         self,
@@ -172,11 +248,40 @@ class AbstractChatRepo(ABC):
 
     @abstractmethod
     async def update_user_chat_state_from_dict(
-        self, user_id: uuid.UUID, user_chat_state_dict: dict[uuid.UUID, dict[str, int]]
-    ):
+        self,
+        user_id: uuid.UUID,
+        user_chat_state_dict: dict[uuid.UUID, dict[str, int]],
+        *,
+        clamp_to_last_message: bool = False,
+    ) -> list[UserChatStateSchema]:
         """
         Updates data about last delivered and last read chat message, according to the
         data in the input dict.
+        Values are never decreased (the greatest of stored and passed value is kept).
+        If `clamp_to_last_message` is True, passed values are limited by the id of the
+        last message of the chat (should be used for values received from clients).
+        Returns updated records with unread messages counters.
+
+        Raises:
+         - ChatRepoDatabaseError if the database fails
+        """
+        raise NotImplementedError()
+
+    @abstractmethod
+    async def update_user_chat_state_bulk(
+        self,
+        user_chat_state_dict: dict[uuid.UUID, dict[uuid.UUID, dict[str, int]]],
+        *,
+        clamp_to_last_message: bool = False,
+    ) -> list[UserChatStateSchema]:
+        """
+        Updates data about last delivered and last read chat message for several
+        users at once. Input dict maps user_id to the dict of the same format as
+        `update_user_chat_state_from_dict()` accepts.
+        Values are never decreased (the greatest of stored and passed value is kept).
+        If `clamp_to_last_message` is True, passed values are limited by the id of the
+        last message of the chat (should be used for values received from clients).
+        Returns updated records with unread messages counters.
 
         Raises:
          - ChatRepoDatabaseError if the database fails
@@ -189,13 +294,17 @@ class AbstractChatRepo(ABC):
         *,
         chat_list_filter: list[uuid.UUID] | None = None,
         name_filter: str | None = None,
+        id_list_filter: list[uuid.UUID] | None = None,
+        start_id: uuid.UUID | None = None,
         offset: int = 0,
         limit: int | None = None,
     ) -> list[UserSchemaExt]:
         """
-        Get the list of users filtered by chat_list and name filters.
+        Get the list of users filtered by chat_list, name and id_list filters.
         If the filter value is None, this filter doesn't have impact on results.
-        Results are paginated.
+        Results are ordered by (name, id) and paginated.
+        If start_id is specified, only users that follow the user with id=start_id
+        in this order are returned (user with id=start_id is not included).
 
         Raises:
          - ChatRepoDatabaseError if the database fails
@@ -211,3 +320,90 @@ class AbstractChatRepo(ABC):
          - ChatRepoDatabaseError if the database fails
         """
         raise NotImplementedError()
+
+    @abstractmethod
+    async def add_outbox_events(self, events: list[tuple[str, str]]):
+        """
+        Add events to the outbox. Events is a list of (channel, event JSON) pairs.
+        Events are stored in the same transaction as other changes.
+
+        Raises:
+         - ChatRepoDatabaseError if the database fails
+        """
+        raise NotImplementedError()
+
+    @abstractmethod
+    async def acquire_outbox_lease(self, owner: str, now: float, ttl: float) -> bool:
+        """
+        Acquire or prolong the outbox lease for `owner` until `now + ttl`.
+        Returns False if the lease is held by another owner and hasn't expired.
+
+        Raises:
+         - ChatRepoDatabaseError if the database fails
+        """
+        raise NotImplementedError()
+
+    @abstractmethod
+    async def get_outbox_events(self, limit: int) -> list[OutboxEventSchema]:
+        """
+        Get the oldest events from the outbox (ordered by id).
+
+        Raises:
+         - ChatRepoDatabaseError if the database fails
+        """
+        raise NotImplementedError()
+
+    @abstractmethod
+    async def delete_outbox_events(self, id_list: list[int]):
+        """
+        Delete events from the outbox by their ids.
+
+        Raises:
+         - ChatRepoDatabaseError if the database fails
+        """
+        raise NotImplementedError()
+
+    @abstractmethod
+    async def update_presence_sessions(
+        self,
+        node_id: str,
+        heartbeats: dict[uuid.UUID, float],
+        closed: list[uuid.UUID],
+    ):
+        """
+        Update presence sessions of the node: store the last heartbeat time of users
+        that have sessions on the node (`heartbeats`) and remove users whose sessions
+        on the node are closed (`closed`).
+
+        Raises:
+         - ChatRepoDatabaseError if the database fails
+        """
+        raise NotImplementedError()
+
+    @abstractmethod
+    async def update_presence_status(
+        self, user_ids: list[uuid.UUID], alive_since: float | None
+    ) -> tuple[list[uuid.UUID], list[uuid.UUID]]:
+        """
+        Update published online status of users according to presence sessions of
+        all nodes. Sessions without heartbeats since `alive_since` are removed first.
+        Users from `user_ids` that have sessions are marked online, any online users
+        that have no sessions left are marked offline.
+        Returns (went_online, went_offline) lists of users whose status has changed.
+        Status of each user is changed atomically, so when several nodes call it
+        concurrently, only one of them gets each transition.
+
+        Raises:
+         - ChatRepoDatabaseError if the database fails
+        """
+        raise NotImplementedError()
+
+    @abstractmethod
+    async def get_online_user_ids(self, user_ids: list[uuid.UUID]) -> list[uuid.UUID]:
+        """
+        Return users from the `user_ids` list whose published status is online.
+
+        Raises:
+         - ChatRepoDatabaseError if the database fails
+        """
+        raise NotImplementedError()
@@ -0,0 +1,378 @@
+import uuid
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Hashable, TypeVar
+
+from backend.schemas.chat import ChatCreateSchema, ChatExtSchema, ChatSchema
+from backend.schemas.chat_message import (
+    ChatMessageAny,
+    ChatMessageSearchPageSchema,
+    ChatNotificationCreateSchema,
+    ChatNotificationSchema,
+    ChatUserMessageCreateSchema,
+    ChatUserMessageSchema,
+)
+from backend.schemas.outbox_event import OutboxEventSchema
+from backend.schemas.user import UserSchemaExt
+from backend.schemas.user_chat_state import UserChatStateSchema
+from backend.services.cache.expiring_lru_cache import ExpiringLRUCache
+from backend.services.chat_repo.abstract_chat_repo import (
+    MAX_MESSAGE_COUNT_PER_PAGE,
+    AbstractChatRepo,
+)
+
+T = TypeVar("T")
+
+
+@dataclass
+class CachePolicy:
+    maxsize: int
+    ttl: float | None
+
+
+@dataclass
+class CacheStats:
+    hits: int
+    misses: int
+    size: int
+
+
+DEFAULT_CACHE_POLICIES: dict[str, CachePolicy] = {
+    "get_chat": CachePolicy(maxsize=10_000, ttl=300),
+    "get_owned_chats": CachePolicy(maxsize=10_000, ttl=60),
+    # get_joined_chat_ids is not cached by default: chat membership is cached by
+    # ChatMembershipCache, that is updated on membership changes.
+    # get_user_by_id is not cached by default: users are cached by AuthCache
+}
+
+
+class ChatRepoCache:
+    """
+    Process-wide storage for CachingChatRepo.
+    Keeps separate LRU cache for each cached method, configured by `policies`
+    (method name -> CachePolicy). Methods that aren't in `policies` are not cached.
+
+    Loads are registered by `begin_load()`/`end_load()`. If the key is invalidated
+    while it's being loaded, the loaded value may be read before the write was
+    committed, so it's not put to the cache.
+    """
+
+    def __init__(
+        self,
+        policies: dict[str, CachePolicy] | None = None,
+        ttl: float | None = None,
+    ):
+        """
+        If `ttl` is passed, it overrides TTL of all policies.
+        """
+        if policies is None:
+            policies = DEFAULT_CACHE_POLICIES
+        self._caches: dict[str, ExpiringLRUCache[Hashable, Any]] = {
+            method: ExpiringLRUCache(
+                maxsize=policy.maxsize, ttl=(policy.ttl if ttl is None else ttl)
+            )
+            for method, policy in policies.items()
+        }
+        # (method, key) -> number of loads in progress
+        self._loading: dict[tuple[str, Hashable], int] = {}
+        # Keys invalidated while they were being loaded
+        self._stale_loads: set[tuple[str, Hashable]] = set()
+
+    def is_cached(self, method: str) -> bool:
+        return method in self._caches
+
+    def get(self, method: str, key: Hashable) -> Any | None:
+        return self._caches[method].get(key)
+
+    def set(self, method: str, key: Hashable, value: Any):
+        self._caches[method].set(key, value)
+
+    def begin_load(self, method: str, key: Hashable):
+        """
+        Register the start of loading the value from repository.
+        """
+        load_key = (method, key)
+        self._loading[load_key] = self._loading.get(load_key, 0) + 1
+
+    def end_load(self, method: str, key: Hashable, value: Any | None):
+        """
+        Put loaded value to the cache unless the key was invalidated during loading.
+        Pass None if loading failed.
+        """
+        load_key = (method, key)
+        loading_count = self._loading.pop(load_key) - 1
+        if loading_count > 0:
+            self._loading[load_key] = loading_count
+        is_stale = load_key in self._stale_loads
+        if loading_count == 0:
+            self._stale_loads.discard(load_key)
+        if (value is not None) and (not is_stale):
+            self._caches[method].set(key, value)
+
+    def invalidate(self, method: str, key: Hashable):
+        cache = self._caches.get(method)
+        if cache is not None:
+            cache.pop(key)
+            if (method, key) in self._loading:
+                self._stale_loads.add((method, key))
+
+    def stats(self) -> dict[str, CacheStats]:
+        return {
+            method: CacheStats(hits=cache.hits, misses=cache.misses, size=len(cache))
+            for method, cache in self._caches.items()
+        }
+
+
+class CachingChatRepo(AbstractChatRepo):
+    """
+    Caching decorator for any AbstractChatRepo.
+
+    Results of hot read methods are cached in the shared ChatRepoCache.
+    Write methods invalidate affected keys. Invalidations are applied immediately
+    and once again after the transaction is committed (`on_commit()`), so that
+    values read by other sessions before the commit don't stay in the cache.
+    After the first write in the transaction the cache is bypassed until commit or
+    rollback, so that uncommitted data never gets into the cache.
+    Only calls without pagination (offset=0, limit=None) are cached.
+    """
+
+    def __init__(self, repo: AbstractChatRepo, cache: ChatRepoCache):
+        self._repo = repo
+        self._cache = cache
+        self._pending_invalidations: list[tuple[str, Hashable]] = []
+
+    def on_commit(self):
+        for method, key in self._pending_invalidations:
+            self._cache.invalidate(method, key)
+        self._pending_invalidations.clear()
+
+    def on_rollback(self):
+        self._pending_invalidations.clear()
+
+    # Cached read methods
+
+    async def get_chat(self, chat_id: uuid.UUID) -> ChatSchema | None:
+        return await self._cached(
+            "get_chat", chat_id, lambda: self._repo.get_chat(chat_id=chat_id)
+        )
+
+    async def get_owned_chats(
+        self, owner_id: uuid.UUID, offset: int = 0, limit: int | None = None
+    ) -> list[ChatSchema]:
+        if (offset != 0) or (limit is not None):
+            return await self._repo.get_owned_chats(
+                owner_id=owner_id, offset=offset, limit=limit
+            )
+        res = await self._cached(
+            "get_owned_chats",
+            owner_id,
+            lambda: self._repo.get_owned_chats(owner_id=owner_id),
+        )
+        return list(res)
+
+    async def get_joined_chat_ids(
+        self, user_id: uuid.UUID, offset: int = 0, limit: int | None = None
+    ) -> list[uuid.UUID]:
+        if (offset != 0) or (limit is not None):
+            return await self._repo.get_joined_chat_ids(
+                user_id=user_id, offset=offset, limit=limit
+            )
+        res = await self._cached(
+            "get_joined_chat_ids",
+            user_id,
+            lambda: self._repo.get_joined_chat_ids(user_id=user_id),
+        )
+        return list(res)
+
+    async def get_user_by_id(self, user_id: uuid.UUID) -> UserSchemaExt:
+        return await self._cached(
+            "get_user_by_id", user_id, lambda: self._repo.get_user_by_id(user_id)
+        )
+
+    # Write methods that affect cached data
+
+    async def add_chat(self, chat: ChatCreateSchema) -> ChatSchema:
+        self._invalidate("get_chat", chat.id)
+        self._invalidate("get_owned_chats", chat.owner_id)
+        return await self._repo.add_chat(chat=chat)
+
+    async def add_user_to_chat(self, chat_id: uuid.UUID, user_id: uuid.UUID) -> None:
+        self._invalidate("get_joined_chat_ids", user_id)
+        await self._repo.add_user_to_chat(chat_id=chat_id, user_id=user_id)
+
+    async def add_users_to_chat(
+        self, chat_id: uuid.UUID, user_ids: list[uuid.UUID]
+    ) -> None:
+        for user_id in user_ids:
+            self._invalidate("get_joined_chat_ids", user_id)
+        await self._repo.add_users_to_chat(chat_id=chat_id, user_ids=user_ids)
+
+    # Methods that are not cached
+
+    async def get_chat_member_ids(
+        self, chat_id_list: list[uuid.UUID]
+    ) -> dict[uuid.UUID, list[uuid.UUID]]:
+        return await self._repo.get_chat_member_ids(chat_id_list=chat_id_list)
+
+    async def get_joined_chat_list(
+        self,
+        user_id: uuid.UUID,
+        *,
+        offset: int = 0,
+        limit: int | None = None,
+        chat_id_list: list[uuid.UUID] | None = None,
+    ) -> list[ChatExtSchema]:
+        return await self._repo.get_joined_chat_list(
+            user_id=user_id, offset=offset, limit=limit, chat_id_list=chat_id_list
+        )
+
+    async def add_message(
+        self, message: ChatUserMessageCreateSchema
+    ) -> ChatUserMessageSchema:
+        return await self._repo.add_message(message=message)
+
+    async def add_messages(
+        self, messages: list[ChatUserMessageCreateSchema]
+    ) -> list[ChatUserMessageSchema]:
+        return await self._repo.add_messages(messages=messages)
+
+    async def edit_message(self, message_id: int, text: str) -> ChatUserMessageSchema:
+        return await self._repo.edit_message(message_id=message_id, text=text)
+
+    async def get_message(self, message_id: int) -> ChatUserMessageSchema:
+        return await self._repo.get_message(message_id=message_id)
+
+    async def add_notification(
+        self, notification: ChatNotificationCreateSchema
+    ) -> ChatNotificationSchema:
+        return await self._repo.add_notification(notification=notification)
+
+    async def get_message_list(
+        self,
+        chat_id: uuid.UUID,
+        start_id: int = -1,
+        order_desc: bool = True,
+        limit: int = MAX_MESSAGE_COUNT_PER_PAGE,
+    ) -> list[ChatMessageAny]:
+        return await self._repo.get_message_list(
+            chat_id=chat_id, start_id=start_id, order_desc=order_desc, limit=limit
+        )
+
+    async def search_messages(
+        self,
+        query: str,
+        chat_list_filter: list[uuid.UUID],
+        max_id: int | None = None,
+        start_rank: float | None = None,
+        start_id: int = -1,
+        limit: int = MAX_MESSAGE_COUNT_PER_PAGE,
+    ) -> ChatMessageSearchPageSchema:
+        return await self._repo.search_messages(
+            query=query,
+            chat_list_filter=chat_list_filter,
+            max_id=max_id,
+            start_rank=start_rank,
+            start_id=start_id,
+            limit=limit,
+        )
+
+    async def get_user_chat_state(
+        self,
+        user_id: uuid.UUID,
+    ) -> list[UserChatStateSchema]:
+        return await self._repo.get_user_chat_state(user_id=user_id)
+
+    async def update_user_chat_state_from_dict(
+        self,
+        user_id: uuid.UUID,
+        user_chat_state_dict: dict[uuid.UUID, dict[str, int]],
+        *,
+        clamp_to_last_message: bool = False,
+    ) -> list[UserChatStateSchema]:
+        return await self._repo.update_user_chat_state_from_dict(
+            user_id=user_id,
+            user_chat_state_dict=user_chat_state_dict,
+            clamp_to_last_message=clamp_to_last_message,
+        )
+
+    async def update_user_chat_state_bulk(
+        self,
+        user_chat_state_dict: dict[uuid.UUID, dict[uuid.UUID, dict[str, int]]],
+        *,
+        clamp_to_last_message: bool = False,
+    ) -> list[UserChatStateSchema]:
+        return await self._repo.update_user_chat_state_bulk(
+            user_chat_state_dict=user_chat_state_dict,
+            clamp_to_last_message=clamp_to_last_message,
+        )
+
+    async def get_user_list(
+        self,
+        *,
+        chat_list_filter: list[uuid.UUID] | None = None,
+        name_filter: str | None = None,
+        id_list_filter: list[uuid.UUID] | None = None,
+        start_id: uuid.UUID | None = None,
+        offset: int = 0,
+        limit: int | None = None,
+    ) -> list[UserSchemaExt]:
+        return await self._repo.get_user_list(
+            chat_list_filter=chat_list_filter,
+            name_filter=name_filter,
+            id_list_filter=id_list_filter,
+            start_id=start_id,
+            offset=offset,
+            limit=limit,
+        )
+
+    async def add_outbox_events(self, events: list[tuple[str, str]]):
+        await self._repo.add_outbox_events(events=events)
+
+    async def acquire_outbox_lease(self, owner: str, now: float, ttl: float) -> bool:
+        return await self._repo.acquire_outbox_lease(owner=owner, now=now, ttl=ttl)
+
+    async def get_outbox_events(self, limit: int) -> list[OutboxEventSchema]:
+        return await self._repo.get_outbox_events(limit=limit)
+
+    async def delete_outbox_events(self, id_list: list[int]):
+        await self._repo.delete_outbox_events(id_list=id_list)
+
+    async def update_presence_sessions(
+        self,
+        node_id: str,
+        heartbeats: dict[uuid.UUID, float],
+        closed: list[uuid.UUID],
+    ):
+        await self._repo.update_presence_sessions(
+            node_id=node_id, heartbeats=heartbeats, closed=closed
+        )
+
+    async def update_presence_status(
+        self, user_ids: list[uuid.UUID], alive_since: float | None
+    ) -> tuple[list[uuid.UUID], list[uuid.UUID]]:
+        return await self._repo.update_presence_status(
+            user_ids=user_ids, alive_since=alive_since
+        )
+
+    async def get_online_user_ids(self, user_ids: list[uuid.UUID]) -> list[uuid.UUID]:
+        return await self._repo.get_online_user_ids(user_ids=user_ids)
+
+    # Private methods
+
+    async def _cached(
+        self, method: str, key: Hashable, loader: Callable[[], Awaitable[T]]
+    ) -> T:
+        if self._pending_invalidations or (not self._cache.is_cached(method)):
+            return await loader()
+        value = self._cache.get(method, key)
+        if value is None:
+            self._cache.begin_load(method, key)
+            try:
+                value = await loader()
+            finally:
+                self._cache.end_load(method, key, value)
+        return value
+
+    def _invalidate(self, method: str, key: Hashable):
+        if self._cache.is_cached(method):
+            self._cache.invalidate(method, key)
+            self._pending_invalidations.append((method, key))
@@ -0,0 +1,83 @@
+import os
+import time
+from datetime import datetime, timezone
+from typing import Callable, Mapping
+
+# Id layout (from the most significant bits):
+#   timestamp (ms since EPOCH) | node id | sequence number within the millisecond
+# Ids fit into 53 bits, so they are safely represented by JavaScript numbers
+TIMESTAMP_BITS = 41  # ~69 years
+NODE_BITS = 4
+SEQUENCE_BITS = 8  # 256 ids per millisecond per node
+MAX_NODE_ID = (1 << NODE_BITS) - 1
+MAX_SEQUENCE = (1 << SEQUENCE_BITS) - 1
+EPOCH_MS = int(datetime(2024, 1, 1, tzinfo=timezone.utc).timestamp() * 1000)
+# Environment variable with the node id. Every process that writes messages to the
+# same DB should have its own node id
+NODE_ID_ENV_VAR = "MESSAGE_ID_NODE_ID"
+
+
+class MessageIdGenerator:
+    """
+    Generates unique time-ordered integer ids of messages (snowflake-style).
+
+    Ids generated by one generator are strictly increasing, even if the clock goes
+    backwards or more than 256 ids are requested within one millisecond (in these
+    cases the timestamp part is borrowed from the next milliseconds).
+    Ids generated by different nodes (processes) are unique if their `node_id`s are
+    different, and ordered by generation time with millisecond precision.
+    """
+
+    def __init__(
+        self,
+        node_id: int = 0,
+        epoch_ms: int = EPOCH_MS,
+        timer: Callable[[], float] = time.time,
+    ):
+        if not 0 <= node_id <= MAX_NODE_ID:
+            raise ValueError(f"node_id should be in range [0, {MAX_NODE_ID}]")
+        self.node_id = node_id
+        self._epoch_ms = epoch_ms
+        self._timer = timer
+        self._last_ms = -1
+        self._sequence = 0
+
+    def next_id(self) -> int:
+        now_ms = int(self._timer() * 1000) - self._epoch_ms
+        if now_ms > self._last_ms:
+            self._last_ms = now_ms
+            self._sequence = 0
+        else:
+            self._sequence += 1
+            if self._sequence > MAX_SEQUENCE:
+                self._last_ms += 1
+                self._sequence = 0
+        return (
+            (self._last_ms << (NODE_BITS + SEQUENCE_BITS))
+            | (self.node_id << SEQUENCE_BITS)
+            | self._sequence
+        )
+
+    def next_ids(self, count: int) -> list[int]:
+        return [self.next_id() for _ in range(count)]
+
+
+def node_id_from_env(environ: Mapping[str, str] = os.environ) -> int | None:
+    """
+    Read node id from the `MESSAGE_ID_NODE_ID` environment variable.
+    Return None if it's not set, raise ValueError if it's invalid.
+    """
+    value = environ.get(NODE_ID_ENV_VAR)
+    if value is None:
+        return None
+    try:
+        node_id = int(value)
+    except ValueError:
+        raise ValueError(f"{NODE_ID_ENV_VAR} should be an integer, got {value!r}")
+    if not 0 <= node_id <= MAX_NODE_ID:
+        raise ValueError(f"{NODE_ID_ENV_VAR} should be in range [0, {MAX_NODE_ID}]")
+    return node_id
+
+
+# Node id is validated at import, so the misconfigured process fails at startup
+message_id_generator = MessageIdGenerator(node_id=node_id_from_env() or 0)
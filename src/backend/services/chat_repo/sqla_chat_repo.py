@@ -1,25 +1,54 @@
 import uuid
 from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Any
 
 from pydantic import TypeAdapter
-from sqlalchemy import and_, delete, insert, select
+from sqlalchemy import (
+    and_,
+    delete,
+    func,
+    insert,
+    literal,
+    literal_column,
+    or_,
+    select,
+    tuple_,
+    update,
+)
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.exc import IntegrityError, OperationalError, SQLAlchemyError
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from backend.models.chat import Chat, ChatExt
-from backend.models.chat_message import ChatMessage, ChatNotification, ChatUserMessage
+from backend.models.chat_message import (
+    ChatMessage,
+    ChatNotification,
+    ChatUserMessage,
+    chat_messages_fts,
+)
+from backend.models.outbox_event import OutboxEvent, OutboxLease
 from backend.models.user import User
 from backend.models.user_chat_link import UserChatLink
 from backend.models.user_chat_state import UserChatState
-from backend.schemas.chat import ChatCreateSchema, ChatExtSchema, ChatSchema
+from backend.models.user_presence import PresenceSession, UserPresence
+from backend.schemas.chat import (
+    UNREAD_COUNT_LIMIT,
+    ChatCreateSchema,
+    ChatExtSchema,
+    ChatSchema,
+)
 from backend.schemas.chat_message import (
     AnnotatedChatMessageAny,
     ChatMessageAny,
+    ChatMessageSearchPageSchema,
+    ChatMessageSearchResultSchema,
     ChatNotificationCreateSchema,
     ChatNotificationSchema,
     ChatUserMessageCreateSchema,
     ChatUserMessageSchema,
 )
+from backend.schemas.outbox_event import OutboxEventSchema
 from backend.schemas.user import UserSchemaExt
 from backend.schemas.user_chat_state import UserChatStateSchema
 from backend.services.chat_repo.abstract_chat_repo import (
@@ -31,6 +60,20 @@ from backend.services.chat_repo.chat_repo_exc import (
     ChatRepoException,
     ChatRepoRequestError,
 )
+from backend.services.chat_repo.message_id_generator import (
+    MessageIdGenerator,
+    message_id_generator,
+)
+from backend.services.metrics.metrics import metrics_registry, timed_methods
+from backend.services.tracing.tracing import traced_methods
+
+DB_QUERY_LATENCY = metrics_registry.histogram(
+    "chat_repo_query_duration_seconds",
+    "Time of execution of chat repository methods (DB queries)",
+    labelnames=("method",),
+)
+# Name of the row of the outbox_lease table
+OUTBOX_LEASE_NAME = "outbox"
 
 
 @contextmanager
@@ -48,9 +91,55 @@ def sqla_exceptions_to_repo_exc(*args, **kwds):
         raise ChatRepoDatabaseError(detail=str(exc))
 
 
+def fts_match_query(query: str) -> str:
+    """
+    Convert user's search string to FTS5 query: every word is quoted (to escape
+    FTS5 syntax), the last word is used as a prefix.
+    """
+    words = ['"' + word.replace('"', '""') + '"' for word in query.split()]
+    if words:
+        words[-1] += "*"
+    return " ".join(words)
+
+
+def unread_count_st(chat_id: Any, user_id: Any, last_read: Any) -> Any:
+    """
+    Build scalar subquery that counts messages of other users after `last_read`.
+    Counting stops at UNREAD_COUNT_LIMIT, so only a few last messages of the chat
+    are scanned (via the chat_id index).
+    Arguments are SQL expressions (or values), the subquery is correlated with the
+    tables they refer to.
+    """
+    unread_ids_st = (
+        select(ChatUserMessage.id)
+        .where(
+            ChatUserMessage.chat_id == chat_id,
+            ChatUserMessage.id > last_read,
+            ChatUserMessage.sender_id != user_id,
+        )
+        .limit(UNREAD_COUNT_LIMIT)
+        .correlate_except(ChatUserMessage)
+        .subquery()
+    )
+    return select(func.count()).select_from(unread_ids_st).scalar_subquery()
+
+
+def _utc_now() -> datetime:
+    # Naive UTC datetime, the same as SQLite's CURRENT_TIMESTAMP and the values read
+    # from the DB
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+@traced_methods("chat_repo.", sorted(AbstractChatRepo.__abstractmethods__))
+@timed_methods(DB_QUERY_LATENCY, sorted(AbstractChatRepo.__abstractmethods__))
 class SQLAlchemyChatRepo(AbstractChatRepo):
-    def __init__(self, session: AsyncSession):
+    def __init__(
+        self,
+        session: AsyncSession,
+        id_generator: MessageIdGenerator = message_id_generator,
+    ):
         self._session = session
+        self._id_generator = id_generator
 
     async def add_chat(self, chat: ChatCreateSchema) -> ChatSchema:
         with sqla_exceptions_to_repo_exc():
@@ -90,6 +179,19 @@ class SQLAlchemyChatRepo(AbstractChatRepo):
             res = await self._session.scalars(st)
         return list(res)
 
+    async def get_chat_member_ids(
+        self, chat_id_list: list[uuid.UUID]
+    ) -> dict[uuid.UUID, list[uuid.UUID]]:
+        st = select(UserChatLink.chat_id, UserChatLink.user_id).where(
+            UserChatLink.chat_id.in_(chat_id_list)
+        )
+        with sqla_exceptions_to_repo_exc():
+            res = await self._session.execute(st)
+        chat_members: dict[uuid.UUID, list[uuid.UUID]] = {}
+        for chat_id, user_id in res:
+            chat_members.setdefault(chat_id, []).append(user_id)
+        return chat_members
+
     async def get_joined_chat_list(
         self,
         user_id: uuid.UUID,
@@ -123,10 +225,23 @@ class SQLAlchemyChatRepo(AbstractChatRepo):
                 chat_ids_st = chat_ids_st.limit(limit)
             chats_st = select(ChatExt).where(ChatExt.id.in_(chat_ids_st))
 
+        chats_st = chats_st.add_columns(
+            unread_count_st(
+                ChatExt.id, user_id, func.coalesce(UserChatState.last_read, 0)
+            )
+        ).outerjoin(
+            UserChatState,
+            and_(UserChatState.chat_id == ChatExt.id, UserChatState.user_id == user_id),
+        )
         with sqla_exceptions_to_repo_exc():
-            chats = await self._session.scalars(chats_st)
+            rows = await self._session.execute(chats_st)
 
-        return [ChatExtSchema.model_validate(chat) for chat in chats]
+        return [
+            ChatExtSchema.model_validate(chat).model_copy(
+                update={"unread_count": unread_count}
+            )
+            for chat, unread_count in rows
+        ]
 
     async def add_user_to_chat(self, chat_id: uuid.UUID, user_id: uuid.UUID) -> None:
         with sqla_exceptions_to_repo_exc():
@@ -134,18 +249,41 @@ class SQLAlchemyChatRepo(AbstractChatRepo):
                 insert(UserChatLink), {"user_id": user_id, "chat_id": chat_id}
             )
 
+    async def add_users_to_chat(
+        self, chat_id: uuid.UUID, user_ids: list[uuid.UUID]
+    ) -> None:
+        if not user_ids:
+            return
+        with sqla_exceptions_to_repo_exc():
+            await self._session.execute(
+                insert(UserChatLink).values(
+                    [{"user_id": user_id, "chat_id": chat_id} for user_id in user_ids]
+                )
+            )
+
     async def add_message(
         self, message: ChatUserMessageCreateSchema
     ) -> ChatUserMessageSchema:
+        return (await self.add_messages([message]))[0]
+
+    async def add_messages(
+        self, messages: list[ChatUserMessageCreateSchema]
+    ) -> list[ChatUserMessageSchema]:
+        if not messages:
+            return []
+        dt = _utc_now()
+        messages_in_db = [
+            ChatUserMessageSchema(**message.model_dump(), id=message_id, dt=dt)
+            for message, message_id in zip(
+                messages, self._id_generator.next_ids(len(messages))
+            )
+        ]
         with sqla_exceptions_to_repo_exc():
-            message_in_db = await self._session.scalar(
-                insert(ChatUserMessage).returning(ChatUserMessage),
-                message.model_dump(exclude_unset=True),
+            await self._session.execute(
+                insert(ChatUserMessage),
+                [message.model_dump() for message in messages_in_db],
             )
-        if message_in_db:
-            return ChatUserMessageSchema.model_validate(message_in_db)
-        else:
-            raise ChatRepoException()
+        return messages_in_db
 
     async def edit_message(self, message_id: int, text: str) -> ChatUserMessageSchema:
         with sqla_exceptions_to_repo_exc():
@@ -165,15 +303,17 @@ class SQLAlchemyChatRepo(AbstractChatRepo):
     async def add_notification(
         self, notification: ChatNotificationCreateSchema
     ) -> ChatNotificationSchema:
+        notification_in_db = ChatNotificationSchema(
+            **notification.model_dump(exclude={"params"}),
+            params=notification.params,
+            id=self._id_generator.next_id(),
+            dt=_utc_now(),
+        )
         with sqla_exceptions_to_repo_exc():
-            notification_in_db = await self._session.scalar(
-                insert(ChatNotification).returning(ChatNotification),
-                notification.model_dump(exclude_unset=True),
+            await self._session.execute(
+                insert(ChatNotification), [notification_in_db.model_dump()]
             )
-        if notification_in_db:
-            return ChatNotificationSchema.model_validate(notification_in_db)
-        else:
-            raise ChatRepoException()
+        return notification_in_db
 
     async def get_message_list(
         self,
@@ -200,6 +340,54 @@ class SQLAlchemyChatRepo(AbstractChatRepo):
 
             return [message_adapter.validate_python(message) for message in res]
 
+    async def search_messages(
+        self,
+        query: str,
+        chat_list_filter: list[uuid.UUID],
+        max_id: int | None = None,
+        start_rank: float | None = None,
+        start_id: int = -1,
+        limit: int = MAX_MESSAGE_COUNT_PER_PAGE,
+    ) -> ChatMessageSearchPageSchema:
+        with sqla_exceptions_to_repo_exc():
+            if max_id is None:
+                max_id = await self._session.scalar(
+                    select(func.coalesce(func.max(ChatMessage.id), 0))
+                )
+                assert max_id is not None
+            match_query = fts_match_query(query)
+            if (not match_query) or (not chat_list_filter):
+                return ChatMessageSearchPageSchema(results=[], max_id=max_id)
+            rank = chat_messages_fts.c.rank
+            st = (
+                select(ChatUserMessage, rank)
+                .join(
+                    chat_messages_fts, chat_messages_fts.c.rowid == ChatUserMessage.id
+                )
+                .where(literal_column("chat_messages_fts").op("MATCH")(match_query))
+                .where(ChatUserMessage.chat_id.in_(chat_list_filter))
+                .where(ChatUserMessage.id <= max_id)
+            )
+            if start_rank is not None:
+                st = st.where(
+                    or_(
+                        rank > start_rank,
+                        and_(rank == start_rank, ChatUserMessage.id < start_id),
+                    )
+                )
+            st = st.order_by(rank, ChatUserMessage.id.desc()).limit(limit)
+            res = await self._session.execute(st)
+            return ChatMessageSearchPageSchema(
+                results=[
+                    ChatMessageSearchResultSchema(
+                        message=ChatUserMessageSchema.model_validate(message),
+                        rank=message_rank,
+                    )
+                    for message, message_rank in res.all()
+                ],
+                max_id=max_id,
+            )
+
     async def get_user_chat_state(
         self,
         user_id: uuid.UUID,
@@ -211,27 +399,88 @@ class SQLAlchemyChatRepo(AbstractChatRepo):
             return [UserChatStateSchema.model_validate(state) for state in res.all()]
 
     async def update_user_chat_state_from_dict(
-        self, user_id: uuid.UUID, user_chat_state_dict: dict[uuid.UUID, dict[str, int]]
-    ):
-        await self._session.execute(
-            delete(UserChatState).where(
-                and_(
-                    UserChatState.chat_id.in_(user_chat_state_dict.keys()),
-                    UserChatState.user_id == user_id,
+        self,
+        user_id: uuid.UUID,
+        user_chat_state_dict: dict[uuid.UUID, dict[str, int]],
+        *,
+        clamp_to_last_message: bool = False,
+    ) -> list[UserChatStateSchema]:
+        return await self.update_user_chat_state_bulk(
+            {user_id: user_chat_state_dict},
+            clamp_to_last_message=clamp_to_last_message,
+        )
+
+    async def update_user_chat_state_bulk(
+        self,
+        user_chat_state_dict: dict[uuid.UUID, dict[uuid.UUID, dict[str, int]]],
+        *,
+        clamp_to_last_message: bool = False,
+    ) -> list[UserChatStateSchema]:
+        insert_data: list[dict[str, Any]] = []
+        for user_id, user_states in user_chat_state_dict.items():
+            for chat_id, state_item in user_states.items():
+                last_delivered: Any = state_item.get("last_delivered", 0)
+                last_read: Any = state_item.get("last_read", 0)
+                if clamp_to_last_message:
+                    # Values are clamped in the inserted row, so the conflict clause
+                    # (`excluded.*`) gets clamped values too
+                    last_message_id = (
+                        select(func.coalesce(func.max(ChatMessage.id), 0))
+                        .where(ChatMessage.chat_id == chat_id)
+                        .scalar_subquery()
+                    )
+                    last_delivered = func.min(last_delivered, last_message_id)
+                    last_read = func.min(last_read, last_message_id)
+                insert_data.append(
+                    {
+                        "user_id": user_id,
+                        "chat_id": chat_id,
+                        "last_delivered": last_delivered,
+                        "last_read": last_read,
+                    }
                 )
-            )
+        if not insert_data:
+            return []
+        pk_columns = (UserChatState.user_id, UserChatState.chat_id)
+        st = sqlite_insert(UserChatState).values(insert_data)
+        st = st.on_conflict_do_update(
+            index_elements=pk_columns,
+            set_={
+                "last_delivered": func.max(
+                    UserChatState.last_delivered, st.excluded.last_delivered
+                ),
+                "last_read": func.max(UserChatState.last_read, st.excluded.last_read),
+            },
         )
-        insert_data = [
-            {"chat_id": chat_id, "user_id": user_id, **state_item}
-            for (chat_id, state_item) in user_chat_state_dict.items()
-        ]
         with sqla_exceptions_to_repo_exc():
-            await self._session.execute(insert(UserChatState), insert_data)
+            keys = (await self._session.execute(st.returning(*pk_columns))).all()
+            # Unread counters are read by a separate query, since SQLAlchemy renders
+            # columns of subqueries in RETURNING without table names
+            rows = await self._session.execute(
+                select(
+                    UserChatState,
+                    unread_count_st(
+                        UserChatState.chat_id,
+                        UserChatState.user_id,
+                        UserChatState.last_read,
+                    ),
+                )
+                .where(tuple_(*pk_columns).in_(keys))
+                .execution_options(populate_existing=True)
+            )
+            return [
+                UserChatStateSchema.model_validate(state).model_copy(
+                    update={"unread_count": unread_count}
+                )
+                for state, unread_count in rows
+            ]
 
     async def get_user_list(
         self,
         chat_list_filter: list[uuid.UUID] | None = None,
         name_filter: str | None = None,
+        id_list_filter: list[uuid.UUID] | None = None,
+        start_id: uuid.UUID | None = None,
         offset: int = 0,
         limit: int | None = None,
     ) -> list[UserSchemaExt]:
@@ -242,13 +491,23 @@ class SQLAlchemyChatRepo(AbstractChatRepo):
                 UserChatLink.chat_id.in_(chat_list_filter)
             )
 
-        user_list_st = select(User).offset(offset)
+        user_list_st = select(User).order_by(User.name, User.id).offset(offset)
         if limit is not None:
             user_list_st = user_list_st.limit(limit)
         if chat_list_filter is not None:
             user_list_st = user_list_st.where(User.id.in_(user_id_list_st))
         if name_filter is not None:
             user_list_st = user_list_st.where(User.name.like(f"{name_filter}%"))
+        if id_list_filter is not None:
+            user_list_st = user_list_st.where(User.id.in_(id_list_filter))
+        if start_id is not None:
+            start_name = select(User.name).where(User.id == start_id).scalar_subquery()
+            user_list_st = user_list_st.where(
+                or_(
+                    User.name > start_name,
+                    and_(User.name == start_name, User.id > start_id),
+                )
+            )
 
         with sqla_exceptions_to_repo_exc():
             res = await self._session.scalars(user_list_st)
@@ -257,3 +516,124 @@ class SQLAlchemyChatRepo(AbstractChatRepo):
     async def get_user_by_id(self, user_id: uuid.UUID) -> UserSchemaExt:
         user = await self._session.get(User, user_id)
         return UserSchemaExt.model_validate(user)
+
+    async def add_outbox_events(self, events: list[tuple[str, str]]):
+        if not events:
+            return
+        with sqla_exceptions_to_repo_exc():
+            await self._session.execute(
+                insert(OutboxEvent),
+                [{"channel": channel, "event": event} for channel, event in events],
+            )
+
+    async def acquire_outbox_lease(self, owner: str, now: float, ttl: float) -> bool:
+        with sqla_exceptions_to_repo_exc():
+            st = sqlite_insert(OutboxLease).values(
+                name=OUTBOX_LEASE_NAME, owner=owner, expires_at=now + ttl
+            )
+            res = await self._session.execute(
+                st.on_conflict_do_update(
+                    index_elements=[OutboxLease.name],
+                    set_={"owner": owner, "expires_at": now + ttl},
+                    where=(OutboxLease.owner == owner) | (OutboxLease.expires_at < now),
+                ).returning(OutboxLease.owner)
+            )
+            return res.scalar_one_or_none() is not None
+
+    async def get_outbox_events(self, limit: int) -> list[OutboxEventSchema]:
+        with sqla_exceptions_to_repo_exc():
+            res = await self._session.scalars(
+                select(OutboxEvent).order_by(OutboxEvent.id).limit(limit)
+            )
+            return [OutboxEventSchema.model_validate(event) for event in res.all()]
+
+    async def delete_outbox_events(self, id_list: list[int]):
+        with sqla_exceptions_to_repo_exc():
+            await self._session.execute(
+                delete(OutboxEvent).where(OutboxEvent.id.in_(id_list))
+            )
+
+    async def update_presence_sessions(
+        self,
+        node_id: str,
+        heartbeats: dict[uuid.UUID, float],
+        closed: list[uuid.UUID],
+    ):
+        with sqla_exceptions_to_repo_exc():
+            if heartbeats:
+                st = sqlite_insert(PresenceSession).values(
+                    [
+                        {
+                            "user_id": user_id,
+                            "node_id": node_id,
+                            "last_heartbeat": last_heartbeat,
+                        }
+                        for user_id, last_heartbeat in heartbeats.items()
+                    ]
+                )
+                await self._session.execute(
+                    st.on_conflict_do_update(
+                        index_elements=[
+                            PresenceSession.user_id,
+                            PresenceSession.node_id,
+                        ],
+                        set_={"last_heartbeat": st.excluded.last_heartbeat},
+                    )
+                )
+            if closed:
+                await self._session.execute(
+                    delete(PresenceSession).where(
+                        PresenceSession.node_id == node_id,
+                        PresenceSession.user_id.in_(closed),
+                    )
+                )
+
+    async def update_presence_status(
+        self, user_ids: list[uuid.UUID], alive_since: float | None
+    ) -> tuple[list[uuid.UUID], list[uuid.UUID]]:
+        with sqla_exceptions_to_repo_exc():
+            if alive_since is not None:
+                await self._session.execute(
+                    delete(PresenceSession).where(
+                        PresenceSession.last_heartbeat < alive_since
+                    )
+                )
+            went_online: list[uuid.UUID] = []
+            if user_ids:
+                st = sqlite_insert(UserPresence).from_select(
+                    [UserPresence.user_id, UserPresence.is_online],
+                    select(PresenceSession.user_id, literal(True))
+                    .where(PresenceSession.user_id.in_(user_ids))
+                    .distinct(),
+                )
+                # Only rows whose status actually changes are returned
+                st = st.on_conflict_do_update(
+                    index_elements=[UserPresence.user_id],
+                    set_={"is_online": True},
+                    where=UserPresence.is_online.is_(False),
+                )
+                res = await self._session.scalars(st.returning(UserPresence.user_id))
+                went_online = list(res.all())
+            res = await self._session.scalars(
+                update(UserPresence)
+                .where(
+                    UserPresence.is_online.is_(True),
+                    ~select(PresenceSession.user_id)
+                    .where(PresenceSession.user_id == UserPresence.user_id)
+                    .exists(),
+                )
+                .values(is_online=False)
+                .returning(UserPresence.user_id)
+            )
+            went_offline = list(res.all())
+        return went_online, went_offline
+
+    async def get_online_user_ids(self, user_ids: list[uuid.UUID]) -> list[uuid.UUID]:
+        with sqla_exceptions_to_repo_exc():
+            res = await self._session.scalars(
+                select(UserPresence.user_id).where(
+                    UserPresence.user_id.in_(user_ids),
+                    UserPresence.is_online.is_(True),
+                )
+            )
+            return list(res.all())
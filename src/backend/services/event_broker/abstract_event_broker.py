@@ -1,18 +1,21 @@
+import json
+import time
 import uuid
 from abc import ABC, abstractmethod
-from collections import defaultdict
 from contextlib import asynccontextmanager, contextmanager
 from dataclasses import dataclass
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from typing import AsyncIterator
 
 from pydantic import TypeAdapter
 
-from backend.schemas.event import AnyEvent, AnyEventDiscr
+from backend.schemas.event import AnyEvent, AnyEventDiscr, TypingEvent
 from backend.services.event_broker.event_broker_exc import (
     EventBrokerException,
     EventBrokerFail,
 )
+from backend.services.metrics.metrics import metrics_registry
+from backend.services.tracing.tracing import traced_methods, tracer
 
 USE_CONTEXT_ERROR = (
     "EventBroker should be used as a async context manager. "
@@ -20,11 +23,75 @@ USE_CONTEXT_ERROR = (
 )
 ACK_TIMEOUT_SEC = 2
 
+# Events are posted in the envelope: service fields are added to the beginning of
+# the event's JSON object (they are ignored by event validation).
+ENVELOPE_PREFIX = '{"_env":'
 
-@dataclass
+EVENT_FANOUT_LATENCY = metrics_registry.histogram(
+    "chat_event_fanout_seconds",
+    "Time from posting the event to its delivery to the subscriber's session",
+)
+
+
+@dataclass(slots=True)
 class UnacknowledgedEvents:
     expire_dt: datetime
-    sent_events: list[AnyEvent]
+    # Events are kept serialized, it takes several times less memory than models
+    sent_events: list[str]
+
+
+_event_adapter: TypeAdapter[AnyEvent] = TypeAdapter(
+    AnyEventDiscr  # type: ignore[arg-type]
+)
+
+
+def _validate_events(events: list[str]) -> list[AnyEvent]:
+    return [_event_adapter.validate_json(event) for event in events]
+
+
+def _is_ephemeral(event: AnyEvent) -> bool:
+    return isinstance(event, TypingEvent)
+
+
+def _wrap_event(event_json: str) -> str:
+    """
+    Put event JSON into the envelope with the posting time and the trace context of
+    the current span (if tracing is enabled).
+    """
+    trace_context = tracer.current_context()
+    if trace_context is None:
+        return f'{ENVELOPE_PREFIX}{{"ts":{time.time():.6f}}},{event_json[1:]}'
+    return (
+        f'{ENVELOPE_PREFIX}{{"ts":{time.time():.6f},"trace":"{trace_context}"}},'
+        f"{event_json[1:]}"
+    )
+
+
+def _get_envelope(event_str: str) -> dict | None:
+    if not event_str.startswith(ENVELOPE_PREFIX):
+        return None
+    start = len(ENVELOPE_PREFIX)
+    end = event_str.index("}", start) + 1
+    return json.loads(event_str[start:end])
+
+
+def _observe_delivery(events: list[str]):
+    """
+    Observe fan-out latency of delivered events and, if the event was posted inside
+    the span, record the delivery span as a child of it.
+    """
+    now = time.time()
+    for event_str in events:
+        envelope = _get_envelope(event_str)
+        if envelope is not None:
+            EVENT_FANOUT_LATENCY.observe(now - envelope["ts"])
+            if "trace" in envelope:
+                tracer.record_span(
+                    "event_broker.deliver",
+                    start_time=envelope["ts"],
+                    end_time=now,
+                    parent_context=envelope["trace"],
+                )
 
 
 @contextmanager
@@ -40,12 +107,24 @@ def handle_exceptions(*args, **kwds):
         raise EventBrokerFail(detail=f"{exc}")
 
 
+@traced_methods(
+    "event_broker.",
+    [
+        "post_event",
+        "post_events",
+        "post_ephemeral_event",
+        "post_events_str",
+        "acknowledge_events",
+    ],
+)
 class AbstractEventBroker(ABC):
 
+    # Number of unacknowledged events of all sessions in this process
+    unacknowledged_events_total: int = 0
+
     def __init__(self):
-        self._unacknowledged_events: dict[int, UnacknowledgedEvents | None] = (
-            defaultdict(None)
-        )
+        # Only sessions that have unacknowledged events have an entry here
+        self._unacknowledged_events: dict[int, UnacknowledgedEvents] = {}
 
     @asynccontextmanager
     async def session(self, user_id: uuid.UUID) -> AsyncIterator[None]:
@@ -57,9 +136,9 @@ class AbstractEventBroker(ABC):
          - EventBrokerFail in case of Event broker failure
         """
         async with self._session(user_id=user_id):
-            self._unacknowledged_events[user_id.int] = None
+            self._pop_unacknowledged_events(user_id.int)
             yield
-            self._unacknowledged_events[user_id.int] = None
+            self._pop_unacknowledged_events(user_id.int)
 
     @abstractmethod
     @asynccontextmanager
@@ -127,31 +206,73 @@ class AbstractEventBroker(ABC):
                         unack_data.expire_dt = datetime.now() + timedelta(
                             seconds=ACK_TIMEOUT_SEC
                         )
-                        return unack_data.sent_events
-                self._unacknowledged_events[user_id_int] = None
+                        return _validate_events(unack_data.sent_events)
+                self._pop_unacknowledged_events(user_id_int)
 
-            events = await self._get_events_str(user_id=user_id, limit=limit)
-            event_adapter: TypeAdapter[AnyEvent] = TypeAdapter(
-                AnyEventDiscr  # type: ignore[arg-type]
-            )
-            events_validated = [event_adapter.validate_json(event) for event in events]
+            while True:
+                events = await self._get_events_str(user_id=user_id, limit=limit)
+                if not events:
+                    return []
+                _observe_delivery(events)
+                events_validated = _validate_events(events)
+                # Ephemeral events are not acknowledged, expired ones are dropped
+                now = datetime.now(timezone.utc)
+                events_to_ack = [
+                    event_str
+                    for event_str, event in zip(events, events_validated)
+                    if not _is_ephemeral(event)
+                ]
+                events_validated = [
+                    event
+                    for event in events_validated
+                    if not (isinstance(event, TypingEvent) and event.expires_at < now)
+                ]
+                if events_validated:
+                    break
 
-            if events_validated:
+            if events_to_ack:
                 self._unacknowledged_events[user_id_int] = UnacknowledgedEvents(
                     expire_dt=(datetime.now() + timedelta(seconds=ACK_TIMEOUT_SEC)),
-                    sent_events=events_validated,
+                    sent_events=events_to_ack,
                 )
+                AbstractEventBroker.unacknowledged_events_total += len(events_to_ack)
             return events_validated
 
+    def user_queue_depths(self) -> list[int] | None:
+        """
+        Numbers of events queued for sessions of this process (one item per session
+        with non-empty queue), or None if the broker doesn't track it.
+        """
+        return None
+
+    def queue_depth(self) -> int | None:
+        """
+        Total number of events queued for sessions of this process, or None if the
+        broker doesn't track it.
+        """
+        depths = self.user_queue_depths()
+        return None if depths is None else sum(depths)
+
     async def acknowledge_events(self, user_id: uuid.UUID) -> list[AnyEvent]:
         """
         Acknowledge receiving the list of events.
         Returns list of events that were acknowledged by this call.
         """
         with handle_exceptions():
-            acknowledged_events = self._unacknowledged_events[user_id.int]
-            self._unacknowledged_events[user_id.int] = None
-            return acknowledged_events.sent_events if acknowledged_events else []
+            acknowledged_events = self._pop_unacknowledged_events(user_id.int)
+            if acknowledged_events is None:
+                return []
+            return _validate_events(acknowledged_events.sent_events)
+
+    def _pop_unacknowledged_events(
+        self, user_id_int: int
+    ) -> UnacknowledgedEvents | None:
+        unack_data = self._unacknowledged_events.pop(user_id_int, None)
+        if unack_data is not None:
+            AbstractEventBroker.unacknowledged_events_total -= len(
+                unack_data.sent_events
+            )
+        return unack_data
 
     @abstractmethod
     async def _post_event_str(self, channel: str, event: str):
@@ -173,4 +294,79 @@ class AbstractEventBroker(ABC):
          - EventBrokerFail in case of Event broker failure
         """
         with handle_exceptions():
-            await self._post_event_str(channel=channel, event=event.model_dump_json())
+            await self._post_event_str(
+                channel=channel, event=_wrap_event(event.model_dump_json())
+            )
+
+    async def _post_events_str(self, events: list[tuple[str, str]]):
+        """
+        Post several new events (string representation) to their channels.
+        Events is a list of (channel, event) pairs.
+        Derived class can override this method to post events more efficiently than
+        one by one, but it should keep the order of events of the same channel.
+        Only for internal use. Don't use it in your code!
+
+        Raises:
+         - EventBrokerFail in case of Event broker failure
+        """
+        for channel, event in events:
+            await self._post_event_str(channel=channel, event=event)
+
+    async def post_events(self, events: list[tuple[str, AnyEvent]]):
+        """
+        Post several new events. Events is a list of (channel, event) pairs.
+        Events posted to the same channel preserve their order. Order of events of
+        different channels isn't guaranteed (they can be published concurrently).
+
+        Raises:
+         - EventBrokerFail in case of Event broker failure
+        """
+        with handle_exceptions():
+            await self._post_events_str(
+                events=[
+                    (channel, _wrap_event(event.model_dump_json()))
+                    for channel, event in events
+                ]
+            )
+
+    async def _post_ephemeral_event_str(self, channel: str, event: str, ttl: float):
+        """
+        Post ephemeral event (string representation) to the specific channel.
+        Derived class should override this method to drop the event if subscriber's
+        queue is congested and to expire it after `ttl` seconds.
+        Only for internal use. Don't use it in your code!
+
+        Raises:
+         - EventBrokerFail in case of Event broker failure
+        """
+        await self._post_event_str(channel=channel, event=event)
+
+    async def post_ephemeral_event(self, channel: str, event: TypingEvent, ttl: float):
+        """
+        Post ephemeral event to the specific channel.
+        Ephemeral events are not acknowledged by clients (they don't take part in the
+        ack window), they are dropped if subscriber's queue is congested or if they
+        weren't delivered within `ttl` seconds.
+
+        Raises:
+         - EventBrokerFail in case of Event broker failure
+        """
+        with handle_exceptions():
+            await self._post_ephemeral_event_str(
+                channel=channel, event=_wrap_event(event.model_dump_json()), ttl=ttl
+            )
+
+    async def post_events_str(self, events: list[tuple[str, str]]):
+        """
+        Post several new events that are already serialized to JSON. Events is a list
+        of (channel, event JSON) pairs.
+        Events posted to the same channel preserve their order. Order of events of
+        different channels isn't guaranteed (they can be published concurrently).
+
+        Raises:
+         - EventBrokerFail in case of Event broker failure
+        """
+        with handle_exceptions():
+            await self._post_events_str(
+                events=[(channel, _wrap_event(event)) for channel, event in events]
+            )
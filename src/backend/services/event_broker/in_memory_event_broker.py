@@ -10,14 +10,23 @@ from backend.services.event_broker.abstract_event_broker import (
 )
 
 MAX_DEQUE_SIZE = 1000
+# Ephemeral events are dropped for subscribers that have more events in the queue
+MAX_DEQUE_SIZE_FOR_EPHEMERAL = 100
 
 
 class InMemoryEventBroker(AbstractEventBroker):
+    """
+    Users are identified by `uuid.int`.
+    Event queue of the user is created on the first event and removed when it's
+    emptied, so idle sessions don't keep empty deques.
+    """
+
     _cls_initialized: bool = False
     _max_deque_size: int
-    _subscribers: set[str]
-    _subscribtions: defaultdict[str, set[str]]
-    _event_queue: dict[str, deque[str]]
+    _subscribers: set[int]
+    _subscribtions: defaultdict[str, set[int]]
+    _event_queue: dict[int, deque[str]]
+    _queue_depth: int  # Total number of events in all queues
 
     def __init__(self, max_deque_size: int = MAX_DEQUE_SIZE):
         super().__init__()
@@ -27,60 +36,89 @@ class InMemoryEventBroker(AbstractEventBroker):
             cls._subscribers = set()
             cls._subscribtions = defaultdict(set)
             cls._event_queue = {}
+            cls._queue_depth = 0
             cls._cls_initialized = True
 
     @asynccontextmanager
     async def _session(self, user_id: uuid.UUID) -> AsyncIterator[None]:
         with handle_exceptions():
             cls = InMemoryEventBroker
-            user_id_str = str(user_id)
+            user_id_int = user_id.int
             assert (
-                user_id_str not in cls._subscribers
-            ), f"session already exists for user {user_id_str}"
-            cls._event_queue[user_id_str] = deque()
-            cls._subscribers.add(user_id_str)
+                user_id_int not in cls._subscribers
+            ), f"session already exists for user {user_id}"
+            cls._subscribers.add(user_id_int)
         yield
         with handle_exceptions():
-            if user_id_str in cls._event_queue:
-                cls._event_queue.pop(user_id_str)
-            if user_id_str in cls._subscribers:
-                cls._subscribers.remove(user_id_str)
+            events = cls._event_queue.pop(user_id_int, None)
+            if events is not None:
+                cls._queue_depth -= len(events)
+            cls._subscribers.discard(user_id_int)
             for channel_subscribers in cls._subscribtions.values():
-                if user_id_str in channel_subscribers:
-                    channel_subscribers.remove(user_id_str)
+                channel_subscribers.discard(user_id_int)
 
     async def subscribe(self, channel: str, user_id: uuid.UUID):
         with handle_exceptions():
             cls = InMemoryEventBroker
-            user_id_str = str(user_id)
-            assert user_id_str in cls._subscribers, USE_CONTEXT_ERROR
+            user_id_int = user_id.int
+            assert user_id_int in cls._subscribers, USE_CONTEXT_ERROR
             channel_subscribers = cls._subscribtions[channel]
-            channel_subscribers.add(user_id_str)
+            channel_subscribers.add(user_id_int)
 
     async def subscribe_list(self, channels: list[str], user_id: uuid.UUID):
         with handle_exceptions():
             cls = InMemoryEventBroker
-            user_id_str = str(user_id)
-            assert user_id_str in cls._subscribers, USE_CONTEXT_ERROR
+            user_id_int = user_id.int
+            assert user_id_int in cls._subscribers, USE_CONTEXT_ERROR
             for channel in channels:
-                cls._subscribtions[channel].add(user_id_str)
+                cls._subscribtions[channel].add(user_id_int)
 
     async def _get_events_str(
         self, user_id: uuid.UUID, limit: int | None = None
     ) -> list[str]:
         cls = InMemoryEventBroker
-        user_id_str = str(user_id)
-        assert user_id_str in cls._subscribers, USE_CONTEXT_ERROR
-        events = cls._event_queue[user_id_str]
-        if limit is None:
-            limit = len(events)
-        sent_events = [events.popleft() for _ in range(min(len(events), limit))]
-        return sent_events
+        user_id_int = user_id.int
+        assert user_id_int in cls._subscribers, USE_CONTEXT_ERROR
+        events = cls._event_queue.get(user_id_int)
+        if not events:
+            return []
+        if limit is None or limit >= len(events):
+            del cls._event_queue[user_id_int]
+            cls._queue_depth -= len(events)
+            return list(events)
+        cls._queue_depth -= limit
+        return [events.popleft() for _ in range(limit)]
 
     async def _post_event_str(self, channel: str, event: str):
         cls = InMemoryEventBroker
-        channel_subscribers = cls._subscribtions[channel]
-        for user_id_str in channel_subscribers:
-            cls._event_queue[user_id_str].append(event)
-            if len(cls._event_queue[user_id_str]) > cls._max_deque_size:
-                channel_subscribers.remove(user_id_str)
+        channel_subscribers = cls._subscribtions.get(channel)
+        if not channel_subscribers:
+            return
+        for user_id_int in list(channel_subscribers):
+            events = cls._event_queue.get(user_id_int)
+            if events is None:
+                events = cls._event_queue[user_id_int] = deque()
+            events.append(event)
+            cls._queue_depth += 1
+            if len(events) > cls._max_deque_size:
+                channel_subscribers.remove(user_id_int)
+
+    async def _post_ephemeral_event_str(self, channel: str, event: str, ttl: float):
+        cls = InMemoryEventBroker
+        channel_subscribers = cls._subscribtions.get(channel)
+        if not channel_subscribers:
+            return
+        for user_id_int in channel_subscribers:
+            events = cls._event_queue.get(user_id_int)
+            if events is None:
+                cls._event_queue[user_id_int] = deque((event,))
+                cls._queue_depth += 1
+            elif len(events) < MAX_DEQUE_SIZE_FOR_EPHEMERAL:
+                events.append(event)
+                cls._queue_depth += 1
+
+    def user_queue_depths(self) -> list[int]:
+        return [len(events) for events in InMemoryEventBroker._event_queue.values()]
+
+    def queue_depth(self) -> int:
+        return InMemoryEventBroker._queue_depth
@@ -1,3 +1,4 @@
+import asyncio
 import uuid
 from contextlib import asynccontextmanager
 from dataclasses import dataclass
@@ -23,7 +24,7 @@ USE_AINIT_ERROR = (
 )
 
 
-@dataclass
+@dataclass(slots=True)
 class UserConData:
     channel: AbstractChannel
     exchange: AbstractExchange
@@ -36,6 +37,8 @@ class RabbitEventBroker(AbstractEventBroker):
         super().__init__()
         self._connection = connection
         self._con_data: dict[int, UserConData] = {}
+        # Number of messages in user's queue, as of the last fetch
+        self._queue_depths: dict[int, int] = {}
         self._common_channel: AbstractChannel | None = None
         self._common_exchange: AbstractExchange | None = None
 
@@ -64,6 +67,7 @@ class RabbitEventBroker(AbstractEventBroker):
             await self._con_data[user_id_int].channel.close()
             if self._con_data.get(user_id_int):
                 self._con_data.pop(user_id_int)
+            self._queue_depths.pop(user_id_int, None)
 
     async def subscribe(self, channel: str, user_id: uuid.UUID):
         with handle_exceptions():
@@ -86,14 +90,51 @@ class RabbitEventBroker(AbstractEventBroker):
         assert con_data is not None, USE_CONTEXT_ERROR
         events: list[str] = []
         count = limit if (limit is not None) else 1_000_000
+        queue_depth = 0
         for _ in range(count):
             message = await con_data.queue.get(fail=False)
             if message:
                 events.append(message.body.decode())
+                # Number of messages remaining in the queue
+                queue_depth = message.message_count or 0
             else:
+                queue_depth = 0
                 break
+        self._queue_depths[user_id.int] = queue_depth
         return events
 
+    def user_queue_depths(self) -> list[int]:
+        return [depth for depth in self._queue_depths.values() if depth]
+
     async def _post_event_str(self, channel: str, event: str):
         assert self._common_exchange is not None, USE_AINIT_ERROR
         await self._common_exchange.publish(Message(event.encode()), channel)
+
+    async def _post_ephemeral_event_str(self, channel: str, event: str, ttl: float):
+        assert self._common_exchange is not None, USE_AINIT_ERROR
+        # Message TTL: RabbitMQ discards the message if it's not consumed in time
+        await self._common_exchange.publish(
+            Message(event.encode(), expiration=ttl), channel
+        )
+
+    async def _post_events_str(self, events: list[tuple[str, str]]):
+        assert self._common_exchange is not None, USE_AINIT_ERROR
+        exchange = self._common_exchange
+        # Order of concurrent publications isn't guaranteed, so events of the same
+        # channel are published one by one. Only different channels are published
+        # concurrently, so the order is kept only within the channel (that's what
+        # post_events() promises, ChatManager doesn't rely on cross-channel order).
+        channel_events: dict[str, list[str]] = {}
+        for channel, event in events:
+            channel_events.setdefault(channel, []).append(event)
+
+        async def publish_channel_events(channel: str, events: list[str]):
+            for event in events:
+                await exchange.publish(Message(event.encode()), channel)
+
+        await asyncio.gather(
+            *(
+                publish_channel_events(channel, events)
+                for channel, events in channel_events.items()
+            )
+        )
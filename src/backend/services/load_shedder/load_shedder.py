@@ -0,0 +1,89 @@
+from typing import Callable
+
+from backend.services.chat_manager.chat_manager_exc import ServerOverloaded
+
+DEFAULT_MAX_SESSIONS = 5_000
+DEFAULT_MAX_IN_FLIGHT = 200
+DEFAULT_MAX_QUEUE_DEPTH = 100_000
+DEFAULT_RETRY_AFTER_SEC = 1.0
+
+# Expensive read requests that can be rejected when the server is overloaded.
+# Other requests (sending messages, acknowledgements, etc.) are always admitted.
+SHEDDABLE_PACKET_TYPES = frozenset(
+    (
+        "CMDGetJoinedChats",
+        "CMDGetMessages",
+        "CMDGetUserAutocomplete",
+        "CMDGetFirstCircleListUpdates",
+        "CMDSearchMessages",
+    )
+)
+
+
+class LoadShedder:
+    """
+    Server-wide (per worker process) admission control.
+
+    - New websocket sessions are rejected when there are `max_sessions` sessions.
+    - Sheddable requests are rejected when there are `max_in_flight` requests in
+      progress or when the number of queued events (`queue_depth()`) reached
+      `max_queue_depth`, so that requests of connected users are processed with
+      bounded latency.
+    """
+
+    def __init__(
+        self,
+        max_sessions: int = DEFAULT_MAX_SESSIONS,
+        max_in_flight: int = DEFAULT_MAX_IN_FLIGHT,
+        max_queue_depth: int = DEFAULT_MAX_QUEUE_DEPTH,
+        queue_depth: Callable[[], int | None] | None = None,
+    ):
+        self.max_sessions = max_sessions
+        self.max_in_flight = max_in_flight
+        self.max_queue_depth = max_queue_depth
+        self._queue_depth = queue_depth
+        self.sessions = 0
+        self.in_flight = 0
+        self.rejected_sessions = 0
+        self.shed_requests = 0
+
+    def open_session(self) -> bool:
+        """
+        Register new session. Returns False if the session should be rejected.
+        """
+        if self.sessions >= self.max_sessions:
+            self.rejected_sessions += 1
+            return False
+        self.sessions += 1
+        return True
+
+    def close_session(self):
+        self.sessions -= 1
+
+    def is_overloaded(self) -> bool:
+        if self.in_flight >= self.max_in_flight:
+            return True
+        if self._queue_depth is not None:
+            queue_depth = self._queue_depth()
+            if (queue_depth is not None) and (queue_depth >= self.max_queue_depth):
+                return True
+        return False
+
+    def start_request(self, packet_type: str):
+        """
+        Register new request. Every successful call should be followed by
+        `finish_request()`.
+
+        Raises:
+         - ServerOverloaded if the request is shed
+        """
+        if (packet_type in SHEDDABLE_PACKET_TYPES) and self.is_overloaded():
+            self.shed_requests += 1
+            raise ServerOverloaded(
+                detail=f"Server is overloaded, {packet_type} request is rejected",
+                retry_after=DEFAULT_RETRY_AFTER_SEC,
+            )
+        self.in_flight += 1
+
+    def finish_request(self):
+        self.in_flight -= 1
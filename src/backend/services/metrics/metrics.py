@@ -0,0 +1,220 @@
+import math
+import time
+from bisect import bisect_left
+from functools import wraps
+from typing import Any, Callable, Iterable, Literal, TypeVar
+
+# Latency buckets (seconds)
+DEFAULT_BUCKETS = (
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+LabelValues = tuple[str, ...]
+CollectorValue = float | dict[LabelValues, float] | None
+
+T = TypeVar("T")
+
+
+def _format_labels(labelnames: tuple[str, ...], values: LabelValues) -> str:
+    if not labelnames:
+        return ""
+    pairs = ",".join(
+        f'{name}="{_escape(value)}"' for name, value in zip(labelnames, values)
+    )
+    return "{" + pairs + "}"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", r"\\").replace("\n", r"\n").replace('"', r"\"")
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Histogram:
+    """
+    Histogram with cumulative buckets (Prometheus-style).
+    Observing the value is one bisect and a few list/dict operations, so it's cheap
+    enough to be used on hot paths.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Iterable[str] = (),
+        buckets: Iterable[float] = DEFAULT_BUCKETS,
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Label values -> [counts per bucket (not cumulative) + overflow, sum]
+        self._data: dict[LabelValues, tuple[list[int], list[float]]] = {}
+
+    def observe(self, value: float, labels: LabelValues = ()):
+        data = self._data.get(labels)
+        if data is None:
+            data = self._data[labels] = ([0] * (len(self.buckets) + 1), [0.0])
+        counts, total = data
+        counts[bisect_left(self.buckets, value)] += 1
+        total[0] += value
+
+    def count(self, labels: LabelValues = ()) -> int:
+        data = self._data.get(labels)
+        return sum(data[0]) if data is not None else 0
+
+    def render(self) -> list[str]:
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} histogram",
+        ]
+        bucket_labelnames = self.labelnames + ("le",)
+        for labels, (counts, total) in sorted(self._data.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), counts):
+                cumulative += count
+                bucket_labels = _format_labels(
+                    bucket_labelnames, labels + (_format_value(bound),)
+                )
+                lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+            label_str = _format_labels(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{label_str} {_format_value(total[0])}")
+            lines.append(f"{self.name}_count{label_str} {cumulative}")
+        return lines
+
+
+class Collector:
+    """
+    Gauge or counter whose value is read by the callback on every scrape.
+    Callback returns the value, dict (label values -> value) for labeled metrics or
+    None if the value is unknown.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        metric_type: Literal["gauge", "counter"],
+        callback: Callable[[], CollectorValue],
+        labelnames: Iterable[str] = (),
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.metric_type = metric_type
+        self.callback = callback
+        self.labelnames = tuple(labelnames)
+
+    def render(self) -> list[str]:
+        value = self.callback()
+        if value is None:
+            return []
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.metric_type}",
+        ]
+        if isinstance(value, dict):
+            for labels, labeled_value in sorted(value.items()):
+                label_str = _format_labels(self.labelnames, labels)
+                lines.append(f"{self.name}{label_str} {_format_value(labeled_value)}")
+        else:
+            lines.append(f"{self.name} {_format_value(value)}")
+        return lines
+
+
+class MetricsRegistry:
+    """
+    In-process registry of metrics, rendered in Prometheus text exposition format.
+    """
+
+    def __init__(self):
+        self._metrics: dict[str, Histogram | Collector] = {}
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Iterable[str] = (),
+        buckets: Iterable[float] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        histogram = Histogram(name, documentation, labelnames, buckets)
+        self._register(histogram)
+        return histogram
+
+    def collector(
+        self,
+        name: str,
+        documentation: str,
+        metric_type: Literal["gauge", "counter"],
+        callback: Callable[[], CollectorValue],
+        labelnames: Iterable[str] = (),
+    ) -> Collector:
+        collector = Collector(name, documentation, metric_type, callback, labelnames)
+        self._register(collector)
+        return collector
+
+    def render(self) -> str:
+        lines: list[str] = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    def _register(self, metric: Histogram | Collector):
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self._metrics[metric.name] = metric
+
+
+def timed_methods(
+    histogram: Histogram, method_names: Iterable[str]
+) -> Callable[[type[T]], type[T]]:
+    """
+    Class decorator that observes execution time of the coroutine methods
+    `method_names` in the `histogram` (labeled by the method name).
+    """
+
+    def decorator(cls: type[T]) -> type[T]:
+        for method_name in method_names:
+            setattr(
+                cls,
+                method_name,
+                _timed(histogram, getattr(cls, method_name), method_name),
+            )
+        return cls
+
+    return decorator
+
+
+def _timed(
+    histogram: Histogram, method: Callable[..., Any], method_name: str
+) -> Callable[..., Any]:
+    labels = (method_name,)
+
+    @wraps(method)
+    async def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return await method(*args, **kwargs)
+        finally:
+            histogram.observe(time.perf_counter() - start, labels)
+
+    return wrapper
+
+
+metrics_registry = MetricsRegistry()
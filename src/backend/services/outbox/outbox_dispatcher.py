@@ -0,0 +1,130 @@
+import asyncio
+import logging
+import time
+import uuid
+from typing import Callable
+
+from backend.services.event_broker.abstract_event_broker import AbstractEventBroker
+from backend.services.uow.abstract_uow import AbstractUnitOfWork
+
+DEFAULT_BATCH_SIZE = 500
+DEFAULT_POLL_INTERVAL_SEC = 1.0
+RETRY_DELAY_SEC = 1.0
+# Should be much greater than the time of posting one batch
+DEFAULT_LEASE_TTL_SEC = 10.0
+
+logger = logging.getLogger(__name__)
+
+
+class OutboxDispatcher:
+    """
+    Background task that drains the outbox to the Event broker.
+
+    Events are written to the outbox in the same transaction as the data change they
+    describe, so they are neither lost nor published for rolled back changes.
+    The dispatcher takes up to `batch_size` of the oldest events, posts them to the
+    Event broker in one call and deletes them from the outbox. Reading and deleting
+    are done in separate short transactions, no transaction is open while events
+    are posted.
+    It's woken up by `wake()` after commit and also polls the outbox every
+    `poll_interval` seconds (to pick up events left by the previous run).
+    Delivery is at-least-once: if deletion fails after posting, events are posted
+    again.
+    Every process runs its own dispatcher on the shared DB. To keep events ordered
+    and not post them several times, only the dispatcher that holds the outbox
+    lease drains the outbox. The lease is prolonged before every batch and taken
+    over by another dispatcher after `lease_ttl` seconds if its holder stops.
+    Lease expiration times are compared across nodes, so `timer` should return the
+    wall clock time.
+    """
+
+    def __init__(
+        self,
+        uow: AbstractUnitOfWork,
+        event_broker: AbstractEventBroker,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        poll_interval: float = DEFAULT_POLL_INTERVAL_SEC,
+        lease_ttl: float = DEFAULT_LEASE_TTL_SEC,
+        timer: Callable[[], float] = time.time,
+        node_id: str | None = None,
+    ):
+        self.uow = uow
+        self.event_broker = event_broker
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.lease_ttl = lease_ttl
+        self.node_id = node_id if node_id is not None else uuid.uuid4().hex
+        self._timer = timer
+        self.dispatched = 0
+        self.batches = 0
+        self.errors = 0
+        self._wakeup = asyncio.Event()
+        self._task: asyncio.Task | None = None
+
+    @property
+    def is_running(self) -> bool:
+        return self._task is not None
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def wake(self):
+        self._wakeup.set()
+
+    async def dispatch_batch(self) -> int:
+        """
+        Post one batch of events from the outbox to the Event broker and delete them
+        from the outbox. Returns the number of dispatched events (0 if the outbox
+        lease is held by another dispatcher).
+
+        Raises:
+         - ChatRepoException on repository failure
+         - EventBrokerException on Event broker failure
+        """
+        async with self.uow:
+            is_leader = await self.uow.chat_repo.acquire_outbox_lease(
+                owner=self.node_id, now=self._timer(), ttl=self.lease_ttl
+            )
+            if not is_leader:
+                return 0
+            await self.uow.commit()
+            events = await self.uow.chat_repo.get_outbox_events(limit=self.batch_size)
+        if not events:
+            return 0
+        await self.event_broker.post_events_str(
+            events=[(event.channel, event.event) for event in events]
+        )
+        async with self.uow:
+            await self.uow.chat_repo.delete_outbox_events(
+                id_list=[event.id for event in events]
+            )
+            await self.uow.commit()
+        self.dispatched += len(events)
+        self.batches += 1
+        return len(events)
+
+    async def _run(self):
+        while True:
+            self._wakeup.clear()
+            try:
+                while await self.dispatch_batch() == self.batch_size:
+                    pass
+            except Exception:
+                self.errors += 1
+                logger.exception("Outbox dispatching failed")
+                await asyncio.sleep(RETRY_DELAY_SEC)
+                continue
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+            except TimeoutError:
+                pass
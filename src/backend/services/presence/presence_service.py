@@ -0,0 +1,235 @@
+import asyncio
+import logging
+import time
+import uuid
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Callable
+
+from backend.schemas.event import AnyEvent, UserPresenceUpdate
+from backend.services.chat_manager.utils import channel_code
+from backend.services.event_broker.abstract_event_broker import AbstractEventBroker
+from backend.services.uow.abstract_uow import AbstractUnitOfWork
+
+DEFAULT_DEBOUNCE_SEC = 1.0
+DEFAULT_HEARTBEAT_TIMEOUT_SEC = 90.0
+RETRY_DELAY_SEC = 1.0
+
+logger = logging.getLogger(__name__)
+
+
+class PresenceService:
+    """
+    Tracks online status of users and publishes its changes.
+
+    User is online while they have at least one session (`session()` context
+    manager, entered together with the Event broker session) on any node that sent a
+    heartbeat within `heartbeat_timeout` seconds. Session start counts as a
+    heartbeat.
+    Sessions are counted per node (process), each node stores the time of the last
+    heartbeat of its users in the repository, so the status is aggregated over all
+    nodes that share the DB. Published status is stored in the repository too and
+    is changed atomically, so each transition is published by one node.
+    Changes are debounced: they are written and published by the background task
+    not earlier than `debounce` seconds after the first change, and only if the
+    status differs from the published one (so reconnects don't produce events).
+    All changes accumulated by that time are published in one batch: every user of
+    the first circle of changed users receives one UserPresenceUpdate event to their
+    user channel. Events are posted via AbstractEventBroker, so they reach
+    subscribers in all processes that share the broker.
+    Heartbeat times are compared across nodes, so `timer` should return the wall
+    clock time.
+    """
+
+    def __init__(
+        self,
+        uow: AbstractUnitOfWork,
+        event_broker: AbstractEventBroker,
+        debounce: float = DEFAULT_DEBOUNCE_SEC,
+        heartbeat_timeout: float | None = DEFAULT_HEARTBEAT_TIMEOUT_SEC,
+        timer: Callable[[], float] = time.time,
+        node_id: str | None = None,
+    ):
+        self.uow = uow
+        self.event_broker = event_broker
+        self.node_id = node_id if node_id is not None else uuid.uuid4().hex
+        self.debounce = debounce
+        self.heartbeat_timeout = heartbeat_timeout
+        self.published_events = 0
+        self.errors = 0
+        self._timer = timer
+        # Keys are `uuid.int` of user id
+        self._sessions: dict[int, int] = {}
+        self._last_heartbeat: dict[int, float] = {}
+        # Users whose sessions or heartbeats on this node have changed since the
+        # last publication
+        self._changed: set[int] = set()
+        self._wakeup = asyncio.Event()
+        self._task: asyncio.Task | None = None
+
+    @property
+    def is_running(self) -> bool:
+        return self._task is not None
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """
+        Stop the background task and publish the remaining changes (e.g. sessions
+        closed on shutdown).
+        """
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+            try:
+                await self.publish_changes()
+            except Exception:
+                self.errors += 1
+                logger.exception("Publishing presence changes failed")
+
+    @asynccontextmanager
+    async def session(self, user_id: uuid.UUID) -> AsyncIterator[None]:
+        user_id_int = user_id.int
+        self._sessions[user_id_int] = self._sessions.get(user_id_int, 0) + 1
+        self._last_heartbeat[user_id_int] = self._timer()
+        self._mark_changed(user_id_int)
+        try:
+            yield
+        finally:
+            sessions = self._sessions[user_id_int] - 1
+            if sessions:
+                self._sessions[user_id_int] = sessions
+            else:
+                del self._sessions[user_id_int]
+                del self._last_heartbeat[user_id_int]
+            self._mark_changed(user_id_int)
+
+    def heartbeat(self, user_id: uuid.UUID):
+        user_id_int = user_id.int
+        if user_id_int in self._sessions:
+            self._last_heartbeat[user_id_int] = self._timer()
+            self._mark_changed(user_id_int)
+
+    async def get_online_user_ids(self, user_ids: list[uuid.UUID]) -> list[uuid.UUID]:
+        """
+        Return users from the list whose published status is online.
+
+        Raises:
+         - ChatRepoException on repository failure
+        """
+        async with self.uow:
+            return await self.uow.chat_repo.get_online_user_ids(user_ids=user_ids)
+
+    async def is_online(self, user_id: uuid.UUID) -> bool:
+        """
+        Return published online status of the user.
+
+        Raises:
+         - ChatRepoException on repository failure
+        """
+        return bool(await self.get_online_user_ids([user_id]))
+
+    async def publish_changes(self) -> int:
+        """
+        Write presence changes of this node accumulated since the previous call,
+        update the published status and publish its changes (including expired
+        sessions of other nodes).
+        Returns the number of users whose status has changed.
+
+        Raises:
+         - ChatRepoException on repository failure
+         - EventBrokerException on Event broker failure
+        """
+        changed, self._changed = self._changed, set()
+        heartbeats: dict[uuid.UUID, float] = {}
+        closed: list[uuid.UUID] = []
+        for user_id_int in changed:
+            last_heartbeat = self._last_heartbeat.get(user_id_int)
+            if last_heartbeat is None:
+                closed.append(uuid.UUID(int=user_id_int))
+            else:
+                heartbeats[uuid.UUID(int=user_id_int)] = last_heartbeat
+        alive_since = None
+        if self.heartbeat_timeout is not None:
+            alive_since = self._timer() - self.heartbeat_timeout
+        try:
+            async with self.uow:
+                await self.uow.chat_repo.update_presence_sessions(
+                    node_id=self.node_id, heartbeats=heartbeats, closed=closed
+                )
+                went_online, went_offline = (
+                    await self.uow.chat_repo.update_presence_status(
+                        user_ids=list(heartbeats), alive_since=alive_since
+                    )
+                )
+                events = await self._build_events(went_online, went_offline)
+                # Events are posted before the commit: if posting fails, status
+                # isn't changed and the transition is published next time
+                if events:
+                    await self.event_broker.post_events(events=events)
+                await self.uow.commit()
+        except BaseException:
+            self._changed |= changed  # Retry next time
+            raise
+        self.published_events += len(events)
+        return len(went_online) + len(went_offline)
+
+    async def _build_events(
+        self, went_online: list[uuid.UUID], went_offline: list[uuid.UUID]
+    ) -> list[tuple[str, AnyEvent]]:
+        """
+        Should be called inside the UoW context.
+        """
+        # Recipient (first circle member) -> (online, offline) user ids
+        updates: dict[uuid.UUID, tuple[list[uuid.UUID], list[uuid.UUID]]] = {}
+        for user_id, is_online in [
+            *((id, True) for id in went_online),
+            *((id, False) for id in went_offline),
+        ]:
+            chat_ids = await self.uow.chat_repo.get_joined_chat_ids(user_id)
+            chat_members = await self.uow.chat_repo.get_chat_member_ids(
+                chat_id_list=chat_ids
+            )
+            recipients = {
+                member_id
+                for member_ids in chat_members.values()
+                for member_id in member_ids
+            }
+            recipients.discard(user_id)
+            for recipient in recipients:
+                online, offline = updates.setdefault(recipient, ([], []))
+                (online if is_online else offline).append(user_id)
+        return [
+            (
+                channel_code("user", recipient),
+                UserPresenceUpdate(online=online, offline=offline),
+            )
+            for recipient, (online, offline) in updates.items()
+        ]
+
+    def _mark_changed(self, user_id_int: int):
+        self._changed.add(user_id_int)
+        self._wakeup.set()
+
+    async def _run(self):
+        while True:
+            # asyncio.wait() is used instead of wait_for(), that can swallow
+            # cancellation if the event is set at the same moment
+            wakeup = asyncio.ensure_future(self._wakeup.wait())
+            try:
+                await asyncio.wait((wakeup,), timeout=self.heartbeat_timeout)
+            finally:
+                wakeup.cancel()
+            await asyncio.sleep(self.debounce)
+            self._wakeup.clear()
+            try:
+                await self.publish_changes()
+            except Exception:
+                self.errors += 1
+                logger.exception("Publishing presence changes failed")
+                await asyncio.sleep(RETRY_DELAY_SEC)
@@ -0,0 +1,195 @@
+import time
+import uuid
+from collections import Counter
+from dataclasses import dataclass
+from typing import Callable
+
+from backend.services.cache.expiring_lru_cache import ExpiringLRUCache
+
+# TTL is counted from the last access. Idle users' buckets are refilled long
+# before they expire, so dropping them doesn't give extra tokens
+USER_BUCKETS_TTL_SEC = 300
+USER_BUCKETS_MAX_COUNT = 100_000
+
+
+@dataclass
+class RateLimit:
+    rate: float  # Tokens (packets) per second
+    burst: float  # Bucket capacity
+
+
+@dataclass
+class RateLimitStats:
+    admitted: int
+    throttled_connection: int
+    throttled_user: int
+
+
+# Limits are keyed by the name of the client packet data class (CMD...).
+# Packet types that aren't listed are not limited.
+DEFAULT_CONNECTION_RATE_LIMITS: dict[str, RateLimit] = {
+    "CMDGetJoinedChats": RateLimit(rate=1, burst=5),
+    "CMDGetMessages": RateLimit(rate=5, burst=20),
+    "CMDGetUserAutocomplete": RateLimit(rate=5, burst=10),
+    "CMDSearchMessages": RateLimit(rate=1, burst=5),
+    "CMDSendMessage": RateLimit(rate=5, burst=20),
+    "CMDCreateChat": RateLimit(rate=0.2, burst=5),
+    "CMDEditMessage": RateLimit(rate=2, burst=10),
+    "CMDAddUserToChat": RateLimit(rate=1, burst=10),
+    "CMDAddUsersToChat": RateLimit(rate=0.2, burst=5),
+    "CMDMarkRead": RateLimit(rate=5, burst=20),
+}
+
+DEFAULT_USER_RATE_LIMITS: dict[str, RateLimit] = {
+    "CMDGetJoinedChats": RateLimit(rate=2, burst=10),
+    "CMDGetMessages": RateLimit(rate=10, burst=40),
+    "CMDGetUserAutocomplete": RateLimit(rate=10, burst=20),
+    "CMDSearchMessages": RateLimit(rate=2, burst=10),
+    "CMDSendMessage": RateLimit(rate=10, burst=40),
+    "CMDCreateChat": RateLimit(rate=0.2, burst=5),
+    "CMDEditMessage": RateLimit(rate=4, burst=20),
+    "CMDAddUserToChat": RateLimit(rate=1, burst=10),
+    "CMDAddUsersToChat": RateLimit(rate=0.2, burst=5),
+    "CMDMarkRead": RateLimit(rate=10, burst=40),
+}
+
+
+class TokenBucket:
+    __slots__ = ("tokens", "updated_at")
+
+    def __init__(self, limit: RateLimit, now: float):
+        self.tokens = limit.burst
+        self.updated_at = now
+
+    def wait_time(self, limit: RateLimit, now: float) -> float:
+        """
+        Refill the bucket and return the time to wait for one token (0 if the token
+        is available now).
+        """
+        elapsed = now - self.updated_at
+        if elapsed > 0:
+            self.tokens = min(limit.burst, self.tokens + elapsed * limit.rate)
+            self.updated_at = now
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / limit.rate
+
+
+class RateLimiter:
+    """
+    Process-wide token-bucket admission control for client packets.
+
+    Each packet type has separate buckets for every connection (session) and for
+    every user (shared by all user's sessions in this process), configured by
+    `connection_limits` and `user_limits` (packet type -> RateLimit).
+    The packet is admitted only if both buckets have a token, then one token is
+    taken from each of them.
+    Admission and throttling counters are collected per packet type.
+    """
+
+    def __init__(
+        self,
+        connection_limits: dict[str, RateLimit] | None = None,
+        user_limits: dict[str, RateLimit] | None = None,
+        timer: Callable[[], float] = time.monotonic,
+    ):
+        if connection_limits is None:
+            connection_limits = DEFAULT_CONNECTION_RATE_LIMITS
+        if user_limits is None:
+            user_limits = DEFAULT_USER_RATE_LIMITS
+        self.connection_limits = connection_limits
+        self.user_limits = user_limits
+        self.timer = timer
+        self.admitted: Counter[str] = Counter()
+        self.throttled_connection: Counter[str] = Counter()
+        self.throttled_user: Counter[str] = Counter()
+        self._user_buckets: ExpiringLRUCache[int, dict[str, TokenBucket]] = (
+            ExpiringLRUCache(
+                maxsize=USER_BUCKETS_MAX_COUNT, ttl=USER_BUCKETS_TTL_SEC, timer=timer
+            )
+        )
+
+    def session(self, user_id: uuid.UUID) -> "SessionRateLimiter":
+        """
+        Create rate limiter for the new session (connection) of the user.
+        """
+        return SessionRateLimiter(self, user_id)
+
+    def stats(self) -> dict[str, RateLimitStats]:
+        packet_types = (
+            self.admitted.keys()
+            | self.throttled_connection.keys()
+            | self.throttled_user.keys()
+        )
+        return {
+            packet_type: RateLimitStats(
+                admitted=self.admitted[packet_type],
+                throttled_connection=self.throttled_connection[packet_type],
+                throttled_user=self.throttled_user[packet_type],
+            )
+            for packet_type in packet_types
+        }
+
+    def _acquire(
+        self,
+        user_id: uuid.UUID,
+        connection_buckets: dict[str, TokenBucket],
+        packet_type: str,
+    ) -> float:
+        connection_limit = self.connection_limits.get(packet_type)
+        user_limit = self.user_limits.get(packet_type)
+        if (connection_limit is None) and (user_limit is None):
+            return 0.0
+        now = self.timer()
+        buckets: list[TokenBucket] = []
+        if connection_limit is not None:
+            bucket = connection_buckets.get(packet_type)
+            if bucket is None:
+                bucket = TokenBucket(connection_limit, now)
+                connection_buckets[packet_type] = bucket
+            wait_time = bucket.wait_time(connection_limit, now)
+            if wait_time > 0:
+                self.throttled_connection[packet_type] += 1
+                return wait_time
+            buckets.append(bucket)
+        if user_limit is not None:
+            user_buckets = self._user_buckets.get(user_id.int)
+            if user_buckets is None:
+                user_buckets = {}
+            # Re-set on every access to prolong TTL, otherwise buckets of an active
+            # user would be recreated full every USER_BUCKETS_TTL_SEC
+            self._user_buckets.set(user_id.int, user_buckets)
+            bucket = user_buckets.get(packet_type)
+            if bucket is None:
+                bucket = TokenBucket(user_limit, now)
+                user_buckets[packet_type] = bucket
+            wait_time = bucket.wait_time(user_limit, now)
+            if wait_time > 0:
+                self.throttled_user[packet_type] += 1
+                return wait_time
+            buckets.append(bucket)
+        for bucket in buckets:
+            bucket.tokens -= 1
+        self.admitted[packet_type] += 1
+        return 0.0
+
+
+class SessionRateLimiter:
+    """
+    Rate limiter of one session (connection). Keeps connection's buckets.
+    """
+
+    __slots__ = ("_rate_limiter", "_user_id", "_buckets")
+
+    def __init__(self, rate_limiter: RateLimiter, user_id: uuid.UUID):
+        self._rate_limiter = rate_limiter
+        self._user_id = user_id
+        self._buckets: dict[str, TokenBucket] = {}
+
+    def acquire(self, packet_type: str) -> float:
+        """
+        Take tokens for the packet of `packet_type`.
+        Returns 0 if the packet is admitted, otherwise returns the number of seconds
+        after which the packet can be admitted.
+        """
+        return self._rate_limiter._acquire(self._user_id, self._buckets, packet_type)
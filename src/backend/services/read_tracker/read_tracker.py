@@ -0,0 +1,206 @@
+import asyncio
+import logging
+import uuid
+
+from backend.schemas.event import AnyEvent, ReadReceiptsUpdate, UnreadCountUpdate
+from backend.schemas.user_chat_state import ReadReceiptSchema, UserChatStateSchema
+from backend.services.chat_manager.utils import channel_code
+from backend.services.event_broker.abstract_event_broker import AbstractEventBroker
+from backend.services.outbox.outbox_dispatcher import OutboxDispatcher
+from backend.services.uow.abstract_uow import AbstractUnitOfWork
+
+DEFAULT_FLUSH_INTERVAL_SEC = 1.0
+RETRY_DELAY_SEC = 1.0
+# Events that failed to be posted are kept for retry up to this number (the oldest
+# are dropped first, they are superseded by the newer receipts and counters)
+MAX_UNPOSTED_EVENTS = 10_000
+
+logger = logging.getLogger(__name__)
+
+
+class ReadTracker:
+    """
+    Buffers read marks (`last_read` of UserChatState) in memory and flushes them
+    in the background.
+
+    Marks are coalesced per user/chat (only the greatest message id is kept), all
+    buffered marks are written by one bulk upsert, then one ReadReceiptsUpdate event
+    with all receipts of the chat is posted to every affected chat and
+    UnreadCountUpdate events with recalculated counters are posted to the readers.
+    Flushes happen at most once in `flush_interval` seconds, so it's also the
+    minimal interval between receipt events in the chat.
+    If `outbox_dispatcher` is set, events are written to the outbox in the same
+    transaction as the marks. Otherwise they are posted to the Event broker after
+    commit, events that failed to be posted are kept and posted before the events
+    of the next flush.
+    Marks that weren't flushed when the process stops are lost (clients send them
+    again on the next read).
+    """
+
+    def __init__(
+        self,
+        uow: AbstractUnitOfWork,
+        event_broker: AbstractEventBroker,
+        flush_interval: float = DEFAULT_FLUSH_INTERVAL_SEC,
+        outbox_dispatcher: OutboxDispatcher | None = None,
+    ):
+        self.uow = uow
+        self.event_broker = event_broker
+        self.flush_interval = flush_interval
+        self.outbox_dispatcher = outbox_dispatcher
+        self.marks = 0
+        self.flushed = 0
+        self.errors = 0
+        self.dropped_events = 0
+        # Chat id -> user id -> last read message id
+        self._pending: dict[uuid.UUID, dict[uuid.UUID, int]] = {}
+        # Events of committed marks that weren't posted because of broker failure
+        self._unposted: list[tuple[str, AnyEvent]] = []
+        self._wakeup = asyncio.Event()
+        self._task: asyncio.Task | None = None
+
+    @property
+    def is_running(self) -> bool:
+        return self._task is not None
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+            try:
+                await self.flush()
+            except Exception:
+                logger.exception("Flushing read marks failed")
+
+    def mark_read(self, user_id: uuid.UUID, chat_id: uuid.UUID, message_id: int):
+        self.marks += 1
+        self._add_mark(user_id, chat_id, message_id)
+        self._wakeup.set()
+
+    async def flush(self) -> int:
+        """
+        Write buffered read marks to the repository and post read receipts.
+        Returns the number of written marks.
+        If writing fails, marks are kept for the next flush. If posting fails, marks
+        are written and their events are kept for the next flush.
+
+        Raises:
+         - ChatRepoException on repository failure
+         - EventBrokerException on Event broker failure
+        """
+        pending, self._pending = self._pending, {}
+        if not pending:
+            await self._post_events([])
+            return 0
+        user_chat_state: dict[uuid.UUID, dict[uuid.UUID, dict[str, int]]] = {}
+        for chat_id, chat_marks in pending.items():
+            for user_id, message_id in chat_marks.items():
+                user_chat_state.setdefault(user_id, {})[chat_id] = {
+                    "last_delivered": message_id,
+                    "last_read": message_id,
+                }
+        try:
+            async with self.uow:
+                states = await self.uow.chat_repo.update_user_chat_state_bulk(
+                    user_chat_state_dict=user_chat_state, clamp_to_last_message=True
+                )
+                events = self._build_events(states)
+                if self.outbox_dispatcher is not None:
+                    await self.uow.chat_repo.add_outbox_events(
+                        events=[
+                            (channel, event.model_dump_json())
+                            for channel, event in events
+                        ]
+                    )
+                await self.uow.commit()
+        except BaseException:
+            # Put marks back to retry them with the next flush
+            for chat_id, chat_marks in pending.items():
+                for user_id, message_id in chat_marks.items():
+                    self._add_mark(user_id, chat_id, message_id)
+            raise
+        count = sum(len(chat_marks) for chat_marks in pending.values())
+        self.flushed += count
+        if self.outbox_dispatcher is not None:
+            self.outbox_dispatcher.wake()
+        else:
+            await self._post_events(events)
+        return count
+
+    def _build_events(
+        self, states: list[UserChatStateSchema]
+    ) -> list[tuple[str, AnyEvent]]:
+        # Receipts carry stored values: marks from clients are clamped to the last
+        # message of the chat
+        receipts: dict[uuid.UUID, list[ReadReceiptSchema]] = {}
+        for state in states:
+            receipts.setdefault(state.chat_id, []).append(
+                ReadReceiptSchema(user_id=state.user_id, last_read=state.last_read)
+            )
+        events: list[tuple[str, AnyEvent]] = [
+            (
+                channel_code("chat", chat_id),
+                ReadReceiptsUpdate(chat_id=chat_id, receipts=chat_receipts),
+            )
+            for chat_id, chat_receipts in receipts.items()
+        ]
+        events.extend(
+            (
+                channel_code("user", state.user_id),
+                UnreadCountUpdate(
+                    chat_id=state.chat_id, unread_count=state.unread_count
+                ),
+            )
+            for state in states
+        )
+        return events
+
+    async def _post_events(self, events: list[tuple[str, AnyEvent]]):
+        """
+        Post events that weren't posted by the previous flushes and the new events
+        (in this order). If posting fails, all of them are kept for the next flush.
+
+        Raises:
+         - EventBrokerException on Event broker failure
+        """
+        events, self._unposted = self._unposted + events, []
+        if not events:
+            return
+        try:
+            await self.event_broker.post_events(events=events)
+        except BaseException:
+            self._unposted = events + self._unposted
+            overflow = len(self._unposted) - MAX_UNPOSTED_EVENTS
+            if overflow > 0:
+                del self._unposted[:overflow]
+                self.dropped_events += overflow
+                logger.warning("Dropped %d unposted read receipt events", overflow)
+            raise
+
+    def _add_mark(self, user_id: uuid.UUID, chat_id: uuid.UUID, message_id: int):
+        chat_marks = self._pending.setdefault(chat_id, {})
+        if message_id > chat_marks.get(user_id, 0):
+            chat_marks[user_id] = message_id
+
+    async def _run(self):
+        while True:
+            await self._wakeup.wait()
+            self._wakeup.clear()
+            try:
+                await self.flush()
+            except Exception:
+                self.errors += 1
+                logger.exception("Flushing read marks failed")
+                await asyncio.sleep(RETRY_DELAY_SEC)
+                # Retry even if no new marks arrive
+                self._wakeup.set()
+                continue
+            await asyncio.sleep(self.flush_interval)
@@ -0,0 +1,243 @@
+import inspect
+import logging
+import random
+import time
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from functools import wraps
+from typing import Any, Callable, Iterable, Iterator, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+@dataclass(slots=True)
+class Span:
+    trace_id: str
+    span_id: str
+    parent_id: str | None
+    name: str
+    start_time: float  # Seconds since the epoch
+    end_time: float | None = None
+    error: str | None = None
+    attributes: dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def context(self) -> str:
+        """
+        Trace context of the span to pass it to other processes (`trace_id-span_id`).
+        """
+        return f"{self.trace_id}-{self.span_id}"
+
+    @property
+    def duration(self) -> float | None:
+        if self.end_time is None:
+            return None
+        return self.end_time - self.start_time
+
+
+class SpanExporter(ABC):
+    @abstractmethod
+    def export(self, span: Span):
+        """
+        Export finished span. Called synchronously, so it shouldn't block.
+        """
+        raise NotImplementedError()
+
+
+class InMemorySpanExporter(SpanExporter):
+    """
+    Keeps finished spans in the list (for tests).
+    """
+
+    def __init__(self):
+        self.spans: list[Span] = []
+
+    def export(self, span: Span):
+        self.spans.append(span)
+
+    def clear(self):
+        self.spans.clear()
+
+    def get_spans(self, name: str) -> list[Span]:
+        return [span for span in self.spans if span.name == name]
+
+
+class LoggingSpanExporter(SpanExporter):
+    """
+    Writes finished spans to the log.
+    """
+
+    def __init__(self, level: int = logging.DEBUG):
+        self.level = level
+
+    def export(self, span: Span):
+        logger.log(
+            self.level,
+            "span %s trace=%s id=%s parent=%s duration=%.6f error=%s %s",
+            span.name,
+            span.trace_id,
+            span.span_id,
+            span.parent_id,
+            span.duration or 0.0,
+            span.error,
+            span.attributes,
+        )
+
+
+class Tracer:
+    """
+    Lightweight tracer.
+
+    Current span is kept in the context variable, so spans started inside another
+    span (in the same task or in tasks created inside it) become its children.
+    Tracing is disabled until the exporter is set, in this case starting the span
+    costs one attribute check.
+    """
+
+    def __init__(self, exporter: SpanExporter | None = None):
+        self.exporter = exporter
+        self._current_span: ContextVar[Span | None] = ContextVar(
+            "current_span", default=None
+        )
+
+    def set_exporter(self, exporter: SpanExporter | None):
+        self.exporter = exporter
+
+    @property
+    def enabled(self) -> bool:
+        return self.exporter is not None
+
+    def current_span(self) -> Span | None:
+        return self._current_span.get()
+
+    def current_context(self) -> str | None:
+        """
+        Trace context of the current span (see `Span.context`) or None.
+        """
+        if self.exporter is None:
+            return None
+        span = self._current_span.get()
+        return None if span is None else span.context
+
+    @contextmanager
+    def span(
+        self,
+        name: str,
+        parent_context: str | None = None,
+        **attributes: Any,
+    ) -> Iterator[Span | None]:
+        """
+        Start the span as a child of the current span or, if `parent_context` is
+        passed, as a child of the span from another process.
+        Yields None if tracing is disabled.
+        """
+        if self.exporter is None:
+            yield None
+            return
+        span = self._new_span(name, parent_context, time.time(), attributes)
+        token = self._current_span.set(span)
+        try:
+            yield span
+        except BaseException as exc:
+            span.error = repr(exc)
+            raise
+        finally:
+            self._current_span.reset(token)
+            span.end_time = time.time()
+            self._export(span)
+
+    def record_span(
+        self,
+        name: str,
+        start_time: float,
+        end_time: float,
+        parent_context: str | None = None,
+        **attributes: Any,
+    ):
+        """
+        Export already finished span (e.g. the time the event spent in the queue).
+        """
+        if self.exporter is None:
+            return
+        span = self._new_span(name, parent_context, start_time, attributes)
+        span.end_time = end_time
+        self._export(span)
+
+    def _new_span(
+        self,
+        name: str,
+        parent_context: str | None,
+        start_time: float,
+        attributes: dict[str, Any],
+    ) -> Span:
+        trace_id: str | None = None
+        parent_id: str | None = None
+        if parent_context is not None:
+            trace_id, _, parent_id = parent_context.partition("-")
+        else:
+            parent = self._current_span.get()
+            if parent is not None:
+                trace_id, parent_id = parent.trace_id, parent.span_id
+        if not trace_id:
+            trace_id = f"{random.getrandbits(128):032x}"
+        return Span(
+            trace_id=trace_id,
+            span_id=f"{random.getrandbits(64):016x}",
+            parent_id=parent_id or None,
+            name=name,
+            start_time=start_time,
+            attributes=attributes,
+        )
+
+    def _export(self, span: Span):
+        exporter = self.exporter
+        if exporter is None:
+            return
+        try:
+            exporter.export(span)
+        except Exception:
+            logger.exception("Span export failed")
+
+
+def traced_methods(
+    prefix: str, method_names: Iterable[str] | None = None
+) -> Callable[[type[T]], type[T]]:
+    """
+    Class decorator that runs coroutine methods `method_names` (all public
+    coroutine methods defined in the class by default) in spans named
+    `{prefix}{method_name}`.
+    Spans are only started inside another span (e.g. the span of the client's
+    request), so background polling doesn't produce orphan traces.
+    """
+
+    def decorator(cls: type[T]) -> type[T]:
+        names = method_names
+        if names is None:
+            names = [
+                name
+                for name, attr in vars(cls).items()
+                if (not name.startswith("_")) and inspect.iscoroutinefunction(attr)
+            ]
+        for name in names:
+            setattr(cls, name, _traced(getattr(cls, name), prefix + name))
+        return cls
+
+    return decorator
+
+
+def _traced(method: Callable[..., Any], span_name: str) -> Callable[..., Any]:
+    @wraps(method)
+    async def wrapper(*args, **kwargs):
+        if (tracer.exporter is None) or (tracer.current_span() is None):
+            return await method(*args, **kwargs)
+        with tracer.span(span_name):
+            return await method(*args, **kwargs)
+
+    return wrapper
+
+
+tracer = Tracer()
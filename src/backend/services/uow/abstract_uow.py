@@ -8,6 +8,13 @@ USE_AS_CONTEXT_MANAGER_ERROR = "UoW should be used as a context manager"
 class AbstractUnitOfWork(ABC):
     chat_repo: AbstractChatRepo
 
+    @property
+    def uncached_chat_repo(self) -> AbstractChatRepo:
+        """
+        Chat repository that bypasses caches (reads always go to the storage).
+        """
+        return self.chat_repo
+
     @abstractmethod
     async def __aenter__(self):
         raise NotImplementedError
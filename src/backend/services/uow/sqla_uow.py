@@ -1,8 +1,11 @@
 from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
+from backend.services.chat_repo.abstract_chat_repo import AbstractChatRepo
+from backend.services.chat_repo.caching_chat_repo import CachingChatRepo, ChatRepoCache
 from backend.services.chat_repo.chat_repo_exc import ChatRepoDatabaseError
 from backend.services.chat_repo.sqla_chat_repo import SQLAlchemyChatRepo
+from backend.services.tracing.tracing import traced_methods
 from backend.services.uow.abstract_uow import (
     USE_AS_CONTEXT_MANAGER_ERROR,
     AbstractUnitOfWork,
@@ -10,16 +13,36 @@ from backend.services.uow.abstract_uow import (
 from backend.services.uow.uow_exc import UnitOfWorkException
 
 
+@traced_methods("uow.", ["commit"])
 class SQLAlchemyUnitOfWork(AbstractUnitOfWork):
+    """
+    If `repo_cache` is passed, chat_repo is wrapped into CachingChatRepo that uses
+    this cache.
+    """
+
     _session: AsyncSession | None
+    _caching_repo: CachingChatRepo | None
+    _sqla_repo: SQLAlchemyChatRepo
 
-    def __init__(self, session_maker: async_sessionmaker):
+    def __init__(
+        self, session_maker: async_sessionmaker, repo_cache: ChatRepoCache | None = None
+    ):
         self._session_factory = session_maker
+        self._repo_cache = repo_cache
 
     async def __aenter__(self):
         session = self._session_factory()
         self._session = session
-        self.chat_repo = SQLAlchemyChatRepo(session)
+        self._sqla_repo = SQLAlchemyChatRepo(session)
+        self.chat_repo = self._sqla_repo
+        self._caching_repo = None
+        if self._repo_cache is not None:
+            self._caching_repo = CachingChatRepo(self.chat_repo, self._repo_cache)
+            self.chat_repo = self._caching_repo
+
+    @property
+    def uncached_chat_repo(self) -> AbstractChatRepo:
+        return self._sqla_repo
 
     async def __aexit__(self, *args):
         if self._session is not None:
@@ -41,6 +64,8 @@ class SQLAlchemyUnitOfWork(AbstractUnitOfWork):
             raise ChatRepoDatabaseError(detail=str(e))
         except Exception as e:
             raise UnitOfWorkException(detail=str(e))
+        if self._caching_repo is not None:
+            self._caching_repo.on_commit()
 
     async def rollback(self):
         if self._session is None:
@@ -51,3 +76,6 @@ class SQLAlchemyUnitOfWork(AbstractUnitOfWork):
             raise ChatRepoDatabaseError(detail=str(e))
         except Exception as e:
             raise UnitOfWorkException(detail=str(e))
+        finally:
+            if self._caching_repo is not None:
+                self._caching_repo.on_rollback()
@@ -0,0 +1,85 @@
+import bisect
+import uuid
+from typing import Iterable
+
+from backend.schemas.user import UserSchema
+
+_IndexKey = tuple[str, int]
+
+
+def _index_key(user: UserSchema) -> _IndexKey:
+    return (user.name.casefold(), user.id.int)
+
+
+class UserNameIndex:
+    """
+    In-memory prefix index of user names.
+
+    Keeps the sorted array of (casefolded name, id) keys, so that prefix search is
+    done with binary search and doesn't touch the database.
+    The index is built once at startup (`build()`) and then updated incrementally
+    (`add()`) when new users are registered.
+    The index is process-local. Users created by other processes are not visible
+    until the index is rebuilt.
+    """
+
+    def __init__(self):
+        self._keys: list[_IndexKey] = []
+        self._users: dict[int, UserSchema] = {}
+        self._is_loaded = False
+
+    @property
+    def is_loaded(self) -> bool:
+        return self._is_loaded
+
+    def build(self, users: Iterable[UserSchema]):
+        """
+        Replace the content of the index with the list of users.
+        """
+        self._users = {
+            user.id.int: UserSchema(id=user.id, name=user.name) for user in users
+        }
+        self._keys = sorted(_index_key(user) for user in self._users.values())
+        self._is_loaded = True
+
+    def add(self, user: UserSchema):
+        """
+        Add user to the index or update user's name if user is already indexed.
+        """
+        user = UserSchema(id=user.id, name=user.name)
+        existing_user = self._users.get(user.id.int)
+        if existing_user is not None:
+            if existing_user.name == user.name:
+                return
+            self._keys.pop(bisect.bisect_left(self._keys, _index_key(existing_user)))
+        self._users[user.id.int] = user
+        bisect.insort(self._keys, _index_key(user))
+
+    def search(
+        self,
+        name_filter: str,
+        limit: int = 10,
+        start_id: uuid.UUID | None = None,
+    ) -> list[UserSchema]:
+        """
+        Get the list of users whose names start with name_filter (case insensitive).
+        Results are ordered by (name, id).
+        If start_id is specified, only users that follow the user with id=start_id
+        in this order are returned (user with id=start_id is not included).
+        """
+        prefix = name_filter.casefold()
+        pos = bisect.bisect_left(self._keys, (prefix, -1))
+        if start_id is not None:
+            start_user = self._users.get(start_id.int)
+            if start_user is None:
+                return []
+            pos = max(pos, bisect.bisect_right(self._keys, _index_key(start_user)))
+
+        res: list[UserSchema] = []
+        while (len(res) < limit) and (pos < len(self._keys)):
+            name, user_id = self._keys[pos]
+            if not name.startswith(prefix):
+                break
+            res.append(self._users[user_id])
+            pos += 1
+        return res
@@ -1,4 +1,5 @@
 import asyncio
+import time
 import uuid
 
 from fastapi import WebSocket
@@ -6,6 +7,7 @@ from fastapi import WebSocket
 from backend.schemas.client_packet import (
     ClientPacket,
     CMDAcknowledgeEvents,
+    CMDAddUsersToChat,
     CMDAddUserToChat,
     CMDCreateChat,
     CMDEditMessage,
@@ -13,7 +15,11 @@ from backend.schemas.client_packet import (
     CMDGetJoinedChats,
     CMDGetMessages,
     CMDGetUserAutocomplete,
+    CMDMarkRead,
+    CMDPing,
+    CMDSearchMessages,
     CMDSendMessage,
+    CMDTyping,
 )
 from backend.schemas.server_packet import (
     ServerPacket,
@@ -23,19 +29,50 @@ from backend.schemas.server_packet import (
     SrvRespGetJoinedChatList,
     SrvRespGetMessages,
     SrvRespGetUserAutocomplete,
+    SrvRespSearchMessages,
     SrvRespSucessNoBody,
 )
 from backend.services.chat_manager.chat_manager import ChatManager
-from backend.services.chat_manager.chat_manager_exc import ChatManagerException
+from backend.services.chat_manager.chat_manager_exc import (
+    ChatManagerException,
+    RateLimitExceeded,
+)
+from backend.services.load_shedder.load_shedder import LoadShedder
+from backend.services.metrics.metrics import metrics_registry
+from backend.services.rate_limiter.rate_limiter import SessionRateLimiter
+from backend.services.tracing.tracing import tracer
+
+REQUEST_LATENCY = metrics_registry.histogram(
+    "chat_ws_request_duration_seconds",
+    "Time of processing client's request packets",
+    labelnames=("packet_type",),
+)
 
 
 async def _process_ws_client_request_packet(
-    chat_manager: ChatManager, packet: ClientPacket, current_user_id: uuid.UUID
+    chat_manager: ChatManager,
+    packet: ClientPacket,
+    current_user_id: uuid.UUID,
+    rate_limiter: SessionRateLimiter | None = None,
+    load_shedder: LoadShedder | None = None,
 ) -> ServerPacket:
 
     response_data: ServerPacketData | None = None
+    packet_type = type(packet.data).__name__
+    request_started = False
+    start_time = time.perf_counter()
 
     try:
+        if rate_limiter is not None:
+            retry_after = rate_limiter.acquire(packet_type)
+            if retry_after > 0:
+                raise RateLimitExceeded(
+                    detail=f"Too many {packet_type} requests",
+                    retry_after=round(retry_after, 3),
+                )
+        if load_shedder is not None:
+            load_shedder.start_request(packet_type)
+            request_started = True
         if isinstance(packet.data, CMDGetJoinedChats):
             chats = await chat_manager.get_joined_chat_list(
                 current_user_id=current_user_id
@@ -48,6 +85,13 @@ async def _process_ws_client_request_packet(
                 user_id=packet.data.user_id,
             )
             response_data = SrvRespSucessNoBody()
+        elif isinstance(packet.data, CMDAddUsersToChat):
+            await chat_manager.add_users_to_chat(
+                current_user_id=current_user_id,
+                chat_id=packet.data.chat_id,
+                user_ids=packet.data.user_ids,
+            )
+            response_data = SrvRespSucessNoBody()
         elif isinstance(packet.data, CMDSendMessage):
             await chat_manager.send_message(
                 current_user_id=current_user_id, message=packet.data.message
@@ -81,12 +125,43 @@ async def _process_ws_client_request_packet(
             response_data = SrvRespGetUserAutocomplete(users=users)
         elif isinstance(packet.data, CMDCreateChat):
             await chat_manager.create_chat(
-                current_user_id=current_user_id, chat_data=packet.data.chat_data
+                current_user_id=current_user_id,
+                chat_data=packet.data.chat_data,
+                user_ids=packet.data.user_ids,
+            )
+            response_data = SrvRespSucessNoBody()
+
+        elif isinstance(packet.data, CMDSearchMessages):
+            page = await chat_manager.search_messages(
+                **packet.data.model_dump(exclude_none=True, exclude={"packet_type"}),
+                current_user_id=current_user_id,
+            )
+            response_data = SrvRespSearchMessages(
+                results=page.results, max_id=page.max_id
+            )
+        elif isinstance(packet.data, CMDTyping):
+            await chat_manager.send_typing(
+                current_user_id=current_user_id, chat_id=packet.data.chat_id
+            )
+            response_data = SrvRespSucessNoBody()
+        elif isinstance(packet.data, CMDMarkRead):
+            await chat_manager.mark_read(
+                current_user_id=current_user_id,
+                chat_id=packet.data.chat_id,
+                message_id=packet.data.message_id,
             )
             response_data = SrvRespSucessNoBody()
+        elif isinstance(packet.data, CMDPing):
+            chat_manager.ping(current_user_id=current_user_id)
+            response_data = SrvRespSucessNoBody()
 
     except ChatManagerException as exc:
         response_data = SrvRespError(error_data=exc)
+    finally:
+        if request_started:
+            assert load_shedder is not None
+            load_shedder.finish_request()
+        REQUEST_LATENCY.observe(time.perf_counter() - start_time, (packet_type,))
 
     if response_data:
         return ServerPacket(request_packet_id=packet.id, data=response_data)
@@ -95,7 +170,11 @@ async def _process_ws_client_request_packet(
 
 
 async def process_ws_client_packets(
-    chat_manager: ChatManager, current_user_id: uuid.UUID, websocket: WebSocket
+    chat_manager: ChatManager,
+    current_user_id: uuid.UUID,
+    websocket: WebSocket,
+    rate_limiter: SessionRateLimiter | None = None,
+    load_shedder: LoadShedder | None = None,
 ):
     while True:
         try:
@@ -106,11 +185,19 @@ async def process_ws_client_packets(
             break
         else:
             client_packet = ClientPacket.model_validate_json(client_packet_str)
-            server_resp = await _process_ws_client_request_packet(
-                chat_manager=chat_manager,
-                packet=client_packet,
-                current_user_id=current_user_id,
-            )
+            with tracer.span(
+                f"ws.{type(client_packet.data).__name__}",
+                user_id=str(current_user_id),
+            ) as span:
+                server_resp = await _process_ws_client_request_packet(
+                    chat_manager=chat_manager,
+                    packet=client_packet,
+                    current_user_id=current_user_id,
+                    rate_limiter=rate_limiter,
+                    load_shedder=load_shedder,
+                )
+                if (span is not None) and isinstance(server_resp.data, SrvRespError):
+                    span.error = server_resp.data.error_data.error_code
             await websocket.send_text(server_resp.model_dump_json())
 
 
@@ -0,0 +1,50 @@
+import pytest
+
+from backend.app_setups import AppConfig
+
+
+def test_defaults():
+    config = AppConfig({})
+    assert config.MULTI_NODE is False
+    assert config.MESSAGE_TAIL_CACHE_ENABLED is True
+    config.check()
+
+
+def test_multi_node__message_tail_cache_disabled():
+    config = AppConfig({"CHAT_MULTI_NODE": "1", "MESSAGE_ID_NODE_ID": "3"})
+    assert config.MESSAGE_TAIL_CACHE_ENABLED is False
+    config.check()
+
+
+def test_multi_node__node_id_required():
+    """
+    Multi-node deployment refuses to start without explicitly set node id.
+    """
+    config = AppConfig({"CHAT_MULTI_NODE": "1"})
+    assert config.MESSAGE_ID_NODE_ID is None
+    with pytest.raises(RuntimeError):
+        config.check()
+
+
+def test_multi_node__message_tail_cache_can_not_be_enabled():
+    config = AppConfig({"CHAT_MULTI_NODE": "true", "CHAT_MESSAGE_TAIL_CACHE": "on"})
+    with pytest.raises(RuntimeError):
+        config.check()
+
+
+def test_invalid_flag():
+    with pytest.raises(ValueError):
+        AppConfig({"CHAT_MULTI_NODE": "maybe"})
+
+
+def test_repo_cache():
+    config = AppConfig({})
+    assert (config.REPO_CACHE_ENABLED, config.REPO_CACHE_TTL_SEC) == (True, None)
+    config = AppConfig({"CHAT_REPO_CACHE": "0", "CHAT_REPO_CACHE_TTL_SEC": "2.5"})
+    assert (config.REPO_CACHE_ENABLED, config.REPO_CACHE_TTL_SEC) == (False, 2.5)
+
+
+@pytest.mark.parametrize("value", ("abc", "-1"))
+def test_repo_cache_ttl__invalid(value: str):
+    with pytest.raises(ValueError):
+        AppConfig({"CHAT_REPO_CACHE_TTL_SEC": value})
@@ -1,11 +1,22 @@
 import uuid
+from datetime import datetime, timedelta
+from unittest.mock import patch
 
+import jwt
 import pytest
+from fastapi.security import SecurityScopes
+from freezegun import freeze_time
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
 from backend.auth_setups import Scopes, auth_config
 from backend.models.user import User
+from backend.schemas.token_data import TokenData
+from backend.schemas.user import UserCreateSchema
+from backend.services.auth.auth_cache import AuthCache
+from backend.services.auth.auth_exc import AuthBadTokenError
 from backend.services.auth.internal_sqla_auth import InternalSQLAAuth
+from backend.services.cache.single_flight import SingleFlight
+from backend.services.user_index.user_name_index import UserNameIndex
 from backend.tests.unit.auth_service.auth_service_test_base import AuthServiceTestBase
 
 
@@ -34,3 +45,106 @@ class TestInternalSQLAAuth(AuthServiceTestBase):
         async_session.add(user)
         await async_session.commit()
         yield user_data
+
+
+class TestInternalSQLAAuthWithCache(TestInternalSQLAAuth):
+
+    @pytest.fixture()
+    def auth_service(self, async_session_maker: async_sessionmaker):
+        yield InternalSQLAAuth(
+            session_maker=async_session_maker, auth_cache=AuthCache()
+        )
+
+
+class TestInternalSQLAAuthWithSingleFlight(TestInternalSQLAAuth):
+
+    @pytest.fixture()
+    def auth_service(self, async_session_maker: async_sessionmaker):
+        yield InternalSQLAAuth(
+            session_maker=async_session_maker, single_flight=SingleFlight()
+        )
+
+
+async def test_register_user__added_to_user_name_index(
+    async_session_maker: async_sessionmaker,
+):
+    """
+    register_user() adds registered user to the user name index.
+    """
+    user_name_index = UserNameIndex()
+    user_name_index.build([])
+    auth_service = InternalSQLAAuth(
+        session_maker=async_session_maker, user_name_index=user_name_index
+    )
+    user_data = UserCreateSchema(name=f"user_{uuid.uuid4().hex}", password="123456")
+
+    user = await auth_service.register_user(user_data=user_data)
+
+    assert user_name_index.search(name_filter=user_data.name) == [user]
+
+
+async def test_validate_token__cached(
+    async_session_maker: async_sessionmaker, registered_user_data: dict[str, str]
+):
+    """
+    validate_token() decodes token only once if auth cache is used. Expired tokens
+    are not served from the cache.
+    """
+    auth_service = InternalSQLAAuth(
+        session_maker=async_session_maker, auth_cache=AuthCache()
+    )
+    tokens = await auth_service.get_token_with_pwd(
+        user_name=registered_user_data["name"],
+        password=registered_user_data["password"],
+        requested_scopes=[Scopes.chat_user.value],
+    )
+    required_scopes = SecurityScopes([Scopes.chat_user.value])
+
+    with patch.object(jwt, "decode", side_effect=jwt.decode) as decode_patched:
+        for _ in range(3):
+            token_data = await auth_service.validate_token(
+                token=tokens.access_token,
+                token_type="access",
+                required_scopes=required_scopes,
+            )
+            assert token_data.sub == registered_user_data["id"]
+        assert decode_patched.call_count == 1
+
+        with freeze_time(
+            datetime.now()
+            + auth_config.ACCESS_TOKEN_EXPIRE_TIMEDELTA
+            + timedelta(seconds=1)
+        ):
+            with pytest.raises(AuthBadTokenError):
+                await auth_service.validate_token(
+                    token=tokens.access_token,
+                    token_type="access",
+                    required_scopes=required_scopes,
+                )
+
+
+async def test_get_current_user__cached(
+    async_session_maker: async_sessionmaker, registered_user_data: dict[str, str]
+):
+    """
+    get_current_user() returns cached user data until it's invalidated.
+    """
+    auth_cache = AuthCache()
+    auth_service = InternalSQLAAuth(
+        session_maker=async_session_maker, auth_cache=auth_cache
+    )
+    token_decoded = TokenData(
+        sub=registered_user_data["id"], user_name=registered_user_data["name"]
+    )
+    user = await auth_service.get_current_user(access_token_decoded=token_decoded)
+
+    # Delete user from DB. Cached data is still returned
+    async with async_session_maker() as session:
+        db_user = await session.get(User, user.id)
+        await session.delete(db_user)
+        await session.commit()
+    assert await auth_service.get_current_user(token_decoded) == user
+
+    auth_cache.invalidate_user(user.id)
+    with pytest.raises(AuthBadTokenError, match="Invalid user id"):
+        await auth_service.get_current_user(access_token_decoded=token_decoded)
@@ -0,0 +1,100 @@
+import asyncio
+import threading
+import time
+from typing import cast
+
+import pytest
+from passlib.context import CryptContext
+
+from backend.auth_setups import auth_config
+from backend.services.auth.auth_exc import AuthServiceBusyError
+from backend.services.auth.password_hasher import PasswordHasher
+
+
+class SlowPwdContext:
+    """
+    Fake CryptContext that records the maximum number of concurrent calls.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._active = 0
+        self.max_active = 0
+
+    def hash(self, password: str) -> str:
+        with self._lock:
+            self._active += 1
+            self.max_active = max(self.max_active, self._active)
+        time.sleep(0.01)
+        with self._lock:
+            self._active -= 1
+        return f"hashed_{password}"
+
+
+async def test_hash_verify():
+    """
+    hash() and verify() produce the same results as pwd_context.
+    """
+    hasher = PasswordHasher(
+        pwd_context=auth_config.pwd_context, max_workers=1, queue_size=10
+    )
+    hashed_password = await hasher.hash("password")
+    assert auth_config.pwd_context.verify("password", hashed_password)
+    assert await hasher.verify("password", hashed_password) is True
+    assert await hasher.verify("wrong_password", hashed_password) is False
+
+
+async def test_concurrency_limit_and_stats():
+    """
+    Not more than max_workers operations run concurrently, the rest are queued.
+    Stats reflect the number of completed and queued operations.
+    """
+    pwd_context = SlowPwdContext()
+    hasher = PasswordHasher(
+        pwd_context=cast(CryptContext, pwd_context), max_workers=2, queue_size=10
+    )
+
+    results = await asyncio.gather(*(hasher.hash(str(i)) for i in range(6)))
+
+    assert results == [f"hashed_{i}" for i in range(6)]
+    assert pwd_context.max_active == 2
+    stats = hasher.stats()
+    assert stats.completed == 6
+    assert stats.queued == 0
+    assert stats.running == 0
+    assert stats.max_queued >= 4
+    assert stats.total_wait_time_sec > 0
+
+
+async def test_queue_size_limit():
+    """
+    Operations above `queue_size` waiting ones are rejected right away and counted.
+    """
+    release = threading.Event()
+
+    class BlockingPwdContext:
+        def hash(self, password: str) -> str:
+            release.wait()
+            return f"hashed_{password}"
+
+    hasher = PasswordHasher(
+        pwd_context=cast(CryptContext, BlockingPwdContext()),
+        max_workers=1,
+        queue_size=2,
+    )
+    running = asyncio.create_task(hasher.hash("0"))
+    while hasher.stats().running == 0:
+        await asyncio.sleep(0.001)
+    queued = [asyncio.create_task(hasher.hash(str(i))) for i in (1, 2)]
+    await asyncio.sleep(0)
+
+    with pytest.raises(AuthServiceBusyError):
+        await hasher.hash("3")
+    release.set()
+    assert await asyncio.gather(running, *queued) == [
+        "hashed_0",
+        "hashed_1",
+        "hashed_2",
+    ]
+    stats = hasher.stats()
+    assert (stats.completed, stats.rejected) == (3, 1)
@@ -0,0 +1,62 @@
+from backend.services.cache.expiring_lru_cache import ExpiringLRUCache
+
+
+class FakeTimer:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_get_set__hits_misses():
+    """
+    get() returns values added by set() and counts hits and misses.
+    """
+    cache: ExpiringLRUCache[str, int] = ExpiringLRUCache(maxsize=10)
+    assert cache.get("a") is None
+    cache.set("a", 1)
+    assert cache.get("a") == 1
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_lru_eviction():
+    """
+    The least recently used entry is evicted when the cache is full.
+    """
+    cache: ExpiringLRUCache[str, int] = ExpiringLRUCache(maxsize=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")  # "b" becomes the least recently used
+    cache.set("c", 3)
+    assert len(cache) == 2
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+
+
+def test_ttl_and_expires_at():
+    """
+    Entries expire after ttl seconds or at expires_at if it's passed.
+    """
+    timer = FakeTimer()
+    cache: ExpiringLRUCache[str, int] = ExpiringLRUCache(maxsize=10, ttl=5, timer=timer)
+    cache.set("a", 1)
+    cache.set("b", 2, expires_at=10)
+    timer.now = 6
+    assert cache.get("a") is None
+    assert cache.get("b") == 2
+    timer.now = 10
+    assert cache.get("b") is None
+    assert len(cache) == 0
+
+
+def test_pop_and_clear():
+    cache: ExpiringLRUCache[str, int] = ExpiringLRUCache(maxsize=10)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.pop("a")
+    cache.pop("unknown")
+    assert cache.get("a") is None
+    cache.clear()
+    assert len(cache) == 0
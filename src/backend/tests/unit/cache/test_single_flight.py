@@ -0,0 +1,92 @@
+import asyncio
+
+import pytest
+
+from backend.services.cache.single_flight import SingleFlight
+
+
+class FakeQuery:
+    """
+    Fake query that waits until it's released and counts calls.
+    """
+
+    def __init__(self, result: int = 1, exc: Exception | None = None):
+        self.result = result
+        self.exc = exc
+        self.calls = 0
+        self.released = asyncio.Event()
+
+    async def __call__(self) -> int:
+        self.calls += 1
+        await self.released.wait()
+        if self.exc is not None:
+            raise self.exc
+        return self.result
+
+
+async def test_concurrent_calls_coalesced():
+    """
+    Concurrent calls with the same key share one call and its result.
+    Calls with different keys aren't coalesced.
+    """
+    single_flight = SingleFlight()
+    query = FakeQuery(result=42)
+    other_query = FakeQuery(result=7)
+    tasks = [asyncio.create_task(single_flight.run("key", query)) for _ in range(5)] + [
+        asyncio.create_task(single_flight.run("other_key", other_query))
+    ]
+    await asyncio.sleep(0)
+    query.released.set()
+    other_query.released.set()
+
+    assert await asyncio.gather(*tasks) == [42] * 5 + [7]
+    assert (query.calls, other_query.calls) == (1, 1)
+    assert (single_flight.calls, single_flight.coalesced) == (6, 4)
+
+
+async def test_sequential_calls_not_coalesced():
+    """
+    Results aren't cached: the next call after the completion of previous one runs
+    the query again.
+    """
+    single_flight = SingleFlight()
+    query = FakeQuery()
+    query.released.set()
+    await single_flight.run("key", query)
+    await single_flight.run("key", query)
+    assert query.calls == 2
+
+
+async def test_exception_shared():
+    """
+    Exception raised by the query is raised to all waiting callers.
+    """
+    single_flight = SingleFlight()
+    query = FakeQuery(exc=ValueError("Failure"))
+    tasks = [asyncio.create_task(single_flight.run("key", query)) for _ in range(3)]
+    await asyncio.sleep(0)
+    query.released.set()
+
+    results = await asyncio.gather(*tasks, return_exceptions=True)
+    assert all(isinstance(res, ValueError) for res in results)
+    assert query.calls == 1
+
+
+async def test_first_caller_cancelled():
+    """
+    If the first caller is cancelled, waiting callers retry the query.
+    """
+    single_flight = SingleFlight()
+    query = FakeQuery()
+    first = asyncio.create_task(single_flight.run("key", query))
+    await asyncio.sleep(0)
+    second = asyncio.create_task(single_flight.run("key", query))
+    await asyncio.sleep(0)
+    first.cancel()
+    await asyncio.sleep(0)
+    query.released.set()
+
+    assert await second == 1
+    with pytest.raises(asyncio.CancelledError):
+        await first
+    assert query.calls == 2
@@ -198,8 +198,9 @@ async def test_add_user_to_chat__update_events_sent(
     async_session.add_all((user, chat, message))
     await async_session.commit()
 
-    # Subscribe user to events
+    # Subscribe user to events, load the first circle (it's empty)
     await chat_manager.subscribe_for_updates(current_user_id=user_id)
+    await chat_manager.get_first_circle_user_list(current_user_id=user_id)
 
     # Call chat_manager.add_user_to_chat()
     await chat_manager.add_user_to_chat(
@@ -293,7 +294,7 @@ async def test_add_user_to_chat_user_unauthorized(
     assert user_chat_link is None
 
 
-@pytest.mark.parametrize("failure_method", ("add_user_to_chat", "add_notification"))
+@pytest.mark.parametrize("failure_method", ("add_users_to_chat", "add_notification"))
 async def test_add_user_to_chat_repo_failure(
     async_session: AsyncSession,
     chat_manager: ChatManager,
@@ -325,7 +326,7 @@ async def test_add_user_to_chat_repo_failure(
             )
 
 
-@pytest.mark.parametrize("failure_method", ("post_event",))
+@pytest.mark.parametrize("failure_method", ("post_events",))
 async def test_add_user_to_chat_event_broker_failure(
     async_session: AsyncSession,
     chat_manager: ChatManager,
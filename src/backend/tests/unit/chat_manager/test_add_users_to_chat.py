@@ -0,0 +1,183 @@
+import json
+import uuid
+from unittest.mock import Mock, patch
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.models.chat import Chat
+from backend.models.chat_message import ChatNotification
+from backend.models.user import User
+from backend.models.user_chat_link import UserChatLink
+from backend.schemas.event import (
+    AnotherUserJoinedChatNotification,
+    ChatMessageEvent,
+    UserAddedToChatNotification,
+)
+from backend.services.chat_manager.chat_manager import (
+    USERS_JOINED_CHAT_NOTIFICATION,
+    ChatManager,
+)
+from backend.services.chat_manager.chat_manager_exc import (
+    BadRequest,
+    UnauthorizedAction,
+)
+from backend.services.chat_manager.utils import channel_code
+from backend.services.event_broker.in_memory_event_broker import InMemoryEventBroker
+
+
+async def test_add_users_to_chat__success(
+    async_session: AsyncSession,
+    chat_manager: ChatManager,
+    event_broker_user_id_list: list[uuid.UUID],
+):
+    """
+    Successful execution of add_users_to_chat() creates user-chat association records
+    for all users and one notification record in the database.
+    """
+    # Create Users and Chat
+    chat_owner_id = uuid.uuid4()
+    user_ids = event_broker_user_id_list
+    chat_id = uuid.uuid4()
+    chat = Chat(id=chat_id, title="", owner_id=chat_owner_id)
+    users = [
+        User(id=user_id, name=f"user {idx}") for idx, user_id in enumerate(user_ids)
+    ]
+    async_session.add_all((chat, *users))
+    await async_session.commit()
+
+    # Call chat_manager.add_users_to_chat()
+    await chat_manager.add_users_to_chat(
+        current_user_id=chat_owner_id, user_ids=user_ids, chat_id=chat_id
+    )
+
+    # Check that UserChatLink records were added to the DB
+    res = await async_session.scalars(
+        select(UserChatLink.user_id).where(UserChatLink.chat_id == chat_id)
+    )
+    assert set(res.all()) == set(user_ids)
+
+    # Check that only one ChatNotification record was added to the DB
+    res_n = await async_session.scalars(
+        select(ChatNotification).where(ChatNotification.chat_id == chat_id)
+    )
+    notifications = res_n.all()
+    assert len(notifications) == 1
+    assert notifications[0].text == USERS_JOINED_CHAT_NOTIFICATION
+    assert notifications[0].params == json.dumps(
+        {"user_names": "user 0, user 1, user 2"}
+    )
+
+
+async def test_add_users_to_chat__events_posted_to_mb(
+    async_session: AsyncSession,
+    chat_manager: ChatManager,
+    event_broker_user_id_list: list[uuid.UUID],
+):
+    """
+    Successful execution of add_users_to_chat() posts one notification to the chat's
+    channel and UserAddedToChatNotification to each added user's channel in one
+    batch.
+    """
+    # Create Users and Chat, subscribe users for updates
+    chat_owner_id = event_broker_user_id_list[0]
+    user_ids = event_broker_user_id_list[1:]
+    chat_id = uuid.uuid4()
+    chat = Chat(id=chat_id, title="", owner_id=chat_owner_id)
+    users = [User(id=user_id, name=f"user {user_id}") for user_id in user_ids]
+    async_session.add_all((chat, *users))
+    await async_session.commit()
+    await chat_manager.event_broker.subscribe(
+        channel=channel_code("chat", chat_id), user_id=chat_owner_id
+    )
+    for user_id in user_ids:
+        await chat_manager.event_broker.subscribe(
+            channel=channel_code("user", user_id), user_id=user_id
+        )
+
+    # Call chat_manager.add_users_to_chat()
+    with patch.object(
+        InMemoryEventBroker,
+        "post_events",
+        autospec=True,
+        side_effect=InMemoryEventBroker.post_events,
+    ) as post_events_patched:
+        await chat_manager.add_users_to_chat(
+            current_user_id=chat_owner_id, user_ids=user_ids, chat_id=chat_id
+        )
+        post_events_patched.assert_awaited_once()
+
+    # Check that notification events were posted to the chat's channel
+    events = await chat_manager.event_broker.get_events(user_id=chat_owner_id)
+    assert len(events) == 2
+    assert isinstance(events[0], ChatMessageEvent)
+    assert isinstance(events[1], AnotherUserJoinedChatNotification)
+
+    # Check that every added user was notified
+    for user_id in user_ids:
+        events = await chat_manager.event_broker.get_events(user_id=user_id)
+        assert len(events) == 1
+        assert isinstance(events[0], UserAddedToChatNotification)
+        assert events[0].chat_id == chat_id
+
+
+async def test_add_users_to_chat__wrong_user_id(
+    async_session: AsyncSession,
+    chat_manager: ChatManager,
+):
+    """
+    add_users_to_chat() raises BadRequest if some of users doesn't exist. Nothing is
+    added to the DB in that case.
+    """
+    # Create User and Chat
+    chat_owner_id = uuid.uuid4()
+    user_id = uuid.uuid4()
+    chat_id = uuid.uuid4()
+    chat = Chat(id=chat_id, title="", owner_id=chat_owner_id)
+    user = User(id=user_id, name="")
+    async_session.add_all((user, chat))
+    await async_session.commit()
+
+    # Call chat_manager.add_users_to_chat() with one wrong user id
+    with pytest.raises(BadRequest):
+        await chat_manager.add_users_to_chat(
+            current_user_id=chat_owner_id,
+            user_ids=[user_id, uuid.uuid4()],
+            chat_id=chat_id,
+        )
+
+    # Check that UserChatLink records were not added to the DB
+    user_chat_link = await async_session.scalar(
+        select(UserChatLink).where(UserChatLink.chat_id == chat_id)
+    )
+    assert user_chat_link is None
+
+
+async def test_add_users_to_chat__user_unauthorized(
+    async_session: AsyncSession, chat_manager: ChatManager
+):
+    """
+    Attempt to call add_users_to_chat() without authorization to add users to this
+    chat (current_user is not a chat owner) raises UnauthorizedAction
+    """
+    # Create User and Chat
+    chat_owner_id = uuid.uuid4()
+    user_id = uuid.uuid4()
+    chat_id = uuid.uuid4()
+    chat = Chat(id=chat_id, title="", owner_id=chat_owner_id)
+    user = User(id=user_id, name="")
+    async_session.add_all((user, chat))
+    await async_session.commit()
+
+    # Call chat_manager.add_users_to_chat()
+    with (
+        patch.object(InMemoryEventBroker, "post_events", new=Mock()) as post_patched,
+        pytest.raises(UnauthorizedAction),
+    ):
+        await chat_manager.add_users_to_chat(
+            current_user_id=user_id,  # user_id is not an owner of this chat
+            user_ids=[user_id],
+            chat_id=chat_id,
+        )
+    post_patched.assert_not_called()
@@ -1,50 +1,133 @@
+import json
 import uuid
-from unittest.mock import Mock, patch
+from unittest.mock import ANY, Mock, patch
 
 import pytest
+from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from backend.models.chat_message import ChatNotification
 from backend.models.user import User
+from backend.models.user_chat_link import UserChatLink
 from backend.schemas.chat import ChatCreateSchema
-from backend.services.chat_manager.chat_manager import ChatManager
+from backend.schemas.event import UserAddedToChatNotification
+from backend.services.chat_manager.chat_manager import (
+    USERS_JOINED_CHAT_NOTIFICATION,
+    ChatManager,
+)
 from backend.services.chat_manager.chat_manager_exc import (
     EventBrokerError,
     RepositoryError,
     UnauthorizedAction,
 )
+from backend.services.chat_manager.utils import channel_code
 from backend.services.chat_repo.chat_repo_exc import ChatRepoException
 from backend.services.chat_repo.sqla_chat_repo import SQLAlchemyChatRepo
 from backend.services.event_broker.event_broker_exc import EventBrokerException
 from backend.services.event_broker.in_memory_event_broker import InMemoryEventBroker
+from backend.services.uow.sqla_uow import SQLAlchemyUnitOfWork
 
 
-async def test_create_chat__evokes_add_chat_and_add_user_to_chat(
+async def test_create_chat__evokes_add_chat_and_add_users_to_chat(
+    async_session: AsyncSession,
     chat_manager: ChatManager,
 ):
     """
-    create_chat() method evokes chat_repo.add_chat() and chat_manager.add_user_to_chat()
-    methods with corresponding params.
+    create_chat() method evokes chat_repo.add_chat() and chat_repo.add_users_to_chat()
+    methods with corresponding params and commits changes once.
     """
     current_user_id = uuid.uuid4()
+    async_session.add(User(id=current_user_id, name="owner"))
+    await async_session.commit()
     chat_data = ChatCreateSchema(
         id=uuid.uuid4(),
         title=f"chat {uuid.uuid4()}",
         owner_id=current_user_id,
     )
 
-    with patch.object(
-        SQLAlchemyChatRepo, "add_chat", return_value=chat_data
-    ) as add_chat_patched:
-        with patch.object(chat_manager, "add_user_to_chat") as add_user_patched:
-            await chat_manager.create_chat(
-                current_user_id=current_user_id, chat_data=chat_data
-            )
-            add_chat_patched.assert_awaited_once_with(chat=chat_data)
-            add_user_patched.assert_awaited_once_with(
-                current_user_id=current_user_id,
-                user_id=current_user_id,
-                chat_id=chat_data.id,
-            )
+    with (
+        patch.object(
+            SQLAlchemyChatRepo,
+            "add_chat",
+            autospec=True,
+            side_effect=SQLAlchemyChatRepo.add_chat,
+        ) as add_chat_patched,
+        patch.object(
+            SQLAlchemyChatRepo,
+            "add_users_to_chat",
+            autospec=True,
+            side_effect=SQLAlchemyChatRepo.add_users_to_chat,
+        ) as add_users_patched,
+        patch.object(
+            SQLAlchemyUnitOfWork,
+            "commit",
+            autospec=True,
+            side_effect=SQLAlchemyUnitOfWork.commit,
+        ) as commit_patched,
+    ):
+        await chat_manager.create_chat(
+            current_user_id=current_user_id, chat_data=chat_data
+        )
+        add_chat_patched.assert_awaited_once_with(ANY, chat=chat_data)
+        add_users_patched.assert_awaited_once_with(
+            ANY, chat_id=chat_data.id, user_ids=[current_user_id]
+        )
+        commit_patched.assert_awaited_once()
+
+
+async def test_create_chat__with_members(
+    async_session: AsyncSession,
+    chat_manager: ChatManager,
+    event_broker_user_id_list: list[uuid.UUID],
+):
+    """
+    create_chat() with user_ids adds owner and all users to the chat, creates one
+    notification and posts UserAddedToChatNotification to each added user.
+    """
+    current_user_id = event_broker_user_id_list[0]
+    member_ids = event_broker_user_id_list[1:]
+    async_session.add_all(
+        [
+            User(id=user_id, name=f"user {idx}")
+            for idx, user_id in enumerate(event_broker_user_id_list)
+        ]
+    )
+    await async_session.commit()
+    for user_id in event_broker_user_id_list:
+        await chat_manager.event_broker.subscribe(
+            channel=channel_code("user", user_id), user_id=user_id
+        )
+    chat_data = ChatCreateSchema(
+        id=uuid.uuid4(), title="my chat", owner_id=current_user_id
+    )
+
+    await chat_manager.create_chat(
+        current_user_id=current_user_id, chat_data=chat_data, user_ids=member_ids
+    )
+
+    # Check that all users were added to the chat
+    member_ids_in_db = await async_session.scalars(
+        select(UserChatLink.user_id).where(UserChatLink.chat_id == chat_data.id)
+    )
+    assert set(member_ids_in_db.all()) == set(event_broker_user_id_list)
+
+    # Check that only one notification was created
+    notifications = await async_session.scalars(
+        select(ChatNotification).where(ChatNotification.chat_id == chat_data.id)
+    )
+    notifications_list = notifications.all()
+    assert len(notifications_list) == 1
+    assert notifications_list[0].text == USERS_JOINED_CHAT_NOTIFICATION
+    assert notifications_list[0].params == json.dumps(
+        {"user_names": "user 0, user 1, user 2"}
+    )
+
+    # Check that every added user received UserAddedToChatNotification
+    for user_id in event_broker_user_id_list:
+        events = await chat_manager.event_broker.get_events(user_id=user_id)
+        assert len(events) == 1
+        assert isinstance(events[0], UserAddedToChatNotification)
+        assert events[0].chat_id == chat_data.id
 
 
 async def test_create_chat__unauthorized_error(
@@ -69,7 +152,7 @@ async def test_create_chat__unauthorized_error(
         )
 
 
-@pytest.mark.parametrize("failure_method", ("add_chat", "add_user_to_chat"))
+@pytest.mark.parametrize("failure_method", ("add_chat", "add_users_to_chat"))
 async def test_create_chat__repo_failure(
     chat_manager: ChatManager,
     failure_method: str,
@@ -98,7 +181,7 @@ async def test_create_chat__repo_failure(
             )
 
 
-@pytest.mark.parametrize("failure_method", ("post_event",))
+@pytest.mark.parametrize("failure_method", ("post_events",))
 async def test_create_chat__event_broker_failure(
     async_session: AsyncSession,
     chat_manager: ChatManager,
@@ -233,8 +233,8 @@ async def test_edit_message__event_broker_failure(
 ):
     """
     edit_message() raises EventBrokerError in case of EventBroker failure.
-    Message in the DB remains unchanged.
-    ChatMessageEdited event is not posted to EventBroker.
+    Event is posted only after the changes are committed, so the message in the DB
+    is updated.
     """
     # Create message, user, chat and user-chat link in the DB
     user_id = event_broker_user_id_list[0]
@@ -253,9 +253,11 @@ async def test_edit_message__event_broker_failure(
     # Subscribe user for updates
     await chat_manager.subscribe_for_updates(current_user_id=user_id)
 
-    # Brake chat_manager.event_broker.post_event() method
+    # Brake chat_manager.event_broker.post_events() method
     with patch.object(
-        chat_manager.event_broker, "post_event", new=Mock(side_effect=EventBrokerFail())
+        chat_manager.event_broker,
+        "post_events",
+        new=Mock(side_effect=EventBrokerFail()),
     ):
         # Call chat_manager.edit_message()
         with pytest.raises(EventBrokerError):
@@ -263,10 +265,6 @@ async def test_edit_message__event_broker_failure(
                 current_user_id=user_id, message_id=message.id, text=new_text
             )
 
-    # Check that message in DB was not updated
+    # Check that message in DB was updated
     await async_session.refresh(message)
-    assert message.text == initial_text
-
-    # Check that ChatMessageEdited was not posted to the EventBroker
-    user_events = await chat_manager.get_events(current_user_id=user_id)
-    assert len(user_events) == 0
+    assert message.text == new_text
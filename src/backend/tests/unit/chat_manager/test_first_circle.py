@@ -0,0 +1,34 @@
+import uuid
+
+from backend.services.chat_manager.first_circle import FirstCircle, IdSet
+
+
+def test_id_set():
+    ids = [uuid.uuid4() for _ in range(20)]
+    id_set = IdSet(ids[:10])
+
+    assert all(id in id_set for id in ids[:10])
+    assert not any(id in id_set for id in ids[10:])
+    assert id_set.add(ids[0]) is False
+    assert id_set.add(ids[10]) is True
+    assert len(id_set) == 11
+    assert set(id_set) == set(ids[:11])
+    assert list(id_set) == sorted(ids[:11], key=lambda id: id.int)
+
+
+def test_first_circle():
+    user_1_id, user_2_id = uuid.uuid4(), uuid.uuid4()
+    chat_1_id, chat_2_id = uuid.uuid4(), uuid.uuid4()
+    first_circle = FirstCircle()
+
+    assert first_circle.add(user_1_id, chat_1_id) is True
+    assert first_circle.add(user_1_id, chat_2_id) is False
+    assert first_circle.add(user_2_id, chat_2_id) is True
+
+    assert len(first_circle) == 2
+    assert user_1_id in first_circle
+    assert uuid.uuid4() not in first_circle
+    assert first_circle.to_dict() == {
+        user_1_id: {chat_1_id, chat_2_id},
+        user_2_id: {chat_2_id},
+    }
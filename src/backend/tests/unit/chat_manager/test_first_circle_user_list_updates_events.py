@@ -1,12 +1,19 @@
 import uuid
+from unittest.mock import patch
 
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from backend.models.chat import Chat
 from backend.models.user import User
 from backend.models.user_chat_link import UserChatLink
-from backend.schemas.event import FirstCircleUserListUpdate
+from backend.schemas.event import (
+    AnotherUserJoinedChatNotification,
+    FirstCircleUserListUpdate,
+)
+from backend.schemas.user import UserSchema
 from backend.services.chat_manager.chat_manager import ChatManager
+from backend.services.chat_manager.utils import channel_code
+from backend.services.chat_repo.sqla_chat_repo import SQLAlchemyChatRepo
 
 # Update on joining new chat
 
@@ -186,4 +193,71 @@ async def test_first_circle_updates_events__new_user_joined_mutual_chat(
         assert False, "No FirstCircleUserListUpdate received"
 
 
+async def test_first_circle_updates_events__incremental_update(
+    async_session: AsyncSession,
+    chat_manager: ChatManager,
+    event_broker_user_id_list: list[uuid.UUID],
+):
+    """
+    AnotherUserJoinedChatNotification updates the first circle state incrementally
+    using profiles of joined users attached to the event, without repository
+    requests. Repeated events are idempotent.
+    """
+    user_1_id = event_broker_user_id_list[0]
+    chat_1 = Chat(id=uuid.uuid4(), title="", owner_id=user_1_id)
+    chat_2 = Chat(id=uuid.uuid4(), title="", owner_id=user_1_id)
+    user_1 = User(id=user_1_id, name="Me")
+    user_2 = User(id=uuid.uuid4(), name="User 2")
+    user_3 = User(id=uuid.uuid4(), name="User 3")
+    async_session.add_all(
+        (
+            user_1,
+            user_2,
+            user_3,
+            chat_1,
+            chat_2,
+            UserChatLink(user_id=user_1_id, chat_id=chat_1.id),
+            UserChatLink(user_id=user_1_id, chat_id=chat_2.id),
+            UserChatLink(user_id=user_2.id, chat_id=chat_1.id),
+        )
+    )
+    await async_session.commit()
+    await chat_manager.subscribe_for_updates(current_user_id=user_1_id)
+    await chat_manager._get_first_circle_user_list_updates(current_user_id=user_1_id)
+
+    # user_2 (already in the first circle) and user_3 (new) joined chat_2
+    for _ in range(2):
+        await chat_manager.event_broker.post_event(
+            channel=channel_code("chat", chat_2.id),
+            event=AnotherUserJoinedChatNotification(
+                chat_id=chat_2.id,
+                users=[
+                    UserSchema.model_validate(user_2),
+                    UserSchema.model_validate(user_3),
+                ],
+            ),
+        )
+    with (
+        patch.object(SQLAlchemyChatRepo, "get_user_list") as get_user_list_patched,
+        patch.object(SQLAlchemyChatRepo, "get_chat_member_ids") as members_patched,
+    ):
+        await chat_manager.get_events(current_user_id=user_1_id)
+        await chat_manager.acknowledge_events(current_user_id=user_1_id)
+        get_user_list_patched.assert_not_awaited()
+        members_patched.assert_not_awaited()
+
+    assert chat_manager._first_circle is not None
+    assert chat_manager._first_circle.to_dict() == {
+        user_1_id: {chat_1.id, chat_2.id},
+        user_2.id: {chat_1.id, chat_2.id},
+        user_3.id: {chat_2.id},
+    }
+    events = await chat_manager.get_events(current_user_id=user_1_id)
+    first_circle_updates = [
+        event for event in events if isinstance(event, FirstCircleUserListUpdate)
+    ]
+    assert len(first_circle_updates) == 1
+    assert [user.id for user in first_circle_updates[0].users] == [user_3.id]
+
+
 # TODO: Add test for sending FirstCircleUserListUpdate on user update
@@ -1,17 +1,21 @@
+import asyncio
 import uuid
 from typing import Any
 from unittest.mock import Mock, patch
 
 import pytest
-from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
 from backend.models.chat import Chat
 from backend.models.user import User
 from backend.models.user_chat_link import UserChatLink
+from backend.services.cache.single_flight import SingleFlight
 from backend.services.chat_manager.chat_manager import ChatManager
 from backend.services.chat_manager.chat_manager_exc import RepositoryError
 from backend.services.chat_repo.chat_repo_exc import ChatRepoException
 from backend.services.chat_repo.sqla_chat_repo import SQLAlchemyChatRepo
+from backend.services.event_broker.in_memory_event_broker import InMemoryEventBroker
+from backend.services.uow.sqla_uow import SQLAlchemyUnitOfWork
 
 
 async def test_get_joined_chat_list_success(
@@ -75,3 +79,43 @@ async def test_get_joined_chat_list_repo_failure(
         # Call get_joined_chat_list() and check that it raises RepositoryError
         with pytest.raises(RepositoryError):
             await chat_manager.get_joined_chat_list(current_user_id=user_id)
+
+
+async def test_get_joined_chat_list__single_flight(
+    async_session_maker: async_sessionmaker, async_session: AsyncSession
+):
+    """
+    Concurrent identical calls made by ChatManager instances that share SingleFlight
+    are served by one repository query.
+    """
+    user_id = uuid.uuid4()
+    chat_id = uuid.uuid4()
+    async_session.add_all(
+        (
+            User(id=user_id, name="User"),
+            Chat(id=chat_id, title="chat", owner_id=user_id),
+            UserChatLink(user_id=user_id, chat_id=chat_id),
+        )
+    )
+    await async_session.commit()
+    single_flight = SingleFlight()
+    chat_managers = [
+        ChatManager(
+            uow=SQLAlchemyUnitOfWork(async_session_maker),
+            event_broker=InMemoryEventBroker(),
+            single_flight=single_flight,
+        )
+        for _ in range(3)
+    ]
+
+    with patch.object(
+        SQLAlchemyChatRepo,
+        "get_joined_chat_list",
+        autospec=True,
+        side_effect=SQLAlchemyChatRepo.get_joined_chat_list,
+    ) as patched:
+        results = await asyncio.gather(
+            *(cm.get_joined_chat_list(current_user_id=user_id) for cm in chat_managers)
+        )
+    patched.assert_awaited_once()
+    assert all([chat.id for chat in res] == [chat_id] for res in results)
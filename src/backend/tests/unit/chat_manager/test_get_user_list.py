@@ -1,42 +1,63 @@
+import uuid
 from typing import Any
 from unittest.mock import Mock, patch
 
 import pytest
 
+from backend.schemas.user import UserSchema
 from backend.services.chat_manager.chat_manager import ChatManager
 from backend.services.chat_manager.chat_manager_exc import RepositoryError
 from backend.services.chat_repo.chat_repo_exc import ChatRepoException
 from backend.services.chat_repo.sqla_chat_repo import SQLAlchemyChatRepo
+from backend.services.user_index.user_name_index import UserNameIndex
 
 
-@pytest.mark.parametrize("offset", (None, 1, 10))
+@pytest.mark.parametrize("start_id", (None, uuid.uuid4()))
 @pytest.mark.parametrize("limit", (None, 1, 10))
 async def test_get_user_list__success(
     chat_manager: ChatManager,
-    offset: int | None,
+    start_id: uuid.UUID | None,
     limit: int | None,
 ):
     """
     get_user_list() calls chat_repo.get_user_list() with the corresponding params.
     """
-    offset_real = offset if (offset is not None) else 0
     limit_real = limit if (limit is not None) else 10
 
     params: dict[str, Any] = {"name_filter": "n"}
     if limit is not None:
         params["limit"] = limit
-    if offset is not None:
-        params["offset"] = offset
+    if start_id is not None:
+        params["start_id"] = start_id
 
     with patch.object(SQLAlchemyChatRepo, "get_user_list") as patched:
         await chat_manager.get_user_list(**params)
         patched.assert_awaited_once_with(
             name_filter="n",
             limit=limit_real,
-            offset=offset_real,
+            start_id=start_id,
         )
 
 
+async def test_get_user_list__user_name_index(chat_manager: ChatManager):
+    """
+    get_user_list() uses the user name index if it's loaded and doesn't call
+    chat_repo.get_user_list().
+    """
+    users = [UserSchema(id=uuid.uuid4(), name=f"user {i}") for i in range(3)]
+    user_name_index = UserNameIndex()
+    user_name_index.build(users)
+    chat_manager.user_name_index = user_name_index
+
+    with patch.object(SQLAlchemyChatRepo, "get_user_list") as patched:
+        res = await chat_manager.get_user_list(name_filter="User", limit=2)
+        patched.assert_not_awaited()
+    assert res == users[:2]
+
+    res = await chat_manager.get_user_list(name_filter="User", start_id=res[-1].id)
+    assert res == users[2:]
+
+
 @pytest.mark.parametrize("failure_method", ("get_user_list",))
 async def test_get_user_list__repo_failure(
     chat_manager: ChatManager,
@@ -0,0 +1,148 @@
+import uuid
+from unittest.mock import patch
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from backend.models.chat import Chat
+from backend.models.user import User
+from backend.models.user_chat_link import UserChatLink
+from backend.schemas.event import UserAddedToChatNotification
+from backend.services.chat_manager.chat_manager import ChatManager
+from backend.services.chat_manager.membership_cache import ChatMembershipCache
+from backend.services.chat_manager.utils import channel_code
+from backend.services.chat_repo.sqla_chat_repo import SQLAlchemyChatRepo
+from backend.services.event_broker.in_memory_event_broker import InMemoryEventBroker
+from backend.services.uow.sqla_uow import SQLAlchemyUnitOfWork
+
+
+def test_membership_cache__set_and_add():
+    """
+    set_user_chat_ids() and add_chat_members() update user's chat set. Users whose
+    chats aren't loaded are not tracked.
+    """
+    user_1_id, user_2_id = uuid.uuid4(), uuid.uuid4()
+    chat_1_id, chat_2_id = uuid.uuid4(), uuid.uuid4()
+    cache = ChatMembershipCache()
+    assert cache.is_member(user_1_id, chat_1_id) is None
+
+    cache.set_user_chat_ids(user_1_id, [chat_1_id])
+    assert cache.is_member(user_1_id, chat_1_id) is True
+    assert cache.is_member(user_1_id, chat_2_id) is False
+
+    cache.add_chat_members(chat_2_id, [user_1_id, user_2_id])
+    assert cache.get_user_chat_ids(user_1_id) == {chat_1_id, chat_2_id}
+    assert cache.get_user_chat_ids(user_2_id) is None
+    assert len(cache) == 1
+
+
+def test_membership_cache__replace_and_invalidate():
+    """
+    set_user_chat_ids() replaces previous user's data, invalidate_user() removes
+    it.
+    """
+    user_id = uuid.uuid4()
+    chat_1_id, chat_2_id = uuid.uuid4(), uuid.uuid4()
+    cache = ChatMembershipCache()
+
+    cache.set_user_chat_ids(user_id, [chat_1_id])
+    cache.set_user_chat_ids(user_id, [chat_2_id])
+    assert cache.get_user_chat_ids(user_id) == {chat_2_id}
+
+    cache.invalidate_user(user_id)
+    assert cache.get_user_chat_ids(user_id) is None
+
+
+def test_membership_cache__bounded():
+    """
+    The least recently used users are evicted when the cache is full, entries
+    expire after `ttl` seconds.
+    """
+    now = 100.0
+    user_ids = [uuid.uuid4() for _ in range(3)]
+    chat_id = uuid.uuid4()
+    cache = ChatMembershipCache(max_users=2, ttl=10.0, timer=lambda: now)
+
+    for user_id in user_ids:
+        cache.set_user_chat_ids(user_id, [chat_id])
+    assert len(cache) == 2
+    assert cache.is_member(user_ids[0], chat_id) is None
+    assert cache.is_member(user_ids[2], chat_id) is True
+
+    now += 10.0
+    assert cache.is_member(user_ids[2], chat_id) is None
+
+
+async def test_membership_cache__shared_by_chat_managers(
+    async_session: AsyncSession, async_session_maker: async_sessionmaker
+):
+    """
+    Membership changes made by one ChatManager are visible to another ChatManager
+    that shares the same cache, without requests to the repository.
+    """
+    owner_id, user_id = uuid.uuid4(), uuid.uuid4()
+    chat_id = uuid.uuid4()
+    async_session.add_all(
+        (
+            User(id=owner_id, name="owner"),
+            User(id=user_id, name="user"),
+            Chat(id=chat_id, title="chat", owner_id=owner_id),
+            UserChatLink(user_id=owner_id, chat_id=chat_id),
+        )
+    )
+    await async_session.commit()
+
+    cache = ChatMembershipCache()
+    owner_chat_manager = ChatManager(
+        uow=SQLAlchemyUnitOfWork(async_session_maker),
+        event_broker=InMemoryEventBroker(),
+        membership_cache=cache,
+    )
+    user_chat_manager = ChatManager(
+        uow=SQLAlchemyUnitOfWork(async_session_maker),
+        event_broker=InMemoryEventBroker(),
+        membership_cache=cache,
+    )
+    async with user_chat_manager.event_broker.session(user_id):
+        await user_chat_manager.subscribe_for_updates(current_user_id=user_id)
+        assert cache.is_member(user_id, chat_id) is False
+
+        await owner_chat_manager.add_user_to_chat(
+            current_user_id=owner_id, user_id=user_id, chat_id=chat_id
+        )
+
+        with patch.object(SQLAlchemyChatRepo, "get_joined_chat_ids") as patched:
+            await user_chat_manager.get_message_list(
+                current_user_id=user_id, chat_id=chat_id
+            )
+            patched.assert_not_awaited()
+
+
+async def test_membership_cache__updated_by_user_added_event(
+    chat_manager: ChatManager,
+    async_session: AsyncSession,
+    event_broker_user_id_list: list[uuid.UUID],
+):
+    """
+    UserAddedToChatNotification received from Event broker (e.g. posted by another
+    process) adds the chat to user's cached chat set.
+    """
+    user_id = event_broker_user_id_list[0]
+    chat_id = uuid.uuid4()
+    async_session.add_all(
+        (
+            User(id=user_id, name="user"),
+            Chat(id=chat_id, title="chat", owner_id=user_id),
+            UserChatLink(user_id=user_id, chat_id=chat_id),
+        )
+    )
+    await async_session.commit()
+    await chat_manager.subscribe_for_updates(current_user_id=user_id)
+    chat_manager.membership_cache.set_user_chat_ids(user_id, [])
+
+    await chat_manager.event_broker.post_event(
+        channel=channel_code("user", user_id),
+        event=UserAddedToChatNotification(chat_id=chat_id),
+    )
+    await chat_manager.get_events(current_user_id=user_id)
+
+    assert chat_manager.membership_cache.is_member(user_id, chat_id) is True
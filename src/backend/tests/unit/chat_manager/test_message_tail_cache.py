@@ -0,0 +1,239 @@
+import uuid
+from datetime import datetime
+from unittest.mock import patch
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.models.chat import Chat
+from backend.models.chat_message import ChatUserMessage
+from backend.models.user import User
+from backend.models.user_chat_link import UserChatLink
+from backend.schemas.chat_message import (
+    ChatMessageAny,
+    ChatUserMessageCreateSchema,
+    ChatUserMessageSchema,
+)
+from backend.services.chat_manager.chat_manager import ChatManager
+from backend.services.chat_manager.message_tail_cache import MessageTailCache
+from backend.services.chat_repo.sqla_chat_repo import SQLAlchemyChatRepo
+
+
+def _message(chat_id: uuid.UUID, message_id: int, text: str = "") -> ChatMessageAny:
+    return ChatUserMessageSchema(
+        id=message_id,
+        dt=datetime.now(),
+        chat_id=chat_id,
+        text=text or f"message {message_id}",
+        sender_id=uuid.uuid4(),
+    )
+
+
+def _ids(messages: list[ChatMessageAny] | None) -> list[int] | None:
+    if messages is None:
+        return None
+    return [message.id for message in messages]
+
+
+def _loaded_cache(
+    chat_id: uuid.UUID, message_ids: list[int], tail_size: int = 5
+) -> MessageTailCache:
+    cache = MessageTailCache(tail_size=tail_size)
+    cache.begin_load(chat_id)
+    cache.end_load(
+        chat_id, [_message(chat_id, message_id) for message_id in message_ids[::-1]]
+    )
+    return cache
+
+
+def test_get_message_list__not_cached():
+    """
+    get_message_list() returns None if chat isn't cached.
+    """
+    cache = MessageTailCache()
+    assert cache.get_message_list(chat_id=uuid.uuid4()) is None
+    assert cache.misses == 1
+
+
+@pytest.mark.parametrize(
+    "start_id, order_desc, limit, expected",
+    (
+        (-1, True, 3, [10, 9, 8]),
+        (-1, True, 5, [10, 9, 8, 7, 6]),
+        (-1, True, 6, None),  # Older messages aren't cached
+        (9, True, 2, [8, 7]),
+        (8, True, 3, None),
+        (7, False, 10, [8, 9, 10]),
+        (6, False, 2, [7, 8]),
+        (5, False, 2, None),  # Message with id=6 might be followed by id>5 messages
+        (-1, False, 2, None),
+    ),
+)
+def test_get_message_list__incomplete_tail(
+    start_id: int, order_desc: bool, limit: int, expected: list[int] | None
+):
+    """
+    get_message_list() serves requests that can be answered by the tail of the chat
+    and returns None for others.
+    """
+    chat_id = uuid.uuid4()
+    cache = _loaded_cache(chat_id, list(range(1, 11)))  # Only 6..10 are kept
+    res = cache.get_message_list(
+        chat_id=chat_id, start_id=start_id, order_desc=order_desc, limit=limit
+    )
+    assert _ids(res) == expected
+
+
+@pytest.mark.parametrize(
+    "start_id, order_desc, limit, expected",
+    (
+        (-1, True, 10, [3, 2, 1]),
+        (2, True, 10, [1]),
+        (-1, False, 2, [1, 2]),
+        (1, False, 10, [2, 3]),
+    ),
+)
+def test_get_message_list__complete_tail(
+    start_id: int, order_desc: bool, limit: int, expected: list[int]
+):
+    """
+    If all chat's messages are cached, all requests are served from the cache.
+    """
+    chat_id = uuid.uuid4()
+    cache = _loaded_cache(chat_id, [1, 2, 3])
+    res = cache.get_message_list(
+        chat_id=chat_id, start_id=start_id, order_desc=order_desc, limit=limit
+    )
+    assert _ids(res) == expected
+
+
+def test_add_message__ring():
+    """
+    add_message() appends message to the cached tail and drops the oldest messages
+    when the tail is full.
+    """
+    chat_id = uuid.uuid4()
+    cache = _loaded_cache(chat_id, [1, 2, 3], tail_size=3)
+    cache.add_message(_message(chat_id, 4))
+    assert _ids(cache.get_message_list(chat_id=chat_id, limit=3)) == [4, 3, 2]
+    assert cache.get_message_list(chat_id=chat_id, limit=4) is None
+    assert cache.total_messages == 3
+
+
+def test_update_message():
+    """
+    update_message() replaces cached message.
+    """
+    chat_id = uuid.uuid4()
+    cache = _loaded_cache(chat_id, [1, 2, 3])
+    cache.update_message(_message(chat_id, 2, text="edited"))
+    res = cache.get_message_list(chat_id=chat_id)
+    assert res is not None
+    assert res[1].text == "edited"
+
+
+def test_end_load__stale():
+    """
+    Loaded data is discarded if a message was written to the chat during loading.
+    """
+    chat_id = uuid.uuid4()
+    cache = MessageTailCache()
+    cache.begin_load(chat_id)
+    cache.add_message(_message(chat_id, 2))
+    cache.end_load(chat_id, [_message(chat_id, 1)])
+    assert cache.get_message_list(chat_id=chat_id) is None
+
+
+def test_lru_eviction():
+    """
+    The least recently used chats are evicted when total number of messages exceeds
+    max_total_messages.
+    """
+    chat_ids = [uuid.uuid4() for _ in range(3)]
+    cache = MessageTailCache(tail_size=2, max_total_messages=4)
+    for chat_id in chat_ids[:2]:
+        cache.begin_load(chat_id)
+        cache.end_load(chat_id, [_message(chat_id, 2), _message(chat_id, 1)])
+    cache.get_message_list(chat_id=chat_ids[0], limit=2)  # chat 2 becomes the LRU
+    cache.begin_load(chat_ids[2])
+    cache.end_load(chat_ids[2], [_message(chat_ids[2], 1)])
+
+    assert cache.total_messages == 3
+    assert cache.get_message_list(chat_id=chat_ids[1], limit=2) is None
+    assert cache.get_message_list(chat_id=chat_ids[0], limit=2) is not None
+    assert cache.get_message_list(chat_id=chat_ids[2], limit=2) is not None
+
+
+async def test_chat_manager__write_through(
+    chat_manager: ChatManager, async_session: AsyncSession
+):
+    """
+    With message cache enabled, ChatManager loads the latest page once and then
+    serves it from the cache, including messages sent and edited afterwards.
+    """
+    user_id = uuid.uuid4()
+    chat_id = uuid.uuid4()
+    async_session.add_all(
+        (
+            User(id=user_id, name="user"),
+            Chat(id=chat_id, title="chat", owner_id=user_id),
+            UserChatLink(user_id=user_id, chat_id=chat_id),
+            ChatUserMessage(chat_id=chat_id, text="first", sender_id=user_id),
+        )
+    )
+    await async_session.commit()
+    chat_manager.message_cache = MessageTailCache()
+
+    messages = await chat_manager.get_message_list(
+        current_user_id=user_id, chat_id=chat_id
+    )
+    assert [message.text for message in messages] == ["first"]
+
+    with patch.object(SQLAlchemyChatRepo, "get_message_list") as patched:
+        await chat_manager.send_message(
+            current_user_id=user_id,
+            message=ChatUserMessageCreateSchema(
+                chat_id=chat_id, text="second", sender_id=user_id
+            ),
+        )
+        await chat_manager.edit_message(
+            current_user_id=user_id, message_id=messages[0].id, text="edited"
+        )
+        messages = await chat_manager.get_message_list(
+            current_user_id=user_id, chat_id=chat_id
+        )
+        patched.assert_not_awaited()
+    assert [message.text for message in messages] == ["second", "edited"]
+
+
+async def test_chat_manager__limit_greater_than_tail_size(
+    chat_manager: ChatManager, async_session: AsyncSession
+):
+    """
+    If the requested page is larger than the cached tail, the whole page is read
+    from the repository.
+    """
+    user_id = uuid.uuid4()
+    chat_id = uuid.uuid4()
+    async_session.add_all(
+        (
+            User(id=user_id, name="user"),
+            Chat(id=chat_id, title="chat", owner_id=user_id),
+            UserChatLink(user_id=user_id, chat_id=chat_id),
+            *[
+                ChatUserMessage(chat_id=chat_id, text=f"msg {i}", sender_id=user_id)
+                for i in range(5)
+            ],
+        )
+    )
+    await async_session.commit()
+    chat_manager.message_cache = MessageTailCache(tail_size=2)
+
+    messages = await chat_manager.get_message_list(
+        current_user_id=user_id, chat_id=chat_id, limit=4
+    )
+    assert len(messages) == 4
+    messages = await chat_manager.get_message_list(
+        current_user_id=user_id, chat_id=chat_id, limit=4
+    )
+    assert len(messages) == 4
@@ -0,0 +1,116 @@
+import uuid
+from typing import Any, cast
+from unittest.mock import Mock, patch
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.models.chat import Chat
+from backend.models.chat_message import ChatUserMessage
+from backend.models.user import User
+from backend.models.user_chat_link import UserChatLink
+from backend.services.chat_manager.chat_manager import ChatManager
+from backend.services.chat_manager.chat_manager_exc import (
+    RepositoryError,
+    UnauthorizedAction,
+)
+from backend.services.chat_repo.chat_repo_exc import ChatRepoException
+from backend.services.chat_repo.sqla_chat_repo import SQLAlchemyChatRepo
+
+
+@pytest.fixture()
+async def user_chats_messages(async_session: AsyncSession):
+    user_id = uuid.uuid4()
+    chat_1_id = uuid.uuid4()
+    chat_2_id = uuid.uuid4()
+    not_joined_chat_id = uuid.uuid4()
+    # Create user, chats, add user to chats 1 and 2, add messages to all chats
+    user = User(id=user_id, name="user")
+    chats = [
+        Chat(id=chat_id, title="chat", owner_id=user_id)
+        for chat_id in (chat_1_id, chat_2_id, not_joined_chat_id)
+    ]
+    user_chat_1 = UserChatLink(user_id=user_id, chat_id=chat_1_id)
+    user_chat_2 = UserChatLink(user_id=user_id, chat_id=chat_2_id)
+    async_session.add_all((user, *chats, user_chat_1, user_chat_2))
+    for chat in chats:
+        async_session.add(
+            ChatUserMessage(
+                chat_id=chat.id, text=f"keyword in {chat.id}", sender_id=user_id
+            )
+        )
+        async_session.add(
+            ChatUserMessage(chat_id=chat.id, text="another message", sender_id=user_id)
+        )
+    await async_session.commit()
+    return {
+        "user_id": user_id,
+        "chat_1_id": chat_1_id,
+        "chat_2_id": chat_2_id,
+        "not_joined_chat_id": not_joined_chat_id,
+    }
+
+
+async def test_search_messages__joined_chats(
+    chat_manager: ChatManager, user_chats_messages: dict[str, Any]
+):
+    """
+    search_messages() without chat_id returns matching messages from all chats
+    user is a member of.
+    """
+    user_id = cast(uuid.UUID, user_chats_messages["user_id"])
+    chat_1_id = cast(uuid.UUID, user_chats_messages["chat_1_id"])
+    chat_2_id = cast(uuid.UUID, user_chats_messages["chat_2_id"])
+
+    page = await chat_manager.search_messages(current_user_id=user_id, query="keyword")
+    assert len(page.results) == 2
+    assert {res.message.chat_id for res in page.results} == {chat_1_id, chat_2_id}
+
+
+async def test_search_messages__specific_chat(
+    chat_manager: ChatManager, user_chats_messages: dict[str, Any]
+):
+    """
+    search_messages() with chat_id returns matching messages from that chat only.
+    """
+    user_id = cast(uuid.UUID, user_chats_messages["user_id"])
+    chat_2_id = cast(uuid.UUID, user_chats_messages["chat_2_id"])
+
+    page = await chat_manager.search_messages(
+        current_user_id=user_id, query="keyword", chat_id=chat_2_id
+    )
+    assert len(page.results) == 1
+    assert page.results[0].message.chat_id == chat_2_id
+
+
+async def test_search_messages__not_joined_chat(
+    chat_manager: ChatManager, user_chats_messages: dict[str, Any]
+):
+    """
+    search_messages() raises UnauthorizedAction if user is not a member of the chat
+    with chat_id.
+    """
+    user_id = cast(uuid.UUID, user_chats_messages["user_id"])
+    not_joined_chat_id = cast(uuid.UUID, user_chats_messages["not_joined_chat_id"])
+
+    with pytest.raises(UnauthorizedAction):
+        await chat_manager.search_messages(
+            current_user_id=user_id, query="keyword", chat_id=not_joined_chat_id
+        )
+
+
+async def test_search_messages__repo_failure(
+    chat_manager: ChatManager, user_chats_messages: dict[str, Any]
+):
+    """
+    search_messages() raises RepositoryError in case of repository failure
+    """
+    user_id = cast(uuid.UUID, user_chats_messages["user_id"])
+
+    with patch.object(
+        SQLAlchemyChatRepo,
+        "search_messages",
+        new=Mock(side_effect=ChatRepoException()),
+    ):
+        with pytest.raises(RepositoryError):
+            await chat_manager.search_messages(current_user_id=user_id, query="keyword")
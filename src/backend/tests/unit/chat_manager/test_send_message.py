@@ -191,7 +191,7 @@ async def test_send_message_repo_failure(
             await chat_manager.send_message(current_user_id=user_id, message=message)
 
 
-@pytest.mark.parametrize("failure_method", ("post_event",))
+@pytest.mark.parametrize("failure_method", ("post_events",))
 async def test_send_message_event_broker_failure(
     async_session: AsyncSession,
     chat_manager: ChatManager,
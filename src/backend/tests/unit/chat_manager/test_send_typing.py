@@ -0,0 +1,139 @@
+import uuid
+from unittest.mock import Mock, patch
+
+import pytest
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.models.chat import Chat
+from backend.models.chat_message import ChatMessage
+from backend.models.user import User
+from backend.models.user_chat_link import UserChatLink
+from backend.schemas.event import TypingEvent
+from backend.services.cache.expiring_lru_cache import ExpiringLRUCache
+from backend.services.chat_manager.chat_manager import (
+    TYPING_EVENT_MIN_INTERVAL_SEC,
+    ChatManager,
+)
+from backend.services.chat_manager.chat_manager_exc import UnauthorizedAction
+
+
+async def _create_chat(
+    async_session: AsyncSession, user_ids: list[uuid.UUID]
+) -> uuid.UUID:
+    chat_id = uuid.uuid4()
+    async_session.add(Chat(id=chat_id, title="", owner_id=user_ids[0]))
+    for user_id in user_ids:
+        async_session.add(User(id=user_id, name=""))
+        async_session.add(UserChatLink(user_id=user_id, chat_id=chat_id))
+    await async_session.commit()
+    return chat_id
+
+
+async def test_send_typing__success(
+    async_session: AsyncSession,
+    chat_manager: ChatManager,
+    event_broker_user_id_list: list[uuid.UUID],
+):
+    """
+    send_typing() sends TypingEvent to chat members. Nothing is stored in the DB,
+    the event doesn't need acknowledgement.
+    """
+    user_id, other_user_id = event_broker_user_id_list[:2]
+    chat_id = await _create_chat(async_session, [user_id, other_user_id])
+    await chat_manager.subscribe_for_updates(current_user_id=user_id)
+    other_chat_manager = ChatManager(
+        uow=chat_manager.uow, event_broker=chat_manager.event_broker
+    )
+    await other_chat_manager.subscribe_for_updates(current_user_id=other_user_id)
+
+    await chat_manager.send_typing(current_user_id=user_id, chat_id=chat_id)
+
+    events = await other_chat_manager.get_events(current_user_id=other_user_id)
+    assert len(events) == 1
+    assert isinstance(events[0], TypingEvent)
+    assert (events[0].chat_id, events[0].user_id) == (chat_id, user_id)
+    assert await chat_manager.event_broker.acknowledge_events(other_user_id) == []
+    assert (await async_session.scalar(select(func.count(ChatMessage.id)))) == 0
+
+
+async def test_send_typing__rate_limited(
+    async_session: AsyncSession,
+    chat_manager: ChatManager,
+    event_broker_user_id_list: list[uuid.UUID],
+):
+    """
+    TypingEvent is sent at most once in TYPING_EVENT_MIN_INTERVAL_SEC per chat.
+    """
+    user_id = event_broker_user_id_list[0]
+    chat_id = await _create_chat(async_session, [user_id])
+    timer = Mock(return_value=100.0)
+    chat_manager = ChatManager(
+        uow=chat_manager.uow,
+        event_broker=chat_manager.event_broker,
+        typing_throttle=ExpiringLRUCache(
+            maxsize=10, ttl=TYPING_EVENT_MIN_INTERVAL_SEC, timer=timer
+        ),
+    )
+
+    with patch.object(
+        chat_manager.event_broker, "post_ephemeral_event"
+    ) as post_patched:
+        await chat_manager.send_typing(current_user_id=user_id, chat_id=chat_id)
+        await chat_manager.send_typing(current_user_id=user_id, chat_id=chat_id)
+        assert post_patched.await_count == 1
+
+        timer.return_value = 100.0 + TYPING_EVENT_MIN_INTERVAL_SEC
+        await chat_manager.send_typing(current_user_id=user_id, chat_id=chat_id)
+        assert post_patched.await_count == 2
+
+
+async def test_send_typing__rate_limited_over_sessions(
+    async_session: AsyncSession,
+    chat_manager: ChatManager,
+    event_broker_user_id_list: list[uuid.UUID],
+):
+    """
+    The limit is per user and chat: sessions sharing the typing throttle don't
+    multiply it, while other users and chats aren't affected.
+    """
+    user_id, other_user_id = event_broker_user_id_list[:2]
+    chat_id = await _create_chat(async_session, [user_id, other_user_id])
+    other_chat_id = uuid.uuid4()
+    async_session.add(Chat(id=other_chat_id, title="", owner_id=user_id))
+    async_session.add(UserChatLink(user_id=user_id, chat_id=other_chat_id))
+    await async_session.commit()
+    sessions = [
+        ChatManager(
+            uow=chat_manager.uow,
+            event_broker=chat_manager.event_broker,
+            typing_throttle=chat_manager.typing_throttle,
+        )
+        for _ in range(3)
+    ]
+
+    with patch.object(
+        chat_manager.event_broker, "post_ephemeral_event"
+    ) as post_patched:
+        for session in sessions:
+            await session.send_typing(current_user_id=user_id, chat_id=chat_id)
+        assert post_patched.await_count == 1
+
+        await sessions[0].send_typing(current_user_id=other_user_id, chat_id=chat_id)
+        await sessions[1].send_typing(current_user_id=user_id, chat_id=other_chat_id)
+        assert post_patched.await_count == 3
+
+
+async def test_send_typing__not_a_member(
+    async_session: AsyncSession,
+    chat_manager: ChatManager,
+    event_broker_user_id_list: list[uuid.UUID],
+):
+    """
+    send_typing() raises UnauthorizedAction if user is not a member of the chat.
+    """
+    user_id, other_user_id = event_broker_user_id_list[:2]
+    chat_id = await _create_chat(async_session, [other_user_id])
+
+    with pytest.raises(UnauthorizedAction):
+        await chat_manager.send_typing(current_user_id=user_id, chat_id=chat_id)
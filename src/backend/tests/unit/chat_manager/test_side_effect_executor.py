@@ -0,0 +1,206 @@
+import asyncio
+import uuid
+from typing import cast
+from unittest.mock import patch
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from backend.models.chat import Chat
+from backend.models.user import User
+from backend.schemas.event import (
+    ChatListUpdate,
+    FirstCircleUserListUpdate,
+    UserAddedToChatNotification,
+)
+from backend.services.chat_manager.chat_manager import ChatManager
+from backend.services.chat_manager.side_effect_executor import SideEffectExecutor
+from backend.services.chat_repo.sqla_chat_repo import SQLAlchemyChatRepo
+from backend.services.uow.abstract_uow import AbstractUnitOfWork
+from backend.services.uow.sqla_uow import SQLAlchemyUnitOfWork
+
+
+async def test_order_and_errors():
+    """
+    Side effects are executed one by one in the order they were scheduled.
+    Failed side effects don't stop the worker.
+    """
+    uow = cast(AbstractUnitOfWork, object())
+    executor = SideEffectExecutor(uow=uow)
+    executed: list[int] = []
+
+    def side_effect(n: int):
+        async def run(uow_arg: AbstractUnitOfWork):
+            assert uow_arg is uow
+            await asyncio.sleep(0.01 if n == 0 else 0)
+            if n == 1:
+                raise ValueError()
+            executed.append(n)
+
+        return run
+
+    for n in range(4):
+        executor.schedule(side_effect(n))
+    await executor.join()
+    await executor.close()
+
+    assert executed == [0, 2, 3]
+    assert executor.errors == 1
+
+
+async def test_bounded_queue():
+    """
+    schedule() doesn't wait while the queue is full, the side effect isn't scheduled
+    and it's counted.
+    """
+    executor = SideEffectExecutor(
+        uow=cast(AbstractUnitOfWork, object()), max_queue_size=1
+    )
+    release = asyncio.Event()
+    executed: list[int] = []
+
+    def blocking_side_effect(n: int):
+        async def run(uow: AbstractUnitOfWork):
+            await release.wait()
+            executed.append(n)
+
+        return run
+
+    assert executor.schedule(blocking_side_effect(0))  # Taken by the worker
+    await asyncio.sleep(0)
+    assert executor.schedule(blocking_side_effect(1))  # Fills the queue
+    assert not executor.schedule(blocking_side_effect(2))
+    assert executor.overflowed == 1
+    release.set()
+    await executor.join()
+    await executor.close()
+
+    assert executed == [0, 1]
+
+
+async def test_close__pending_executed():
+    """
+    close() waits for pending side effects to be executed.
+    """
+    executor = SideEffectExecutor(uow=cast(AbstractUnitOfWork, object()))
+    executed: list[int] = []
+
+    def side_effect(n: int):
+        async def run(uow: AbstractUnitOfWork):
+            await asyncio.sleep(0.01)
+            executed.append(n)
+
+        return run
+
+    for n in range(3):
+        executor.schedule(side_effect(n))
+    await executor.close()
+
+    assert executed == [0, 1, 2]
+    assert executor.discarded == 0
+
+
+async def test_close__timeout():
+    """
+    close() discards side effects that aren't executed in `timeout` seconds and
+    counts them.
+    """
+    executor = SideEffectExecutor(uow=cast(AbstractUnitOfWork, object()))
+
+    async def blocking_side_effect(uow: AbstractUnitOfWork):
+        await asyncio.Event().wait()
+
+    for _ in range(3):
+        executor.schedule(blocking_side_effect)
+    await asyncio.sleep(0)
+    await executor.close(timeout=0.01)
+
+    assert executor.discarded == 3
+    await executor.join()  # Queue is empty
+
+
+async def test_chat_manager__events_delivered_before_side_effects(
+    async_session: AsyncSession,
+    async_session_maker: async_sessionmaker,
+    chat_manager: ChatManager,
+    event_broker_user_id_list: list[uuid.UUID],
+):
+    """
+    With side effect executor, get_events() returns events without waiting for
+    actions triggered by them. Follow-up events are delivered after these actions
+    are executed in background.
+    """
+    chat_owner_id = event_broker_user_id_list[0]
+    user_id = event_broker_user_id_list[1]
+    chat = Chat(id=uuid.uuid4(), title="", owner_id=chat_owner_id)
+    async_session.add_all((User(id=user_id, name="user"), chat))
+    await async_session.commit()
+    executor = SideEffectExecutor(uow=SQLAlchemyUnitOfWork(async_session_maker))
+    chat_manager.side_effect_executor = executor
+    await chat_manager.subscribe_for_updates(current_user_id=user_id)
+    await chat_manager.get_first_circle_user_list(current_user_id=user_id)
+    await chat_manager.add_user_to_chat(
+        current_user_id=chat_owner_id, user_id=user_id, chat_id=chat.id
+    )
+
+    with patch.object(
+        SQLAlchemyChatRepo,
+        "get_joined_chat_list",
+        autospec=True,
+        side_effect=SQLAlchemyChatRepo.get_joined_chat_list,
+    ) as patched:
+        events = await chat_manager.get_events(current_user_id=user_id)
+        patched.assert_not_awaited()
+        assert len(events) == 1
+        assert isinstance(events[0], UserAddedToChatNotification)
+        await chat_manager.acknowledge_events(current_user_id=user_id)
+
+        await executor.join()
+        patched.assert_awaited_once()
+    events = await chat_manager.get_events(current_user_id=user_id)
+    assert [type(event) for event in events] == [
+        ChatListUpdate,
+        FirstCircleUserListUpdate,
+    ]
+    await executor.close()
+
+
+async def test_chat_manager__side_effects_inline_if_queue_full(
+    async_session: AsyncSession,
+    chat_manager: ChatManager,
+    event_broker_user_id_list: list[uuid.UUID],
+):
+    """
+    If the executor's queue is full, get_events() executes side effects inline, so
+    the user is subscribed to the new chat anyway.
+    """
+    chat_owner_id = event_broker_user_id_list[0]
+    user_id = event_broker_user_id_list[1]
+    chat = Chat(id=uuid.uuid4(), title="", owner_id=chat_owner_id)
+    async_session.add_all((User(id=user_id, name="user"), chat))
+    await async_session.commit()
+    executor = SideEffectExecutor(uow=chat_manager.uow, max_queue_size=1)
+    chat_manager.side_effect_executor = executor
+    await chat_manager.subscribe_for_updates(current_user_id=user_id)
+    await chat_manager.add_user_to_chat(
+        current_user_id=chat_owner_id, user_id=user_id, chat_id=chat.id
+    )
+    release = asyncio.Event()
+
+    async def blocking_side_effect(uow: AbstractUnitOfWork):
+        await release.wait()
+
+    executor.schedule(blocking_side_effect)  # Taken by the worker
+    await asyncio.sleep(0)
+    executor.schedule(blocking_side_effect)  # Fills the queue
+
+    with patch.object(
+        chat_manager.event_broker,
+        "subscribe",
+        wraps=chat_manager.event_broker.subscribe,
+    ) as subscribe_patched:
+        events = await chat_manager.get_events(current_user_id=user_id)
+        assert isinstance(events[0], UserAddedToChatNotification)
+        subscribe_patched.assert_awaited_once()
+    assert executor.overflowed == 1
+    release.set()
+    await executor.close()
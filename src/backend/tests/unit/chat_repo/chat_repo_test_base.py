@@ -5,7 +5,7 @@ from typing import Any
 import pytest
 
 from backend.models.user import User
-from backend.schemas.chat import ChatCreateSchema, ChatSchema
+from backend.schemas.chat import UNREAD_COUNT_LIMIT, ChatCreateSchema, ChatSchema
 from backend.schemas.chat_message import (
     ChatNotificationCreateSchema,
     ChatUserMessageCreateSchema,
@@ -182,6 +182,59 @@ class ChatRepoTestBase:
         with pytest.raises(ChatRepoDatabaseError):
             await self.repo.add_message(message)
 
+    # ---------------------------------------------------------------------------------
+    # Tests for add_messages() method
+
+    async def test_add_messages(self):
+        """
+        add_messages() creates several ChatUserMessage records in the DB and returns
+        created records' data in the same order with increasing ids.
+        Messages can be paginated by the generated ids.
+        """
+        chat_id = uuid.uuid4()
+        user_id = uuid.uuid4()
+        messages_before = [
+            ChatUserMessageCreateSchema(
+                chat_id=chat_id, text=f"message {i}", sender_id=user_id
+            )
+            for i in range(5)
+        ]
+
+        messages_after = await self.repo.add_messages(messages_before)
+
+        assert [msg.text for msg in messages_after] == [
+            msg.text for msg in messages_before
+        ]
+        ids = [msg.id for msg in messages_after]
+        assert ids == sorted(set(ids))
+        for message in messages_after:
+            assert message.dt is not None
+            assert (await self._check_if_message_has_persisted(message.id)) is True
+
+        messages_res = await self.repo.get_message_list(
+            chat_id=chat_id, start_id=ids[2], order_desc=False
+        )
+        assert [msg.id for msg in messages_res] == ids[3:]
+
+    async def test_add_messages__empty_list(self):
+        """
+        add_messages() with empty list doesn't fail and returns empty list.
+        """
+        assert await self.repo.add_messages([]) == []
+
+    async def test_add_messages_database_failure(self):
+        """
+        add_messages() raises ChatRepoDatabaseError in case of DB failure.
+        """
+        message = ChatUserMessageCreateSchema(
+            chat_id=uuid.uuid4(), text="my message", sender_id=uuid.uuid4()
+        )
+
+        await self._break_connection()
+
+        with pytest.raises(ChatRepoDatabaseError):
+            await self.repo.add_messages([message])
+
     # ---------------------------------------------------------------------------------
     # Tests for edit_message() method
 
@@ -396,6 +449,64 @@ class ChatRepoTestBase:
         with pytest.raises(ChatRepoDatabaseError):
             await self.repo.add_user_to_chat(user_id=user_id, chat_id=chat_id)
 
+    # ---------------------------------------------------------------------------------
+    # Tests for add_users_to_chat() method
+
+    async def test_add_users_to_chat(self):
+        """
+        add_users_to_chat() method creates UserChatLink records for all users in the
+        list.
+        """
+        # Create users and chat
+        user_ids = [uuid.uuid4() for _ in range(3)]
+        for user_id in user_ids:
+            await self._create_user(user_id=user_id)
+        chat_id = uuid.uuid4()
+        await self.repo.add_chat(
+            ChatCreateSchema(id=chat_id, title="chat", owner_id=user_ids[0])
+        )
+
+        # Add users to chat
+        await self.repo.add_users_to_chat(chat_id=chat_id, user_ids=user_ids)
+
+        # Check that all the records were persisted in the DB
+        for user_id in user_ids:
+            assert (
+                await self._check_if_user_chat_link_has_persisted(
+                    user_id=user_id, chat_id=chat_id
+                )
+            ) is True
+
+    async def test_add_users_to_chat_already_added(self):
+        """
+        add_users_to_chat() method raises ChatRepoRequestError error if one of users
+        has already joined this chat.
+        """
+        # Create users, add one of them to chat
+        user_ids = [uuid.uuid4() for _ in range(2)]
+        for user_id in user_ids:
+            await self._create_user(user_id=user_id)
+        chat_id = uuid.uuid4()
+        await self.repo.add_user_to_chat(user_id=user_ids[1], chat_id=chat_id)
+
+        # Try adding both users to chat, check that it raises ChatRepoRequestError
+        with pytest.raises(ChatRepoRequestError):
+            await self.repo.add_users_to_chat(chat_id=chat_id, user_ids=user_ids)
+
+    async def test_add_users_to_chat_database_failure(self):
+        """
+        add_users_to_chat() raises ChatRepoDatabaseError in case of DB failure.
+        """
+        user_id = uuid.uuid4()
+        await self._create_user(user_id=user_id)
+        chat_id = uuid.uuid4()
+
+        # Mock DB connection to make it always return error
+        await self._break_connection()
+
+        with pytest.raises(ChatRepoDatabaseError):
+            await self.repo.add_users_to_chat(chat_id=chat_id, user_ids=[user_id])
+
     # ---------------------------------------------------------------------------------
     # Tests for get_joined_chat_ids() method
 
@@ -440,6 +551,39 @@ class ChatRepoTestBase:
         with pytest.raises(ChatRepoDatabaseError):
             await self.repo.get_joined_chat_ids(user_1_id)
 
+    # ---------------------------------------------------------------------------------
+    # Tests for get_chat_member_ids() method
+
+    async def test_get_chat_member_ids(self):
+        """
+        get_chat_member_ids() returns ids of members of requested chats.
+        """
+        data = await self.create_users_and_chats()
+        await self.repo.add_user_to_chat(data["chat_1"].id, data["user_1"].id)
+        await self.repo.add_user_to_chat(data["chat_1"].id, data["user_2"].id)
+        await self.repo.add_user_to_chat(data["chat_2"].id, data["user_3"].id)
+        await self.repo.add_user_to_chat(data["chat_3"].id, data["user_3"].id)
+
+        chat_members = await self.repo.get_chat_member_ids(
+            chat_id_list=[data["chat_1"].id, data["chat_2"].id]
+        )
+        assert chat_members.keys() == {data["chat_1"].id, data["chat_2"].id}
+        assert set(chat_members[data["chat_1"].id]) == {
+            data["user_1"].id,
+            data["user_2"].id,
+        }
+        assert chat_members[data["chat_2"].id] == [data["user_3"].id]
+
+    async def test_get_chat_member_ids_database_failure(self):
+        """
+        get_chat_member_ids() raises ChatRepoDatabaseError in case of DB failure.
+        """
+        # Mock DB connection to make it always return error
+        await self._break_connection()
+
+        with pytest.raises(ChatRepoDatabaseError):
+            await self.repo.get_chat_member_ids(chat_id_list=[uuid.uuid4()])
+
     # ---------------------------------------------------------------------------------
     # Tests for get_joined_chat_list() method
 
@@ -620,6 +764,159 @@ class ChatRepoTestBase:
         assert len(expected_ids) == len(message_ids_res)
         assert message_ids_res == expected_ids
 
+    # ---------------------------------------------------------------------------------
+    # Tests for search_messages() method
+
+    async def test_search_messages__found_in_chat_list(self):
+        """
+        search_messages() returns messages that match the query only from chats in
+        chat_list_filter. The last word of the query is used as a prefix.
+        """
+        user_id = uuid.uuid4()
+        chat_ids = [uuid.uuid4() for _ in range(3)]
+        texts = ["hello world", "say hello to everybody", "bye world"]
+        messages: dict[uuid.UUID, list[ChatUserMessageSchema]] = {}
+        for chat_id in chat_ids:
+            messages[chat_id] = [
+                await self.repo.add_message(
+                    ChatUserMessageCreateSchema(
+                        chat_id=chat_id, text=text, sender_id=user_id
+                    )
+                )
+                for text in texts
+            ]
+
+        page = await self.repo.search_messages(
+            query="hel", chat_list_filter=chat_ids[:2]
+        )
+        results = page.results
+
+        expected_ids = {
+            msg.id for chat_id in chat_ids[:2] for msg in messages[chat_id][:2]
+        }
+        assert {res.message.id for res in results} == expected_ids
+        ranks = [res.rank for res in results]
+        assert ranks == sorted(ranks)
+
+    async def test_search_messages__edited_message(self):
+        """
+        search_messages() searches by the actual (edited) text of the message.
+        """
+        chat_id = uuid.uuid4()
+        message = await self.repo.add_message(
+            ChatUserMessageCreateSchema(
+                chat_id=chat_id, text="old text", sender_id=uuid.uuid4()
+            )
+        )
+        await self.repo.edit_message(message_id=message.id, text="new text")
+
+        results_old = (
+            await self.repo.search_messages(query="old", chat_list_filter=[chat_id])
+        ).results
+        results_new = (
+            await self.repo.search_messages(query="new", chat_list_filter=[chat_id])
+        ).results
+        assert len(results_old) == 0
+        assert [res.message.id for res in results_new] == [message.id]
+        assert results_new[0].message.text == "new text"
+
+    async def test_search_messages__special_characters(self):
+        """
+        search_messages() doesn't fail if the query contains FTS syntax characters.
+        """
+        chat_id = uuid.uuid4()
+        await self.repo.add_message(
+            ChatUserMessageCreateSchema(
+                chat_id=chat_id, text='say "hi" (or not)', sender_id=uuid.uuid4()
+            )
+        )
+        page = await self.repo.search_messages(
+            query='"hi" (or', chat_list_filter=[chat_id]
+        )
+        assert len(page.results) == 1
+
+    async def test_search_messages__pagination(self):
+        """
+        search_messages() returns next page if rank and id of the last result of the
+        previous page are passed. All pages together contain all results.
+        """
+        chat_id = uuid.uuid4()
+        for idx in range(7):
+            await self.repo.add_message(
+                ChatUserMessageCreateSchema(
+                    chat_id=chat_id,
+                    text=" ".join(["word"] * (idx % 3 + 1) + ["other"] * idx),
+                    sender_id=uuid.uuid4(),
+                )
+            )
+        all_results = (
+            await self.repo.search_messages(query="word", chat_list_filter=[chat_id])
+        ).results
+        assert len(all_results) == 7
+
+        first_page = await self.repo.search_messages(
+            query="word", chat_list_filter=[chat_id], limit=3
+        )
+        paged_results = first_page.results
+        while True:
+            page = await self.repo.search_messages(
+                query="word",
+                chat_list_filter=[chat_id],
+                max_id=first_page.max_id,
+                start_rank=paged_results[-1].rank,
+                start_id=paged_results[-1].message.id,
+                limit=3,
+            )
+            if not page.results:
+                break
+            paged_results.extend(page.results)
+
+        assert [res.message.id for res in paged_results] == [
+            res.message.id for res in all_results
+        ]
+
+    async def test_search_messages__max_id(self):
+        """
+        search_messages() returns max message id with the page and doesn't return
+        messages with greater ids if max_id is passed.
+        """
+        chat_id = uuid.uuid4()
+
+        async def add_message() -> int:
+            message = await self.repo.add_message(
+                ChatUserMessageCreateSchema(
+                    chat_id=chat_id, text="word", sender_id=uuid.uuid4()
+                )
+            )
+            return message.id
+
+        old_ids = [await add_message() for _ in range(3)]
+        first_page = await self.repo.search_messages(
+            query="word", chat_list_filter=[chat_id]
+        )
+        assert first_page.max_id == max(old_ids)
+        await add_message()
+
+        page = await self.repo.search_messages(
+            query="word", chat_list_filter=[chat_id], max_id=first_page.max_id
+        )
+        assert page.max_id == first_page.max_id
+        assert sorted(res.message.id for res in page.results) == sorted(old_ids)
+
+    async def test_search_messages__database_failure(self):
+        """
+        search_messages() raises ChatRepoDatabaseError in case of DB failure.
+        """
+        await self._break_connection()
+
+        with pytest.raises(ChatRepoDatabaseError):
+            await self.repo.search_messages(
+                query="text", chat_list_filter=[uuid.uuid4()]
+            )
+
+    # ---------------------------------------------------------------------------------
+    # Tests for update_user_chat_state_from_dict() method
+
     async def test_user_chat_state_update__all_new(self):
         """
         update_user_chat_state_from_dict() updates chat status data for specific user
@@ -690,6 +987,212 @@ class ChatRepoTestBase:
         assert len(real_data_set) == len(expected_data_set)
         assert real_data_set == expected_data_set
 
+    async def test_user_chat_state_update__values_never_decrease(self):
+        """
+        update_user_chat_state_from_dict() keeps the greatest of stored and passed
+        values, so repeated or reordered updates don't move the state backwards.
+        """
+        user_id = uuid.uuid4()
+        chat_id = uuid.uuid4()
+        await self.repo.update_user_chat_state_from_dict(
+            user_id, {chat_id: {"last_delivered": 10, "last_read": 5}}
+        )
+        await self.repo.update_user_chat_state_from_dict(
+            user_id, {chat_id: {"last_delivered": 7, "last_read": 8}}
+        )
+        await self.repo.update_user_chat_state_from_dict(
+            user_id, {chat_id: {"last_delivered": 9}}
+        )
+
+        user_chat_state_data = await self.repo.get_user_chat_state(user_id)
+        assert len(user_chat_state_data) == 1
+        assert user_chat_state_data[0].last_delivered == 10
+        assert user_chat_state_data[0].last_read == 8
+
+    async def test_user_chat_state_update_bulk__several_users(self):
+        """
+        update_user_chat_state_bulk() updates chat status data for several users at
+        once.
+        """
+        user_ids = [uuid.uuid4() for _ in range(3)]
+        chat_ids = [uuid.uuid4() for _ in range(2)]
+        # Existing record with greater value should be kept as is
+        await self.repo.update_user_chat_state_from_dict(
+            user_ids[0], {chat_ids[0]: {"last_delivered": 100}}
+        )
+        user_chat_state_dict = {
+            user_id: {
+                chat_id: {"last_delivered": u_idx * 10 + c_idx + 1}
+                for c_idx, chat_id in enumerate(chat_ids)
+            }
+            for u_idx, user_id in enumerate(user_ids)
+        }
+        expected_data_set = {
+            (user_id, chat_id, state["last_delivered"])
+            for user_id, user_states in user_chat_state_dict.items()
+            for chat_id, state in user_states.items()
+        }
+        expected_data_set.remove((user_ids[0], chat_ids[0], 1))
+        expected_data_set.add((user_ids[0], chat_ids[0], 100))
+
+        await self.repo.update_user_chat_state_bulk(user_chat_state_dict)
+
+        real_data_set: set[tuple[uuid.UUID, uuid.UUID, int]] = set()
+        for user_id in user_ids:
+            real_data_set.update(
+                (state.user_id, state.chat_id, state.last_delivered)
+                for state in await self.repo.get_user_chat_state(user_id)
+            )
+        assert real_data_set == expected_data_set
+
+    async def test_user_chat_state_update__clamp_to_last_message(self):
+        """
+        With clamp_to_last_message=True passed values are limited by the id of the
+        last message of the chat (0 if the chat has no messages).
+        """
+        user_id = uuid.uuid4()
+        chat_id, empty_chat_id = uuid.uuid4(), uuid.uuid4()
+        message = await self.repo.add_message(
+            ChatUserMessageCreateSchema(
+                chat_id=chat_id, text="message", sender_id=uuid.uuid4()
+            )
+        )
+
+        states = await self.repo.update_user_chat_state_from_dict(
+            user_id,
+            {
+                chat_id: {"last_delivered": 2**53, "last_read": 2**53},
+                empty_chat_id: {"last_read": 2**53},
+            },
+            clamp_to_last_message=True,
+        )
+
+        assert {
+            (state.chat_id, state.last_delivered, state.last_read) for state in states
+        } == {(chat_id, message.id, message.id), (empty_chat_id, 0, 0)}
+
+    # ---------------------------------------------------------------------------------
+    # Tests for presence methods
+
+    async def test_presence_status__aggregated_over_nodes(self):
+        """
+        User is online while any node has their session with a heartbeat since
+        `alive_since`. Each transition is returned once.
+        """
+        user_id = uuid.uuid4()
+        await self.repo.update_presence_sessions("a", {user_id: 100.0}, [])
+        await self.repo.update_presence_sessions("b", {user_id: 100.0}, [])
+        assert await self.repo.update_presence_status([user_id], 50.0) == (
+            [user_id],
+            [],
+        )
+        assert await self.repo.update_presence_status([user_id], 50.0) == ([], [])
+
+        await self.repo.update_presence_sessions("a", {}, [user_id])
+        assert await self.repo.update_presence_status([user_id], 50.0) == ([], [])
+        assert await self.repo.get_online_user_ids([user_id]) == [user_id]
+
+        # Session on node b has expired
+        assert await self.repo.update_presence_status([], 150.0) == ([], [user_id])
+        assert await self.repo.get_online_user_ids([user_id]) == []
+
+    # ---------------------------------------------------------------------------------
+    # Tests for unread messages counters
+
+    async def test_unread_counts__calculated_from_last_read(self):
+        """
+        Unread messages counter is the number of messages of other users after
+        last_read. Counters are returned by get_joined_chat_list() and by
+        update_user_chat_state_from_dict().
+        """
+        chat_id = uuid.uuid4()
+        user_1_id, user_2_id = uuid.uuid4(), uuid.uuid4()
+        await self.repo.add_chat(
+            ChatCreateSchema(id=chat_id, title="my_chat", owner_id=user_1_id)
+        )
+        await self.repo.add_users_to_chat(
+            chat_id=chat_id, user_ids=[user_1_id, user_2_id]
+        )
+        messages = []
+        for sender_id in (user_2_id, user_2_id, user_1_id, user_2_id):
+            messages.append(
+                await self.repo.add_message(
+                    ChatUserMessageCreateSchema(
+                        chat_id=chat_id, text="message", sender_id=sender_id
+                    )
+                )
+            )
+
+        chats = await self.repo.get_joined_chat_list(user_id=user_1_id)
+        assert chats[0].unread_count == 3
+        chats = await self.repo.get_joined_chat_list(user_id=user_2_id)
+        assert chats[0].unread_count == 1
+
+        # Read up to the first message: 2 messages of user_2 after it
+        states = await self.repo.update_user_chat_state_from_dict(
+            user_1_id, {chat_id: {"last_read": messages[0].id}}
+        )
+        assert [(state.chat_id, state.unread_count) for state in states] == [
+            (chat_id, 2)
+        ]
+        # Delivery doesn't affect the counter
+        await self.repo.update_user_chat_state_from_dict(
+            user_1_id, {chat_id: {"last_delivered": messages[-1].id}}
+        )
+        chats = await self.repo.get_joined_chat_list(
+            user_id=user_1_id, chat_id_list=[chat_id]
+        )
+        assert chats[0].unread_count == 2
+
+        states = await self.repo.update_user_chat_state_from_dict(
+            user_1_id, {chat_id: {"last_read": messages[-1].id}}
+        )
+        assert states[0].unread_count == 0
+
+    async def test_unread_counts__no_state(self):
+        """
+        get_joined_chat_list() returns zero counter if there is no chat state record
+        for the user.
+        """
+        chat_id = uuid.uuid4()
+        user_id = uuid.uuid4()
+        await self.repo.add_chat(
+            ChatCreateSchema(id=chat_id, title="my_chat", owner_id=user_id)
+        )
+        await self.repo.add_user_to_chat(chat_id=chat_id, user_id=user_id)
+
+        chats = await self.repo.get_joined_chat_list(user_id=user_id)
+        assert chats[0].unread_count == 0
+
+    async def test_unread_counts__limit(self):
+        """
+        Unread messages counter stops counting at UNREAD_COUNT_LIMIT.
+        """
+        chat_id = uuid.uuid4()
+        user_1_id, user_2_id = uuid.uuid4(), uuid.uuid4()
+        await self.repo.add_chat(
+            ChatCreateSchema(id=chat_id, title="my_chat", owner_id=user_1_id)
+        )
+        await self.repo.add_users_to_chat(
+            chat_id=chat_id, user_ids=[user_1_id, user_2_id]
+        )
+        messages = await self.repo.add_messages(
+            [
+                ChatUserMessageCreateSchema(
+                    chat_id=chat_id, text="message", sender_id=user_2_id
+                )
+                for _ in range(UNREAD_COUNT_LIMIT + 2)
+            ]
+        )
+
+        chats = await self.repo.get_joined_chat_list(user_id=user_1_id)
+        assert chats[0].unread_count == UNREAD_COUNT_LIMIT
+
+        states = await self.repo.update_user_chat_state_from_dict(
+            user_1_id, {chat_id: {"last_read": messages[2].id}}
+        )
+        assert states[0].unread_count == UNREAD_COUNT_LIMIT - 1
+
     # ---------------------------------------------------------------------------------
     # Tests for get_user_list() method
 
@@ -845,6 +1348,20 @@ class ChatRepoTestBase:
             user.id for user in expected_res
         }
 
+    async def test_get_user_list__start_id(self):
+        """
+        get_user_list() with start_id returns users that follow the user with
+        id=start_id in (name, id) order.
+        """
+        data = await self.create_users_and_chats()
+
+        users = await self.repo.get_user_list(name_filter="user", limit=2)
+        assert [user.id for user in users] == [data["user_1"].id, data["user_2"].id]
+        users = await self.repo.get_user_list(
+            name_filter="user", start_id=users[-1].id, limit=2
+        )
+        assert [user.id for user in users] == [data["user_3"].id]
+
     async def test_get_user_list__database_failure(self):
         """
         get_user_list() raises ChatRepoDatabaseError in case of
@@ -858,6 +1375,37 @@ class ChatRepoTestBase:
         with pytest.raises(ChatRepoDatabaseError):
             await self.repo.get_user_list()
 
+    # ---------------------------------------------------------------------------------
+    # Tests for outbox methods
+
+    async def test_outbox_events__add_get_delete(self):
+        """
+        Events added by add_outbox_events() are returned by get_outbox_events() in the
+        order they were added, until they are deleted by delete_outbox_events().
+        """
+        events = [(f"channel_{i % 2}", f'{{"n": {i}}}') for i in range(5)]
+        await self.repo.add_outbox_events(events)
+
+        outbox_events = await self.repo.get_outbox_events(limit=3)
+        assert [(ev.channel, ev.event) for ev in outbox_events] == events[:3]
+
+        await self.repo.delete_outbox_events([ev.id for ev in outbox_events])
+        outbox_events = await self.repo.get_outbox_events(limit=10)
+        assert [(ev.channel, ev.event) for ev in outbox_events] == events[3:]
+
+    async def test_outbox_events__database_failure(self):
+        """
+        Outbox methods raise ChatRepoDatabaseError in case of DB failure.
+        """
+        await self._break_connection()
+
+        with pytest.raises(ChatRepoDatabaseError):
+            await self.repo.add_outbox_events([("channel", "{}")])
+        with pytest.raises(ChatRepoDatabaseError):
+            await self.repo.get_outbox_events(limit=10)
+        with pytest.raises(ChatRepoDatabaseError):
+            await self.repo.delete_outbox_events([1])
+
     # ---------------------------------------------------------------------------------
     # Methods below should be implemented in the descendant class
 
@@ -0,0 +1,220 @@
+import asyncio
+import uuid
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from backend.models.chat import Chat
+from backend.models.user import User
+from backend.models.user_chat_link import UserChatLink
+from backend.schemas.chat import ChatCreateSchema
+from backend.services.chat_manager.chat_manager import ChatManager
+from backend.services.chat_repo.caching_chat_repo import (
+    CachePolicy,
+    CachingChatRepo,
+    ChatRepoCache,
+)
+from backend.services.chat_repo.sqla_chat_repo import SQLAlchemyChatRepo
+from backend.services.event_broker.in_memory_event_broker import InMemoryEventBroker
+from backend.services.uow.sqla_uow import SQLAlchemyUnitOfWork
+from backend.tests.unit.chat_repo import test_sqla_chat_repo_
+
+
+class TestCachingChatRepo(test_sqla_chat_repo_.TestChatRepoMemory):
+    """
+    Runs all the tests from ChatRepoTestBase against SQLAlchemyChatRepo wrapped into
+    CachingChatRepo.
+    """
+
+    @pytest.fixture(autouse=True)
+    def _create_repo(self, async_session: AsyncSession):
+        self._session = async_session
+        self.repo = CachingChatRepo(SQLAlchemyChatRepo(async_session), ChatRepoCache())
+        yield
+
+
+async def _create_chat(async_session: AsyncSession) -> tuple[uuid.UUID, uuid.UUID]:
+    user_id = uuid.uuid4()
+    chat_id = uuid.uuid4()
+    async_session.add_all(
+        (
+            User(id=user_id, name="user"),
+            Chat(id=chat_id, title="chat", owner_id=user_id),
+            UserChatLink(user_id=user_id, chat_id=chat_id),
+        )
+    )
+    await async_session.commit()
+    return user_id, chat_id
+
+
+async def test_hits_and_misses(async_session: AsyncSession):
+    """
+    The second call of cached method is served from the cache, stats reflect it.
+    Paginated calls aren't cached.
+    """
+    user_id, chat_id = await _create_chat(async_session)
+    cache = ChatRepoCache()
+    repo = CachingChatRepo(SQLAlchemyChatRepo(async_session), cache)
+
+    for _ in range(2):
+        assert (await repo.get_chat(chat_id)) is not None
+        assert (await repo.get_user_by_id(user_id)).id == user_id
+        assert len(await repo.get_owned_chats(user_id)) == 1
+    await repo.get_owned_chats(user_id, limit=1)
+
+    stats = cache.stats()
+    for method in ("get_chat", "get_owned_chats"):
+        assert (stats[method].hits, stats[method].misses) == (1, 1)
+    # Users are cached by AuthCache
+    assert "get_user_by_id" not in stats
+
+
+def test_ttl_override():
+    """
+    `ttl` overrides TTL of all policies.
+    """
+    timer_now = 100.0
+    cache = ChatRepoCache(
+        policies={
+            "get_chat": CachePolicy(maxsize=10, ttl=None),
+            "get_owned_chats": CachePolicy(maxsize=10, ttl=60),
+        },
+        ttl=5,
+    )
+    for method_cache in cache._caches.values():
+        method_cache.timer = lambda: timer_now
+    cache.set("get_chat", 1, "chat")
+    cache.set("get_owned_chats", 1, ["chat"])
+
+    timer_now += 5
+    assert cache.get("get_chat", 1) is None
+    assert cache.get("get_owned_chats", 1) is None
+
+
+async def test_disabled_method(async_session: AsyncSession):
+    """
+    Methods that aren't listed in policies are not cached.
+    """
+    user_id, chat_id = await _create_chat(async_session)
+    cache = ChatRepoCache(policies={"get_chat": CachePolicy(maxsize=10, ttl=None)})
+    repo = CachingChatRepo(SQLAlchemyChatRepo(async_session), cache)
+
+    await repo.get_joined_chat_ids(user_id)
+    await repo.get_joined_chat_ids(user_id)
+
+    assert list(cache.stats().keys()) == ["get_chat"]
+
+
+async def test_invalidation_on_commit(async_session_maker: async_sessionmaker):
+    """
+    Writes made through the repo invalidate affected keys. Until the transaction is
+    committed, reads bypass the cache, so uncommitted data isn't cached.
+    """
+    async with async_session_maker() as session:
+        user_id, chat_id = await _create_chat(session)
+    cache = ChatRepoCache()
+    reader_uow = SQLAlchemyUnitOfWork(async_session_maker, repo_cache=cache)
+    async with reader_uow:
+        assert await reader_uow.chat_repo.get_joined_chat_ids(user_id) == [chat_id]
+        assert len(await reader_uow.chat_repo.get_owned_chats(user_id)) == 1
+
+    new_chat_id = uuid.uuid4()
+    writer_uow = SQLAlchemyUnitOfWork(async_session_maker, repo_cache=cache)
+    async with writer_uow:
+        await writer_uow.chat_repo.add_chat(
+            ChatCreateSchema(id=new_chat_id, title="new", owner_id=user_id)
+        )
+        await writer_uow.chat_repo.add_user_to_chat(
+            chat_id=new_chat_id, user_id=user_id
+        )
+        # Read inside the transaction returns uncommitted data, but doesn't cache it
+        assert len(await writer_uow.chat_repo.get_owned_chats(user_id)) == 2
+        await writer_uow.commit()
+
+    async with reader_uow:
+        assert set(await reader_uow.chat_repo.get_joined_chat_ids(user_id)) == {
+            chat_id,
+            new_chat_id,
+        }
+        assert len(await reader_uow.chat_repo.get_owned_chats(user_id)) == 2
+
+
+async def test_no_caching_of_rolled_back_data(async_session_maker: async_sessionmaker):
+    """
+    Data written in the rolled back transaction doesn't get into the cache.
+    """
+    async with async_session_maker() as session:
+        user_id, _ = await _create_chat(session)
+    cache = ChatRepoCache()
+    uow = SQLAlchemyUnitOfWork(async_session_maker, repo_cache=cache)
+    async with uow:
+        await uow.chat_repo.add_chat(
+            ChatCreateSchema(id=uuid.uuid4(), title="new", owner_id=user_id)
+        )
+        assert len(await uow.chat_repo.get_owned_chats(user_id)) == 2
+        # Do not call `uow.commit()`
+
+    async with uow:
+        assert len(await uow.chat_repo.get_owned_chats(user_id)) == 1
+
+
+async def test_invalidation_during_load(async_session_maker: async_sessionmaker):
+    """
+    If the key is invalidated by the commit while it's being loaded by another
+    session, the loaded (pre-commit) value isn't put to the cache.
+    """
+    async with async_session_maker() as session:
+        user_id, _ = await _create_chat(session)
+    cache = ChatRepoCache()
+    reader_uow = SQLAlchemyUnitOfWork(async_session_maker, repo_cache=cache)
+    writer_uow = SQLAlchemyUnitOfWork(async_session_maker, repo_cache=cache)
+    load_started = asyncio.Event()
+    write_committed = asyncio.Event()
+
+    async with reader_uow:
+        sqla_repo = reader_uow.uncached_chat_repo
+        get_owned_chats = sqla_repo.get_owned_chats
+
+        async def slow_get_owned_chats(*args, **kwargs):
+            res = await get_owned_chats(*args, **kwargs)
+            load_started.set()
+            await write_committed.wait()
+            return res
+
+        sqla_repo.get_owned_chats = slow_get_owned_chats  # type: ignore[method-assign]
+        read_task = asyncio.create_task(reader_uow.chat_repo.get_owned_chats(user_id))
+        await load_started.wait()
+        async with writer_uow:
+            await writer_uow.chat_repo.add_chat(
+                ChatCreateSchema(id=uuid.uuid4(), title="new", owner_id=user_id)
+            )
+            await writer_uow.commit()
+        write_committed.set()
+        assert len(await read_task) == 1
+
+    assert cache.stats()["get_owned_chats"].size == 0
+    async with reader_uow:
+        assert len(await reader_uow.chat_repo.get_owned_chats(user_id)) == 2
+
+
+async def test_subscribe_bypasses_repo_cache(async_session_maker: async_sessionmaker):
+    """
+    subscribe_for_updates() reads joined chats from the storage even if
+    get_joined_chat_ids is cached by the repository cache.
+    """
+    async with async_session_maker() as session:
+        user_id, chat_id = await _create_chat(session)
+    cache = ChatRepoCache(
+        policies={"get_joined_chat_ids": CachePolicy(maxsize=10, ttl=None)}
+    )
+    cache.set("get_joined_chat_ids", user_id, [])
+    event_broker = InMemoryEventBroker()
+    chat_manager = ChatManager(
+        uow=SQLAlchemyUnitOfWork(async_session_maker, repo_cache=cache),
+        event_broker=event_broker,
+    )
+
+    async with event_broker.session(user_id):
+        await chat_manager.subscribe_for_updates(user_id)
+
+    assert chat_manager.membership_cache.get_user_chat_ids(user_id) == {chat_id}
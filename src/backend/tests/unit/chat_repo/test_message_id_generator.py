@@ -0,0 +1,117 @@
+import pytest
+
+from backend.services.chat_repo.message_id_generator import (
+    EPOCH_MS,
+    MAX_NODE_ID,
+    MAX_SEQUENCE,
+    NODE_BITS,
+    SEQUENCE_BITS,
+    MessageIdGenerator,
+    node_id_from_env,
+)
+
+
+class FakeTimer:
+    def __init__(self, time_ms: int):
+        self.time_ms = time_ms
+
+    def __call__(self) -> float:
+        return self.time_ms / 1000
+
+
+def test_ids_are_increasing():
+    """
+    Ids generated within one millisecond and in subsequent milliseconds are strictly
+    increasing. Timestamp part of id is the number of ms since epoch.
+    """
+    timer = FakeTimer(EPOCH_MS + 1000)
+    generator = MessageIdGenerator(timer=timer)
+
+    ids = generator.next_ids(3)
+    timer.time_ms += 1
+    ids.append(generator.next_id())
+
+    assert ids == sorted(set(ids))
+    assert (ids[0] >> (NODE_BITS + SEQUENCE_BITS)) == 1000
+    assert (ids[-1] >> (NODE_BITS + SEQUENCE_BITS)) == 1001
+
+
+def test_sequence_overflow():
+    """
+    If sequence is exhausted within one millisecond, the next millisecond is used.
+    """
+    timer = FakeTimer(EPOCH_MS)
+    generator = MessageIdGenerator(timer=timer)
+
+    ids = generator.next_ids(MAX_SEQUENCE + 2)
+
+    assert ids == sorted(set(ids))
+    assert (ids[-1] >> (NODE_BITS + SEQUENCE_BITS)) == 1
+
+
+def test_clock_goes_backwards():
+    """
+    Ids are still increasing if the clock goes backwards.
+    """
+    timer = FakeTimer(EPOCH_MS + 1000)
+    generator = MessageIdGenerator(timer=timer)
+
+    first_id = generator.next_id()
+    timer.time_ms -= 500
+    second_id = generator.next_id()
+
+    assert second_id > first_id
+
+
+def test_node_id():
+    """
+    Ids generated by different nodes at the same time are different.
+    Ids fit into 53 bits (safe integer in JavaScript).
+    """
+    timer = FakeTimer(EPOCH_MS + 1000)
+
+    id_1 = MessageIdGenerator(node_id=1, timer=timer).next_id()
+    id_2 = MessageIdGenerator(node_id=2, timer=timer).next_id()
+
+    assert id_1 != id_2
+    assert MessageIdGenerator().next_id() < 2**53
+
+
+@pytest.mark.parametrize("node_id", (-1, 2**NODE_BITS))
+def test_invalid_node_id(node_id: int):
+    with pytest.raises(ValueError):
+        MessageIdGenerator(node_id=node_id)
+
+
+def test_different_nodes_never_collide():
+    """
+    Generators with different node ids don't produce the same ids, even if they
+    generate many ids within the same milliseconds.
+    """
+    timer = FakeTimer(EPOCH_MS + 1000)
+    generator_1 = MessageIdGenerator(node_id=0, timer=timer)
+    generator_2 = MessageIdGenerator(node_id=MAX_NODE_ID, timer=timer)
+
+    ids_1: list[int] = []
+    ids_2: list[int] = []
+    for _ in range(5):
+        ids_1.extend(generator_1.next_ids(MAX_SEQUENCE * 2))
+        ids_2.extend(generator_2.next_ids(MAX_SEQUENCE * 2))
+        timer.time_ms += 1
+
+    assert len(set(ids_1)) == len(ids_1)
+    assert set(ids_1).isdisjoint(ids_2)
+
+
+@pytest.mark.parametrize(
+    "environ, node_id",
+    (({}, None), ({"MESSAGE_ID_NODE_ID": "0"}, 0), ({"MESSAGE_ID_NODE_ID": "15"}, 15)),
+)
+def test_node_id_from_env(environ: dict[str, str], node_id: int | None):
+    assert node_id_from_env(environ) == node_id
+
+
+@pytest.mark.parametrize("value", ("-1", "16", "node-1"))
+def test_node_id_from_env__invalid(value: str):
+    with pytest.raises(ValueError):
+        node_id_from_env({"MESSAGE_ID_NODE_ID": value})
@@ -1,5 +1,4 @@
 import uuid
-from typing import cast
 
 import pytest
 from sqlalchemy import insert, select
@@ -59,8 +58,7 @@ class TestChatRepoMemory(ChatRepoTestBase):
         async def raise_error(*args, **kwargs):
             raise OperationalError("", "", Exception())
 
-        sqla_repo = cast(SQLAlchemyChatRepo, self.repo)
-        sqla_repo._session.execute = raise_error  # type: ignore
-        sqla_repo._session.scalar = raise_error  # type: ignore
-        sqla_repo._session.scalars = raise_error  # type: ignore
-        sqla_repo._session.get = raise_error  # type: ignore
+        self._session.execute = raise_error  # type: ignore
+        self._session.scalar = raise_error  # type: ignore
+        self._session.scalars = raise_error  # type: ignore
+        self._session.get = raise_error  # type: ignore
@@ -4,6 +4,7 @@ from typing import Any
 from unittest.mock import AsyncMock, patch
 
 import pytest
+from pydantic import ValidationError
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
@@ -14,12 +15,19 @@ from backend.models.user_chat_link import UserChatLink
 from backend.schemas import client_packet as cli_p
 from backend.schemas import server_packet as srv_p
 from backend.schemas.chat import ChatCreateSchema
-from backend.schemas.chat_message import ChatUserMessageCreateSchema
+from backend.schemas.chat_message import (
+    ChatMessageSearchPageSchema,
+    ChatUserMessageCreateSchema,
+)
 from backend.services.chat_manager.chat_manager import ChatManager
 from backend.services.chat_manager.chat_manager_exc import (
     EventBrokerError,
+    RateLimitExceeded,
     RepositoryError,
+    ServerOverloaded,
 )
+from backend.services.load_shedder.load_shedder import LoadShedder
+from backend.services.rate_limiter.rate_limiter import RateLimit, RateLimiter
 from backend.services.ws_chat_server import _process_ws_client_request_packet
 
 # ---------------------------------------------------------------------------------
@@ -95,6 +103,41 @@ async def test_process_ws_client_request_add_user_to_chat(
     assert isinstance(user_chat_link, UserChatLink)
 
 
+# ---------------------------------------------------------------------------------
+# CMDAddUsersToChat
+
+
+async def test_process_ws_client_request_add_users_to_chat(
+    chat_manager: ChatManager,
+    async_session: AsyncSession,
+    event_broker_user_id_list: list[uuid.UUID],
+):
+    current_user_id = event_broker_user_id_list[0]
+    user_ids = event_broker_user_id_list[1:]
+    chat_id = uuid.uuid4()
+
+    # Create users and chat
+    for user_id in event_broker_user_id_list:
+        async_session.add(User(id=user_id, name=f"user_{user_id.hex[:5]}"))
+    async_session.add(Chat(id=chat_id, title="my chat", owner_id=current_user_id))
+    await async_session.commit()
+
+    request = cli_p.ClientPacket(
+        id=random.randint(1, 10000),
+        data=cli_p.CMDAddUsersToChat(chat_id=chat_id, user_ids=user_ids),
+    )
+
+    response = await _process_ws_client_request_packet(
+        chat_manager=chat_manager, packet=request, current_user_id=current_user_id
+    )
+
+    assert isinstance(response.data, srv_p.SrvRespSucessNoBody) is True
+    res = await async_session.scalars(
+        select(UserChatLink.user_id).where(UserChatLink.chat_id == chat_id)
+    )
+    assert set(res.all()) == set(user_ids)
+
+
 # ---------------------------------------------------------------------------------
 # CMDGetMessages
 
@@ -350,18 +393,18 @@ async def test_process_ws_client_request_get_user_list(
         assert response.data.users[0].id == user_id
 
 
-@pytest.mark.parametrize("offset", (None, 1))
+@pytest.mark.parametrize("start_id", (None, uuid.uuid4()))
 @pytest.mark.parametrize("limit", (None, 1))
-async def test_process_ws_client_request_get_user_list__limit_offset(
+async def test_process_ws_client_request_get_user_list__limit_start_id(
     chat_manager: ChatManager,
     limit: int | None,
-    offset: int | None,
+    start_id: uuid.UUID | None,
 ):
     input_json: dict[str, Any] = {"name_filter": "name"}
     if limit is not None:
         input_json["limit"] = limit
-    if offset is not None:
-        input_json["offset"] = offset
+    if start_id is not None:
+        input_json["start_id"] = start_id
 
     request = cli_p.ClientPacket(
         id=random.randint(1, 10000),
@@ -375,6 +418,79 @@ async def test_process_ws_client_request_get_user_list__limit_offset(
         patched.assert_awaited_once_with(**input_json)
 
 
+# ---------------------------------------------------------------------------------
+# CMDSearchMessages
+
+
+async def test_process_ws_client_request_search_messages(
+    chat_manager: ChatManager, async_session: AsyncSession
+):
+    user_id = uuid.uuid4()
+    chat_id = uuid.uuid4()
+    current_user_id = user_id
+    message = ChatUserMessage(chat_id=chat_id, text="find me", sender_id=user_id)
+    user = User(id=user_id, name="user")
+    chat = Chat(id=chat_id, title="my chat", owner_id=current_user_id)
+    user_chat = UserChatLink(user_id=user_id, chat_id=chat_id)
+    async_session.add_all((user, chat, user_chat, message))
+    await async_session.commit()
+
+    request = cli_p.ClientPacket(
+        id=random.randint(1, 10000),
+        data=cli_p.CMDSearchMessages(query="find"),
+    )
+
+    response = await _process_ws_client_request_packet(
+        chat_manager=chat_manager, packet=request, current_user_id=current_user_id
+    )
+
+    assert isinstance(response.data, srv_p.SrvRespSearchMessages) is True
+    if isinstance(response.data, srv_p.SrvRespSearchMessages):
+        assert len(response.data.results) == 1
+        assert response.data.results[0].message.id == message.id
+        assert response.data.max_id == message.id
+
+
+@pytest.mark.parametrize("chat_id", (None, uuid.uuid4()))
+@pytest.mark.parametrize("start", (None, (100, -1.5, 20)))
+@pytest.mark.parametrize("limit", (None, 1))
+async def test_process_ws_client_request_search_messages__params(
+    chat_manager: ChatManager,
+    chat_id: uuid.UUID | None,
+    start: tuple[int, float, int] | None,
+    limit: int | None,
+):
+    input_json: dict[str, Any] = {"query": "text"}
+    if chat_id is not None:
+        input_json["chat_id"] = chat_id
+    if start is not None:
+        (input_json["max_id"], input_json["start_rank"], input_json["start_id"]) = start
+    if limit is not None:
+        input_json["limit"] = limit
+    current_user_id = uuid.uuid4()
+
+    request = cli_p.ClientPacket(
+        id=random.randint(1, 10000),
+        data=cli_p.CMDSearchMessages.model_validate(input_json),
+    )
+
+    with patch.object(
+        chat_manager,
+        "search_messages",
+        return_value=ChatMessageSearchPageSchema(results=[], max_id=0),
+    ) as patched:
+        await _process_ws_client_request_packet(
+            chat_manager=chat_manager, packet=request, current_user_id=current_user_id
+        )
+        patched.assert_awaited_once_with(**input_json, current_user_id=current_user_id)
+
+
+@pytest.mark.parametrize("limit", (0, -1))
+def test_search_messages_command__limit_not_positive(limit: int):
+    with pytest.raises(ValidationError):
+        cli_p.CMDSearchMessages(query="text", limit=limit)
+
+
 # ---------------------------------------------------------------------------------
 # CMDCreateChat
 
@@ -409,4 +525,162 @@ async def test_process_ws_client_request_create_chat(
         patched.assert_awaited_once_with(
             current_user_id=user_id,
             chat_data=chat_data,
+            user_ids=[],
         )
+
+
+# ---------------------------------------------------------------------------------
+# CMDPing
+
+
+async def test_process_ws_client_request__ping(
+    chat_manager: ChatManager,
+    event_broker_user_id_list: list[uuid.UUID],
+):
+    current_user_id = event_broker_user_id_list[0]
+
+    request = cli_p.ClientPacket(id=random.randint(1, 10000), data=cli_p.CMDPing())
+
+    with patch.object(chat_manager, "ping") as patched:
+        response = await _process_ws_client_request_packet(
+            chat_manager=chat_manager, packet=request, current_user_id=current_user_id
+        )
+        patched.assert_called_once_with(current_user_id=current_user_id)
+
+    assert isinstance(response.data, srv_p.SrvRespSucessNoBody) is True
+
+
+# ---------------------------------------------------------------------------------
+# CMDTyping
+
+
+async def test_process_ws_client_request__typing(
+    chat_manager: ChatManager,
+    event_broker_user_id_list: list[uuid.UUID],
+):
+    current_user_id = event_broker_user_id_list[0]
+    chat_id = uuid.uuid4()
+
+    request = cli_p.ClientPacket(
+        id=random.randint(1, 10000), data=cli_p.CMDTyping(chat_id=chat_id)
+    )
+
+    with patch.object(chat_manager, "send_typing") as patched:
+        response = await _process_ws_client_request_packet(
+            chat_manager=chat_manager, packet=request, current_user_id=current_user_id
+        )
+        patched.assert_awaited_once_with(
+            current_user_id=current_user_id, chat_id=chat_id
+        )
+
+    assert isinstance(response.data, srv_p.SrvRespSucessNoBody) is True
+
+
+# CMDMarkRead
+
+
+async def test_process_ws_client_request__mark_read(
+    chat_manager: ChatManager,
+    event_broker_user_id_list: list[uuid.UUID],
+):
+    current_user_id = event_broker_user_id_list[0]
+    chat_id = uuid.uuid4()
+
+    request = cli_p.ClientPacket(
+        id=random.randint(1, 10000),
+        data=cli_p.CMDMarkRead(chat_id=chat_id, message_id=123),
+    )
+
+    with patch.object(chat_manager, "mark_read") as patched:
+        response = await _process_ws_client_request_packet(
+            chat_manager=chat_manager, packet=request, current_user_id=current_user_id
+        )
+        patched.assert_awaited_once_with(
+            current_user_id=current_user_id, chat_id=chat_id, message_id=123
+        )
+
+    assert isinstance(response.data, srv_p.SrvRespSucessNoBody) is True
+
+
+# Rate limiting
+
+
+async def test_process_ws_client_request__rate_limit_exceeded(
+    chat_manager: ChatManager,
+    event_broker_user_id_list: list[uuid.UUID],
+):
+    """
+    Packet that exceeds the rate limit isn't processed, the error response contains
+    retry-after hint.
+    """
+    current_user_id = event_broker_user_id_list[0]
+    rate_limiter = RateLimiter(
+        connection_limits={"CMDTyping": RateLimit(rate=0.5, burst=1)},
+        user_limits={},
+    ).session(current_user_id)
+
+    responses = []
+    with patch.object(chat_manager, "send_typing") as patched:
+        for _ in range(2):
+            request = cli_p.ClientPacket(
+                id=random.randint(1, 10000), data=cli_p.CMDTyping(chat_id=uuid.uuid4())
+            )
+            responses.append(
+                await _process_ws_client_request_packet(
+                    chat_manager=chat_manager,
+                    packet=request,
+                    current_user_id=current_user_id,
+                    rate_limiter=rate_limiter,
+                )
+            )
+        assert patched.await_count == 1
+
+    assert isinstance(responses[0].data, srv_p.SrvRespSucessNoBody)
+    assert isinstance(responses[1].data, srv_p.SrvRespError)
+    error_data = responses[1].data.error_data
+    assert isinstance(error_data, RateLimitExceeded)
+    assert error_data.error_code == "RATE_LIMIT_EXCEEDED"
+    assert 1.9 < error_data.retry_after <= 2.0
+    assert '"retry_after":' in responses[1].model_dump_json()
+
+
+# Load shedding
+
+
+async def test_process_ws_client_request__server_overloaded(
+    chat_manager: ChatManager,
+    event_broker_user_id_list: list[uuid.UUID],
+):
+    """
+    Sheddable request isn't processed when the server is overloaded.
+    In-flight requests counter is decremented after the request is processed.
+    """
+    current_user_id = event_broker_user_id_list[0]
+    load_shedder = LoadShedder(max_in_flight=1)
+    request = cli_p.ClientPacket(
+        id=random.randint(1, 10000), data=cli_p.CMDGetJoinedChats()
+    )
+
+    with patch.object(chat_manager, "get_joined_chat_list") as patched:
+        patched.return_value = []
+        response = await _process_ws_client_request_packet(
+            chat_manager=chat_manager,
+            packet=request,
+            current_user_id=current_user_id,
+            load_shedder=load_shedder,
+        )
+        assert isinstance(response.data, srv_p.SrvRespGetJoinedChatList)
+        assert load_shedder.in_flight == 0
+
+        load_shedder.start_request("CMDSendMessage")
+        response = await _process_ws_client_request_packet(
+            chat_manager=chat_manager,
+            packet=request,
+            current_user_id=current_user_id,
+            load_shedder=load_shedder,
+        )
+        assert patched.await_count == 1
+
+    assert isinstance(response.data, srv_p.SrvRespError)
+    assert isinstance(response.data.error_data, ServerOverloaded)
+    assert load_shedder.in_flight == 1
@@ -0,0 +1,57 @@
+import tracemalloc
+import uuid
+from contextlib import AsyncExitStack
+from unittest.mock import Mock
+
+from backend.services.chat_manager.chat_manager import ChatManager
+from backend.services.chat_manager.first_circle import FirstCircle
+from backend.services.chat_manager.utils import channel_code
+from backend.services.event_broker.in_memory_event_broker import InMemoryEventBroker
+from backend.services.uow.abstract_uow import AbstractUnitOfWork
+
+SESSION_COUNT = 1000
+CHAT_COUNT = 10
+FIRST_CIRCLE_SIZE = 5
+MAX_BYTES_PER_IDLE_SESSION = 4 * 1024  # ~3.3 KB on CPython 3.11
+
+
+async def test_idle_session_memory_budget():
+    """
+    Memory allocated for idle websocket session (event broker session, subscriptions
+    to user's channel and chat channels, ChatManager with loaded first circle) fits
+    the budget.
+    """
+    event_broker = InMemoryEventBroker()
+    chat_ids = [uuid.uuid4() for _ in range(CHAT_COUNT)]
+    first_circle_ids = [uuid.uuid4() for _ in range(FIRST_CIRCLE_SIZE)]
+    user_ids = [uuid.uuid4() for _ in range(SESSION_COUNT)]
+    chat_managers: list[ChatManager] = []
+    uow = Mock(spec=AbstractUnitOfWork)
+
+    async with AsyncExitStack() as stack:
+        tracemalloc.start()
+        try:
+            snapshot_before = tracemalloc.take_snapshot()
+            for user_id in user_ids:
+                await stack.enter_async_context(event_broker.session(user_id))
+                channels = [channel_code("chat", chat_id) for chat_id in chat_ids]
+                channels.append(channel_code("user", user_id))
+                await event_broker.subscribe_list(channels=channels, user_id=user_id)
+                chat_manager = ChatManager(
+                    uow=uow,
+                    event_broker=event_broker,
+                )
+                chat_manager._first_circle = FirstCircle()
+                for member_id in first_circle_ids:
+                    for chat_id in chat_ids[:2]:
+                        chat_manager._first_circle.add(member_id, chat_id)
+                chat_managers.append(chat_manager)
+            snapshot_after = tracemalloc.take_snapshot()
+        finally:
+            tracemalloc.stop()
+
+    allocated = sum(
+        stat.size_diff
+        for stat in snapshot_after.compare_to(snapshot_before, "filename")
+    )
+    assert allocated / SESSION_COUNT < MAX_BYTES_PER_IDLE_SESSION
@@ -11,6 +11,7 @@ from backend.auth_setups import auth_config
 from backend.dependencies import get_current_user, sqla_sessionmaker_dep
 from backend.routers.auth import auth_router
 from backend.schemas.user import UserCreateSchema, UserSchema
+from backend.services.auth.password_hasher import password_hasher
 
 PWD_TOKEN_PATH = f"{auth_config.AUTH_ROUTER_PATH}{auth_config.TOKEN_PATH_WITH_PWD}"
 REFRESH_TOKEN_PATH = (
@@ -59,6 +60,24 @@ async def test_get_token_pwd_endpoint__wrong_password(
     assert json_data["detail"] == "Incorrect username or password"
 
 
+async def test_get_token_pwd_endpoint__busy(
+    client: TestClient, registered_user_data: dict[str, str]
+):
+    user = registered_user_data
+    with patch.object(password_hasher, "queue_size", 0):
+        res = client.post(
+            PWD_TOKEN_PATH,
+            data={
+                "grant_type": "password",
+                "username": user["name"],
+                "password": user["password"],
+                "scope": user["scope"],
+            },
+        )
+    assert res.status_code == 503, res.json()
+    assert "Retry-After" in res.headers
+
+
 async def test_get_token_pwd_endpoint__wrong_scope(
     client: TestClient, registered_user_data: dict[str, str]
 ):
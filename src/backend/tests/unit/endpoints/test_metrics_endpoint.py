@@ -0,0 +1,15 @@
+from starlette.testclient import TestClient
+
+
+def test_metrics(client: TestClient):
+    response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    for metric_name in (
+        "chat_ws_sessions",
+        "chat_broker_queue_depth",
+        "chat_broker_unacknowledged_events",
+        "chat_repo_cache_size",
+    ):
+        assert f"# TYPE {metric_name} gauge" in response.text
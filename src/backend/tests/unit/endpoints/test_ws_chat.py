@@ -4,11 +4,13 @@ from asyncio import sleep as asleep
 from unittest.mock import AsyncMock, Mock, patch
 
 import pytest
+from fastapi import WebSocketDisconnect, status
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 from starlette.testclient import TestClient, WebSocketTestSession
 
 from backend.auth_setups import Scopes
+from backend.dependencies import load_shedder_dep
 from backend.models.chat import Chat
 from backend.models.chat_message import ChatUserMessage
 from backend.models.user import User
@@ -36,6 +38,7 @@ from backend.services.chat_manager.chat_manager import (
 from backend.services.chat_manager.chat_manager_exc import RepositoryError
 from backend.services.chat_manager.utils import channel_code
 from backend.services.event_broker.in_memory_event_broker import InMemoryEventBroker
+from backend.services.load_shedder.load_shedder import LoadShedder
 from backend.tests.unit.endpoints.helpers import (
     connect_and_perform_request,
     create_access_token,
@@ -74,9 +77,27 @@ async def test_ws_chat_unsubscribe_on_connection_close(
     access_token = create_access_token(registered_user_data, [Scopes.chat_user])
     with client.websocket_connect(f"/ws/chat?access_token={access_token}"):
         await asleep(0.1)
-        assert str(user_id) in event_broker._subscribers
+        assert user_id.int in event_broker._subscribers
     # Check that EventBroker's session data was deleted for this call
-    assert str(user_id) not in event_broker._subscribers
+    assert user_id.int not in event_broker._subscribers
+
+
+async def test_ws_chat_session_limit(client: TestClient, registered_user_data: dict):
+    """
+    Sessions above the limit are rejected with "Try again later" code.
+    """
+    access_token = create_access_token(registered_user_data, [Scopes.chat_user])
+    load_shedder = LoadShedder(max_sessions=0)
+    app = client.app
+    app.dependency_overrides[load_shedder_dep] = lambda: load_shedder  # type: ignore
+    try:
+        with pytest.raises(WebSocketDisconnect) as exc_info:
+            with client.websocket_connect(f"/ws/chat?access_token={access_token}"):
+                pass
+    finally:
+        app.dependency_overrides.pop(load_shedder_dep)  # type: ignore
+    assert exc_info.value.code == status.WS_1013_TRY_AGAIN_LATER
+    assert (load_shedder.sessions, load_shedder.rejected_sessions) == (0, 1)
 
 
 # ---------------------------------------------------------------------------------
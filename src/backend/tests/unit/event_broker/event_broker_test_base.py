@@ -1,6 +1,6 @@
 import uuid
 from contextlib import asynccontextmanager
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from unittest.mock import Mock, patch
 
 import pytest
@@ -9,6 +9,7 @@ from freezegun import freeze_time
 from backend.schemas.event import (
     AnyEvent,
     ChatMessageEvent,
+    TypingEvent,
     UserAddedToChatNotification,
 )
 from backend.services.chat_manager.utils import channel_code
@@ -208,6 +209,40 @@ class EventBrokerTestBase:
             assert events[0].model_dump_json() == event_1.model_dump_json()
             assert events[1].model_dump_json() == event_2.model_dump_json()
 
+    async def test_post_events__several_channels_fifo(self):
+        """
+        post_events() posts all events from the list to their channels, events
+        keep their order.
+        """
+        user_id = uuid.uuid4()
+        channel_1 = channel_code("chat", uuid.uuid4())
+        channel_2 = channel_code("chat", uuid.uuid4())
+        channel_3 = channel_code("chat", uuid.uuid4())
+        events = [create_chat_event(ChatMessageEvent) for _ in range(4)]
+
+        async with self.event_broker.session(user_id):
+            # Subscribe user to channels 1 and 2. Don't subscribe them to channel 3!
+            await self.event_broker.subscribe_list(
+                channels=[channel_1, channel_2], user_id=user_id
+            )
+
+            # Post events to all 3 channels in one call
+            await self.event_broker.post_events(
+                events=[
+                    (channel_1, events[0]),
+                    (channel_3, events[1]),
+                    (channel_2, events[2]),
+                    (channel_1, events[3]),
+                ]
+            )
+
+            # Check that get_events() returns all events from channels
+            # user subscribed to
+            events_res = await self.event_broker.get_events(user_id)
+            assert [ev.model_dump_json() for ev in events_res] == [
+                ev.model_dump_json() for ev in (events[0], events[2], events[3])
+            ]
+
     @pytest.mark.parametrize("limit", (None, 1, 2, 10))
     async def test_get_events__limit(self, limit: int | None):
         """
@@ -741,6 +776,70 @@ class EventBrokerTestBase:
             with pytest.raises(EventBrokerFail):
                 await self.event_broker.acknowledge_events(user_id_1)
 
+    # ---------------------------------------------------------------------------------
+    # Tests for ephemeral events
+
+    async def test_post_ephemeral_event__not_acknowledged(self):
+        """
+        Ephemeral events are delivered, but they don't take part in acknowledgement:
+        they aren't sent again and don't block subsequent events.
+        """
+        user_id = uuid.uuid4()
+        channel = channel_code("chat", uuid.uuid4())
+        typing_event = _create_typing_event()
+        event = create_chat_event(ChatMessageEvent)
+
+        async with self.event_broker.session(user_id):
+            await self.event_broker.subscribe(channel=channel, user_id=user_id)
+
+            await self.event_broker.post_ephemeral_event(
+                channel=channel, event=typing_event, ttl=5
+            )
+            events_res = await self.event_broker.get_events(user_id)
+            assert [e.model_dump_json() for e in events_res] == [
+                typing_event.model_dump_json()
+            ]
+
+            # Next event is returned without acknowledgement
+            await self._post_message(
+                routing_key=channel, message=event.model_dump_json()
+            )
+            await self.event_broker.post_ephemeral_event(
+                channel=channel, event=typing_event, ttl=5
+            )
+            events_res = await self.event_broker.get_events(user_id)
+            assert len(events_res) == 2
+
+            # Only durable event is acknowledged
+            acknowledged = await self.event_broker.acknowledge_events(user_id)
+            assert [e.model_dump_json() for e in acknowledged] == [
+                event.model_dump_json()
+            ]
+
+    async def test_post_ephemeral_event__expired_event_dropped(self):
+        """
+        Expired ephemeral events are not returned by get_events().
+        """
+        user_id = uuid.uuid4()
+        channel = channel_code("chat", uuid.uuid4())
+        event = create_chat_event(ChatMessageEvent)
+
+        async with self.event_broker.session(user_id):
+            await self.event_broker.subscribe(channel=channel, user_id=user_id)
+            await self.event_broker.post_ephemeral_event(
+                channel=channel, event=_create_typing_event(), ttl=5
+            )
+            await self._post_message(
+                routing_key=channel, message=event.model_dump_json()
+            )
+
+            with freeze_time(datetime.now() + timedelta(seconds=10)):
+                events_res = await self.event_broker.get_events(user_id, limit=1)
+
+            assert [e.model_dump_json() for e in events_res] == [
+                event.model_dump_json()
+            ]
+
     # Utils
 
     @asynccontextmanager
@@ -758,3 +857,11 @@ class EventBrokerTestBase:
     async def _brake_event_broker_derrived(self, exception: Exception):
         raise NotImplementedError
         yield
+
+
+def _create_typing_event() -> TypingEvent:
+    return TypingEvent(
+        chat_id=uuid.uuid4(),
+        user_id=uuid.uuid4(),
+        expires_at=datetime.now(timezone.utc) + timedelta(seconds=5),
+    )
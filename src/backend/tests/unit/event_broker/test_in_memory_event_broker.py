@@ -1,11 +1,22 @@
 import uuid
 from contextlib import asynccontextmanager
+from datetime import datetime, timedelta, timezone
 from unittest.mock import Mock, patch
 
 import pytest
 
-from backend.services.event_broker.in_memory_event_broker import InMemoryEventBroker
+from backend.schemas.event import ChatMessageEvent, TypingEvent
+from backend.services.chat_manager.utils import channel_code
+from backend.services.event_broker.abstract_event_broker import (
+    EVENT_FANOUT_LATENCY,
+    AbstractEventBroker,
+)
+from backend.services.event_broker.in_memory_event_broker import (
+    MAX_DEQUE_SIZE_FOR_EPHEMERAL,
+    InMemoryEventBroker,
+)
 from backend.tests.unit.event_broker.event_broker_test_base import EventBrokerTestBase
+from backend.tests.unit.event_broker.helpers import create_chat_event
 
 
 class TestInMemoryEventBroker(EventBrokerTestBase):
@@ -40,3 +51,84 @@ class TestInMemoryEventBroker(EventBrokerTestBase):
             ),
         ):
             yield
+
+
+async def test_post_ephemeral_event__dropped_on_backpressure():
+    """
+    Ephemeral events are dropped for subscribers with congested queue, subscriber
+    isn't unsubscribed.
+    """
+    event_broker = InMemoryEventBroker()
+    user_id = uuid.uuid4()
+    channel = channel_code("chat", uuid.uuid4())
+    event = create_chat_event(ChatMessageEvent)
+    typing_event = TypingEvent(
+        chat_id=uuid.uuid4(),
+        user_id=uuid.uuid4(),
+        expires_at=datetime.now(timezone.utc) + timedelta(seconds=5),
+    )
+
+    async with event_broker.session(user_id):
+        await event_broker.subscribe(channel=channel, user_id=user_id)
+        for _ in range(MAX_DEQUE_SIZE_FOR_EPHEMERAL):
+            await event_broker.post_event(channel=channel, event=event)
+
+        await event_broker.post_ephemeral_event(
+            channel=channel, event=typing_event, ttl=5
+        )
+
+        events = await event_broker.get_events(user_id)
+        assert len(events) == MAX_DEQUE_SIZE_FOR_EPHEMERAL
+        assert not any(isinstance(e, TypingEvent) for e in events)
+        assert user_id.int in InMemoryEventBroker._subscribtions[channel]
+
+
+async def test_queue_depth():
+    """
+    queue_depth() returns the total number of events queued for all sessions.
+    """
+    event_broker = InMemoryEventBroker()
+    user_ids = [uuid.uuid4() for _ in range(2)]
+    channel = channel_code("chat", uuid.uuid4())
+    event = create_chat_event(ChatMessageEvent)
+    initial_depth = event_broker.queue_depth()
+
+    async with event_broker.session(user_ids[0]):
+        async with event_broker.session(user_ids[1]):
+            for user_id in user_ids:
+                await event_broker.subscribe(channel=channel, user_id=user_id)
+            for _ in range(3):
+                await event_broker.post_event(channel=channel, event=event)
+            assert event_broker.queue_depth() == initial_depth + 6
+
+            await event_broker.get_events(user_ids[0], limit=1)
+            await event_broker.acknowledge_events(user_ids[0])
+            assert event_broker.queue_depth() == initial_depth + 5
+            await event_broker.get_events(user_ids[0])
+            assert event_broker.queue_depth() == initial_depth + 3
+        # Queue of closed session is removed
+        assert event_broker.queue_depth() == initial_depth
+
+
+async def test_fanout_latency_and_unacknowledged_events():
+    """
+    Time from posting the event to its delivery is observed, the number of
+    unacknowledged events is tracked.
+    """
+    event_broker = InMemoryEventBroker()
+    user_id = uuid.uuid4()
+    channel = channel_code("chat", uuid.uuid4())
+    fanout_count = EVENT_FANOUT_LATENCY.count()
+    unacknowledged = AbstractEventBroker.unacknowledged_events_total
+
+    async with event_broker.session(user_id):
+        await event_broker.subscribe(channel=channel, user_id=user_id)
+        await event_broker.post_events(
+            [(channel, create_chat_event(ChatMessageEvent)) for _ in range(2)]
+        )
+        await event_broker.get_events(user_id)
+
+        assert EVENT_FANOUT_LATENCY.count() == fanout_count + 2
+        assert AbstractEventBroker.unacknowledged_events_total == unacknowledged + 2
+        await event_broker.acknowledge_events(user_id)
+        assert AbstractEventBroker.unacknowledged_events_total == unacknowledged
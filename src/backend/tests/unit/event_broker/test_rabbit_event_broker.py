@@ -1,3 +1,5 @@
+import asyncio
+import random
 from contextlib import asynccontextmanager
 from typing import cast
 from unittest.mock import Mock
@@ -49,3 +51,35 @@ class TestRabbitEventBroker(EventBrokerTestBase):
             event_broker._con_data[user_id_int] = Mock(side_effect=exception)
         event_broker._common_exchange = Mock(side_effect=exception)
         yield
+
+
+async def test_post_events__channel_order_kept():
+    """
+    Events of the same channel are published one by one in the order they were
+    passed, even if publications take different time. Different channels are
+    published concurrently.
+    """
+    published: list[tuple[str, str]] = []
+    in_flight_channels: set[str] = set()
+    max_in_flight = 0
+
+    async def publish(message: aio_pika.Message, routing_key: str):
+        nonlocal max_in_flight
+        assert routing_key not in in_flight_channels
+        in_flight_channels.add(routing_key)
+        max_in_flight = max(max_in_flight, len(in_flight_channels))
+        await asyncio.sleep(random.random() / 1000)
+        published.append((routing_key, message.body.decode()))
+        in_flight_channels.remove(routing_key)
+
+    event_broker = RabbitEventBroker(connection=Mock())
+    event_broker._common_exchange = Mock(publish=publish)
+    events = [(f"channel_{i % 3}", f"event_{i}") for i in range(30)]
+
+    await event_broker._post_events_str(events)
+
+    for channel in ("channel_0", "channel_1", "channel_2"):
+        assert [e for c, e in published if c == channel] == [
+            e for c, e in events if c == channel
+        ]
+    assert max_in_flight == 3
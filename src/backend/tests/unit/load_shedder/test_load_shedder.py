@@ -0,0 +1,59 @@
+import pytest
+
+from backend.services.chat_manager.chat_manager_exc import ServerOverloaded
+from backend.services.load_shedder.load_shedder import LoadShedder
+
+
+def test_session_limit():
+    """
+    Sessions above the limit are rejected, closed sessions free their slots.
+    """
+    load_shedder = LoadShedder(max_sessions=2)
+
+    assert load_shedder.open_session() is True
+    assert load_shedder.open_session() is True
+    assert load_shedder.open_session() is False
+    load_shedder.close_session()
+    assert load_shedder.open_session() is True
+
+    assert load_shedder.sessions == 2
+    assert load_shedder.rejected_sessions == 1
+
+
+def test_in_flight_limit():
+    """
+    When there are max_in_flight requests in progress, sheddable requests are
+    rejected, other requests are admitted.
+    """
+    load_shedder = LoadShedder(max_in_flight=1)
+
+    load_shedder.start_request("CMDGetMessages")
+    with pytest.raises(ServerOverloaded) as exc_info:
+        load_shedder.start_request("CMDSearchMessages")
+    assert exc_info.value.retry_after > 0
+    load_shedder.start_request("CMDSendMessage")
+    assert load_shedder.in_flight == 2
+
+    load_shedder.finish_request()
+    load_shedder.finish_request()
+    load_shedder.start_request("CMDSearchMessages")
+    assert load_shedder.shed_requests == 1
+
+
+def test_queue_depth_watermark():
+    """
+    Sheddable requests are rejected while the queue depth is above the watermark.
+    """
+    queue_depth: int | None = 10
+    load_shedder = LoadShedder(max_queue_depth=10, queue_depth=lambda: queue_depth)
+
+    with pytest.raises(ServerOverloaded):
+        load_shedder.start_request("CMDGetMessages")
+
+    queue_depth = 9
+    load_shedder.start_request("CMDGetMessages")
+
+    # Queue depth isn't tracked by the broker
+    queue_depth = None
+    load_shedder.start_request("CMDGetMessages")
+    assert load_shedder.in_flight == 2
@@ -0,0 +1,91 @@
+import pytest
+
+from backend.services.metrics.metrics import MetricsRegistry, timed_methods
+
+
+def test_histogram_render():
+    """
+    Histogram is rendered with cumulative buckets, sum and count per label values.
+    """
+    registry = MetricsRegistry()
+    histogram = registry.histogram(
+        "request_seconds", "Request time", labelnames=("type",), buckets=(0.1, 1.0)
+    )
+    histogram.observe(0.05, ("a",))
+    histogram.observe(0.5, ("a",))
+    histogram.observe(5, ("a",))
+    histogram.observe(0.1, ('b"',))
+
+    assert registry.render().splitlines() == [
+        "# HELP request_seconds Request time",
+        "# TYPE request_seconds histogram",
+        'request_seconds_bucket{type="a",le="0.1"} 1',
+        'request_seconds_bucket{type="a",le="1.0"} 2',
+        'request_seconds_bucket{type="a",le="+Inf"} 3',
+        'request_seconds_sum{type="a"} 5.55',
+        'request_seconds_count{type="a"} 3',
+        'request_seconds_bucket{type="b\\"",le="0.1"} 1',
+        'request_seconds_bucket{type="b\\"",le="1.0"} 1',
+        'request_seconds_bucket{type="b\\"",le="+Inf"} 1',
+        'request_seconds_sum{type="b\\""} 0.1',
+        'request_seconds_count{type="b\\""} 1',
+    ]
+    assert histogram.count(("a",)) == 3
+
+
+def test_collector_render():
+    """
+    Collectors' values are read on rendering. Unknown values (None) are skipped.
+    """
+    registry = MetricsRegistry()
+    value = 1
+    registry.collector("sessions", "Sessions", "gauge", lambda: value)
+    registry.collector(
+        "throttled_total",
+        "Throttled",
+        "counter",
+        lambda: {("b",): 2, ("a",): 1},
+        labelnames=("type",),
+    )
+    registry.collector("unknown", "Unknown", "gauge", lambda: None)
+    value = 3
+
+    assert registry.render().splitlines() == [
+        "# HELP sessions Sessions",
+        "# TYPE sessions gauge",
+        "sessions 3",
+        "# HELP throttled_total Throttled",
+        "# TYPE throttled_total counter",
+        'throttled_total{type="a"} 1',
+        'throttled_total{type="b"} 2',
+    ]
+
+
+def test_duplicated_name():
+    registry = MetricsRegistry()
+    registry.collector("sessions", "Sessions", "gauge", lambda: 1)
+    with pytest.raises(ValueError):
+        registry.histogram("sessions", "Sessions")
+
+
+async def test_timed_methods():
+    """
+    timed_methods() observes execution time of the methods, including failed calls.
+    """
+    histogram = MetricsRegistry().histogram("t", "T", labelnames=("method",))
+
+    @timed_methods(histogram, ["get", "fail"])
+    class Repo:
+        async def get(self, value: int) -> int:
+            return value
+
+        async def fail(self):
+            raise ValueError()
+
+    repo = Repo()
+    assert await repo.get(value=5) == 5
+    with pytest.raises(ValueError):
+        await repo.fail()
+
+    assert histogram.count(("get",)) == 1
+    assert histogram.count(("fail",)) == 1
@@ -0,0 +1,94 @@
+import uuid
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+
+from backend.migrations.binary_uuid import (
+    get_binary_uuid_columns,
+    migrate_uuid_columns_to_binary,
+)
+from backend.models.chat import Chat
+from backend.models.user import User
+from backend.models.user_chat_link import UserChatLink
+
+
+async def test_uuid_stored_as_16_bytes(async_session: AsyncSession):
+    """
+    UUID values are stored as 16-byte blobs and loaded back as uuid.UUID.
+    """
+    user_id = uuid.uuid4()
+    async_session.add(User(id=user_id, name="user"))
+    await async_session.commit()
+    async_session.expunge_all()
+
+    connection = await async_session.connection()
+    res = await connection.exec_driver_sql("SELECT id, typeof(id) FROM users")
+    assert res.one() == (user_id.bytes, "blob")
+    user = await async_session.get(User, user_id)
+    assert user is not None
+    assert user.id == user_id
+
+
+async def test_all_uuid_columns_are_binary():
+    columns = set(get_binary_uuid_columns())
+    assert {
+        ("users", "id"),
+        ("chats", "id"),
+        ("chats", "owner_id"),
+        ("user_chat_link", "user_id"),
+        ("user_chat_link", "chat_id"),
+        ("user_chat_state", "user_id"),
+        ("user_chat_state", "chat_id"),
+        ("chat_messages", "chat_id"),
+        ("chat_user_messages", "sender_id"),
+    } <= columns
+
+
+async def test_migrate_uuid_columns_to_binary(
+    engine: AsyncEngine, async_session: AsyncSession
+):
+    """
+    Migration converts UUIDs stored as hex strings into binary, so they can be read
+    by the models. Values that are already binary are left as is.
+    Running migration again doesn't change anything.
+    """
+    user_id = uuid.uuid4()
+    chat_id = uuid.uuid4()
+    binary_user_id = uuid.uuid4()
+    async_session.add(User(id=binary_user_id, name="binary user"))
+    await async_session.commit()
+    async with engine.begin() as conn:
+        await conn.exec_driver_sql(
+            "INSERT INTO users (id, name, hashed_password, scope) "
+            "VALUES (?, 'user', '', '')",
+            (user_id.hex,),
+        )
+        await conn.exec_driver_sql(
+            "INSERT INTO chats (id, title, owner_id) VALUES (?, 'chat', ?)",
+            (chat_id.hex, user_id.hex),
+        )
+        await conn.exec_driver_sql(
+            "INSERT INTO user_chat_link (user_id, chat_id) VALUES (?, ?)",
+            (user_id.hex, chat_id.hex),
+        )
+
+    async with engine.begin() as conn:
+        converted = await migrate_uuid_columns_to_binary(conn, batch_size=2)
+    async with engine.begin() as conn:
+        converted_again = await migrate_uuid_columns_to_binary(conn)
+
+    assert converted == 5
+    assert converted_again == 0
+    async_session.expunge_all()
+    chat = await async_session.get(Chat, chat_id)
+    assert chat is not None
+    assert chat.owner_id == user_id
+    link = await async_session.scalar(
+        select(UserChatLink).where(UserChatLink.user_id == user_id)
+    )
+    assert link is not None
+    assert link.chat_id == chat_id
+    assert {user.id for user in await async_session.scalars(select(User))} == {
+        user_id,
+        binary_user_id,
+    }
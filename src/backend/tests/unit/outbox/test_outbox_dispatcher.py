@@ -0,0 +1,249 @@
+import asyncio
+import uuid
+from unittest.mock import Mock, patch
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from backend.models.chat import Chat
+from backend.models.user import User
+from backend.models.user_chat_link import UserChatLink
+from backend.schemas.chat_message import ChatUserMessageCreateSchema
+from backend.schemas.event import ChatMessageEvent
+from backend.services.chat_manager.chat_manager import ChatManager
+from backend.services.chat_manager.utils import channel_code
+from backend.services.chat_repo.chat_repo_exc import ChatRepoDatabaseError
+from backend.services.chat_repo.sqla_chat_repo import SQLAlchemyChatRepo
+from backend.services.event_broker.event_broker_exc import EventBrokerFail
+from backend.services.event_broker.in_memory_event_broker import InMemoryEventBroker
+from backend.services.outbox.outbox_dispatcher import OutboxDispatcher
+from backend.services.uow.sqla_uow import SQLAlchemyUnitOfWork
+
+
+@pytest.fixture()
+def outbox_dispatcher(async_session_maker: async_sessionmaker):
+    return OutboxDispatcher(
+        uow=SQLAlchemyUnitOfWork(async_session_maker),
+        event_broker=InMemoryEventBroker(),
+        batch_size=2,
+        poll_interval=0.01,
+    )
+
+
+async def _create_chat(
+    async_session: AsyncSession, chat_manager: ChatManager, user_id: uuid.UUID
+) -> uuid.UUID:
+    chat_id = uuid.uuid4()
+    async_session.add_all(
+        (
+            User(id=user_id, name="user"),
+            Chat(id=chat_id, title="chat", owner_id=user_id),
+            UserChatLink(user_id=user_id, chat_id=chat_id),
+        )
+    )
+    await async_session.commit()
+    await chat_manager.subscribe_for_updates(current_user_id=user_id)
+    return chat_id
+
+
+async def _outbox_size(async_session_maker: async_sessionmaker) -> int:
+    uow = SQLAlchemyUnitOfWork(async_session_maker)
+    async with uow:
+        return len(await uow.chat_repo.get_outbox_events(limit=100))
+
+
+async def _send_messages(
+    chat_manager: ChatManager, user_id: uuid.UUID, chat_id: uuid.UUID, count: int
+):
+    for i in range(count):
+        await chat_manager.send_message(
+            current_user_id=user_id,
+            message=ChatUserMessageCreateSchema(
+                chat_id=chat_id, text=f"message {i}", sender_id=user_id
+            ),
+        )
+
+
+async def test_chat_manager__events_written_to_outbox(
+    async_session: AsyncSession,
+    async_session_maker: async_sessionmaker,
+    chat_manager: ChatManager,
+    outbox_dispatcher: OutboxDispatcher,
+    event_broker_user_id_list: list[uuid.UUID],
+):
+    """
+    With outbox enabled, ChatManager writes events to the outbox instead of posting
+    them to the Event broker. Dispatcher posts them in batches, preserving the order.
+    """
+    user_id = event_broker_user_id_list[0]
+    chat_id = await _create_chat(async_session, chat_manager, user_id)
+    chat_manager.outbox_dispatcher = outbox_dispatcher
+
+    with (
+        patch.object(InMemoryEventBroker, "post_event") as post_event_patched,
+        patch.object(InMemoryEventBroker, "post_events") as post_events_patched,
+    ):
+        await _send_messages(chat_manager, user_id, chat_id, count=3)
+        post_event_patched.assert_not_called()
+        post_events_patched.assert_not_called()
+    assert await _outbox_size(async_session_maker) == 3
+
+    assert await outbox_dispatcher.dispatch_batch() == 2
+    assert await outbox_dispatcher.dispatch_batch() == 1
+    assert await outbox_dispatcher.dispatch_batch() == 0
+    assert await _outbox_size(async_session_maker) == 0
+    events = await chat_manager.get_events(current_user_id=user_id)
+    assert [
+        event.message.text for event in events if isinstance(event, ChatMessageEvent)
+    ] == [f"message {i}" for i in range(3)]
+    assert (outbox_dispatcher.dispatched, outbox_dispatcher.batches) == (3, 2)
+
+
+async def test_dispatch_batch__event_broker_failure(
+    async_session_maker: async_sessionmaker, outbox_dispatcher: OutboxDispatcher
+):
+    """
+    If events can't be posted to the Event broker, they are kept in the outbox.
+    """
+    uow = SQLAlchemyUnitOfWork(async_session_maker)
+    async with uow:
+        await uow.chat_repo.add_outbox_events(
+            [(channel_code("chat", uuid.uuid4()), "")]
+        )
+        await uow.commit()
+
+    with patch.object(
+        InMemoryEventBroker, "_post_events_str", new=Mock(side_effect=EventBrokerFail())
+    ):
+        with pytest.raises(EventBrokerFail):
+            await outbox_dispatcher.dispatch_batch()
+    assert await _outbox_size(async_session_maker) == 1
+
+
+async def test_dispatch_batch__no_transaction_while_posting(
+    async_session_maker: async_sessionmaker, outbox_dispatcher: OutboxDispatcher
+):
+    """
+    Events are posted after the transaction that read them is closed.
+    """
+    uow = SQLAlchemyUnitOfWork(async_session_maker)
+    async with uow:
+        await uow.chat_repo.add_outbox_events(
+            [(channel_code("chat", uuid.uuid4()), "")]
+        )
+        await uow.commit()
+
+    async def post_events_str(events: list[tuple[str, str]]):
+        assert outbox_dispatcher.uow._session is None  # type: ignore[attr-defined]
+
+    with patch.object(
+        outbox_dispatcher.event_broker, "post_events_str", new=post_events_str
+    ):
+        assert await outbox_dispatcher.dispatch_batch() == 1
+    assert await _outbox_size(async_session_maker) == 0
+
+
+async def test_dispatch_batch__delete_failure(
+    async_session_maker: async_sessionmaker, outbox_dispatcher: OutboxDispatcher
+):
+    """
+    If posted events can't be deleted from the outbox, they are posted again by
+    the next batch (at-least-once delivery).
+    """
+    uow = SQLAlchemyUnitOfWork(async_session_maker)
+    async with uow:
+        await uow.chat_repo.add_outbox_events(
+            [(channel_code("chat", uuid.uuid4()), "")]
+        )
+        await uow.commit()
+
+    with (
+        patch.object(outbox_dispatcher.event_broker, "post_events_str") as post_patched,
+        patch.object(
+            SQLAlchemyChatRepo,
+            "delete_outbox_events",
+            new=Mock(side_effect=ChatRepoDatabaseError()),
+        ),
+    ):
+        with pytest.raises(ChatRepoDatabaseError):
+            await outbox_dispatcher.dispatch_batch()
+    assert post_patched.await_count == 1
+    assert await _outbox_size(async_session_maker) == 1
+
+    with patch.object(
+        outbox_dispatcher.event_broker, "post_events_str"
+    ) as post_patched:
+        assert await outbox_dispatcher.dispatch_batch() == 1
+    assert post_patched.await_count == 1
+    assert await _outbox_size(async_session_maker) == 0
+
+
+async def test_dispatch_batch__lease(async_session_maker: async_sessionmaker):
+    """
+    Only the dispatcher that holds the outbox lease drains the outbox. The lease is
+    taken over by another dispatcher when it expires.
+    """
+    now = 1000.0
+    dispatchers = [
+        OutboxDispatcher(
+            uow=SQLAlchemyUnitOfWork(async_session_maker),
+            event_broker=InMemoryEventBroker(),
+            batch_size=1,
+            lease_ttl=10.0,
+            timer=lambda: now,
+        )
+        for _ in range(2)
+    ]
+
+    async def add_event():
+        uow = SQLAlchemyUnitOfWork(async_session_maker)
+        async with uow:
+            await uow.chat_repo.add_outbox_events(
+                [(channel_code("chat", uuid.uuid4()), "")]
+            )
+            await uow.commit()
+
+    with patch.object(InMemoryEventBroker, "post_events_str") as post_patched:
+        await add_event()
+        assert await dispatchers[0].dispatch_batch() == 1
+        await add_event()
+        assert await dispatchers[1].dispatch_batch() == 0
+        now += 5.0
+        assert await dispatchers[1].dispatch_batch() == 0
+        assert await dispatchers[0].dispatch_batch() == 1  # Lease prolonged
+
+        await add_event()
+        now += 10.0
+        assert await dispatchers[1].dispatch_batch() == 0  # Not expired yet
+        now += 0.1
+        assert await dispatchers[1].dispatch_batch() == 1
+        assert await dispatchers[0].dispatch_batch() == 0
+    assert post_patched.await_count == 3
+
+
+async def test_run__wake(
+    async_session: AsyncSession,
+    async_session_maker: async_sessionmaker,
+    chat_manager: ChatManager,
+    outbox_dispatcher: OutboxDispatcher,
+    event_broker_user_id_list: list[uuid.UUID],
+):
+    """
+    Running dispatcher drains the outbox in the background.
+    """
+    user_id = event_broker_user_id_list[0]
+    chat_id = await _create_chat(async_session, chat_manager, user_id)
+    chat_manager.outbox_dispatcher = outbox_dispatcher
+    await _send_messages(chat_manager, user_id, chat_id, count=3)
+    outbox_dispatcher.start()
+    try:
+        for _ in range(100):
+            if outbox_dispatcher.dispatched == 3:
+                break
+            await asyncio.sleep(0.01)
+    finally:
+        await outbox_dispatcher.stop()
+
+    events = await chat_manager.get_events(current_user_id=user_id)
+    assert len(events) == 3
+    assert not outbox_dispatcher.is_running
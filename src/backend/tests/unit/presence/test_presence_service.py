@@ -0,0 +1,276 @@
+import asyncio
+import uuid
+from contextlib import AsyncExitStack
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from backend.models.chat import Chat
+from backend.models.user import User
+from backend.models.user_chat_link import UserChatLink
+from backend.schemas.event import UserPresenceUpdate
+from backend.services.chat_manager.chat_manager import ChatManager
+from backend.services.chat_manager.utils import channel_code
+from backend.services.event_broker.in_memory_event_broker import InMemoryEventBroker
+from backend.services.presence.presence_service import PresenceService
+from backend.services.uow.sqla_uow import SQLAlchemyUnitOfWork
+
+
+class FakeTimer:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture()
+def event_broker():
+    return InMemoryEventBroker()
+
+
+@pytest.fixture()
+def timer():
+    return FakeTimer()
+
+
+@pytest.fixture()
+def presence_service(
+    async_session_maker: async_sessionmaker,
+    event_broker: InMemoryEventBroker,
+    timer: FakeTimer,
+):
+    return PresenceService(
+        uow=SQLAlchemyUnitOfWork(async_session_maker),
+        event_broker=event_broker,
+        debounce=0.01,
+        heartbeat_timeout=60,
+        timer=timer,
+    )
+
+
+@pytest.fixture()
+async def user_ids(async_session: AsyncSession) -> list[uuid.UUID]:
+    """
+    user_0 has mutual chats with user_1 (chat_1) and user_2 (chat_2).
+    user_3 has no mutual chats with others.
+    """
+    user_ids = [uuid.uuid4() for _ in range(4)]
+    chat_ids = [uuid.uuid4() for _ in range(3)]
+    async_session.add_all([User(id=id, name=f"user {id}") for id in user_ids])
+    async_session.add_all(
+        [Chat(id=id, title="chat", owner_id=user_ids[0]) for id in chat_ids]
+    )
+    for user_id, chat_id in (
+        (user_ids[0], chat_ids[0]),
+        (user_ids[1], chat_ids[0]),
+        (user_ids[0], chat_ids[1]),
+        (user_ids[2], chat_ids[1]),
+        (user_ids[3], chat_ids[2]),
+    ):
+        async_session.add(UserChatLink(user_id=user_id, chat_id=chat_id))
+    await async_session.commit()
+    return user_ids
+
+
+async def _listen(
+    stack: AsyncExitStack, event_broker: InMemoryEventBroker, user_ids: list[uuid.UUID]
+):
+    for user_id in user_ids:
+        await stack.enter_async_context(event_broker.session(user_id))
+        await event_broker.subscribe(channel_code("user", user_id), user_id)
+
+
+async def _presence_events(
+    event_broker: InMemoryEventBroker, user_id: uuid.UUID
+) -> list[UserPresenceUpdate]:
+    events = await event_broker.get_events(user_id)
+    await event_broker.acknowledge_events(user_id)
+    return [event for event in events if isinstance(event, UserPresenceUpdate)]
+
+
+async def test_publish_changes__first_circle_only(
+    presence_service: PresenceService,
+    event_broker: InMemoryEventBroker,
+    user_ids: list[uuid.UUID],
+):
+    """
+    Status changes are published to the first circle of the user only, each
+    recipient receives one event with all changes.
+    """
+    async with AsyncExitStack() as stack:
+        await _listen(stack, event_broker, user_ids)
+        await stack.enter_async_context(presence_service.session(user_ids[0]))
+        await stack.enter_async_context(presence_service.session(user_ids[1]))
+
+        assert await presence_service.publish_changes() == 2
+
+        assert await presence_service.is_online(user_ids[0])
+        events_0 = await _presence_events(event_broker, user_ids[0])
+        assert [(e.online, e.offline) for e in events_0] == [([user_ids[1]], [])]
+        events_1 = await _presence_events(event_broker, user_ids[1])
+        assert [(e.online, e.offline) for e in events_1] == [([user_ids[0]], [])]
+        events_2 = await _presence_events(event_broker, user_ids[2])
+        assert [(e.online, e.offline) for e in events_2] == [([user_ids[0]], [])]
+        assert await _presence_events(event_broker, user_ids[3]) == []
+
+    # Sessions are closed
+    async with AsyncExitStack() as stack:
+        await _listen(stack, event_broker, [user_ids[2]])
+        assert await presence_service.publish_changes() == 2
+        events_2 = await _presence_events(event_broker, user_ids[2])
+        assert [(e.online, e.offline) for e in events_2] == [([], [user_ids[0]])]
+    assert not await presence_service.is_online(user_ids[0])
+
+
+async def test_publish_changes__only_transitions(
+    presence_service: PresenceService,
+    event_broker: InMemoryEventBroker,
+    user_ids: list[uuid.UUID],
+):
+    """
+    Reconnection and additional sessions between publications don't produce events.
+    """
+    async with AsyncExitStack() as stack:
+        await _listen(stack, event_broker, [user_ids[1]])
+        async with presence_service.session(user_ids[0]):
+            await presence_service.publish_changes()
+            await _presence_events(event_broker, user_ids[1])
+        async with presence_service.session(user_ids[0]):
+            async with presence_service.session(user_ids[0]):
+                assert await presence_service.publish_changes() == 0
+        async with presence_service.session(user_ids[0]):
+            assert await presence_service.publish_changes() == 0
+            assert await _presence_events(event_broker, user_ids[1]) == []
+
+
+async def test_heartbeat_timeout(
+    presence_service: PresenceService,
+    event_broker: InMemoryEventBroker,
+    timer: FakeTimer,
+    user_ids: list[uuid.UUID],
+):
+    """
+    User goes offline if there were no heartbeats within the timeout and goes online
+    again on the next heartbeat.
+    """
+    async with presence_service.session(user_ids[0]):
+        await presence_service.publish_changes()
+        timer.now += 30
+        presence_service.heartbeat(user_ids[0])
+        timer.now += 59
+        await presence_service.publish_changes()
+        assert await presence_service.is_online(user_ids[0])
+
+        timer.now += 2
+        assert await presence_service.publish_changes() == 1
+        assert not await presence_service.is_online(user_ids[0])
+
+        presence_service.heartbeat(user_ids[0])
+        assert await presence_service.publish_changes() == 1
+        assert await presence_service.is_online(user_ids[0])
+
+
+async def test_background_publishing(
+    presence_service: PresenceService,
+    event_broker: InMemoryEventBroker,
+    user_ids: list[uuid.UUID],
+):
+    """
+    Running service publishes changes after debounce delay, the rest is published
+    on stop.
+    """
+    async with AsyncExitStack() as stack:
+        await _listen(stack, event_broker, [user_ids[1]])
+        presence_service.start()
+        try:
+            async with presence_service.session(user_ids[0]):
+                await asyncio.sleep(0.1)
+        finally:
+            await presence_service.stop()
+        # Online and offline events for user_1 and user_2
+        assert presence_service.published_events == 4
+        events = await _presence_events(event_broker, user_ids[1])
+        assert [(e.online, e.offline) for e in events] == [
+            ([user_ids[0]], []),
+            ([], [user_ids[0]]),
+        ]
+
+
+async def test_chat_manager__first_circle_presence(
+    async_session_maker: async_sessionmaker,
+    presence_service: PresenceService,
+    event_broker: InMemoryEventBroker,
+    timer: FakeTimer,
+    user_ids: list[uuid.UUID],
+):
+    """
+    Full first circle request sends the list of online first circle users.
+    ChatManager.ping() registers heartbeat.
+    """
+    chat_manager = ChatManager(
+        uow=SQLAlchemyUnitOfWork(async_session_maker),
+        event_broker=event_broker,
+        presence_service=presence_service,
+    )
+    async with AsyncExitStack() as stack:
+        await _listen(stack, event_broker, [user_ids[0]])
+        await stack.enter_async_context(presence_service.session(user_ids[1]))
+        await stack.enter_async_context(presence_service.session(user_ids[3]))
+        await presence_service.publish_changes()
+        await _presence_events(event_broker, user_ids[0])
+
+        await chat_manager.get_first_circle_user_list(user_ids[0], full=True)
+
+        events = await _presence_events(event_broker, user_ids[0])
+        assert [(e.online, e.offline) for e in events] == [([user_ids[1]], [])]
+
+        # No heartbeats from user_3 within the timeout
+        timer.now += 61
+        chat_manager.ping(user_ids[1])
+        await presence_service.publish_changes()
+        assert await presence_service.is_online(user_ids[1])
+        assert not await presence_service.is_online(user_ids[3])
+
+
+async def test_several_nodes(
+    async_session_maker: async_sessionmaker,
+    event_broker: InMemoryEventBroker,
+    timer: FakeTimer,
+    user_ids: list[uuid.UUID],
+):
+    """
+    Status is aggregated over the nodes that share the DB: user connected to two
+    nodes stays online until the sessions on both nodes are closed or expired, each
+    transition is published once.
+    """
+    node_a, node_b = (
+        PresenceService(
+            uow=SQLAlchemyUnitOfWork(async_session_maker),
+            event_broker=event_broker,
+            heartbeat_timeout=60,
+            timer=timer,
+            node_id=node_id,
+        )
+        for node_id in ("a", "b")
+    )
+    async with AsyncExitStack() as stack:
+        await _listen(stack, event_broker, [user_ids[1]])
+
+        async with node_a.session(user_ids[0]):
+            async with node_b.session(user_ids[0]):
+                assert await node_a.publish_changes() == 1
+                assert await node_b.publish_changes() == 0
+            # Session on node B is closed, user is still connected to node A
+            assert await node_b.publish_changes() == 0
+            assert await node_a.is_online(user_ids[0])
+            events = await _presence_events(event_broker, user_ids[1])
+            assert [(e.online, e.offline) for e in events] == [([user_ids[0]], [])]
+
+            # Node A doesn't send heartbeats (e.g. it has crashed): session expires,
+            # that is published by another node
+            timer.now += 61
+            assert await node_b.publish_changes() == 1
+            assert not await node_b.is_online(user_ids[0])
+            events = await _presence_events(event_broker, user_ids[1])
+            assert [(e.online, e.offline) for e in events] == [([], [user_ids[0]])]
@@ -0,0 +1,134 @@
+import uuid
+
+import pytest
+
+from backend.services.rate_limiter.rate_limiter import (
+    DEFAULT_CONNECTION_RATE_LIMITS,
+    DEFAULT_USER_RATE_LIMITS,
+    USER_BUCKETS_TTL_SEC,
+    RateLimit,
+    RateLimiter,
+    RateLimitStats,
+)
+
+
+class FakeTimer:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture()
+def timer():
+    return FakeTimer()
+
+
+@pytest.fixture()
+def rate_limiter(timer: FakeTimer):
+    return RateLimiter(
+        connection_limits={"CMDGetMessages": RateLimit(rate=1, burst=2)},
+        user_limits={
+            "CMDGetMessages": RateLimit(rate=2, burst=3),
+            "CMDSearchMessages": RateLimit(rate=0.5, burst=1),
+        },
+        timer=timer,
+    )
+
+
+def test_connection_limit(rate_limiter: RateLimiter, timer: FakeTimer):
+    """
+    Burst is admitted, then packets are admitted at the configured rate.
+    Throttled packets don't take tokens.
+    """
+    session = rate_limiter.session(uuid.uuid4())
+
+    assert session.acquire("CMDGetMessages") == 0
+    assert session.acquire("CMDGetMessages") == 0
+    assert session.acquire("CMDGetMessages") == pytest.approx(1.0)
+
+    timer.now += 0.5
+    assert session.acquire("CMDGetMessages") == pytest.approx(0.5)
+
+    timer.now += 0.5
+    assert session.acquire("CMDGetMessages") == 0
+    assert session.acquire("CMDGetMessages") > 0
+
+    assert rate_limiter.stats() == {
+        "CMDGetMessages": RateLimitStats(
+            admitted=3, throttled_connection=3, throttled_user=0
+        )
+    }
+
+
+def test_user_limit(rate_limiter: RateLimiter, timer: FakeTimer):
+    """
+    User's buckets are shared by all user's sessions, sessions of other users are
+    not affected.
+    """
+    user_id = uuid.uuid4()
+    session_1 = rate_limiter.session(user_id)
+    session_2 = rate_limiter.session(user_id)
+    other_user_session = rate_limiter.session(uuid.uuid4())
+
+    assert session_1.acquire("CMDGetMessages") == 0
+    assert session_1.acquire("CMDGetMessages") == 0
+    assert session_2.acquire("CMDGetMessages") == 0
+    assert session_2.acquire("CMDGetMessages") == pytest.approx(0.5)
+    assert other_user_session.acquire("CMDGetMessages") == 0
+
+    # Packet type that has only user limit
+    assert session_1.acquire("CMDSearchMessages") == 0
+    assert session_2.acquire("CMDSearchMessages") == pytest.approx(2.0)
+
+    stats = rate_limiter.stats()
+    assert stats["CMDGetMessages"].throttled_user == 1
+    assert stats["CMDSearchMessages"].throttled_user == 1
+
+
+def test_user_buckets_ttl_refreshed_on_access(
+    rate_limiter: RateLimiter, timer: FakeTimer
+):
+    """
+    TTL of user's buckets is counted from the last access: buckets of a user who
+    keeps sending packets are not recreated full when the TTL passes.
+    """
+    session = rate_limiter.session(uuid.uuid4())
+    assert session.acquire("CMDSearchMessages") == 0
+
+    for _ in range(2 * USER_BUCKETS_TTL_SEC):
+        timer.now += 1.0
+        session.acquire("CMDSearchMessages")
+
+    # Burst of 1 plus one token per 2 seconds
+    assert (
+        rate_limiter.stats()["CMDSearchMessages"].admitted == 1 + USER_BUCKETS_TTL_SEC
+    )
+
+
+def test_write_packet_types_limited():
+    """
+    Packet types that write to the DB are limited by default.
+    """
+    write_packet_types = {
+        "CMDSendMessage",
+        "CMDEditMessage",
+        "CMDCreateChat",
+        "CMDAddUserToChat",
+        "CMDAddUsersToChat",
+        "CMDMarkRead",
+    }
+    assert write_packet_types <= DEFAULT_CONNECTION_RATE_LIMITS.keys()
+    assert write_packet_types <= DEFAULT_USER_RATE_LIMITS.keys()
+
+
+def test_not_limited_packet_type(rate_limiter: RateLimiter):
+    """
+    Packet types without configured limits are always admitted and not counted.
+    """
+    session = rate_limiter.session(uuid.uuid4())
+
+    for _ in range(100):
+        assert session.acquire("CMDPing") == 0
+    assert rate_limiter.stats() == {}
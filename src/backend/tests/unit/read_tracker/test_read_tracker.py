@@ -0,0 +1,331 @@
+import asyncio
+import uuid
+from contextlib import AsyncExitStack
+from unittest.mock import patch
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from backend.models.chat import Chat
+from backend.models.chat_message import ChatUserMessage
+from backend.models.user import User
+from backend.models.user_chat_link import UserChatLink
+from backend.models.user_chat_state import UserChatState
+from backend.schemas.event import ReadReceiptsUpdate, UnreadCountUpdate
+from backend.services.chat_manager.chat_manager import ChatManager
+from backend.services.chat_manager.chat_manager_exc import UnauthorizedAction
+from backend.services.chat_manager.utils import channel_code
+from backend.services.event_broker.event_broker_exc import EventBrokerFail
+from backend.services.event_broker.in_memory_event_broker import InMemoryEventBroker
+from backend.services.outbox.outbox_dispatcher import OutboxDispatcher
+from backend.services.read_tracker.read_tracker import ReadTracker
+from backend.services.uow.sqla_uow import SQLAlchemyUnitOfWork
+
+
+@pytest.fixture()
+def event_broker():
+    return InMemoryEventBroker()
+
+
+@pytest.fixture()
+def read_tracker(
+    async_session_maker: async_sessionmaker, event_broker: InMemoryEventBroker
+):
+    return ReadTracker(
+        uow=SQLAlchemyUnitOfWork(async_session_maker),
+        event_broker=event_broker,
+        flush_interval=0.01,
+    )
+
+
+@pytest.fixture()
+async def ids(async_session: AsyncSession) -> dict[str, list[uuid.UUID]]:
+    """
+    user_0 and user_1 are members of chat_0 and chat_1, user_2 isn't a member of
+    any chat. The last message of each chat (sent by user_0) has id 100.
+    """
+    user_ids = [uuid.uuid4() for _ in range(3)]
+    chat_ids = [uuid.uuid4() for _ in range(2)]
+    async_session.add_all([User(id=id, name=f"user {id}") for id in user_ids])
+    async_session.add_all(
+        [Chat(id=id, title="chat", owner_id=user_ids[0]) for id in chat_ids]
+    )
+    for user_id in user_ids[:2]:
+        for chat_id in chat_ids:
+            async_session.add(UserChatLink(user_id=user_id, chat_id=chat_id))
+    for index, chat_id in enumerate(chat_ids):
+        message = ChatUserMessage(chat_id=chat_id, text="text", sender_id=user_ids[0])
+        message.id = 100 + index
+        async_session.add(message)
+    await async_session.commit()
+    return dict(users=user_ids, chats=chat_ids)
+
+
+async def _listen(
+    stack: AsyncExitStack, event_broker: InMemoryEventBroker, user_id: uuid.UUID
+):
+    await stack.enter_async_context(event_broker.session(user_id))
+    await event_broker.subscribe(channel_code("user", user_id), user_id)
+
+
+async def _receipt_events(
+    event_broker: InMemoryEventBroker, user_id: uuid.UUID
+) -> list[ReadReceiptsUpdate]:
+    events = await event_broker.get_events(user_id)
+    await event_broker.acknowledge_events(user_id)
+    return [event for event in events if isinstance(event, ReadReceiptsUpdate)]
+
+
+async def _last_read(async_session: AsyncSession) -> dict[tuple, int]:
+    states = await async_session.scalars(select(UserChatState))
+    return {(state.user_id, state.chat_id): state.last_read for state in states.all()}
+
+
+async def test_flush__coalesced(
+    async_session: AsyncSession,
+    read_tracker: ReadTracker,
+    event_broker: InMemoryEventBroker,
+    ids: dict[str, list[uuid.UUID]],
+):
+    """
+    Marks are coalesced per user/chat (the greatest message id wins), written by one
+    bulk update, each affected chat receives one event with all its receipts.
+    """
+    (user_0, user_1, _), (chat_0, chat_1) = ids["users"], ids["chats"]
+    async with AsyncExitStack() as stack:
+        await _listen(stack, event_broker, user_0)
+        for chat_id in (chat_0, chat_1):
+            await event_broker.subscribe(channel_code("chat", chat_id), user_0)
+
+        read_tracker.mark_read(user_0, chat_0, 5)
+        read_tracker.mark_read(user_0, chat_0, 7)
+        read_tracker.mark_read(user_0, chat_0, 6)
+        read_tracker.mark_read(user_1, chat_0, 3)
+        read_tracker.mark_read(user_1, chat_1, 4)
+
+        assert await read_tracker.flush() == 3
+        assert await read_tracker.flush() == 0
+
+        events = await _receipt_events(event_broker, user_0)
+        receipts = {
+            event.chat_id: {(r.user_id, r.last_read) for r in event.receipts}
+            for event in events
+        }
+        assert len(events) == 2
+        assert receipts == {chat_0: {(user_0, 7), (user_1, 3)}, chat_1: {(user_1, 4)}}
+
+    assert await _last_read(async_session) == {
+        (user_0, chat_0): 7,
+        (user_1, chat_0): 3,
+        (user_1, chat_1): 4,
+    }
+    assert (read_tracker.marks, read_tracker.flushed) == (5, 3)
+
+
+async def test_flush__failed(
+    async_session: AsyncSession,
+    read_tracker: ReadTracker,
+    ids: dict[str, list[uuid.UUID]],
+):
+    """
+    If writing fails, marks are kept and written with the next flush.
+    """
+    (user_0, _, _), (chat_0, _) = ids["users"], ids["chats"]
+    read_tracker.mark_read(user_0, chat_0, 5)
+
+    with patch.object(read_tracker.uow, "commit", side_effect=RuntimeError):
+        with pytest.raises(RuntimeError):
+            await read_tracker.flush()
+
+    read_tracker.mark_read(user_0, chat_0, 4)
+    assert await read_tracker.flush() == 1
+    assert await _last_read(async_session) == {(user_0, chat_0): 5}
+
+
+async def test_flush__posting_failed(
+    async_session: AsyncSession,
+    read_tracker: ReadTracker,
+    event_broker: InMemoryEventBroker,
+    ids: dict[str, list[uuid.UUID]],
+):
+    """
+    If posting fails, marks stay written and their events are posted with the next
+    flush (before the events of new marks).
+    """
+    (user_0, user_1, _), (chat_0, chat_1) = ids["users"], ids["chats"]
+    async with AsyncExitStack() as stack:
+        await _listen(stack, event_broker, user_0)
+        for chat_id in (chat_0, chat_1):
+            await event_broker.subscribe(channel_code("chat", chat_id), user_0)
+
+        read_tracker.mark_read(user_1, chat_0, 5)
+        with patch.object(event_broker, "post_events", side_effect=EventBrokerFail):
+            with pytest.raises(EventBrokerFail):
+                await read_tracker.flush()
+        assert await _last_read(async_session) == {(user_1, chat_0): 5}
+        assert await _receipt_events(event_broker, user_0) == []
+
+        # Nothing new to write, kept events are posted
+        assert await read_tracker.flush() == 0
+        events = await _receipt_events(event_broker, user_0)
+        assert [(e.chat_id, e.receipts[0].last_read) for e in events] == [(chat_0, 5)]
+
+        read_tracker.mark_read(user_1, chat_0, 6)
+        with patch.object(event_broker, "post_events", side_effect=EventBrokerFail):
+            with pytest.raises(EventBrokerFail):
+                await read_tracker.flush()
+        read_tracker.mark_read(user_1, chat_1, 7)
+        assert await read_tracker.flush() == 1
+        events = await _receipt_events(event_broker, user_0)
+        assert [(e.chat_id, e.receipts[0].last_read) for e in events] == [
+            (chat_0, 6),
+            (chat_1, 7),
+        ]
+
+
+async def test_flush__outbox(
+    async_session_maker: async_sessionmaker,
+    event_broker: InMemoryEventBroker,
+    ids: dict[str, list[uuid.UUID]],
+):
+    """
+    With outbox, events are written in the same transaction as marks and posted by
+    the dispatcher.
+    """
+    (user_0, user_1, _), (chat_0, _) = ids["users"], ids["chats"]
+    outbox_dispatcher = OutboxDispatcher(
+        uow=SQLAlchemyUnitOfWork(async_session_maker), event_broker=event_broker
+    )
+    read_tracker = ReadTracker(
+        uow=SQLAlchemyUnitOfWork(async_session_maker),
+        event_broker=event_broker,
+        outbox_dispatcher=outbox_dispatcher,
+    )
+    async with AsyncExitStack() as stack:
+        await _listen(stack, event_broker, user_0)
+        await event_broker.subscribe(channel_code("chat", chat_0), user_0)
+
+        read_tracker.mark_read(user_1, chat_0, 5)
+        with patch.object(event_broker, "post_events", side_effect=EventBrokerFail):
+            assert await read_tracker.flush() == 1
+        assert await _receipt_events(event_broker, user_0) == []
+
+        # Receipt to the chat and unread counter to the reader
+        assert await outbox_dispatcher.dispatch_batch() == 2
+        events = await _receipt_events(event_broker, user_0)
+        assert [(e.chat_id, e.receipts[0].last_read) for e in events] == [(chat_0, 5)]
+
+
+async def test_background_flushing(
+    async_session: AsyncSession,
+    read_tracker: ReadTracker,
+    ids: dict[str, list[uuid.UUID]],
+):
+    """
+    Running tracker flushes marks in the background, the rest is flushed on stop.
+    """
+    (user_0, user_1, _), (chat_0, _) = ids["users"], ids["chats"]
+    read_tracker.start()
+    try:
+        read_tracker.mark_read(user_0, chat_0, 5)
+        await asyncio.sleep(0.05)
+        assert read_tracker.flushed == 1
+        read_tracker.mark_read(user_1, chat_0, 6)
+    finally:
+        await read_tracker.stop()
+    assert read_tracker.flushed == 2
+    assert await _last_read(async_session) == {(user_0, chat_0): 5, (user_1, chat_0): 6}
+
+
+async def test_chat_manager_mark_read__direct(
+    async_session: AsyncSession,
+    async_session_maker: async_sessionmaker,
+    event_broker: InMemoryEventBroker,
+    ids: dict[str, list[uuid.UUID]],
+):
+    """
+    Without ReadTracker mark_read() writes the mark immediately, sends receipt to
+    the chat and the new unread messages counter to the user.
+    """
+    (user_0, user_1, _), (chat_0, _) = ids["users"], ids["chats"]
+    chat_manager = ChatManager(
+        uow=SQLAlchemyUnitOfWork(async_session_maker), event_broker=event_broker
+    )
+    async with AsyncExitStack() as stack:
+        await _listen(stack, event_broker, user_1)
+        await event_broker.subscribe(channel_code("chat", chat_0), user_1)
+
+        await _listen(stack, event_broker, user_0)
+
+        await chat_manager.mark_read(user_0, chat_0, 9)
+
+        events = await _receipt_events(event_broker, user_1)
+        assert [(e.chat_id, e.receipts[0].user_id) for e in events] == [
+            (chat_0, user_0)
+        ]
+        user_events = await event_broker.get_events(user_0)
+        assert [
+            (e.chat_id, e.unread_count)
+            for e in user_events
+            if isinstance(e, UnreadCountUpdate)
+        ] == [(chat_0, 0)]
+    assert await _last_read(async_session) == {(user_0, chat_0): 9}
+
+
+async def test_chat_manager_mark_read__buffered(
+    async_session_maker: async_sessionmaker,
+    read_tracker: ReadTracker,
+    event_broker: InMemoryEventBroker,
+    ids: dict[str, list[uuid.UUID]],
+):
+    """
+    With ReadTracker mark_read() only buffers the mark.
+    Non-members can't mark messages as read.
+    """
+    (user_0, _, user_2), (chat_0, _) = ids["users"], ids["chats"]
+    chat_manager = ChatManager(
+        uow=SQLAlchemyUnitOfWork(async_session_maker),
+        event_broker=event_broker,
+        read_tracker=read_tracker,
+    )
+
+    with patch.object(read_tracker, "mark_read") as patched:
+        await chat_manager.mark_read(user_0, chat_0, 9)
+        patched.assert_called_once_with(user_0, chat_0, 9)
+
+        with pytest.raises(UnauthorizedAction):
+            await chat_manager.mark_read(user_2, chat_0, 9)
+        assert patched.call_count == 1
+
+
+@pytest.mark.parametrize("buffered", (False, True))
+async def test_mark_read__message_id_out_of_range(
+    async_session: AsyncSession,
+    async_session_maker: async_sessionmaker,
+    read_tracker: ReadTracker,
+    event_broker: InMemoryEventBroker,
+    ids: dict[str, list[uuid.UUID]],
+    buffered: bool,
+):
+    """
+    Message id greater than the id of the last message of the chat is clamped, so
+    it doesn't pin last_read and the receipt carries the clamped value.
+    """
+    (user_0, user_1, _), (chat_0, _) = ids["users"], ids["chats"]
+    chat_manager = ChatManager(
+        uow=SQLAlchemyUnitOfWork(async_session_maker),
+        event_broker=event_broker,
+        read_tracker=read_tracker if buffered else None,
+    )
+    async with AsyncExitStack() as stack:
+        await _listen(stack, event_broker, user_0)
+        await event_broker.subscribe(channel_code("chat", chat_0), user_0)
+
+        await chat_manager.mark_read(user_1, chat_0, 2**53)
+        if buffered:
+            await read_tracker.flush()
+
+        events = await _receipt_events(event_broker, user_0)
+        assert [(r.user_id, r.last_read) for r in events[0].receipts] == [(user_1, 100)]
+    assert await _last_read(async_session) == {(user_1, chat_0): 100}
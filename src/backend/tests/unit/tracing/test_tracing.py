@@ -0,0 +1,175 @@
+import uuid
+from unittest.mock import AsyncMock, Mock
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.models.chat import Chat
+from backend.models.user_chat_link import UserChatLink
+from backend.schemas import client_packet as cli_p
+from backend.schemas.chat_message import ChatUserMessageCreateSchema
+from backend.schemas.event import ChatMessageEvent
+from backend.services.chat_manager.chat_manager import ChatManager
+from backend.services.chat_manager.utils import channel_code
+from backend.services.event_broker.in_memory_event_broker import InMemoryEventBroker
+from backend.services.tracing.tracing import (
+    InMemorySpanExporter,
+    Tracer,
+    traced_methods,
+    tracer,
+)
+from backend.services.ws_chat_server import process_ws_client_packets
+from backend.tests.unit.event_broker.helpers import create_chat_event
+
+
+@pytest.fixture()
+def exporter():
+    exporter = InMemorySpanExporter()
+    tracer.set_exporter(exporter)
+    yield exporter
+    tracer.set_exporter(None)
+
+
+def test_nested_spans():
+    """
+    Nested spans share the trace id and are linked to their parents. Exception is
+    recorded in the span.
+    """
+    exporter = InMemorySpanExporter()
+    local_tracer = Tracer(exporter)
+
+    with local_tracer.span("root", user="a") as root:
+        assert root is not None
+        assert local_tracer.current_context() == root.context
+        with pytest.raises(ValueError):
+            with local_tracer.span("child"):
+                raise ValueError("boom")
+    assert local_tracer.current_span() is None
+
+    child, root = exporter.spans
+    assert (root.name, root.parent_id, root.attributes) == ("root", None, {"user": "a"})
+    assert child.name == "child"
+    assert child.trace_id == root.trace_id
+    assert child.parent_id == root.span_id
+    assert child.error == "ValueError('boom')"
+    assert root.error is None
+    assert (root.duration is not None) and (child.duration is not None)
+    assert root.duration >= child.duration
+
+
+def test_parent_context_from_another_process():
+    exporter = InMemorySpanExporter()
+    local_tracer = Tracer(exporter)
+
+    local_tracer.record_span(
+        "remote_child", start_time=1.0, end_time=3.0, parent_context="abc-def"
+    )
+
+    (span,) = exporter.spans
+    assert (span.trace_id, span.parent_id, span.duration) == ("abc", "def", 2.0)
+
+
+def test_tracing_disabled():
+    local_tracer = Tracer()
+
+    with local_tracer.span("root") as span:
+        assert span is None
+        assert local_tracer.current_context() is None
+
+
+async def test_traced_methods_only_inside_span(exporter: InMemorySpanExporter):
+    """
+    Traced methods start child spans only if they are called inside another span.
+    """
+
+    @traced_methods("svc.")
+    class Service:
+        async def run(self) -> int:
+            return 1
+
+        async def _private(self) -> int:
+            return 2
+
+    service = Service()
+    assert await service.run() == 1
+    assert exporter.spans == []
+
+    with tracer.span("root"):
+        assert await service.run() == 1
+        assert await service._private() == 2
+
+    run, root = exporter.spans
+    assert run.name == "svc.run"
+    assert run.parent_id == root.span_id
+
+
+async def test_trace_context_is_propagated_in_event_envelope(
+    exporter: InMemorySpanExporter,
+):
+    """
+    Delivery of the event is recorded as a child of the span the event was posted in.
+    """
+    event_broker = InMemoryEventBroker()
+    user_id = uuid.uuid4()
+    channel = channel_code("chat", uuid.uuid4())
+
+    async with event_broker.session(user_id):
+        await event_broker.subscribe(channel=channel, user_id=user_id)
+        with tracer.span("root"):
+            await event_broker.post_event(
+                channel=channel, event=create_chat_event(ChatMessageEvent)
+            )
+        events = await event_broker.get_events(user_id)
+
+    assert len(events) == 1
+    (post,) = exporter.get_spans("event_broker.post_event")
+    (deliver,) = exporter.get_spans("event_broker.deliver")
+    assert deliver.trace_id == post.trace_id
+    assert deliver.parent_id == post.span_id
+
+
+async def test_client_packet_span(
+    exporter: InMemorySpanExporter,
+    chat_manager: ChatManager,
+    async_session: AsyncSession,
+    event_broker_user_id_list: list[uuid.UUID],
+):
+    """
+    Client packet is processed in the root span, calls of ChatManager, repository,
+    UoW and event broker are traced as its descendants.
+    """
+    user_id = event_broker_user_id_list[0]
+    chat_id = uuid.uuid4()
+    async_session.add(Chat(id=chat_id, title="my chat", owner_id=user_id))
+    async_session.add(UserChatLink(chat_id=chat_id, user_id=user_id))
+    await async_session.commit()
+
+    message = ChatUserMessageCreateSchema(
+        chat_id=chat_id, text="my message", sender_id=user_id
+    )
+    request = cli_p.ClientPacket(id=1, data=cli_p.CMDSendMessage(message=message))
+    websocket = Mock(
+        receive_text=AsyncMock(side_effect=[request.model_dump_json(), TimeoutError]),
+        send_text=AsyncMock(),
+    )
+
+    await process_ws_client_packets(
+        chat_manager=chat_manager, current_user_id=user_id, websocket=websocket
+    )
+
+    spans = {span.span_id: span for span in exporter.spans}
+    (root,) = exporter.get_spans("ws.CMDSendMessage")
+    assert root.parent_id is None
+    assert root.attributes == {"user_id": str(user_id)}
+    (send_message,) = exporter.get_spans("chat_manager.send_message")
+    assert send_message.parent_id == root.span_id
+    for name in (
+        "chat_repo.add_message",
+        "uow.commit",
+        "event_broker.post_events",
+    ):
+        (span,) = exporter.get_spans(name)
+        assert span.trace_id == root.trace_id
+        while span.parent_id is not None:
+            span = spans[span.parent_id]
+        assert span is root
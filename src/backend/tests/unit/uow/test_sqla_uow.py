@@ -5,6 +5,8 @@ import pytest
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
 from backend.models.chat import Chat
+from backend.services.chat_repo.caching_chat_repo import CachingChatRepo, ChatRepoCache
+from backend.services.chat_repo.sqla_chat_repo import SQLAlchemyChatRepo
 from backend.services.uow.sqla_uow import SQLAlchemyUnitOfWork
 from backend.services.uow.uow_exc import UnitOfWorkException
 
@@ -50,3 +52,14 @@ class TestSQLAlchemyUOW:
             pass
         with pytest.raises(UnitOfWorkException):
             await self.uow.commit()
+
+    async def test_repo_cache(self):
+        """
+        If repo_cache is passed, chat_repo is wrapped into CachingChatRepo
+        """
+        async with self.uow:
+            assert isinstance(self.uow.chat_repo, SQLAlchemyChatRepo)
+
+        uow = SQLAlchemyUnitOfWork(self._session_maker, repo_cache=ChatRepoCache())
+        async with uow:
+            assert isinstance(uow.chat_repo, CachingChatRepo)
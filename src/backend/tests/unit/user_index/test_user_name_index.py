@@ -0,0 +1,93 @@
+import uuid
+
+import pytest
+
+from backend.schemas.user import UserSchema
+from backend.services.user_index.user_name_index import UserNameIndex
+
+
+@pytest.fixture()
+def users() -> list[UserSchema]:
+    return [
+        UserSchema(id=uuid.uuid4(), name=name)
+        for name in ("Anna", "bob", "Bobby", "Bob", "Charlie")
+    ]
+
+
+@pytest.fixture()
+def user_name_index(users: list[UserSchema]) -> UserNameIndex:
+    user_name_index = UserNameIndex()
+    user_name_index.build(users)
+    return user_name_index
+
+
+def test_is_loaded():
+    """
+    Index is considered loaded after build() is called.
+    """
+    user_name_index = UserNameIndex()
+    assert user_name_index.is_loaded is False
+    user_name_index.build([])
+    assert user_name_index.is_loaded is True
+
+
+def test_search__prefix_case_insensitive(
+    user_name_index: UserNameIndex, users: list[UserSchema]
+):
+    """
+    search() returns users whose names start with name_filter, case insensitive,
+    ordered by name.
+    """
+    res = user_name_index.search(name_filter="BO")
+    assert {user.name for user in res} == {"bob", "Bob", "Bobby"}
+    assert res[-1].name == "Bobby"
+
+    assert user_name_index.search(name_filter="bobb") == [users[2]]
+    assert user_name_index.search(name_filter="d") == []
+    assert len(user_name_index.search(name_filter="")) == len(users)
+
+
+def test_search__limit_and_start_id(user_name_index: UserNameIndex):
+    """
+    search() returns not more than `limit` users. Passing the id of the last user
+    as start_id returns the next page.
+    """
+    expected = user_name_index.search(name_filter="b")
+    pages: list[UserSchema] = []
+    start_id = None
+    while True:
+        page = user_name_index.search(name_filter="b", limit=2, start_id=start_id)
+        if not page:
+            break
+        assert len(page) <= 2
+        pages.extend(page)
+        start_id = page[-1].id
+    assert pages == expected
+
+
+def test_search__unknown_start_id(user_name_index: UserNameIndex):
+    """
+    search() returns empty list if user with id=start_id is not in the index.
+    """
+    assert user_name_index.search(name_filter="b", start_id=uuid.uuid4()) == []
+
+
+def test_add__new_user(user_name_index: UserNameIndex):
+    """
+    add() makes new user available for search.
+    """
+    user = UserSchema(id=uuid.uuid4(), name="Boris")
+    user_name_index.add(user)
+    res = user_name_index.search(name_filter="bor")
+    assert res == [user]
+
+
+def test_add__rename_user(user_name_index: UserNameIndex, users: list[UserSchema]):
+    """
+    add() of already indexed user with different name replaces the old name.
+    """
+    renamed_user = UserSchema(id=users[0].id, name="Zoe")
+    user_name_index.add(renamed_user)
+    assert user_name_index.search(name_filter="anna") == []
+    assert user_name_index.search(name_filter="zoe") == [renamed_user]
+    assert len(user_name_index.search(name_filter="")) == len(users)
@@ -12,6 +12,7 @@ import {
   FirstCircleListUpdateEvent,
   JoinedChatListPacket,
   ServerPacket,
+  UnreadCountUpdateEvent,
   UserAutocompleteResponsePacket,
 } from "./ChatProtocolTypes";
 
@@ -24,6 +25,7 @@ class ChatMessages {
 }
 
 const chatMessageRequestLimit = 5;
+const pingIntervalMs = 30000;
 
 class ChatClient {
   #connection: Websocket | null = null;
@@ -36,6 +38,7 @@ class ChatClient {
   #userNamesCache: Map<string, string>;
   #lastUserAutocompleteInput: number = 0;
   #updateRequiredIDs: number[] = [];
+  #pingTimer: ReturnType<typeof setInterval> | null = null;
 
   #setClientID: SetState<string>;
   #setChatList: SetState<ChatDataExtended[]>;
@@ -85,6 +88,7 @@ class ChatClient {
   }
 
   disconnect(): void {
+    this.#stopPing();
     if (this.#connection) {
       this.#connection.close();
       this.#connection = null;
@@ -96,9 +100,10 @@ class ChatClient {
       this.#selectedChat = chat;
       this.#setSelectedChat(chat);
       if (this.#chatMessages.has(chat.id)) {
-        this.#setSelectedChatMessages([
-          ...this.#chatMessages.get(chat.id)!.messages,
-        ]);
+        const chatMessages = this.#chatMessages.get(chat.id)!;
+        this.#setSelectedChatMessages([...chatMessages.messages]);
+        if (chat.unread_count > 0)
+          this.#markRead(chat.id, chatMessages.maxMessageID);
       } else {
         this.#setSelectedChatMessages([]);
         this.#requestChatMessageList(chat.id);
@@ -221,8 +226,45 @@ class ChatClient {
     }
   }
 
+  #markRead(chatID: string, messageID: number) {
+    if (this.#connection) {
+      const cmd = {
+        id: (this.#lastPacketID += 1),
+        data: {
+          packet_type: "CMDMarkRead",
+          chat_id: chatID,
+          message_id: messageID,
+        },
+      };
+      this.#connection.send(JSON.stringify(cmd));
+    } else {
+      console.log("Attempt to call markRead while disconnected");
+    }
+  }
+
+  #ping() {
+    if (this.#connection) {
+      const cmd = {
+        id: (this.#lastPacketID += 1),
+        data: {
+          packet_type: "CMDPing",
+        },
+      };
+      this.#connection.send(JSON.stringify(cmd));
+    }
+  }
+
+  #stopPing() {
+    if (this.#pingTimer) {
+      clearInterval(this.#pingTimer);
+      this.#pingTimer = null;
+    }
+  }
+
   #connectedHandler(ws: Websocket, event: Event): void {
     console.log("Connected to WebSocket server");
+    this.#stopPing();
+    this.#pingTimer = setInterval(this.#ping.bind(this), pingIntervalMs);
     this.#chatMessages.clear();
     this.#requestJoinedChatList();
     this.#requestFirstCircleList();
@@ -231,6 +273,7 @@ class ChatClient {
 
   #disconnectedHandler(ws: Websocket, event: Event): void {
     console.log("Disconnected from WebSocket server");
+    this.#stopPing();
   }
 
   #connectionErrorHandler(ws: Websocket, event: Event): void {
@@ -255,6 +298,14 @@ class ChatClient {
             chatID,
             messages.slice().reverse()
           );
+          const chat = this.#chatList.find((chat) => chat.id === chatID);
+          if (
+            chat &&
+            chat.unread_count > 0 &&
+            this.#selectedChat &&
+            chatID === this.#selectedChat.id
+          )
+            this.#markRead(chatID, this.#chatMessages.get(chatID)!.maxMessageID);
         }
         break;
       case "RespGetUserAutocomplete":
@@ -309,8 +360,25 @@ class ChatClient {
       }
       case "ChatMessageEvent": {
         const chatMessageEvent = chatEvent as ChatMessageEvent;
-        const chatID = chatMessageEvent.message.chat_id;
-        this.#updateChatMessageListInternal(chatID, [chatMessageEvent.message]);
+        const message = chatMessageEvent.message;
+        const chatID = message.chat_id;
+        this.#updateChatMessageListInternal(chatID, [message]);
+        // Server doesn't send unread counter updates on new messages, so the counter
+        // is incremented here. Messages of the opened chat are marked as read.
+        if (message.sender_id && message.sender_id !== this.#user_id) {
+          if (this.#selectedChat && chatID === this.#selectedChat.id)
+            this.#markRead(chatID, parseInt(message.id));
+          else
+            this.#updateChatUnreadCount(chatID, (count) => count + 1);
+        }
+        break;
+      }
+      case "UnreadCountUpdate": {
+        const unreadCountUpdateEvent = chatEvent as UnreadCountUpdateEvent;
+        this.#updateChatUnreadCount(
+          unreadCountUpdateEvent.chat_id,
+          () => unreadCountUpdateEvent.unread_count
+        );
         break;
       }
       case "ChatMessageEdited": {
@@ -471,6 +539,15 @@ class ChatClient {
     this.#setChatList([...this.#chatList]);
   }
 
+  #updateChatUnreadCount(chatID: string, update: (count: number) => number) {
+    this.#chatList = this.#chatList.map((chat) => {
+      return chat.id == chatID
+        ? { ...chat, unread_count: update(chat.unread_count) }
+        : chat;
+    });
+    this.#setChatList([...this.#chatList]);
+  }
+
   #updateMessageSenderName(message: ChatMessage) {
     if (message.sender_id && !message.senderName)
       message.senderName = this.#userNamesCache.get(message.sender_id);
@@ -484,6 +561,9 @@ class ChatClient {
       case "USER_JOINED_CHAT_MSG":
         const userName = paramsParsed!.user_name;
         return `${userName} joined chat`;
+      case "USERS_JOINED_CHAT_MSG":
+        const userNames = paramsParsed!.user_names;
+        return `${userNames} joined chat`;
       default:
         return `Unknown event (${messageText})`;
     }
@@ -7,10 +7,12 @@ interface ChatData {
 interface ChatDataExtended extends ChatData {
   last_message_text: string | null;
   members_count: number;
+  unread_count: number;
 }
 
 interface ChatNotificationParams {
   user_name?: string
+  user_names?: string
 }
 
 interface ChatMessage {
@@ -59,6 +59,11 @@ interface FirstCircleListUpdateEvent extends ChatEventBase {
   is_full: boolean;
 }
 
+interface UnreadCountUpdateEvent extends ChatEventBase {
+  chat_id: string;
+  unread_count: number;
+}
+
 
 export {
     ServerPacket,
@@ -71,4 +76,5 @@ export {
     ChatMessageEditedEvent,
     ChatListUpdateEvent,
     FirstCircleListUpdateEvent,
+    UnreadCountUpdateEvent,
 };
@@ -11,8 +11,13 @@ import {
   VStack,
   LinkBox,
   Button,
+  Badge,
+  Spacer,
 } from "@chakra-ui/react";
 
+// Server stops counting unread messages at this value (UNREAD_COUNT_LIMIT)
+const UNREAD_COUNT_LIMIT = 100;
+
 interface ChatListLineComponentParams {
   chat: ChatDataExtended;
   selected: boolean;
@@ -40,6 +45,14 @@ function ChatListLineComponent({
                 {chat.last_message_text}
               </Text>
             </Box>
+            <Spacer />
+            {chat.unread_count > 0 && (
+              <Badge colorScheme="blue" borderRadius="full" alignSelf="center">
+                {chat.unread_count >= UNREAD_COUNT_LIMIT
+                  ? `${UNREAD_COUNT_LIMIT}+`
+                  : chat.unread_count}
+              </Badge>
+            )}
           </Flex>
         </CardHeader>
       </Card>